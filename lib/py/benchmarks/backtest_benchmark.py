@@ -0,0 +1,248 @@
+"""
+End to end backtesting benchmark.
+Generates synthetic data bundles, runs full backtests
+through the PortfolioManager and reports the results as json.
+
+Every scenario runs in a fresh process so that peak memory
+of one scenario does not leak into the next one.
+
+To run:
+  > python3 -m lib.py.benchmarks.backtest_benchmark \
+        --pairs 1 4 --days 2 --objects-per-pair 1 8 --output results.json
+"""
+import argparse
+import contextlib
+import datetime
+import itertools
+import sys
+import tempfile
+import time
+from typing import Any
+
+from lib.py.benchmarks.benchmark_history import (
+    add_record_arguments,
+    record_from_arguments
+)
+from lib.py.benchmarks.benchmark_utils import (
+    peak_memory_mb,
+    run_isolated,
+    summarize_latencies,
+    write_report
+)
+from lib.py.benchmarks.synthetic_data import (
+    DEFAULT_START,
+    synthetic_pair_names,
+    write_data_bundle
+)
+
+# Days of data generated before the start date so strategies
+# can calculate their bands on the first tick
+WARMUP_DAYS = 30
+
+
+def build_strategy_dictionary(
+        strategy_class: Any,
+        pairs: list,
+        objects_per_pair: int
+) -> dict:
+    """
+    Creates a strategy dictionary with objects_per_pair
+    identical entries of the strategy class. Every entry creates
+    one object per pair on each creation interval.
+    :param strategy_class: class of the strategy object
+    :param pairs: list -> pairs to trade
+    :param objects_per_pair: int -> entries in the dictionary
+    :return: dict -> strategy dictionary for the portfolio
+    """
+    strategy_dictionary = {}
+    for index in range(objects_per_pair):
+        strategy_dictionary[f'{strategy_class.__name__}_{index}'] = {
+            'object': strategy_class,
+            'last_object_created_time': None,
+            'active': True,
+            'creation_interval': datetime.timedelta(days=1),
+            'pairs': list(pairs),
+            'advanced_settings': False
+        }
+    return strategy_dictionary
+
+
+def measure_fetch_custom_ohlcv(
+        data_manager: Any,
+        pairs: list,
+        calls: int
+) -> list:
+    """
+    Times fetch_custom_ohlcv with the same settings
+    the MeanReversion strategy uses
+    :param data_manager: data manager at the end of the backtest
+    :param pairs: list -> pairs to fetch
+    :param calls: int -> calls per pair
+    :return: list -> duration of every call in seconds
+    """
+    from lib.py.fpg.utils import get_timestamp
+
+    current_time = data_manager.fetch_current_time()
+    since = get_timestamp(current_time - datetime.timedelta(days=20))
+    ohlcv_times = []
+    for pair in pairs:
+        for _ in range(calls):
+            call_start = time.perf_counter()
+            data_manager.fetch_custom_ohlcv(
+                exchange_id='kraken',
+                pair=pair,
+                exchange_open_time='13:00:00',
+                since=since,
+                days_back=20
+            )
+            ohlcv_times.append(time.perf_counter() - call_start)
+    return ohlcv_times
+
+
+def run_backtest_scenario(
+        scenario: dict
+) -> dict:
+    """
+    Runs one backtest with synthetic data.
+    :param scenario: dict -> 'pairs', 'days', 'objects_per_pair',
+                             'seed', 'ohlcv_calls' and optionally
+                             'batch_refresh' and 'price_triggers'
+    :return: dict -> scenario parameters and measured results
+    """
+    from lib.py.fpg.constants import Constants
+    from lib.py.strategies.mean_reversion.mean_reversion import (
+        MeanReversion
+    )
+    from user_managment.portfolio import PortfolioManager
+
+    pairs = synthetic_pair_names(scenario['pairs'])
+    start_date = DEFAULT_START + datetime.timedelta(days=WARMUP_DAYS)
+    end_date = start_date + datetime.timedelta(days=scenario['days'])
+    with tempfile.TemporaryDirectory() as directory:
+        generation_start = time.perf_counter()
+        write_data_bundle(
+            pairs,
+            DEFAULT_START,
+            WARMUP_DAYS + scenario['days'],
+            scenario['seed'],
+            directory
+        )
+        generation_time = time.perf_counter() - generation_start
+        Constants.data_bundle_link = directory
+        Constants.database_link = f'{directory}/benchmark.db'
+
+        portfolio = PortfolioManager()
+        portfolio.strategy_dictionary = build_strategy_dictionary(
+            MeanReversion, pairs, scenario['objects_per_pair'])
+        portfolio.pairs = set()
+        portfolio.coins = set()
+        portfolio.add_pairs_to_coins_portfolio()
+        portfolio.portfolio_money['USD'] = 1000000.0
+        portfolio.batch_refresh = scenario.get('batch_refresh', False)
+        portfolio.price_triggers = scenario.get('price_triggers', True)
+
+        # The data manager and portfolio print progress,
+        # keep stdout clean for the json results
+        with contextlib.redirect_stdout(sys.stderr):
+            load_start = time.perf_counter()
+            portfolio.setup_backtesting(
+                _utc(start_date), _utc(end_date), 'benchmark')
+            load_time = time.perf_counter() - load_start
+
+            initialize_start = time.perf_counter()
+            portfolio.initialize_trading()
+            initialize_time = time.perf_counter() - initialize_start
+
+            tick_times = []
+            active_objects = []
+            data_manager = portfolio.data_manager
+            while not data_manager.check_end_of_file():
+                tick_start = time.perf_counter()
+                portfolio.tick()
+                tick_times.append(time.perf_counter() - tick_start)
+                active_objects.append(len(portfolio.active_strategy_objects))
+            data_manager.current_index -= 1
+
+            ohlcv_times = measure_fetch_custom_ohlcv(
+                data_manager, pairs, scenario['ohlcv_calls'])
+
+            Constants.backtesting_results = directory
+            export_start = time.perf_counter()
+            portfolio.export_strategies()
+            portfolio.export_trades()
+            export_time = time.perf_counter() - export_start
+
+    total_tick_time = sum(tick_times)
+    ticks = len(tick_times)
+    return {
+        'parameters': scenario,
+        'results': {
+            'generation_seconds': generation_time,
+            'load_seconds': load_time,
+            'initialize_seconds': initialize_time,
+            'ticks': ticks,
+            'tick_seconds': total_tick_time,
+            'ticks_per_second':
+                ticks / total_tick_time if total_tick_time else 0.0,
+            'time_per_tick_ms': summarize_latencies(tick_times),
+            'active_objects': {
+                'mean': sum(active_objects) / ticks if ticks else 0.0,
+                'max': max(active_objects) if ticks else 0
+            },
+            'fetch_custom_ohlcv_ms': summarize_latencies(ohlcv_times),
+            'export_seconds': export_time,
+            'peak_memory_mb': peak_memory_mb()
+        }
+    }
+
+
+def _utc(
+        date: Any
+) -> Any:
+    return date.replace(tzinfo=datetime.timezone.utc)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Run backtesting benchmarks on synthetic data')
+    parser.add_argument('--pairs', type=int, nargs='+', default=[2])
+    parser.add_argument('--days', type=int, nargs='+', default=[2])
+    parser.add_argument('--objects-per-pair', type=int, nargs='+',
+                        default=[1])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--ohlcv-calls', type=int, default=20,
+                        help='timed fetch_custom_ohlcv calls per pair')
+    parser.add_argument('--batch-refresh', action='store_true',
+                        help='refresh the strategy objects in batches')
+    parser.add_argument('--no-price-triggers', action='store_true',
+                        help='refresh every object on every tick')
+    parser.add_argument('--repeat', type=int, default=1,
+                        help='runs of every scenario')
+    parser.add_argument('--output', default=None,
+                        help='file to write the json results to')
+    add_record_arguments(parser)
+    args = parser.parse_args()
+
+    results = []
+    for pairs, days, objects_per_pair in itertools.product(
+            args.pairs, args.days, args.objects_per_pair):
+        scenario = {
+            'pairs': pairs,
+            'days': days,
+            'objects_per_pair': objects_per_pair,
+            'seed': args.seed,
+            'ohlcv_calls': args.ohlcv_calls
+        }
+        if args.batch_refresh:
+            scenario['batch_refresh'] = True
+        if args.no_price_triggers:
+            scenario['price_triggers'] = False
+        for _ in range(args.repeat):
+            print(f'Running scenario {scenario}', file=sys.stderr)
+            results.append(run_isolated(run_backtest_scenario, scenario))
+    report = write_report('backtest', results, args.output)
+    record_from_arguments(report, args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,457 @@
+"""
+Benchmark history store and regression check.
+Results are appended to a json lines file, one line per
+scenario run, keyed by commit and machine. The compare command
+checks a candidate commit against a baseline commit and exits
+with status 1 when a tracked metric regressed and with status 3
+when there is nothing to compare. Results recorded from a tree with
+uncommitted changes are never used as the baseline.
+
+To run:
+  > python3 -m lib.py.benchmarks.benchmark_history record results.json
+  > python3 -m lib.py.benchmarks.benchmark_history list
+  > python3 -m lib.py.benchmarks.benchmark_history compare --baseline <commit>
+"""
+import argparse
+import datetime
+import json
+import numpy
+import os
+import platform
+import subprocess
+import sys
+from typing import Any
+
+from lib.py.fpg.constants import (
+    Constants
+)
+
+# Exit status of compare
+REGRESSION_STATUS = 1
+NO_RESULTS_STATUS = 3
+
+# benchmark -> metric -> (better direction, allowed relative change)
+TRACKED_METRICS = {
+    'backtest': {
+        'ticks_per_second': ('higher', 0.05),
+        'fetch_custom_ohlcv_ms.mean': ('lower', 0.10),
+        'export_seconds': ('lower', 0.10),
+        'peak_memory_mb': ('lower', 0.05)
+    },
+    'live': {
+        'tick_latency_ms.p95': ('lower', 0.10),
+        'order_latency_ms.p95': ('lower', 0.10)
+    },
+    'strategy_objects': {
+        'bytes_per_object': ('lower', 0.05),
+        'creation_per_second': ('higher', 0.10),
+        'restore_per_second': ('higher', 0.10)
+    }
+}
+
+
+def current_commit() -> tuple:
+    """
+    :return: tuple -> (commit sha, True if the tree has
+                      uncommitted changes)
+    """
+    try:
+        commit = subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'],
+            stderr=subprocess.DEVNULL).decode().strip()
+        status = subprocess.check_output(
+            ['git', 'status', '--porcelain', '--untracked-files=no'],
+            stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown', False
+    return commit, bool(status)
+
+
+def machine_name() -> str:
+    return f'{platform.node()}-{platform.machine()}'
+
+
+def flatten_metrics(
+        results: dict,
+        prefix: str = ''
+) -> dict:
+    """
+    :param results: dict -> nested results of a scenario
+    :param prefix: str -> prefix for the keys
+    :return: dict -> 'a.b': value for every numeric value
+    """
+    metrics = {}
+    for name, value in results.items():
+        key = f'{prefix}{name}'
+        if isinstance(value, dict):
+            metrics.update(flatten_metrics(value, f'{key}.'))
+        elif isinstance(value, (int, float)) and \
+                not isinstance(value, bool):
+            metrics[key] = value
+    return metrics
+
+
+def scenario_key(
+        parameters: dict
+) -> str:
+    return json.dumps(parameters, sort_keys=True)
+
+
+def append_report(
+        report: dict,
+        history: str = Constants.benchmark_history,
+        commit: str = None,
+        machine: str = None
+) -> int:
+    """
+    Appends every scenario of a benchmark report to the history
+    :param report: dict -> report created by write_report
+    :param history: str -> path of the history file
+    :param commit: str -> commit to record, defaults to HEAD
+    :param machine: str -> machine name, defaults to this host
+    :return: int -> number of records written
+    """
+    dirty = False
+    if commit is None:
+        commit, dirty = current_commit()
+    if machine is None:
+        machine = machine_name()
+    directory = os.path.dirname(history)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(history, 'a') as history_file:
+        for scenario in report['scenarios']:
+            record = {
+                'commit': commit,
+                'dirty': dirty,
+                'machine': machine,
+                'created': report['created'],
+                'benchmark': report['benchmark'],
+                'environment': report['environment'],
+                'parameters': scenario['parameters'],
+                'metrics': flatten_metrics(scenario['results'])
+            }
+            history_file.write(json.dumps(record) + '\n')
+    return len(report['scenarios'])
+
+
+def load_history(
+        history: str = Constants.benchmark_history
+) -> list:
+    """
+    :param history: str -> path of the history file
+    :return: list -> records in the order they were written
+    """
+    if not os.path.exists(history):
+        return []
+    with open(history) as history_file:
+        return [json.loads(line) for line in history_file if line.strip()]
+
+
+def resolve_commit(
+        records: list,
+        reference: str
+) -> str:
+    """
+    Finds the recorded commit matching the reference.
+    The reference is a prefix of a recorded sha or anything
+    git rev-parse understands (HEAD~1, a tag, a branch).
+    :param records: list -> history records
+    :param reference: str -> commit reference
+    :return: str -> full commit sha
+    """
+    commits = []
+    for record in records:
+        if record['commit'].startswith(reference) and \
+                record['commit'] not in commits:
+            commits.append(record['commit'])
+    if len(commits) == 1:
+        return commits[0]
+    if len(commits) > 1:
+        raise ValueError(f'Ambiguous commit reference {reference}')
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', reference],
+            stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        raise ValueError(f'Unknown commit reference {reference}')
+
+
+def collect_samples(
+        records: list,
+        commit: str,
+        machine: str,
+        include_dirty: bool = True
+) -> dict:
+    """
+    :param include_dirty: bool -> False to leave out the results
+                                  recorded with uncommitted changes
+    :return: dict -> (benchmark, scenario key) -> metric -> list of values
+    """
+    samples = {}
+    for record in records:
+        if record['commit'] != commit or record['machine'] != machine:
+            continue
+        if record.get('dirty') and not include_dirty:
+            continue
+        scenario = samples.setdefault(
+            (record['benchmark'], scenario_key(record['parameters'])), {})
+        for metric, value in record['metrics'].items():
+            scenario.setdefault(metric, []).append(value)
+    return samples
+
+
+def bootstrap_change_interval(
+        baseline: list,
+        candidate: list,
+        confidence: float = 0.95,
+        resamples: int = 2000,
+        seed: int = 0
+) -> tuple:
+    """
+    Bootstrap confidence interval of the relative change
+    of the candidate mean against the baseline mean
+    :param baseline: list -> baseline samples
+    :param candidate: list -> candidate samples
+    :param confidence: float -> confidence level of the interval
+    :param resamples: int -> bootstrap resamples
+    :param seed: int -> seed of the resampling
+    :return: tuple -> (low, high) relative change
+    """
+    generator = numpy.random.default_rng(seed)
+    baseline = numpy.asarray(baseline, dtype=float)
+    candidate = numpy.asarray(candidate, dtype=float)
+    baseline_means = generator.choice(
+        baseline, (resamples, baseline.size)).mean(axis=1)
+    candidate_means = generator.choice(
+        candidate, (resamples, candidate.size)).mean(axis=1)
+    changes = candidate_means / baseline_means - 1
+    tail = (1 - confidence) / 2 * 100
+    return (float(numpy.percentile(changes, tail)),
+            float(numpy.percentile(changes, 100 - tail)))
+
+
+def compare_samples(
+        baseline: list,
+        candidate: list,
+        direction: str,
+        threshold: float,
+        confidence: float = 0.95
+) -> dict:
+    """
+    Compares the samples of one metric.
+    A metric regressed when the mean moved in the worse direction
+    by more than the threshold, and - when both sides have at least
+    two samples - the confidence interval of the change does not
+    include zero.
+    :param baseline: list -> baseline samples
+    :param candidate: list -> candidate samples
+    :param direction: str -> 'higher' or 'lower' is better
+    :param threshold: float -> allowed relative change, 0.05 is 5%
+    :param confidence: float -> confidence level for significance
+    :return: dict -> comparison details
+    """
+    baseline_mean = sum(baseline) / len(baseline)
+    candidate_mean = sum(candidate) / len(candidate)
+    change = candidate_mean / baseline_mean - 1 if baseline_mean else 0.0
+    # Positive worsening means the metric got worse
+    sign = -1 if direction == 'higher' else 1
+    worsening = sign * change
+    significant = None
+    interval = None
+    if len(baseline) > 1 and len(candidate) > 1:
+        interval = bootstrap_change_interval(baseline, candidate, confidence)
+        worst_bound = min(sign * interval[0], sign * interval[1])
+        significant = worst_bound > 0
+    return {
+        'baseline': baseline_mean,
+        'candidate': candidate_mean,
+        'change': change,
+        'interval': interval,
+        'samples': [len(baseline), len(candidate)],
+        'significant': significant,
+        'regression': worsening > threshold and significant is not False
+    }
+
+
+def compare_commits(
+        records: list,
+        baseline: str,
+        candidate: str,
+        machine: str,
+        thresholds: dict = None,
+        confidence: float = 0.95
+) -> list:
+    """
+    Compares every tracked metric of every scenario
+    recorded for both commits on the same machine. The baseline
+    results recorded with uncommitted changes are left out.
+    :param records: list -> history records
+    :param baseline: str -> baseline commit sha
+    :param candidate: str -> candidate commit sha
+    :param machine: str -> machine to compare on
+    :param thresholds: dict -> metric: threshold overrides
+    :param confidence: float -> confidence level for significance
+    :return: list of dict -> one comparison per metric and scenario
+    """
+    thresholds = thresholds or {}
+    baseline_samples = collect_samples(
+        records, baseline, machine, include_dirty=False)
+    candidate_samples = collect_samples(records, candidate, machine)
+    comparisons = []
+    for key, candidate_metrics in candidate_samples.items():
+        if key not in baseline_samples:
+            continue
+        benchmark, parameters = key
+        for metric, (direction, threshold) in \
+                TRACKED_METRICS.get(benchmark, {}).items():
+            if metric not in candidate_metrics or \
+                    metric not in baseline_samples[key]:
+                continue
+            comparison = compare_samples(
+                baseline_samples[key][metric],
+                candidate_metrics[metric],
+                direction,
+                thresholds.get(metric, threshold),
+                confidence
+            )
+            comparison.update({
+                'benchmark': benchmark,
+                'parameters': json.loads(parameters),
+                'metric': metric
+            })
+            comparisons.append(comparison)
+    return comparisons
+
+
+def add_record_arguments(
+        parser: Any
+) -> None:
+    """
+    Adds the history options to a benchmark argument parser
+    :param parser: argparse.ArgumentParser
+    :return: None
+    """
+    parser.add_argument('--record', action='store_true',
+                        help='append the results to the benchmark history')
+    parser.add_argument('--history', default=Constants.benchmark_history)
+    parser.add_argument('--machine', default=None)
+
+
+def record_from_arguments(
+        report: dict,
+        args: Any
+) -> None:
+    if args.record:
+        written = append_report(report, args.history, machine=args.machine)
+        print(f'Recorded {written} results in {args.history}',
+              file=sys.stderr)
+
+
+def print_comparisons(
+        comparisons: list
+) -> None:
+    for comparison in comparisons:
+        if comparison['regression']:
+            status = 'REGRESSION'
+        elif comparison['significant'] is None:
+            status = 'ok (not enough samples for significance)'
+        else:
+            status = 'ok'
+        print(f"{comparison['benchmark']} {comparison['parameters']} "
+              f"{comparison['metric']}: "
+              f"{comparison['baseline']:.4f} -> "
+              f"{comparison['candidate']:.4f} "
+              f"({100 * comparison['change']:+.2f}%) {status}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark history and regression checks')
+    parser.add_argument('--history', default=Constants.benchmark_history)
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+
+    record_parser = commands.add_parser(
+        'record', help='append a benchmark report to the history')
+    record_parser.add_argument('report')
+    record_parser.add_argument('--commit', default=None)
+    record_parser.add_argument('--machine', default=None)
+
+    commands.add_parser('list', help='list recorded commits')
+
+    compare_parser = commands.add_parser(
+        'compare', help='compare a candidate commit against a baseline')
+    compare_parser.add_argument('--baseline', required=True)
+    compare_parser.add_argument(
+        '--candidate', default=None,
+        help='defaults to the last commit recorded on the machine')
+    compare_parser.add_argument('--machine', default=None)
+    compare_parser.add_argument('--confidence', type=float, default=0.95)
+    compare_parser.add_argument(
+        '--threshold', action='append', default=[],
+        help='metric=relative change, for example ticks_per_second=0.1')
+    compare_parser.add_argument('--json', action='store_true',
+                                help='print the comparison as json')
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        with open(args.report) as report_file:
+            report = json.load(report_file)
+        written = append_report(
+            report, args.history, args.commit, args.machine)
+        print(f'Recorded {written} results in {args.history}')
+        return
+
+    records = load_history(args.history)
+    if args.command == 'list':
+        seen = set()
+        for record in records:
+            key = (record['commit'], record['machine'], record['benchmark'])
+            if key not in seen:
+                seen.add(key)
+                print(f"{record['commit'][:12]} {record['machine']} "
+                      f"{record['benchmark']} {record['created']}")
+        return
+
+    machine = args.machine or machine_name()
+    baseline = resolve_commit(records, args.baseline)
+    if args.candidate is None:
+        machine_records = [record for record in records
+                           if record['machine'] == machine]
+        if not machine_records:
+            print(f'No results recorded for machine {machine}',
+                  file=sys.stderr)
+            sys.exit(NO_RESULTS_STATUS)
+        candidate = machine_records[-1]['commit']
+    else:
+        candidate = resolve_commit(records, args.candidate)
+    thresholds = {}
+    for threshold in args.threshold:
+        metric, value = threshold.split('=')
+        thresholds[metric] = float(value)
+    comparisons = compare_commits(
+        records, baseline, candidate, machine, thresholds, args.confidence)
+    if not comparisons:
+        print(f'No common results for {baseline[:12]} and '
+              f'{candidate[:12]} on {machine}, the baseline results '
+              f'recorded with uncommitted changes are not used',
+              file=sys.stderr)
+        sys.exit(NO_RESULTS_STATUS)
+    if any(record.get('dirty') for record in records
+           if record['commit'] == candidate and
+           record['machine'] == machine):
+        print(f'Warning: results of {candidate[:12]} were recorded with '
+              f'uncommitted changes', file=sys.stderr)
+    if args.json:
+        print(json.dumps(comparisons, indent=2))
+    else:
+        print(f'Baseline {baseline[:12]} -> candidate {candidate[:12]} '
+              f'on {machine}')
+        print_comparisons(comparisons)
+    if any(comparison['regression'] for comparison in comparisons):
+        sys.exit(REGRESSION_STATUS)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""
+Shared helpers for the benchmarks
+"""
+import datetime
+import json
+import multiprocessing
+import platform
+import resource
+from typing import Any
+
+
+def percentile(
+        values: list,
+        percent: float
+) -> float:
+    """
+    :param values: sorted list of floats
+    :param percent: float -> 0 to 100
+    :return: float -> nearest rank percentile
+    """
+    if not values:
+        return 0.0
+    index = min(len(values) - 1,
+                int(round(percent / 100.0 * (len(values) - 1))))
+    return values[index]
+
+
+def summarize_latencies(
+        seconds: list
+) -> dict:
+    """
+    :param seconds: list of measured durations in seconds
+    :return: dict -> count and mean/p50/p95/p99/max in milliseconds
+    """
+    sorted_seconds = sorted(seconds)
+    count = len(sorted_seconds)
+    return {
+        'count': count,
+        'mean': 1000 * sum(sorted_seconds) / count if count else 0.0,
+        'p50': 1000 * percentile(sorted_seconds, 50),
+        'p95': 1000 * percentile(sorted_seconds, 95),
+        'p99': 1000 * percentile(sorted_seconds, 99),
+        'max': 1000 * sorted_seconds[-1] if count else 0.0
+    }
+
+
+def peak_memory_mb() -> float:
+    """
+    :return: float -> peak resident memory of the current process
+    """
+    # ru_maxrss is in kilobytes on linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def environment_details() -> dict:
+    """
+    :return: dict -> details of the machine running the benchmark
+    """
+    import numpy
+    import pandas
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'numpy': numpy.__version__,
+        'pandas': pandas.__version__
+    }
+
+
+def run_isolated(
+        function: Any,
+        argument: Any
+) -> Any:
+    """
+    Runs the function in a fresh interpreter and returns its result
+    :param function: module level function to run
+    :param argument: single argument passed to the function
+    :return: return value of the function
+    """
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(1, maxtasksperchild=1) as pool:
+        return pool.apply(function, (argument,))
+
+
+def write_report(
+        benchmark: str,
+        scenarios: list,
+        output: str = None
+) -> dict:
+    """
+    Prints the json report and writes it to the output file
+    :param benchmark: str -> name of the benchmark
+    :param scenarios: list -> results of every scenario
+    :param output: str -> file path, None to only print
+    :return: dict -> the report
+    """
+    report = {
+        'benchmark': benchmark,
+        'created': datetime.datetime.utcnow().isoformat(),
+        'environment': environment_details(),
+        'scenarios': scenarios
+    }
+    encoded = json.dumps(report, indent=2)
+    if output:
+        with open(output, 'w') as output_file:
+            output_file.write(encoded)
+    print(encoded)
+    return report
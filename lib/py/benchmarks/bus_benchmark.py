@@ -0,0 +1,251 @@
+"""
+Market data bus fan-out benchmark.
+Publishes price ticks or order book snapshots on the zmq market
+data bus to subscriber processes on the same host and reports the
+latency from publishing to the subscriber's callback, plus the
+encode/decode time of every message kind.
+
+The subscribers are spawned from the main process (pool workers
+can't start processes), so the scenarios aren't isolated from each
+other the way the other benchmarks' are.
+
+To run:
+  > python3 -m lib.py.benchmarks.bus_benchmark --subscribers 1 4 16
+"""
+import argparse
+import itertools
+import multiprocessing
+import sys
+import threading
+import time
+from typing import Any
+
+import numpy
+import pandas as pd
+
+from lib.py.benchmarks.benchmark_history import (
+    add_record_arguments,
+    record_from_arguments
+)
+from lib.py.benchmarks.benchmark_utils import (
+    peak_memory_mb,
+    summarize_latencies,
+    write_report
+)
+from lib.py.benchmarks.synthetic_data import (
+    synthetic_pair_names
+)
+from lib.py.fpg.market_data_bus import (
+    MarketDataPublisher,
+    MarketDataSubscriber,
+    decode,
+    encode_orderbook,
+    encode_price,
+    encode_session_bars
+)
+
+WARM_UP_PAIR = 'warm/up'
+STOP_PAIR = 'stop/stop'
+
+
+def synthetic_orderbook(
+        levels: int
+) -> dict:
+    return {
+        'bids': [[100.0 - index, 1.0 + index] for index in range(levels)],
+        'asks': [[101.0 + index, 1.0 + index] for index in range(levels)]
+    }
+
+
+def run_subscriber(
+        address: str,
+        ready: Any,
+        results: Any
+) -> None:
+    """
+    Subscriber process, sends its latencies (seconds) to the results
+    queue once the stop message arrives
+    """
+    latencies = []
+    stopped = threading.Event()
+    signalled = []
+
+    def receive(kind, pair, value):
+        if pair == WARM_UP_PAIR:
+            if not signalled:
+                signalled.append(True)
+                ready.put(True)
+        elif pair == STOP_PAIR:
+            stopped.set()
+        else:
+            latencies.append(time.time() - value[0])
+
+    subscriber = MarketDataSubscriber(address, receive)
+    subscriber.start()
+    stopped.wait()
+    subscriber.stop()
+    results.put(latencies)
+
+
+def time_codec(
+        frames: list,
+        encode: Any,
+        repeats: int
+) -> dict:
+    """
+    :return: dict -> payload bytes and encode/decode microseconds
+    """
+    start = time.perf_counter()
+    for _ in range(repeats):
+        encode()
+    encode_time = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(repeats):
+        decode(frames)
+    decode_time = time.perf_counter() - start
+    return {
+        'bytes': len(frames[0]) + len(frames[1]),
+        'encode_us': 1e6 * encode_time / repeats,
+        'decode_us': 1e6 * decode_time / repeats
+    }
+
+
+def codec_results(
+        levels: int,
+        session_days: int,
+        repeats: int = 2000
+) -> dict:
+    orderbook = synthetic_orderbook(levels)
+    closes = 10000.0 + numpy.arange(session_days, dtype=float)
+    ohlcv = pd.DataFrame({
+        'exchange_shift_time': pd.date_range(
+            '2019-01-01', periods=session_days, freq='D'),
+        'h': closes, 'l': closes, 'o': closes, 'c': closes,
+        'v': numpy.ones(session_days)
+    })
+
+    def price():
+        return encode_price('BTC/USD', time.time(), 100.0)
+
+    def book():
+        return encode_orderbook('BTC/USD', time.time(), orderbook)
+
+    def session():
+        return encode_session_bars('binance', 'BTC/USD', '18:00:00', 0,
+                                   session_days, ohlcv)
+    return {
+        name: time_codec(encode(), encode, repeats)
+        for name, encode in (('price', price), ('book', book),
+                             ('session', session))
+    }
+
+
+def run_bus_scenario(
+        scenario: dict
+) -> dict:
+    context = multiprocessing.get_context('spawn')
+    publisher = MarketDataPublisher(scenario['address'])
+    ready = context.Queue()
+    results = context.Queue()
+    processes = [
+        context.Process(target=run_subscriber,
+                        args=(publisher.address, ready, results))
+        for _ in range(scenario['subscribers'])
+    ]
+    for process in processes:
+        process.start()
+    try:
+        # Subscribers miss what was published before they connected
+        joined = 0
+        while joined < len(processes):
+            publisher.publish_price(WARM_UP_PAIR, time.time(), 0.0)
+            while not ready.empty():
+                ready.get()
+                joined += 1
+            time.sleep(0.01)
+
+        pairs = synthetic_pair_names(scenario['pairs'])
+        orderbook = synthetic_orderbook(scenario['levels'])
+        interval = 1.0 / scenario['rate'] if scenario['rate'] else 0.0
+        start = time.perf_counter()
+        for index in range(scenario['messages']):
+            pair = pairs[index % len(pairs)]
+            if scenario['kind'] == 'book':
+                publisher.publish_orderbook(pair, time.time(), orderbook)
+            else:
+                publisher.publish_price(pair, time.time(), 100.0)
+            if interval:
+                delay = start + (index + 1) * interval - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+        publish_time = time.perf_counter() - start
+        publisher.publish_price(STOP_PAIR, time.time(), 0.0)
+
+        latencies = []
+        for _ in processes:
+            latencies.extend(results.get(timeout=60))
+    finally:
+        for process in processes:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+        publisher.close()
+
+    expected = scenario['messages'] * scenario['subscribers']
+    return {
+        'parameters': scenario,
+        'results': {
+            'publish_rate': scenario['messages'] / publish_time
+            if publish_time else 0.0,
+            'delivered': len(latencies),
+            'dropped': expected - len(latencies),
+            'fan_out_latency_ms': summarize_latencies(latencies),
+            'codec': codec_results(scenario['levels'],
+                                   scenario['session_days']),
+            'peak_memory_mb': peak_memory_mb()
+        }
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the fan-out of the market data bus')
+    parser.add_argument('--subscribers', type=int, nargs='+',
+                        default=[1, 4])
+    parser.add_argument('--kind', nargs='+', choices=('price', 'book'),
+                        default=['price'])
+    parser.add_argument('--messages', type=int, default=5000)
+    parser.add_argument('--rate', type=float, default=2000.0,
+                        help='messages published per second, 0 '
+                             'publishes back to back')
+    parser.add_argument('--pairs', type=int, default=10)
+    parser.add_argument('--levels', type=int, default=20,
+                        help='bid and ask levels of the order books')
+    parser.add_argument('--session-days', type=int, default=20)
+    parser.add_argument('--address', default='tcp://127.0.0.1:*',
+                        help="endpoint to bind, e.g. 'ipc:///tmp/md'")
+    parser.add_argument('--output', default=None,
+                        help='file to write the json results to')
+    add_record_arguments(parser)
+    args = parser.parse_args()
+
+    results = []
+    for subscribers, kind in itertools.product(args.subscribers, args.kind):
+        scenario = {
+            'subscribers': subscribers,
+            'kind': kind,
+            'messages': args.messages,
+            'rate': args.rate,
+            'pairs': args.pairs,
+            'levels': args.levels,
+            'session_days': args.session_days,
+            'address': args.address
+        }
+        print(f'Running scenario {scenario}', file=sys.stderr)
+        results.append(run_bus_scenario(scenario))
+    report = write_report('bus', results, args.output)
+    record_from_arguments(report, args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,291 @@
+"""
+Live path benchmark against the local mock FPG api.
+Runs PortfolioManagers in live mode (FPGTrader, FPGConnector
+and LiveDataManager) on a PortfolioHost against MockFPGServer and
+reports end to end tick and order latencies together with the
+requests the api received.
+
+The daily ohlcv strategies pull from ccxt is not part of FPG's api,
+so it is replaced by a seeded synthetic series to keep the run offline.
+
+To run:
+  > python3 -m lib.py.benchmarks.live_benchmark \
+        --pairs 1 8 --objects-per-pair 1 4 --portfolios 1 4 \
+        --ticks 300 --latency-ms 20 --jitter-ms 10 --price-process sine
+"""
+import argparse
+import contextlib
+import itertools
+import numpy
+import pandas as pd
+import sys
+import tempfile
+import time
+from typing import Any
+
+from lib.py.benchmarks.backtest_benchmark import (
+    build_strategy_dictionary
+)
+from lib.py.benchmarks.benchmark_history import (
+    add_record_arguments,
+    record_from_arguments
+)
+from lib.py.benchmarks.benchmark_utils import (
+    peak_memory_mb,
+    run_isolated,
+    summarize_latencies,
+    write_report
+)
+from lib.py.benchmarks.mock_fpg_api import (
+    MockFPGServer,
+    add_server_arguments,
+    server_settings_from_arguments
+)
+from lib.py.benchmarks.synthetic_data import (
+    synthetic_pair_names
+)
+from lib.py.fpg.data_manager.market_data import (
+    MarketData
+)
+
+
+class OfflineMarketData(MarketData):
+    """
+    Market data that answers the ohlcv downloads
+    with synthetic daily candles instead of calling ccxt
+    """
+    start_price = 10000.0
+    daily_volatility = 0.01
+
+    def download_ohlcv(
+            self: Any,
+            exchange_id: str,
+            pair: str,
+            exchange_open_time: str,
+            since: Any,
+            days_back: int
+    ) -> Any:
+        generator = numpy.random.default_rng(since)
+        close = self.start_price * (
+            1 + generator.normal(0.0, self.daily_volatility, days_back))
+        days = pd.date_range(
+            pd.Timestamp(since, unit='ms'), periods=days_back, freq='D')
+        return pd.DataFrame({
+            'exchange_shift_time': days,
+            'h': close * (1 + self.daily_volatility),
+            'l': close * (1 - self.daily_volatility),
+            'o': close,
+            'c': close,
+            'v': numpy.ones(days_back)
+        })
+
+
+def run_live_scenario(
+        scenario: dict
+) -> dict:
+    """
+    Runs the portfolios in live mode against a mock api.
+    :param scenario: dict -> 'pairs', 'objects_per_pair',
+                             'portfolios', 'ticks',
+                             'tick_time', 'creation_workers',
+                             'balance_reconcile_seconds',
+                             'order_netting', 'fpg_rate_limit',
+                             'refresh_budget', 'price_triggers',
+                             'adaptive_polling', 'polling_budget' and
+                             'server' settings
+    :return: dict -> scenario parameters and measured results
+    """
+    from lib.py.fpg.circuit_breaker import get_circuit_breakers
+    from lib.py.fpg.constants import Constants
+    from lib.py.fpg.database import Database
+    from lib.py.fpg.fpg_library import FPGConnector
+    from lib.py.fpg.rate_limiter import get_rate_limiter, reset_rate_limiter
+    from lib.py.fpg.trader import FPGTrader
+    from lib.py.strategies.mean_reversion.mean_reversion import (
+        MeanReversion
+    )
+    from user_managment.portfolio import PortfolioManager
+    from user_managment.portfolio_host import PortfolioHost
+    from user_managment.risk_manager import RiskManager
+
+    pairs = synthetic_pair_names(scenario['pairs'])
+    starting_balance = {'USD': 1000000.0}
+    for pair in pairs:
+        starting_balance[pair.split('/')[0]] = 0.0
+    server = MockFPGServer(
+        starting_balance=starting_balance, **scenario['server'])
+    with server, tempfile.TemporaryDirectory() as directory, \
+            contextlib.redirect_stdout(sys.stderr):
+        Constants.endpoint_link = server.url
+        Constants.database_link = f'{directory}/live_benchmark.db'
+        if scenario['fpg_rate_limit'] is not None:
+            rate, burst = scenario['fpg_rate_limit']
+            Constants.rate_limits = dict(
+                Constants.rate_limits, fpg=(rate, burst))
+        reset_rate_limiter()
+        if scenario['polling_budget'] is not None:
+            Constants.polling_budget = scenario['polling_budget']
+        OfflineMarketData.start_price = scenario['server']['start_price']
+        host = PortfolioHost(OfflineMarketData(
+            FPGConnector('public', 'private'), Database()))
+        order_times = []
+
+        for index in range(scenario['portfolios']):
+            trader = FPGTrader('public', 'private')
+            trader.connect()
+            trade = trader.trade
+
+            def timed_trade(*args, trade=trade, **kwargs):
+                order_start = time.perf_counter()
+                try:
+                    return trade(*args, **kwargs)
+                finally:
+                    order_times.append(time.perf_counter() - order_start)
+            trader.trade = timed_trade
+
+            portfolio = PortfolioManager()
+            portfolio.strategy_dictionary = build_strategy_dictionary(
+                MeanReversion, pairs, scenario['objects_per_pair'])
+            portfolio.pairs = set()
+            portfolio.coins = set()
+            portfolio.add_pairs_to_coins_portfolio()
+            portfolio.refresh_budget = scenario['refresh_budget']
+            portfolio.balance_reconcile_seconds = \
+                scenario['balance_reconcile_seconds']
+            host.add_portfolio(f'portfolio_{index}', trader, portfolio)
+            portfolio.risk_manager = RiskManager(portfolio.data_manager)
+            portfolio.creation_workers = scenario['creation_workers']
+            portfolio.order_netting = scenario['order_netting']
+            portfolio.price_triggers = scenario['price_triggers']
+            portfolio.adaptive_polling = scenario['adaptive_polling']
+
+        initialize_start = time.perf_counter()
+        host.initialize_trading()
+        initialize_time = time.perf_counter() - initialize_start
+
+        tick_times = []
+        active_objects = []
+        failed_ticks = 0
+        for _ in range(scenario['ticks']):
+            tick_start = time.perf_counter()
+            failed_ticks += len(host.tick())
+            tick_times.append(time.perf_counter() - tick_start)
+            active_objects.append(sum(
+                len(portfolio.active_strategy_objects)
+                for portfolio in host.portfolios.values()))
+            if scenario['tick_time']:
+                time.sleep(scenario['tick_time'])
+        # The db writes still queued go to the temporary
+        # directory before it is removed
+        host.stop()
+        for portfolio in host.portfolios.values():
+            portfolio.event_bus.stop()
+        requests = dict(server.state.stats)
+        rate_limiter = get_rate_limiter().metrics()
+        circuit_breakers = get_circuit_breakers().metrics()
+        refresh_watchdog = {
+            name: portfolio.refresh_watchdog.report(top=5)
+            for name, portfolio in host.portfolios.items()
+        }
+        market_data = host.market_data.metrics()
+        event_bus = {
+            name: portfolio.event_bus.metrics()
+            for name, portfolio in host.portfolios.items()
+        }
+
+    return {
+        'parameters': scenario,
+        'results': {
+            # Adaptive polling skips the pairs that are not due,
+            # back to back ticks then mostly read cached prices
+            'polling_mode': 'adaptive' if scenario['adaptive_polling']
+            else 'every tick',
+            'initialize_seconds': initialize_time,
+            'ticks': len(tick_times),
+            'failed_ticks': failed_ticks,
+            'tick_latency_ms': summarize_latencies(tick_times),
+            'order_latency_ms': summarize_latencies(order_times),
+            'active_objects': {
+                'mean': sum(active_objects) / len(active_objects)
+                if active_objects else 0.0,
+                'max': max(active_objects) if active_objects else 0
+            },
+            'api_requests': requests,
+            'rate_limiter': rate_limiter,
+            'circuit_breakers': circuit_breakers,
+            'refresh_watchdog': refresh_watchdog,
+            'market_data': market_data,
+            'event_bus': event_bus,
+            'peak_memory_mb': peak_memory_mb()
+        }
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the live path against a mock FPG api')
+    parser.add_argument('--pairs', type=int, nargs='+', default=[2])
+    parser.add_argument('--objects-per-pair', type=int, nargs='+',
+                        default=[1])
+    parser.add_argument('--portfolios', type=int, nargs='+', default=[1],
+                        help='portfolios on one host, every one trading '
+                             'the same pairs')
+    parser.add_argument('--ticks', type=int, default=200)
+    parser.add_argument('--tick-time', type=float, default=0.0,
+                        help='sleep between ticks, 0 runs back to back')
+    parser.add_argument('--creation-workers', type=int, default=8,
+                        help='objects initialized concurrently')
+    parser.add_argument('--balance-reconcile-seconds', type=float,
+                        default=60.0,
+                        help='seconds the cached balance is used, '
+                             '0 reads it for every request')
+    parser.add_argument('--no-order-netting', action='store_true',
+                        help='send every order of a tick on its own')
+    parser.add_argument('--fpg-rate-limit', type=float, nargs=2,
+                        default=None, metavar=('RATE', 'BURST'),
+                        help='requests per second and burst allowed '
+                             'to the api, defaults to Constants')
+    parser.add_argument('--no-price-triggers', action='store_true',
+                        help='refresh every object on every tick')
+    parser.add_argument('--adaptive-polling', action='store_true',
+                        help='poll the pairs by their cadence within the '
+                             'polling budget instead of every tick, '
+                             'best run with a --tick-time')
+    parser.add_argument('--polling-budget', type=float, default=None,
+                        help='price polls per second of all the pairs, '
+                             'defaults to Constants')
+    parser.add_argument('--refresh-budget', type=float, default=0.1,
+                        help='seconds one object refresh may take')
+    parser.add_argument('--output', default=None,
+                        help='file to write the json results to')
+    add_server_arguments(parser)
+    add_record_arguments(parser)
+    args = parser.parse_args()
+
+    results = []
+    for pairs, objects_per_pair, portfolios in itertools.product(
+            args.pairs, args.objects_per_pair, args.portfolios):
+        scenario = {
+            'pairs': pairs,
+            'objects_per_pair': objects_per_pair,
+            'portfolios': portfolios,
+            'ticks': args.ticks,
+            'tick_time': args.tick_time,
+            'creation_workers': args.creation_workers,
+            'balance_reconcile_seconds': args.balance_reconcile_seconds,
+            'order_netting': not args.no_order_netting,
+            'fpg_rate_limit': args.fpg_rate_limit,
+            'refresh_budget': args.refresh_budget,
+            'price_triggers': not args.no_price_triggers,
+            'adaptive_polling': args.adaptive_polling,
+            'polling_budget': args.polling_budget,
+            'server': server_settings_from_arguments(args)
+        }
+        print(f'Running scenario {scenario}', file=sys.stderr)
+        results.append(run_isolated(run_live_scenario, scenario))
+    report = write_report('live', results, args.output)
+    record_from_arguments(report, args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,434 @@
+"""
+Local stand-in for FPG's api.
+Implements the endpoints used by the FPGConnector:
+/fetch_price, /fetch_l2_book, /fetch_balance and /execute_trade
+with configurable latency, jitter, error rate and price processes.
+Used for load and latency testing of the live path offline.
+
+To run a standalone server:
+  > python3 -m lib.py.benchmarks.mock_fpg_api --port 8000 --latency-ms 30
+Then point Constants.endpoint_link to http://127.0.0.1:8000
+"""
+import argparse
+import json
+import math
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+from lib.py.fpg.logger import (
+    get_module_logger
+)
+
+logger = get_module_logger('mock_api')
+
+
+class ConstantPrice:
+    def __init__(
+            self: Any,
+            start_price: float,
+            seed: int = 0
+    ) -> None:
+        self.price = start_price
+
+    def next_price(
+            self: Any
+    ) -> float:
+        return self.price
+
+
+class RandomWalkPrice:
+    def __init__(
+            self: Any,
+            start_price: float,
+            seed: int = 0,
+            volatility: float = 0.0005
+    ) -> None:
+        """
+        Geometric random walk, moves one step on every price request
+        :param volatility: float -> standard deviation of every step
+        """
+        self.price = start_price
+        self.volatility = volatility
+        self.random = random.Random(seed)
+
+    def next_price(
+            self: Any
+    ) -> float:
+        self.price *= math.exp(self.random.gauss(0.0, self.volatility))
+        return self.price
+
+
+class SinePrice:
+    def __init__(
+            self: Any,
+            start_price: float,
+            seed: int = 0,
+            amplitude: float = 0.05,
+            period: int = 600
+    ) -> None:
+        """
+        Oscillates around the start price, useful for forcing
+        mean reversion objects to enter and exit positions
+        :param amplitude: float -> relative amplitude of the wave
+        :param period: int -> price requests for one full wave
+        """
+        self.start_price = start_price
+        self.amplitude = amplitude
+        self.period = period
+        self.step = random.Random(seed).randrange(period)
+
+    def next_price(
+            self: Any
+    ) -> float:
+        self.step += 1
+        return self.start_price * (1 + self.amplitude * math.sin(
+            2 * math.pi * self.step / self.period))
+
+
+PRICE_PROCESSES = {
+    'constant': ConstantPrice,
+    'random_walk': RandomWalkPrice,
+    'sine': SinePrice
+}
+
+
+class MockFPGState:
+    def __init__(
+            self: Any,
+            latency_ms: float = 0.0,
+            jitter_ms: float = 0.0,
+            error_rate: float = 0.0,
+            price_process: str = 'random_walk',
+            price_process_settings: dict = None,
+            start_price: float = 10000.0,
+            starting_balance: dict = None,
+            book_depth: int = 10,
+            seed: int = 0,
+            outage_pairs: list = (),
+            outage_seconds: float = 0.0
+    ) -> None:
+        """
+        Holds everything the mock endpoints need:
+        the price process of every pair, the account balance
+        and the request statistics
+        :param latency_ms: float -> added latency for every request
+        :param jitter_ms: float -> max uniform jitter added to the latency
+        :param error_rate: float -> probability (0-1) a request fails
+        :param price_process: str -> key in PRICE_PROCESSES
+        :param price_process_settings: dict -> extra settings for the process
+        :param start_price: float -> first price of every pair
+        :param starting_balance: dict -> coin: amount
+        :param book_depth: int -> levels per side in the l2 book
+        :param seed: int -> seed for latency, errors and prices
+        :param outage_pairs: list -> pairs whose requests fail
+                                     for the first outage_seconds
+        :param outage_seconds: float -> outage length from the start
+        """
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.price_process = price_process
+        self.price_process_settings = price_process_settings or {}
+        self.start_price = start_price
+        self.balance = dict(starting_balance or {'USD': 1000000.0})
+        self.book_depth = book_depth
+        self.seed = seed
+        self.outage_pairs = set(outage_pairs)
+        self.outage_end = time.monotonic() + outage_seconds
+        self.random = random.Random(seed)
+        self.processes = {}
+        self.last_prices = {}
+        self.stats = {}
+        self.lock = threading.Lock()
+
+    def delay(
+            self: Any
+    ) -> float:
+        """
+        :return: float -> seconds to wait before answering
+        """
+        with self.lock:
+            jitter = self.random.uniform(0, self.jitter_ms)
+        return (self.latency_ms + jitter) / 1000.0
+
+    def should_fail(
+            self: Any,
+            pair: str = None
+    ) -> bool:
+        if pair in self.outage_pairs and time.monotonic() < self.outage_end:
+            return True
+        with self.lock:
+            return self.random.random() < self.error_rate
+
+    def record(
+            self: Any,
+            endpoint: str,
+            seconds: float,
+            failed: bool
+    ) -> None:
+        with self.lock:
+            endpoint_stats = self.stats.setdefault(
+                endpoint, {'requests': 0, 'errors': 0, 'seconds': 0.0})
+            endpoint_stats['requests'] += 1
+            endpoint_stats['errors'] += int(failed)
+            endpoint_stats['seconds'] += seconds
+
+    def price(
+            self: Any,
+            pair: str
+    ) -> float:
+        """
+        Moves the price process of the pair one step
+        :param pair: str -> pair requested
+        :return: float -> new mid price
+        """
+        with self.lock:
+            try:
+                process = self.processes[pair]
+            except KeyError:
+                process = PRICE_PROCESSES[self.price_process](
+                    self.start_price,
+                    seed=zlib.crc32(pair.encode()) ^ self.seed,
+                    **self.price_process_settings
+                )
+                self.processes[pair] = process
+            price = process.next_price()
+            self.last_prices[pair] = price
+            return price
+
+    def last_price(
+            self: Any,
+            pair: str
+    ) -> float:
+        try:
+            return self.last_prices[pair]
+        except KeyError:
+            return self.price(pair)
+
+    def orderbook(
+            self: Any,
+            pair: str
+    ) -> dict:
+        mid = self.last_price(pair)
+        tick = mid * 0.0001
+        return {
+            'asks': [[mid + tick * level, 1.0 + level]
+                     for level in range(1, self.book_depth + 1)],
+            'bids': [[mid - tick * level, 1.0 + level]
+                     for level in range(1, self.book_depth + 1)]
+        }
+
+    def fetch_balance(
+            self: Any,
+            coins: list
+    ) -> dict:
+        with self.lock:
+            if not coins:
+                coins = list(self.balance)
+            return {coin: self.balance.get(coin, 0.0) for coin in coins}
+
+    def execute_trade(
+            self: Any,
+            trade_info: dict
+    ) -> dict:
+        """
+        Fills the whole order at the order price and
+        updates the balance
+        :param trade_info: dict -> trade info sent by the connector
+        :return: dict -> fill details
+        """
+        base, quote = trade_info['ebq'].split('/')
+        amount = float(trade_info['amount'])
+        price = float(trade_info['order_price'])
+        direction = 1 if trade_info['action'] == 'buy' else -1
+        with self.lock:
+            self.balance[base] = \
+                self.balance.get(base, 0.0) + direction * amount
+            self.balance[quote] = \
+                self.balance.get(quote, 0.0) - direction * amount * price
+        return {
+            'executed_price': price,
+            'executed_amount': amount,
+            'side': trade_info['action'],
+            'pair': trade_info['ebq']
+        }
+
+
+class MockFPGRequestHandler(BaseHTTPRequestHandler):
+    # Set by MockFPGServer
+    state = None
+
+    def log_message(
+            self: Any,
+            format: str,
+            *args: Any
+    ) -> None:
+        logger.debug(format % args)
+
+    def read_body(
+            self: Any
+    ) -> dict:
+        length = int(self.headers.get('Content-Length') or 0)
+        if not length:
+            return {}
+        return json.loads(self.rfile.read(length))
+
+    def send_json(
+            self: Any,
+            status: int,
+            body: dict
+    ) -> None:
+        encoded = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(encoded)))
+        self.end_headers()
+        self.wfile.write(encoded)
+
+    def handle_request(
+            self: Any
+    ) -> None:
+        start = time.perf_counter()
+        endpoint = self.path.rstrip('/').split('/')[-1]
+        if endpoint == 'stats':
+            self.send_json(200, self.state.stats)
+            return
+        data = self.read_body()
+        time.sleep(self.state.delay())
+        failed = self.state.should_fail(data.get('currency_pair'))
+        if failed:
+            self.send_json(500, {'succeeded': False, 'error': 'mock error'})
+        elif endpoint == 'fetch_price':
+            self.send_json(200, {
+                'succeeded': True,
+                'mid': self.state.price(data['currency_pair'])
+            })
+        elif endpoint == 'fetch_l2_book':
+            self.send_json(200, self.state.orderbook(data['currency_pair']))
+        elif endpoint == 'fetch_balance':
+            balance = self.state.fetch_balance(data.get('coins'))
+            balance['succeeded'] = True
+            self.send_json(200, balance)
+        elif endpoint == 'execute_trade':
+            fill = self.state.execute_trade(data['trade_info'])
+            fill['succeeded'] = True
+            self.send_json(200, fill)
+        else:
+            failed = True
+            self.send_json(404, {'succeeded': False, 'error': 'not found'})
+        self.state.record(endpoint, time.perf_counter() - start, failed)
+
+    do_GET = handle_request
+    do_POST = handle_request
+
+
+class MockFPGServer:
+    def __init__(
+            self: Any,
+            host: str = '127.0.0.1',
+            port: int = 0,
+            **state_settings: Any
+    ) -> None:
+        """
+        Threaded http server answering like FPG's api.
+        :param host: str -> host to bind
+        :param port: int -> port to bind, 0 picks a free port
+        :param state_settings: settings passed to MockFPGState
+        """
+        self.state = MockFPGState(**state_settings)
+        handler = type('BoundMockFPGRequestHandler',
+                       (MockFPGRequestHandler,), {'state': self.state})
+        self.server = ThreadingHTTPServer((host, port), handler)
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(
+            self: Any
+    ) -> str:
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(
+            self: Any
+    ) -> str:
+        """
+        Starts serving in a background thread
+        :return: str -> base url of the server
+        """
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        logger.info(f'mock fpg api listening on {self.url}')
+        return self.url
+
+    def stop(
+            self: Any
+    ) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def add_server_arguments(
+        parser: Any
+) -> None:
+    """
+    Adds the mock server settings to an argument parser
+    :param parser: argparse.ArgumentParser
+    :return: None
+    """
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--price-process', default='random_walk',
+                        choices=sorted(PRICE_PROCESSES))
+    parser.add_argument('--start-price', type=float, default=10000.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--outage-pairs', nargs='*', default=[],
+                        help='pairs whose requests fail during the outage')
+    parser.add_argument('--outage-seconds', type=float, default=0.0)
+
+
+def server_settings_from_arguments(
+        args: Any
+) -> dict:
+    return {
+        'latency_ms': args.latency_ms,
+        'jitter_ms': args.jitter_ms,
+        'error_rate': args.error_rate,
+        'price_process': args.price_process,
+        'start_price': args.start_price,
+        'seed': args.seed,
+        'outage_pairs': args.outage_pairs,
+        'outage_seconds': args.outage_seconds
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a mock FPG api')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    add_server_arguments(parser)
+    args = parser.parse_args()
+    server = MockFPGServer(
+        args.host, args.port, **server_settings_from_arguments(args))
+    print(f'Serving mock FPG api on {server.url}')
+    try:
+        server.server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+"""
+Startup time benchmark.
+Imports what the interface, a backtest and a live session load in
+a fresh interpreter with -X importtime and reports the wall time,
+the import time, the slowest modules and which of the heavy
+dependencies were loaded.
+
+To run:
+  > python3 -m lib.py.benchmarks.startup_benchmark --repeats 5
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+from lib.py.benchmarks.benchmark_history import (
+    add_record_arguments,
+    record_from_arguments
+)
+from lib.py.benchmarks.benchmark_utils import (
+    write_report
+)
+
+# mode -> code run at startup, the imports done by
+# core.py and by setup_backtesting()/ setup_live_trading(),
+# 'portfolio' also loads the active strategies
+MODES = {
+    'interface': 'import lib.py.fpg.interface',
+    'portfolio': 'import lib.py.fpg.interface\n'
+                 'from user_managment.portfolio import PortfolioManager\n'
+                 'PortfolioManager()',
+    'backtest': 'import lib.py.fpg.interface\n'
+                'import lib.py.fpg.data_manager.data_manager_backtesting',
+    'live': 'import lib.py.fpg.interface\n'
+            'import lib.py.fpg.trader\n'
+            'import lib.py.fpg.data_manager.data_manager_live'
+}
+HEAVY_MODULES = ('ccxt', 'pandas', 'requests', 'zmq', 'numpy')
+
+
+def parse_importtime(
+        output: str
+) -> list:
+    """
+    :param output: str -> stderr of python -X importtime
+    :return: list -> (module, self microseconds, cumulative
+                      microseconds, nesting level) of every import
+    """
+    imports = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_time, cumulative, name = line[len('import time:'):].split('|')
+        # One space, then two more per nesting level
+        level = (len(name) - len(name.lstrip()) - 1) // 2
+        imports.append((name.strip(), int(self_time), int(cumulative),
+                        level))
+    return imports
+
+
+def time_startup(
+        code: str
+) -> tuple:
+    """
+    :param code: str -> code run by a fresh interpreter
+    :return: tuple -> (wall seconds, list of parse_importtime)
+    """
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        capture_output=True, text=True, check=True)
+    return time.perf_counter() - start, parse_importtime(completed.stderr)
+
+
+def run_startup_scenario(
+        scenario: dict
+) -> dict:
+    wall_times = []
+    import_times = []
+    imports = []
+    for _ in range(scenario['repeats']):
+        wall_time, imports = time_startup(MODES[scenario['mode']])
+        wall_times.append(wall_time)
+        # Top level imports include their dependencies
+        import_times.append(sum(
+            cumulative for _, _, cumulative, level in imports
+            if level == 0))
+    modules = {name for name, _, _, _ in imports}
+    slowest = sorted(imports, key=lambda row: row[1],
+                     reverse=True)[:scenario['top']]
+    return {
+        'parameters': scenario,
+        'results': {
+            'wall_ms': 1000 * statistics.median(wall_times),
+            'import_ms': statistics.median(import_times) / 1000,
+            'modules': len(modules),
+            'heavy_modules': {
+                name: name in modules for name in HEAVY_MODULES
+            },
+            'slowest_modules_ms': {
+                name: self_time / 1000 for name, self_time, _, _ in slowest
+            }
+        }
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the startup time of every mode')
+    parser.add_argument('--modes', nargs='+', choices=sorted(MODES),
+                        default=sorted(MODES))
+    parser.add_argument('--repeats', type=int, default=5,
+                        help='fresh interpreters per mode, the median '
+                             'is reported')
+    parser.add_argument('--top', type=int, default=10,
+                        help='slowest modules reported by self time')
+    parser.add_argument('--output', default=None,
+                        help='file to write the json results to')
+    add_record_arguments(parser)
+    args = parser.parse_args()
+
+    results = []
+    for mode in args.modes:
+        scenario = {
+            'mode': mode,
+            'repeats': args.repeats,
+            'top': args.top
+        }
+        print(f'Running scenario {scenario}', file=sys.stderr)
+        results.append(run_startup_scenario(scenario))
+    report = write_report('startup', results, args.output)
+    record_from_arguments(report, args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,248 @@
+"""
+Strategy object footprint benchmark.
+Creates and restores many strategy objects and reports the
+memory per object and the creation and restore rates (rows with
+and without the saved bands), for the
+slotted (compact) layout and for a subclass with a __dict__,
+whose objects also hold their own close data frame like the
+objects of the strategies used before.
+
+Market data comes from a static data manager so only the
+object construction itself is measured.
+
+To run:
+  > python3 -m lib.py.benchmarks.strategy_objects_benchmark --objects 100000
+"""
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from typing import Any
+
+import numpy
+import pandas as pd
+
+from lib.py.benchmarks.benchmark_history import (
+    add_record_arguments,
+    record_from_arguments
+)
+from lib.py.benchmarks.benchmark_utils import (
+    run_isolated,
+    write_report
+)
+from lib.py.benchmarks.synthetic_data import (
+    synthetic_pair_names
+)
+from lib.py.fpg.data_manager.data_manager_parent import (
+    DataHandlerSuper,
+    shares_ohlcv
+)
+from lib.py.fpg.utils import (
+    create_datetime_object,
+    get_epoch_from_datetime
+)
+
+
+class StaticDataManager(DataHandlerSuper):
+    """
+    Answers every request with the same values
+    """
+    def __init__(
+            self: Any,
+            current_time: Any,
+            days_back: int = 20
+    ) -> None:
+        super().__init__()
+        self.current_time = current_time
+        self.current_price = 10000.0
+        self.ohlcv_requests = 0
+        closes = 10000.0 + numpy.arange(days_back, dtype=float)
+        self.ohlcv = pd.DataFrame({
+            'exchange_shift_time': pd.date_range(
+                '2019-01-01', periods=days_back, freq='D'),
+            'h': closes, 'l': closes, 'o': closes, 'c': closes,
+            'v': numpy.ones(days_back)
+        })
+
+    def fetch_current_time(self):
+        return self.current_time
+
+    def fetch_mid_price(self, pair):
+        return self.current_price
+
+    @shares_ohlcv
+    def fetch_custom_ohlcv(self, exchange_id, pair, exchange_open_time,
+                           since, days_back):
+        self.ohlcv_requests += 1
+        return self.ohlcv.copy()
+
+
+def dictionary_layout(
+        strategy_class: Any
+) -> Any:
+    """
+    :param strategy_class: slotted strategy class
+    :return: plain subclass without __slots__, its objects
+             get a __dict__ like the objects of the strategies
+             used before
+    """
+    return type(f'Dict{strategy_class.__name__}', (strategy_class,), {})
+
+
+def database_row(
+        strategy_object: Any,
+        saved_bands: bool = True
+) -> dict:
+    """
+    :param strategy_object: strategy object
+    :param saved_bands: bool -> False for rows saved before
+                                the bands were kept in the db
+    :return: dict -> same values as the row of the
+                     strategy objects table
+    """
+    user_settings = strategy_object.create_dictionary_for_db()
+    if not saved_bands:
+        for name in ('high_band', 'low_band', 'mean_band', 'std'):
+            user_settings.pop(name, None)
+    return {
+        'strategy_id': strategy_object.strategy_id,
+        'strategy_name': strategy_object.strategy_name,
+        'pair': strategy_object.pair,
+        'creation_time': get_epoch_from_datetime(
+            strategy_object.creation_time),
+        'strategy_position': strategy_object.strategy_position,
+        'amount': strategy_object.amount,
+        'is_expired': int(strategy_object.is_expired),
+        'live_position': str(int(strategy_object.live_position)),
+        'days_passed': strategy_object.days_passed,
+        'is_leverage': strategy_object.is_leverage,
+        'additional_user_settings': json.dumps(user_settings)
+    }
+
+
+def measure_layout(
+        scenario: dict
+) -> dict:
+    """
+    Creates, measures and restores the objects of one layout
+    :param scenario: dict -> 'objects', 'pairs', 'memory_sample'
+                             and 'layout' ('compact' or 'dictionary')
+    :return: dict -> scenario parameters and measured results
+    """
+    from lib.py.strategies.mean_reversion.mean_reversion import (
+        MeanReversion
+    )
+    from user_managment.portfolio import PortfolioManager
+
+    strategy_class = MeanReversion
+    keep_close_df = scenario['layout'] == 'dictionary'
+    if keep_close_df:
+        strategy_class = dictionary_layout(MeanReversion)
+    current_time = create_datetime_object('2019-01-01 14:00:00')
+    data_manager = StaticDataManager(current_time)
+    pairs = synthetic_pair_names(scenario['pairs'])
+    total = scenario['objects']
+
+    def create_objects(count):
+        strategy_objects = []
+        for index in range(count):
+            strategy_object = strategy_class(
+                current_time, data_manager, pairs[index % len(pairs)])
+            if keep_close_df:
+                # Objects used to keep the data frame they were built from
+                strategy_object.close_df = data_manager.fetch_custom_ohlcv(
+                    None, None, None, None, None)
+            strategy_objects.append(strategy_object)
+        return strategy_objects
+
+    # Memory is traced on a sample, tracing slows down the creation
+    memory_sample = min(total, scenario['memory_sample'])
+    gc.collect()
+    tracemalloc.start()
+    baseline_memory = tracemalloc.get_traced_memory()[0]
+    strategy_objects = create_objects(memory_sample)
+    gc.collect()
+    object_memory = tracemalloc.get_traced_memory()[0] - baseline_memory
+    tracemalloc.stop()
+    del strategy_objects
+    gc.collect()
+
+    creation_start = time.perf_counter()
+    strategy_objects = create_objects(total)
+    creation_time = time.perf_counter() - creation_start
+
+    rows = [database_row(strategy_object)
+            for strategy_object in strategy_objects]
+    legacy_rows = [database_row(strategy_object, saved_bands=False)
+                   for strategy_object in strategy_objects]
+    del strategy_objects
+    gc.collect()
+    portfolio = PortfolioManager()
+    portfolio.strategy_dictionary = {
+        'MeanReversion': {'object': strategy_class}}
+    portfolio.data_manager = data_manager
+    restore_start = time.perf_counter()
+    restored = portfolio.restore_strategy_objects(rows)
+    restore_time = time.perf_counter() - restore_start
+    assert len(restored) == total
+    del restored
+    gc.collect()
+
+    # Rows without the bands, the objects fetch their data
+    # when they are warmed up
+    data_manager.ohlcv_requests = 0
+    legacy_restore_start = time.perf_counter()
+    restored = portfolio.restore_strategy_objects(legacy_rows)
+    with data_manager.shared_ohlcv():
+        for strategy_object in portfolio.pending_warm_up:
+            strategy_object.warm_up()
+    legacy_restore_time = time.perf_counter() - legacy_restore_start
+    assert len(restored) == total
+
+    return {
+        'parameters': scenario,
+        'results': {
+            'bytes_per_object': object_memory / memory_sample,
+            'creation_per_second': total / creation_time,
+            'restore_per_second': total / restore_time,
+            'creation_seconds': creation_time,
+            'restore_seconds': restore_time,
+            'legacy_restore_per_second': total / legacy_restore_time,
+            'legacy_ohlcv_requests': data_manager.ohlcv_requests
+        }
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark memory and creation rate of strategy objects')
+    parser.add_argument('--objects', type=int, default=100000)
+    parser.add_argument('--pairs', type=int, default=100)
+    parser.add_argument('--memory-sample', type=int, default=10000,
+                        help='objects created with memory tracing')
+    parser.add_argument('--layouts', nargs='+',
+                        default=['dictionary', 'compact'],
+                        choices=['dictionary', 'compact'])
+    parser.add_argument('--output', default=None,
+                        help='file to write the json results to')
+    add_record_arguments(parser)
+    args = parser.parse_args()
+
+    results = []
+    for layout in args.layouts:
+        scenario = {
+            'objects': args.objects,
+            'pairs': args.pairs,
+            'memory_sample': args.memory_sample,
+            'layout': layout
+        }
+        print(f'Running scenario {scenario}', file=sys.stderr)
+        results.append(run_isolated(measure_layout, scenario))
+    report = write_report('strategy_objects', results, args.output)
+    record_from_arguments(report, args)
+
+
+if __name__ == '__main__':
+    main()
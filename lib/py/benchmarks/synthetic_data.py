@@ -0,0 +1,135 @@
+"""
+Seeded synthetic minute bar generator.
+Writes files in the same layout as the csv dumps
+under data/data_bundles so they can be loaded by the
+backtesting data manager.
+
+To run:
+  > python3 -m lib.py.benchmarks.synthetic_data --pairs 4 --days 10
+"""
+import argparse
+import datetime
+import numpy
+import os
+import pandas as pd
+from typing import Any
+
+from lib.py.fpg.constants import (
+    Constants
+)
+
+MINUTES_IN_DAY = 1440
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S+00:00'
+DEFAULT_START = datetime.datetime(2019, 1, 1)
+
+
+def synthetic_pair_names(
+        number_of_pairs: int,
+        quote: str = 'USD'
+) -> list:
+    """
+    :param number_of_pairs: int -> how many pairs to name
+    :param quote: str -> quote currency for all of the pairs
+    :return: list -> ['SYN0/USD', 'SYN1/USD', ...]
+    """
+    return [f'SYN{index}/{quote}' for index in range(number_of_pairs)]
+
+
+def generate_minute_bars(
+        start: Any,
+        days: int,
+        seed: int,
+        pair_index: int = 0,
+        start_price: float = 10000.0,
+        annual_volatility: float = 0.8
+) -> Any:
+    """
+    Generates one minute ohlcv candles following a
+    geometric random walk. The same seed and pair index
+    will always return the same candles.
+    :param start: datetime object -> time of the first candle (utc)
+    :param days: int -> number of days to generate
+    :param seed: int -> seed of the random generator
+    :param pair_index: int -> index of the pair, every pair gets
+                              its own stream of random numbers
+    :param start_price: float -> price of the first candle
+    :param annual_volatility: float -> volatility of the walk
+    :return: pandas DF with the columns:
+             datetime, open, high, low, close, volume, price
+    """
+    generator = numpy.random.default_rng([seed, pair_index])
+    minutes = days * MINUTES_IN_DAY
+    minute_volatility = annual_volatility / numpy.sqrt(365 * MINUTES_IN_DAY)
+    returns = generator.normal(0.0, minute_volatility, minutes)
+    close = start_price * numpy.exp(numpy.cumsum(returns))
+    opens = numpy.empty(minutes)
+    opens[0] = start_price
+    opens[1:] = close[:-1]
+    wick = numpy.abs(generator.normal(0.0, minute_volatility, (2, minutes)))
+    high = numpy.maximum(opens, close) * (1 + wick[0])
+    low = numpy.minimum(opens, close) * (1 - wick[1])
+    volume = generator.lognormal(0.0, 1.0, minutes)
+    dates = pd.date_range(start, periods=minutes, freq='min')
+    return pd.DataFrame({
+        'datetime': dates.strftime(DATETIME_FORMAT),
+        'open': opens.round(2),
+        'high': high.round(2),
+        'low': low.round(2),
+        'close': close.round(2),
+        'volume': volume.round(6),
+        'price': close.round(2)
+    })
+
+
+def write_data_bundle(
+        pairs: list,
+        start: Any,
+        days: int,
+        seed: int,
+        directory: str = Constants.data_bundle_link
+) -> list:
+    """
+    Generates and writes a csv file for every pair.
+    Files are named as the pair without the '/'.
+    :param pairs: list -> pairs to generate, for example ['SYN0/USD']
+    :param start: datetime object -> time of the first candle
+    :param days: int -> number of days per file
+    :param seed: int -> seed of the random generator
+    :param directory: str -> directory to write the files to
+    :return: list -> paths of the written files
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for pair_index, pair in enumerate(pairs):
+        pair_df = generate_minute_bars(start, days, seed, pair_index)
+        file_name = pair.replace('/', '')
+        path = f'{directory}/{file_name}.csv'
+        pair_df.to_csv(path, index=False)
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Generate synthetic minute bar data bundles')
+    parser.add_argument('--pairs', type=int, default=2)
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--start', default=DEFAULT_START.strftime('%Y-%m-%d'),
+                        help='first day of data, yyyy-mm-dd')
+    parser.add_argument('--output-dir', default=Constants.data_bundle_link)
+    args = parser.parse_args()
+    start = datetime.datetime.strptime(args.start, '%Y-%m-%d')
+    paths = write_data_bundle(
+        synthetic_pair_names(args.pairs),
+        start,
+        args.days,
+        args.seed,
+        args.output_dir
+    )
+    for path in paths:
+        print(path)
+
+
+if __name__ == '__main__':
+    main()
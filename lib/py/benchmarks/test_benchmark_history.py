@@ -0,0 +1,144 @@
+"""
+Test file for the benchmark history
+
+To run:
+  > pytest test_benchmark_history.py
+"""
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+from lib.py.benchmarks.benchmark_history import (
+    NO_RESULTS_STATUS,
+    REGRESSION_STATUS,
+    append_report,
+    compare_commits,
+    compare_samples,
+    flatten_metrics,
+    load_history,
+    main
+)
+
+
+def make_report(ticks_per_second, peak_memory_mb):
+    return {
+        'benchmark': 'backtest',
+        'created': '2019-01-01T00:00:00',
+        'environment': {},
+        'scenarios': [{
+            'parameters': {'pairs': 1, 'days': 1},
+            'results': {
+                'ticks_per_second': value,
+                'time_per_tick_ms': {'mean': 1.0},
+                'peak_memory_mb': peak_memory_mb
+            }
+        } for value in ticks_per_second]
+    }
+
+
+class TestBenchmarkHistory(unittest.TestCase):
+
+    def test_flatten_metrics(self):
+        metrics = flatten_metrics({
+            'ticks': 10,
+            'time_per_tick_ms': {'mean': 1.5, 'p95': 2.0},
+            'skipped': True
+        })
+        assert metrics == {
+            'ticks': 10,
+            'time_per_tick_ms.mean': 1.5,
+            'time_per_tick_ms.p95': 2.0
+        }
+
+    def test_significant_regression(self):
+        comparison = compare_samples(
+            [1000, 1010, 990, 1005], [800, 810, 790, 805], 'higher', 0.05)
+        assert comparison['significant']
+        assert comparison['regression']
+
+    def test_improvement_is_not_regression(self):
+        comparison = compare_samples(
+            [100, 101, 99], [80, 81, 79], 'lower', 0.05)
+        assert not comparison['regression']
+
+    def test_noise_is_not_significant(self):
+        comparison = compare_samples(
+            [100, 200, 100, 200], [110, 190, 120, 210], 'lower', 0.05)
+        assert comparison['significant'] is False
+        assert not comparison['regression']
+
+    def test_single_samples_use_threshold(self):
+        comparison = compare_samples([100], [120], 'lower', 0.10)
+        assert comparison['significant'] is None
+        assert comparison['regression']
+
+    def test_compare_commits_from_history(self):
+        with tempfile.TemporaryDirectory() as directory:
+            history = os.path.join(directory, 'history.jsonl')
+            append_report(make_report([1000, 1002, 998], 100),
+                          history, 'a' * 40, 'machine')
+            append_report(make_report([700, 702, 698], 100),
+                          history, 'b' * 40, 'machine')
+            append_report(make_report([10, 10, 10], 100),
+                          history, 'b' * 40, 'other machine')
+            records = load_history(history)
+            comparisons = compare_commits(
+                records, 'a' * 40, 'b' * 40, 'machine')
+        by_metric = {comparison['metric']: comparison
+                     for comparison in comparisons}
+        assert set(by_metric) == {'ticks_per_second', 'peak_memory_mb'}
+        assert by_metric['ticks_per_second']['regression']
+        assert by_metric['ticks_per_second']['candidate'] == 700
+        assert not by_metric['peak_memory_mb']['regression']
+
+    def test_dirty_results_are_not_a_baseline(self):
+        with tempfile.TemporaryDirectory() as directory:
+            history = os.path.join(directory, 'history.jsonl')
+            append_report(make_report([1000, 1002, 998], 100),
+                          history, 'a' * 40, 'machine')
+            append_report(make_report([700, 702, 698], 100),
+                          history, 'b' * 40, 'machine')
+            records = load_history(history)
+            for record in records[:3]:
+                record['dirty'] = True
+            assert compare_commits(
+                records, 'a' * 40, 'b' * 40, 'machine') == []
+            # A dirty candidate is still compared
+            assert compare_commits(records, 'b' * 40, 'a' * 40, 'machine')
+
+    def test_compare_exit_status(self):
+        with tempfile.TemporaryDirectory() as directory:
+            history = os.path.join(directory, 'history.jsonl')
+            for commit, ticks_per_second in (('a', 1000), ('b', 700),
+                                             ('c', 1000)):
+                append_report(make_report([ticks_per_second] * 3, 100),
+                              history, commit * 40, 'machine')
+            # Commit c was recorded with uncommitted changes
+            records = load_history(history)
+            for record in records:
+                record['dirty'] = record['commit'] == 'c' * 40
+            with open(history, 'w') as history_file:
+                history_file.writelines(
+                    json.dumps(record) + '\n' for record in records)
+
+            def compare_status(baseline, candidate):
+                arguments = ['benchmark_history', '--history', history,
+                             'compare', '--machine', 'machine',
+                             '--baseline', baseline * 40,
+                             '--candidate', candidate * 40]
+                with mock.patch.object(sys, 'argv', arguments), \
+                        contextlib.redirect_stdout(io.StringIO()), \
+                        contextlib.redirect_stderr(io.StringIO()):
+                    try:
+                        main()
+                    except SystemExit as exit:
+                        return exit.code
+                return 0
+
+            assert compare_status('a', 'b') == REGRESSION_STATUS
+            assert compare_status('b', 'a') == 0
+            assert compare_status('c', 'a') == NO_RESULTS_STATUS
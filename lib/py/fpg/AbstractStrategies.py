@@ -4,6 +4,8 @@ from abc import ABC, abstractclassmethod
 
 
 class StrategiesAbstract(ABC):
+    __slots__ = ()
+
     @abstractclassmethod
     def create_dictionary_for_db(cls):
         raise NotImplementedError
@@ -25,3 +27,55 @@ class StrategiesAbstract(ABC):
         raise NotImplementedError
         pass
 
+
+class CompactStrategy(StrategiesAbstract):
+    """
+    Strategy base class without a per object __dict__.
+    All of the mandatory settings and the attributes the
+    portfolio sets on the objects are slots, strategies
+    list their own attributes in __slots__ as well.
+    Market data (ohlcv data frames etc.) should not be kept
+    on the objects, only the values derived from it.
+    """
+    __slots__ = (
+        # Mandatory settings
+        'data_manager',
+        'strategy_id',
+        'strategy_name',
+        'pair',
+        'exchange',
+        'exchange_daily_open_time',
+        'expiration_period',
+        'creation_time',
+        'last_exchange_open_time',
+        'last_price_fetch_time',
+        'days_passed',
+        'is_leverage',
+        'current_price',
+        'is_executed',
+        'is_expired',
+        'amount',
+        'strategy_position',
+        'live_position',
+        # Set by the portfolio
+        'timer_driven',
+        'short_allowed',
+        'long_allowed',
+        'short_entrance_price',
+        'long_entrance_price',
+        'short_exit_price',
+        'long_exit_price',
+        'short_liquidation_time',
+        'long_liquidation_time'
+    )
+
+    def __init__(self):
+        self.timer_driven = False
+        self.short_allowed = False
+        self.long_allowed = False
+        self.short_entrance_price = None
+        self.long_entrance_price = None
+        self.short_exit_price = None
+        self.long_exit_price = None
+        self.short_liquidation_time = None
+        self.long_liquidation_time = None
@@ -0,0 +1,137 @@
+"""
+Account balance cache for live trading.
+The balance is read from FPG's endpoint once, updated locally
+from the fills of our own trades and reconciled against the
+endpoint on an interval or after a fill we can't account for.
+"""
+import threading
+import time
+from typing import Any
+
+from lib.py.fpg.logger import (
+    get_module_logger
+)
+logger = get_module_logger('data')
+
+
+class BalanceCache:
+    def __init__(
+            self: Any,
+            fetch_balance: Any,
+            reconcile_seconds: float = 60.0,
+            clock: Any = time.monotonic
+    ) -> None:
+        """
+        :param fetch_balance: function -> list of coins -> balance dict
+                                          from the endpoint
+        :param reconcile_seconds: float -> seconds until the cached
+                                           balance is read again
+        :param clock: function -> seconds, monotonic
+        """
+        self.fetch_balance = fetch_balance
+        self.reconcile_seconds = reconcile_seconds
+        self.clock = clock
+        self.balance = {}
+        self.last_reconcile_time = None
+        self.stale = True
+        self.lock = threading.Lock()
+        self.stats = {'reads': 0, 'requests': 0, 'fills': 0,
+                      'invalidations': 0}
+
+    def get(
+            self: Any,
+            coins: Any
+    ) -> dict:
+        """
+        :param coins: list of coins, for example ['BTC','ETH']
+        :return: dict -> balance in every coin and 'succeeded'
+        """
+        coins = list(coins)
+        with self.lock:
+            self.stats['reads'] += 1
+            if self.needs_reconcile(coins):
+                self.reconcile(coins)
+            balance = {coin: self.balance[coin] for coin in coins}
+        balance['succeeded'] = True
+        return balance
+
+    def needs_reconcile(
+            self: Any,
+            coins: list
+    ) -> bool:
+        if self.stale or self.last_reconcile_time is None:
+            return True
+        if self.clock() - self.last_reconcile_time >= \
+                self.reconcile_seconds:
+            return True
+        return any(coin not in self.balance for coin in coins)
+
+    def reconcile(
+            self: Any,
+            coins: list
+    ) -> None:
+        """
+        Reads the balance of the requested and every
+        cached coin from the endpoint
+        :param coins: list of coins
+        :return: None
+        """
+        requested = list(dict.fromkeys(list(self.balance) + coins))
+        response = self.fetch_balance(requested)
+        self.stats['requests'] += 1
+        if not response.get('succeeded', True):
+            raise ConnectionError('Balance request did not succeed')
+        for coin in requested:
+            self.balance[coin] = float(response.get(coin, 0.0))
+        self.last_reconcile_time = self.clock()
+        self.stale = False
+
+    def apply_fill(
+            self: Any,
+            pair: str,
+            side: str,
+            amount: float,
+            fill: dict
+    ) -> None:
+        """
+        Updates the cached balance from the fill of a trade.
+        A fill without the executed price and amount, or with a
+        different amount than ordered, invalidates the cache.
+        :param pair: str -> pair traded
+        :param side: str -> 'buy'/ 'sell'
+        :param amount: float -> amount ordered
+        :param fill: dict -> execution response of the endpoint
+        :return: None
+        """
+        executed_price = fill.get('executed_price')
+        executed_amount = fill.get('executed_amount')
+        if executed_price is None or executed_amount is None or \
+                abs(float(executed_amount) - amount) > 1e-9:
+            logger.info(f'ambiguous fill for {pair}, '
+                        f'balance will be reconciled')
+            self.invalidate()
+            return
+        base, quote = pair.split('/')
+        direction = 1 if side == 'buy' else -1
+        with self.lock:
+            self.stats['fills'] += 1
+            if self.stale:
+                return
+            executed_amount = float(executed_amount)
+            # Coins that are not cached are read on their next request
+            if base in self.balance:
+                self.balance[base] += direction * executed_amount
+            if quote in self.balance:
+                self.balance[quote] -= \
+                    direction * executed_amount * float(executed_price)
+
+    def invalidate(
+            self: Any
+    ) -> None:
+        """
+        The next read goes to the endpoint
+        :return: None
+        """
+        with self.lock:
+            self.stats['invalidations'] += 1
+            self.stale = True
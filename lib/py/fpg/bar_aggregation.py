@@ -0,0 +1,570 @@
+"""
+Bars of any timeframe built from the minute stream of every pair.
+A timeframe is a period ('1m', '5m', '1h', '4h', '1d') and an anchor,
+the epoch seconds its buckets are aligned to modulo the period
+(e.g. the exchange open time of session days, see session_anchor()).
+A bar starts at t - (t - anchor) % period.
+
+The minute series of a pair is fed with prices or minute bars, every
+other series of the pair is fed with the finished bars of the largest
+lower timeframe it can be built from (e.g. 4h from 1h, 1h from 5m),
+a bar is finished once a later bucket gets data. The series are kept
+per (pair, period, anchor) by a BarAggregator, every strategy asking
+for the same bars reads the same series.
+"""
+import threading
+import numpy
+from typing import Any
+
+from lib.py.fpg.utils import (
+    exchange_open_time_hours_shift
+)
+
+MINUTE = 60
+TIMEFRAMES = {
+    '1m': 60,
+    '5m': 300,
+    '15m': 900,
+    '1h': 3600,
+    '4h': 14400,
+    '1d': 86400
+}
+BAR_COLUMNS = ('time', 'open', 'high', 'low', 'close', 'volume')
+
+
+def timeframe_seconds(
+        timeframe: Any
+) -> int:
+    """
+    :param timeframe: str -> one of TIMEFRAMES, or int seconds
+    :return: int -> period of the timeframe in seconds
+    """
+    if isinstance(timeframe, str):
+        try:
+            return TIMEFRAMES[timeframe]
+        except KeyError:
+            raise ValueError(f'Unknown timeframe {timeframe}') from None
+    if timeframe <= 0 or timeframe % MINUTE:
+        raise ValueError(f'Timeframe of {timeframe} seconds is not a '
+                         f'whole number of minutes')
+    return int(timeframe)
+
+
+def session_anchor(
+        exchange_open_time: str
+) -> int:
+    """
+    :param exchange_open_time: str -> "18:00:00"
+    :return: int -> anchor of the days starting at the open time,
+                    the days of fetch_custom_ohlcv
+    """
+    shift = exchange_open_time_hours_shift(exchange_open_time)
+    return int(-shift.total_seconds()) % TIMEFRAMES['1d']
+
+
+def bucket_starts(
+        unix_times: Any,
+        period: int,
+        anchor: int
+) -> Any:
+    """
+    :param unix_times: numpy array or float -> epoch seconds
+    :return: epoch seconds of the buckets the times are in
+    """
+    return unix_times - (unix_times - anchor) % period
+
+
+def aggregate_bars(
+        bars: dict,
+        period: int,
+        anchor: int
+) -> dict:
+    """
+    :param bars: dict -> BAR_COLUMNS: numpy arrays of bars or prices
+                         (open = high = low = close), oldest first
+    :param period: int -> seconds of the aggregated bars
+    :param anchor: int -> anchor of the aggregated bars
+    :return: dict -> BAR_COLUMNS: numpy arrays, one bar per bucket
+                     with data, 'time' is the start of the bucket
+    """
+    times = numpy.asarray(bars['time'], dtype=float)
+    if not len(times):
+        return {column: numpy.empty(0) for column in BAR_COLUMNS}
+    buckets = bucket_starts(times, period, anchor)
+    starts = numpy.flatnonzero(numpy.r_[True, buckets[1:] != buckets[:-1]])
+    ends = numpy.r_[starts[1:], len(times)]
+    return {
+        'time': buckets[starts],
+        'open': numpy.asarray(bars['open'], dtype=float)[starts],
+        'high': numpy.maximum.reduceat(
+            numpy.asarray(bars['high'], dtype=float), starts),
+        'low': numpy.minimum.reduceat(
+            numpy.asarray(bars['low'], dtype=float), starts),
+        'close': numpy.asarray(bars['close'], dtype=float)[ends - 1],
+        'volume': numpy.add.reduceat(
+            numpy.asarray(bars['volume'], dtype=float), starts)
+    }
+
+
+def merge_bars(
+        first: dict,
+        second: dict
+) -> dict:
+    """
+    :return: dict -> bar of the two bars of one bucket, second later
+    """
+    if first is None:
+        return dict(second)
+    if second is None:
+        return dict(first)
+    return {
+        'time': first['time'],
+        'open': first['open'],
+        'high': max(first['high'], second['high']),
+        'low': min(first['low'], second['low']),
+        'close': second['close'],
+        'volume': first['volume'] + second['volume']
+    }
+
+
+def concatenate_bars(
+        *bars: dict
+) -> dict:
+    return {column: numpy.concatenate([part[column] for part in bars])
+            for column in BAR_COLUMNS}
+
+
+def ohlcv_frame(
+        bars: dict,
+        exchange_open_time: str
+) -> Any:
+    """
+    :param bars: dict -> session days of aggregate_bars
+    :param exchange_open_time: str -> "18:00:00", open time of the days
+    :return: pandas data frame of fetch_custom_ohlcv: the
+             exchange_shift_time of a day is its open time shifted
+             to midnight, then h, l, o, c, v
+    """
+    import pandas as pd
+    time_to_shift = exchange_open_time_hours_shift(exchange_open_time)
+    return pd.DataFrame({
+        'exchange_shift_time': pd.to_datetime(
+            bars['time'] + time_to_shift.total_seconds(), unit='s'),
+        'h': bars['high'],
+        'l': bars['low'],
+        'o': bars['open'],
+        'c': bars['close'],
+        'v': bars['volume']
+    })
+
+
+class BarSeries:
+    def __init__(
+            self: Any,
+            period: int,
+            anchor: int,
+            capacity: int = None,
+            source: Any = None
+    ) -> None:
+        """
+        :param period: int -> seconds of a bar
+        :param anchor: int -> epoch seconds the bars are aligned to
+        :param capacity: int -> finished bars kept, None for all
+        :param source: BarSeries the bars are built from, None for
+                       the minute series of a pair
+        """
+        self.period = period
+        self.anchor = anchor % period
+        self.capacity = capacity
+        self.source = source
+        # Finished bars, count of them from the start of the arrays
+        self.columns = {column: numpy.empty(64) for column in BAR_COLUMNS}
+        self.count = 0
+        # Bar of the current bucket, of the finished source bars
+        self.current_bar = None
+        # Series built from this one
+        self.children = []
+
+    def __len__(
+            self: Any
+    ) -> int:
+        return self.count
+
+    def bucket(
+            self: Any,
+            unix_time: float
+    ) -> float:
+        return bucket_starts(unix_time, self.period, self.anchor)
+
+    def can_build(
+            self: Any,
+            period: int,
+            anchor: int
+    ) -> bool:
+        """
+        :return: bool -> True if every bucket of the timeframe is
+                         made of whole buckets of this series
+        """
+        return period % self.period == 0 and \
+            (anchor - self.anchor) % self.period == 0
+
+    def append(
+            self: Any,
+            bars: dict
+    ) -> None:
+        size = len(bars['time'])
+        if not size:
+            return
+        if self.capacity is not None and \
+                self.count + size > 2 * self.capacity:
+            # Drops the oldest bars once twice the capacity is kept,
+            # one copy per capacity appends
+            keep = max(self.capacity - size, 0)
+            for column, values in self.columns.items():
+                values[:keep] = values[self.count - keep:self.count]
+            self.count = keep
+            bars = {column: values[-self.capacity:]
+                    for column, values in bars.items()}
+            size = len(bars['time'])
+        needed = self.count + size
+        if needed > len(self.columns['time']):
+            length = max(needed, 2 * len(self.columns['time']))
+            for column, values in self.columns.items():
+                grown = numpy.empty(length)
+                grown[:self.count] = values[:self.count]
+                self.columns[column] = grown
+        for column, values in self.columns.items():
+            values[self.count:needed] = bars[column]
+        self.count = needed
+
+    def finish(
+            self: Any,
+            bars: dict
+    ) -> None:
+        self.append(bars)
+        for child in self.children:
+            child.extend(bars)
+
+    def add(
+            self: Any,
+            bar: dict
+    ) -> None:
+        """
+        :param bar: dict -> BAR_COLUMNS: floats, bar or price of the
+                            source, not older than the last one
+        :return: None
+        """
+        start = self.bucket(bar['time'])
+        current = self.current_bar
+        if current is not None and current['time'] == start:
+            self.current_bar = merge_bars(current, bar)
+            return
+        if current is not None:
+            self.finish({column: numpy.array([value])
+                         for column, value in current.items()})
+        self.current_bar = dict(bar, time=start)
+        for child in self.children:
+            child.advance(start)
+
+    def extend(
+            self: Any,
+            bars: dict
+    ) -> None:
+        """
+        :param bars: dict -> BAR_COLUMNS: numpy arrays of source bars
+                             or prices, oldest first, not older than
+                             the last one
+        :return: None
+        """
+        aggregated = aggregate_bars(bars, self.period, self.anchor)
+        if not len(aggregated['time']):
+            return
+        first = {column: values[0].item()
+                 for column, values in aggregated.items()}
+        current = self.current_bar
+        if current is not None and current['time'] == first['time']:
+            first = merge_bars(current, first)
+            for column, value in first.items():
+                aggregated[column][0] = value
+        elif current is not None:
+            self.finish({column: numpy.array([value])
+                         for column, value in current.items()})
+        self.finish({column: values[:-1]
+                     for column, values in aggregated.items()})
+        self.current_bar = {column: values[-1].item()
+                            for column, values in aggregated.items()}
+        for child in self.children:
+            child.advance(self.current_bar['time'])
+
+    def advance(
+            self: Any,
+            unix_time: float
+    ) -> None:
+        """
+        Finishes the current bar if its bucket ended by unix_time
+        :param unix_time: float -> epoch seconds
+        :return: None
+        """
+        current = self.current_bar
+        if current is not None and \
+                current['time'] + self.period <= unix_time:
+            self.current_bar = None
+            self.finish({column: numpy.array([value])
+                         for column, value in current.items()})
+        for child in self.children:
+            child.advance(unix_time)
+
+    def partial_bar(
+            self: Any
+    ) -> dict:
+        """
+        :return: dict -> bar of the current bucket with the unfinished
+                         bars of the sources, None without data
+        """
+        bar = self.current_bar
+        if self.source is None:
+            return None if bar is None else dict(bar)
+        source_bar = self.source.partial_bar()
+        if source_bar is not None:
+            source_bar['time'] = self.bucket(source_bar['time'])
+        return merge_bars(bar, source_bar) \
+            if bar is not None or source_bar is not None else None
+
+    def bars(
+            self: Any,
+            count: int = None,
+            include_current: bool = False
+    ) -> dict:
+        """
+        :param count: int -> number of the last finished bars,
+                             None for all
+        :param include_current: bool -> adds the unfinished bar of the
+                                        current bucket
+        :return: dict -> BAR_COLUMNS: numpy arrays, oldest first, read
+                         only views unless the current bar is added,
+                         copy them to keep them past the next bars
+        """
+        start = 0 if count is None else max(self.count - count, 0)
+        bars = {}
+        for column, values in self.columns.items():
+            view = values[start:self.count]
+            view.flags.writeable = False
+            bars[column] = view
+        partial = self.partial_bar() if include_current else None
+        if partial is not None:
+            bars = {column: numpy.append(values, partial[column])
+                    for column, values in bars.items()}
+        return bars
+
+    def bars_between(
+            self: Any,
+            start: float,
+            end: float,
+            count: int = None
+    ) -> dict:
+        """
+        Binary search of the bars, the current one included
+        :param start: float -> epoch seconds, included
+        :param end: float -> epoch seconds, excluded
+        :param count: int -> number of the last bars, None for all
+        :return: dict -> copies of the bars starting in [start, end)
+        """
+        partial = self.partial_bar()
+        if partial is not None and not start <= partial['time'] < end:
+            partial = None
+        finished = self.bars()
+        first, last = numpy.searchsorted(finished['time'], (start, end))
+        if count is not None:
+            first = max(first, last - count + (partial is not None))
+        bars = {column: numpy.array(values[first:last])
+                for column, values in finished.items()}
+        if partial is not None and count != 0:
+            bars = {column: numpy.append(values, partial[column])
+                    for column, values in bars.items()}
+        return bars
+
+
+class BarAggregator:
+    def __init__(
+            self: Any,
+            capacity: int = None
+    ) -> None:
+        """
+        :param capacity: int -> bars kept per series, None for all
+                                (backtests)
+        """
+        self.capacity = capacity
+        # (pair, period, anchor) -> BarSeries
+        self.series_by_key = {}
+        # pair -> epoch seconds of the last price recorded
+        self.last_times = {}
+        # Series are made and fed from the refresh threads
+        self.lock = threading.Lock()
+
+    def minute_series(
+            self: Any,
+            pair: str
+    ) -> BarSeries:
+        key = (pair, MINUTE, 0)
+        series = self.series_by_key.get(key)
+        if series is None:
+            series = self.series_by_key[key] = BarSeries(
+                MINUTE, 0, self.capacity)
+        return series
+
+    def series(
+            self: Any,
+            pair: str,
+            timeframe: Any,
+            anchor: int = 0
+    ) -> BarSeries:
+        """
+        :param pair: str -> pair
+        :param timeframe: str or int -> see timeframe_seconds()
+        :param anchor: int -> epoch seconds the bars are aligned to,
+                              see session_anchor()
+        :return: BarSeries -> the series of the timeframe, made from
+                              the largest lower one on first use
+        """
+        period = timeframe_seconds(timeframe)
+        with self.lock:
+            return self.get_series(pair, period, anchor % period)
+
+    def get_series(
+            self: Any,
+            pair: str,
+            period: int,
+            anchor: int
+    ) -> BarSeries:
+        if anchor % MINUTE:
+            raise ValueError(f'Anchor {anchor} is not on a minute')
+        if period == MINUTE:
+            return self.minute_series(pair)
+        series = self.series_by_key.get((pair, period, anchor))
+        if series is not None:
+            return series
+        self.minute_series(pair)
+        source = max(
+            (candidate for (series_pair, _, _), candidate
+             in self.series_by_key.items()
+             if series_pair == pair and candidate.period < period and
+             candidate.can_build(period, anchor)),
+            key=lambda candidate: candidate.period)
+        series = BarSeries(period, anchor, self.capacity, source)
+        series.extend(source.bars())
+        if source.current_bar is not None:
+            series.advance(source.current_bar['time'])
+        source.children.append(series)
+        self.series_by_key[(pair, period, anchor)] = series
+        return series
+
+    def record(
+            self: Any,
+            pair: str,
+            unix_time: float,
+            price: float
+    ) -> None:
+        """
+        :param pair: str -> pair of the price
+        :param unix_time: float -> epoch seconds of the price
+        :param price: float -> price, older prices than the last
+                               one are ignored
+        :return: None
+        """
+        with self.lock:
+            last_time = self.last_times.get(pair)
+            if last_time is not None and unix_time < last_time:
+                return
+            self.last_times[pair] = unix_time
+            self.minute_series(pair).add({
+                'time': unix_time, 'open': price, 'high': price,
+                'low': price, 'close': price, 'volume': 0.0})
+
+    def extend(
+            self: Any,
+            pair: str,
+            bars: dict
+    ) -> None:
+        """
+        :param pair: str -> pair of the bars
+        :param bars: dict -> BAR_COLUMNS: numpy arrays of minute bars
+                             or prices, oldest first
+        :return: None
+        """
+        with self.lock:
+            series = self.minute_series(pair)
+            current = series.current_bar
+            if current is not None:
+                first = numpy.searchsorted(bars['time'], current['time'])
+                bars = {column: values[first:]
+                        for column, values in bars.items()}
+            series.extend(bars)
+
+    def advance(
+            self: Any,
+            pair: str,
+            unix_time: float
+    ) -> None:
+        """
+        Finishes the bars of the pair whose bucket ended by unix_time
+        """
+        with self.lock:
+            self.minute_series(pair).advance(unix_time)
+
+    def window(
+            self: Any,
+            pair: str,
+            timeframe: Any,
+            anchor: int,
+            start: float,
+            end: float
+    ) -> dict:
+        """
+        Bars of the minutes of the pair in [start, end), the buckets
+        at the edges only hold their minutes in the window
+        :return: dict -> BAR_COLUMNS: numpy arrays, oldest first
+        """
+        series = self.series(pair, timeframe, anchor)
+        with self.lock:
+            minutes = self.minute_series(pair)
+            full_start = series.bucket(start)
+            if full_start < start:
+                full_start += series.period
+            full_end = series.bucket(end)
+            if full_start >= full_end:
+                return aggregate_bars(
+                    minutes.bars_between(start, end),
+                    series.period, series.anchor)
+            return concatenate_bars(
+                aggregate_bars(minutes.bars_between(start, full_start),
+                               series.period, series.anchor),
+                series.bars_between(full_start, full_end),
+                aggregate_bars(minutes.bars_between(full_end, end),
+                               series.period, series.anchor))
+
+    def last(
+            self: Any,
+            pair: str,
+            timeframe: Any,
+            anchor: int,
+            count: int,
+            end: float
+    ) -> dict:
+        """
+        The last count bars of the pair starting before end, the
+        last bucket only holds its minutes before end
+        :return: dict -> BAR_COLUMNS: numpy arrays, oldest first
+        """
+        series = self.series(pair, timeframe, anchor)
+        with self.lock:
+            last_start = series.bucket(end)
+            clipped = aggregate_bars(
+                self.minute_series(pair).bars_between(last_start, end),
+                series.period, series.anchor)
+            bars = concatenate_bars(
+                series.bars_between(
+                    -numpy.inf, last_start,
+                    max(count - len(clipped['time']), 0)),
+                clipped)
+        first = max(len(bars['time']) - count, 0)
+        return {column: values[first:] for column, values in bars.items()}
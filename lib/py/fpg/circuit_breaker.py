@@ -0,0 +1,289 @@
+"""
+Circuit breakers for the dependencies of the live tick.
+A breaker opens after failure_threshold failures in a row, its
+callers then fail fast with CircuitOpenError instead of waiting on
+the dependency. While a breaker is open its dependency is retried
+with an exponential backoff between the attempts, by its probe in
+the background (or by the next caller if it has no probe), and the
+breaker closes on the first success.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from lib.py.fpg.logger import (
+    get_module_logger
+)
+logger = get_module_logger('circuit_breaker')
+
+
+class CircuitOpenError(Exception):
+    def __init__(
+            self: Any,
+            breaker: Any
+    ) -> None:
+        super().__init__(f'{breaker.name} is unavailable')
+        self.breaker = breaker
+
+
+class CircuitBreaker:
+    def __init__(
+            self: Any,
+            name: str,
+            probe: Any = None,
+            failure_threshold: int = 2,
+            base_backoff: float = 1.0,
+            max_backoff: float = 60.0,
+            clock: Any = time.monotonic
+    ) -> None:
+        """
+        :param name: str -> dependency name, e.g. 'fetch_price BTC/USD'
+        :param probe: callable -> retries the dependency in the
+                                  background, None lets the first
+                                  caller after the backoff through
+        :param failure_threshold: int -> failures in a row that open it
+        :param base_backoff: float -> seconds before the first retry
+        :param max_backoff: float -> longest wait between retries
+        :param clock: callable -> monotonic time in seconds
+        """
+        self.name = name
+        self.probe = probe
+        self.failure_threshold = failure_threshold
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.is_open = False
+        self.retrying = False
+        self.failures = 0
+        self.backoff = base_backoff
+        self.retry_time = None
+        self.opened_time = None
+        # Metrics
+        self.outages = 0
+        self.outage_seconds = 0.0
+        self.longest_outage_seconds = 0.0
+        self.skipped_ticks = 0
+
+    def allow(
+            self: Any
+    ) -> bool:
+        """
+        :return: bool -> True if a request may be sent
+        """
+        if not self.is_open:
+            return True
+        if self.probe is not None:
+            return False
+        return self.start_retry()
+
+    def check(
+            self: Any
+    ) -> None:
+        """
+        :return: None -> raises CircuitOpenError if it is open
+        """
+        if not self.allow():
+            raise CircuitOpenError(self)
+
+    def start_retry(
+            self: Any
+    ) -> bool:
+        """
+        :return: bool -> True if the backoff passed and the
+                         caller should retry the dependency
+        """
+        with self.lock:
+            if not self.is_open or self.retrying or \
+                    self.clock() < self.retry_time:
+                return False
+            self.retrying = True
+            return True
+
+    def record_success(
+            self: Any
+    ) -> None:
+        with self.lock:
+            self.failures = 0
+            self.retrying = False
+            if not self.is_open:
+                return
+            outage = self.clock() - self.opened_time
+            self.outage_seconds += outage
+            self.longest_outage_seconds = max(
+                self.longest_outage_seconds, outage)
+            self.is_open = False
+            self.backoff = self.base_backoff
+        logger.info(f'{self.name} recovered after {outage:.1f} seconds')
+
+    def record_failure(
+            self: Any
+    ) -> None:
+        with self.lock:
+            self.failures += 1
+            self.retrying = False
+            now = self.clock()
+            if self.is_open:
+                self.backoff = min(self.max_backoff, self.backoff * 2)
+            elif self.failures >= self.failure_threshold:
+                self.is_open = True
+                self.opened_time = now
+                self.outages += 1
+                self.backoff = self.base_backoff
+                logger.warning(f'{self.name} failed {self.failures} '
+                               f'times, opening its circuit')
+            else:
+                return
+            self.retry_time = now + self.backoff
+
+    def record_skip(
+            self: Any
+    ) -> None:
+        """
+        Counts a tick the dependency's work was skipped in
+        :return: None
+        """
+        with self.lock:
+            self.skipped_ticks += 1
+
+    def stats(
+            self: Any
+    ) -> dict:
+        with self.lock:
+            outage_seconds = self.outage_seconds
+            if self.is_open:
+                outage_seconds += self.clock() - self.opened_time
+            return {
+                'open': self.is_open,
+                'outages': self.outages,
+                'outage_seconds': outage_seconds,
+                'longest_outage_seconds': self.longest_outage_seconds,
+                'skipped_ticks': self.skipped_ticks
+            }
+
+
+class CircuitBreakers:
+    def __init__(
+            self: Any,
+            failure_threshold: int = 2,
+            base_backoff: float = 1.0,
+            max_backoff: float = 60.0,
+            probe_workers: int = 4,
+            clock: Any = time.monotonic
+    ) -> None:
+        """
+        Breakers by name, created with these settings on first use
+        :param probe_workers: int -> threads running the probes
+        """
+        self.settings = {
+            'failure_threshold': failure_threshold,
+            'base_backoff': base_backoff,
+            'max_backoff': max_backoff,
+            'clock': clock
+        }
+        self.probe_workers = probe_workers
+        self.breakers = {}
+        self.lock = threading.Lock()
+        self.probe_pool = None
+
+    def get(
+            self: Any,
+            name: str,
+            probe: Any = None,
+            **settings: Any
+    ) -> CircuitBreaker:
+        """
+        :param name: str -> dependency name
+        :param probe: callable -> background retry of the dependency
+        :param settings: overrides of the default breaker settings
+        :return: CircuitBreaker
+        """
+        breaker = self.breakers.get(name)
+        if breaker is None:
+            with self.lock:
+                if name not in self.breakers:
+                    self.breakers[name] = CircuitBreaker(
+                        name, probe, **dict(self.settings, **settings))
+                breaker = self.breakers[name]
+        return breaker
+
+    def call(
+            self: Any,
+            name: str,
+            function: Any
+    ) -> Any:
+        """
+        Calls the function behind the breaker of the name, the
+        function is also the probe that retries it once it is open
+        :param name: str -> dependency name
+        :param function: callable -> request without arguments
+        :return: the result of the function
+        """
+        breaker = self.get(name, function)
+        breaker.check()
+        try:
+            result = function()
+        except Exception:
+            breaker.record_failure()
+            raise
+        breaker.record_success()
+        return result
+
+    def recover(
+            self: Any
+    ) -> None:
+        """
+        Starts the probes of the open breakers whose backoff passed,
+        they run in the background so the tick doesn't wait on them
+        :return: None
+        """
+        for breaker in list(self.breakers.values()):
+            if breaker.probe is not None and breaker.start_retry():
+                if self.probe_pool is None:
+                    self.probe_pool = ThreadPoolExecutor(
+                        max_workers=self.probe_workers,
+                        thread_name_prefix='circuit-probe')
+                self.probe_pool.submit(self.run_probe, breaker)
+
+    def run_probe(
+            self: Any,
+            breaker: CircuitBreaker
+    ) -> None:
+        try:
+            breaker.probe()
+        except Exception as exception:
+            logger.info(f'{breaker.name} still unavailable: '
+                        f'{exception!r}')
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+
+    def metrics(
+            self: Any
+    ) -> dict:
+        """
+        :return: dict -> name: outages, outage seconds and skipped
+                         ticks of the breakers that ever opened
+        """
+        return {
+            name: breaker.stats()
+            for name, breaker in list(self.breakers.items())
+            if breaker.outages
+        }
+
+
+shared_circuit_breakers = None
+shared_circuit_breakers_lock = threading.Lock()
+
+
+def get_circuit_breakers() -> CircuitBreakers:
+    """
+    :return: CircuitBreakers -> the breakers shared by every
+                                connector of the process
+    """
+    global shared_circuit_breakers
+    with shared_circuit_breakers_lock:
+        if shared_circuit_breakers is None:
+            shared_circuit_breakers = CircuitBreakers()
+        return shared_circuit_breakers
@@ -9,8 +9,38 @@ class Environment(IntEnum):
 class Constants:
 
     backtesting_results = "data/backtesting_results"
+    benchmark_history = "data/benchmark_history/history.jsonl"
     config_link = "data/config/debug.env"
     data_bundle_link = "data/data_bundles"
     database_link = "data/database/user_database.db"
     endpoint_link = "https://testing.api.floating.group/v0"
+    # bucket: (requests per second, burst), see rate_limiter.py
+    rate_limits = {
+        'fpg': (20.0, 40),
+        'exchange': (1.0, 10)
+    }
+    # cadence: seconds between the live price polls of a pair,
+    # 0 polls every tick, see polling_schedule.py
+    polling_intervals = {
+        'fast': 0.0,
+        'slow': 5.0,
+        'expired': 30.0
+    }
+    # Price polls per second of all the pairs together
+    polling_budget = 10.0
+    # A price within this fraction of a level an object waits
+    # for polls its pair fast
+    polling_near_fraction = 0.002
+    # Live prices and finished minute bars kept in memory
+    # per pair, see price_history.py
+    price_history_size = 14400
+    price_history_minute_bars = 1440
+    # Finished bars kept per pair and timeframe of the live
+    # bar aggregator, see bar_aggregation.py
+    live_bars_per_timeframe = 1440
+    # Seconds an ohlcv response of the exchange is reused
+    ohlcv_cache_seconds = 60.0
+    # Events waiting for each subscriber of the event bus
+    # before the publisher blocks/ drops, see event_bus.py
+    event_queue_size = 10000
     realtime_results = "data/strategies_csv"
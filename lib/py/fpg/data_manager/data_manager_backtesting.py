@@ -2,13 +2,27 @@
 Data Manager class for backtesting
 """
 import datetime
+import math
+import numpy
 import pandas as pd
 from typing import Any
 
-from lib.py.fpg.data_manager.data_manager_parent import DataHandlerSuper
+from lib.py.fpg.bar_aggregation import (
+    BarAggregator,
+    ohlcv_frame,
+    session_anchor,
+    timeframe_seconds
+)
+from lib.py.fpg.data_manager.data_manager_parent import (
+    DataHandlerSuper,
+    shares_ohlcv
+)
 from lib.py.fpg.logger import (
     get_module_logger
 )
+from lib.py.fpg.time_index import (
+    TimeIndex
+)
 from lib.py.fpg.utils import (
     exchange_open_time_hours_shift,
     set_backtesting_datetime_object,
@@ -37,7 +51,14 @@ class BacktestingDataManager(DataHandlerSuper):
         self.ticking_dfs = {}
         self.pairs = pairs
         self.current_index = 0
-        self.shifted_general_dfs = {}
+        # pair -> TimeIndex and read only numpy columns ('time',
+        # 'open', 'high', 'low', 'close', 'volume', 'price') of
+        # the minutes of the general df, for the as-of queries
+        self.time_indexes = {}
+        self.minute_columns = {}
+        # Bars of every timeframe, shared by the strategies
+        # of the backtest
+        self.bar_aggregator = BarAggregator()
         self.minutes = None
         self.initialize_backtesting()
 
@@ -69,6 +90,19 @@ class BacktestingDataManager(DataHandlerSuper):
             pair_general_df = pair_general_df.copy(deep=True)
             pair_general_df.reset_index()
             self.general_dfs[pair] = pair_general_df
+            unix_times = (pd.to_datetime(pair_general_df['datetime'],
+                                         utc=True) -
+                          pd.Timestamp(0, tz='UTC')).dt.total_seconds()
+            columns = {'time': unix_times.to_numpy()}
+            for column in ('open', 'high', 'low', 'close', 'volume',
+                           'price'):
+                columns[column] = pair_general_df[column].to_numpy(
+                    dtype=float, copy=True)
+            for values in columns.values():
+                values.flags.writeable = False
+            self.time_indexes[pair] = TimeIndex(columns['time'])
+            self.minute_columns[pair] = columns
+            self.bar_aggregator.extend(pair, columns)
             pair_ticking_df = pair_general_df[
                 pair_general_df['datetime'] >= self.start_date]
             pair_ticking_df = pair_ticking_df.copy(deep=True)
@@ -116,6 +150,7 @@ class BacktestingDataManager(DataHandlerSuper):
         """
         return self.ticking_dfs[pair].iloc[self.current_index]['price']
 
+    @shares_ohlcv
     def fetch_custom_ohlcv(
             self: Any,
             exchange_id: str,
@@ -135,53 +170,108 @@ class BacktestingDataManager(DataHandlerSuper):
         """
         since = get_datetime_from_epoch(
             since/1000, True) + datetime.timedelta(days=2)
-        try:
-            general_df = self.shifted_general_dfs[
-                pair][exchange_open_time]
-        except KeyError:
-            time_to_shift = exchange_open_time_hours_shift(
-                exchange_open_time
-            )
-            general_df = self.general_dfs[pair].copy(deep=True)
-            general_df['datetime'] = general_df[
-                'datetime'].apply(lambda date: date + time_to_shift)
-            shifted_dict = {exchange_open_time: general_df}
-            self.shifted_general_dfs[pair] = shifted_dict
         to = since + datetime.timedelta(days=days_back)
-        while to > self.current_time:
-            to -= datetime.timedelta(days=1)
-            since -= datetime.timedelta(days=1)
-        current_df = general_df[
-            (general_df['datetime'] >= since) &
-            (general_df['datetime'] <= to)
-        ]
-        current_df = current_df.copy(deep=True)
-        high = current_df.groupby(
-            current_df.datetime.dt.date)[['high']].max()
-        low = current_df.groupby(
-            current_df.datetime.dt.date)[['low']].min()
-        opens = current_df.groupby(
-            current_df.datetime.dt.date)[['open']].first()
-        close = current_df.groupby(
-            current_df.datetime.dt.date)[['close']].last()
-        volume = current_df.groupby(
-            current_df.datetime.dt.date)[['volume']].sum()
-        custom_high_low_df = \
-            high.join([low, opens, close, volume])
-        custom_high_low_df = \
-            custom_high_low_df.reset_index()
-        custom_high_low_df = \
-            custom_high_low_df.sort_values(by='datetime')
-        custom_high_low_df = custom_high_low_df.rename(columns={
-            'datetime': 'exchange_shift_time',
-            'high': 'h',
-            'low': 'l',
-            'close': 'c',
-            'open': 'o',
-            'volume': 'v'
-        })
-        custom_high_low_df['exchange_shift_time'] = \
-            custom_high_low_df['exchange_shift_time'].apply(
-            lambda date: datetime.datetime.combine(date, datetime.time(0, 0))
-        )
-        return custom_high_low_df
+        if to > self.current_time:
+            # The window is moved back by whole days until it
+            # ends by the current time
+            days = math.ceil(
+                (to - self.current_time) / datetime.timedelta(days=1))
+            to -= datetime.timedelta(days=days)
+            since -= datetime.timedelta(days=days)
+        # since and to are in the shifted time, the minutes
+        # from since to to included
+        time_to_shift = exchange_open_time_hours_shift(
+            exchange_open_time
+        ).total_seconds()
+        bars = self.bars_between(
+            pair,
+            since.timestamp() - time_to_shift,
+            numpy.nextafter(to.timestamp() - time_to_shift, numpy.inf),
+            '1d', exchange_open_time)
+        return ohlcv_frame(bars, exchange_open_time)
+
+    def price_at(
+            self: Any,
+            pair: str,
+            unix_time: float = None
+    ) -> float:
+        """
+        See DataHandlerSuper.price_at, never later than the
+        current minute
+        """
+        now = self.current_unix_time()
+        position = self.time_indexes[pair].as_of(
+            now if unix_time is None else unix_time, now)
+        if position < 0:
+            raise ValueError(f'No price of {pair} at {unix_time}')
+        return float(self.minute_columns[pair]['price'][position])
+
+    def bars_between(
+            self: Any,
+            pair: str,
+            start: float,
+            end: float,
+            timeframe: str = '1m',
+            exchange_open_time: str = None
+    ) -> dict:
+        """
+        See DataHandlerSuper.bars_between, the minute bars are read
+        only views of the data
+        """
+        now = self.current_unix_time()
+        if timeframe_seconds(timeframe) == 60:
+            rows = self.time_indexes[pair].between(start, end, now)
+            return {column: values[rows] for column, values
+                    in self.minute_columns[pair].items()
+                    if column != 'price'}
+        anchor = 0 if exchange_open_time is None else \
+            session_anchor(exchange_open_time)
+        return self.bar_aggregator.window(
+            pair, timeframe, anchor, start,
+            min(end, numpy.nextafter(now, numpy.inf)))
+
+    def last_bars(
+            self: Any,
+            pair: str,
+            count: int,
+            before: float = None,
+            timeframe: str = '1m',
+            exchange_open_time: str = None
+    ) -> dict:
+        """
+        See DataHandlerSuper.last_bars, the minute bars are read
+        only views of the data
+        """
+        now = self.current_unix_time()
+        if timeframe_seconds(timeframe) == 60:
+            rows = self.time_indexes[pair].last(count, before, now)
+            return {column: values[rows] for column, values
+                    in self.minute_columns[pair].items()
+                    if column != 'price'}
+        end = numpy.nextafter(now, numpy.inf)
+        anchor = 0 if exchange_open_time is None else \
+            session_anchor(exchange_open_time)
+        return self.bar_aggregator.last(
+            pair, timeframe, anchor, count,
+            end if before is None else min(before, end))
+
+    def fetch_bars(
+            self: Any,
+            pair: str,
+            timeframe: str,
+            exchange_open_time: str = None,
+            count: int = None
+    ) -> dict:
+        """
+        Bars of any timeframe up to the current minute included,
+        see LiveDataManager.fetch_bars
+        :return: dict -> 'time', 'open', 'high', 'low', 'close',
+                         'volume': numpy arrays, oldest first, the
+                         current bar last
+        """
+        end = numpy.nextafter(self.current_unix_time(), numpy.inf)
+        if count is not None:
+            return self.last_bars(pair, count + 1, end, timeframe,
+                                  exchange_open_time)
+        return self.bars_between(pair, 0.0, end, timeframe,
+                                 exchange_open_time)
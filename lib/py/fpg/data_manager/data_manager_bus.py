@@ -0,0 +1,186 @@
+"""
+Live data manager of a strategy process that gets its market data
+from the market data bus (see market_data_bus.py) instead of FPG's
+api. Balances and orders still go through the process's own keys.
+"""
+import threading
+import time
+from typing import Any
+
+from lib.py.fpg.data_manager.data_manager_live import (
+    LiveDataManager
+)
+from lib.py.fpg.data_manager.market_data import (
+    MarketData
+)
+from lib.py.fpg.market_data_bus import (
+    MarketDataSubscriber
+)
+
+
+class SubscribedMarketData(MarketData):
+    def __init__(
+            self: Any,
+            address: str,
+            pairs: Any = None,
+            database: Any = None,
+            wait_seconds: float = 5.0,
+            stale_seconds: float = 10.0,
+            context: Any = None
+    ) -> None:
+        """
+        Market data received from the bus
+        :param address: str -> zmq endpoint of the collector
+        :param pairs: iterable of pairs to subscribe to, None for all
+        :param database: Database the price history is seeded from
+        :param wait_seconds: float -> longest wait for the first price/
+                                      order book of a pair
+        :param stale_seconds: float -> a price older than this fails
+                                       like a failed request
+        :param context: zmq.Context, None for the shared one
+        """
+        super().__init__(None, database)
+        self.wait_seconds = wait_seconds
+        self.stale_seconds = stale_seconds
+        # pair -> (unix time, value) of the last message
+        self.latest_prices = {}
+        self.orderbooks = {}
+        # fetch_custom_ohlcv arguments -> data frame
+        self.session_bars = {}
+        self.updated = threading.Condition()
+        self.stats.update({'session_hits': 0})
+        self.subscriber = MarketDataSubscriber(
+            address, self.receive, pairs, context)
+        self.subscriber.start()
+
+    def receive(
+            self: Any,
+            kind: str,
+            pair: str,
+            value: tuple
+    ) -> None:
+        with self.updated:
+            if kind == 'price':
+                self.latest_prices[pair] = value
+                self.record_price(pair, *value)
+            elif kind == 'book':
+                self.orderbooks[pair] = value
+            else:
+                arguments, ohlcv = value
+                self.session_bars[arguments] = ohlcv
+            self.updated.notify_all()
+
+    def latest(
+            self: Any,
+            messages: dict,
+            pair: str,
+            name: str
+    ) -> tuple:
+        """
+        :return: tuple -> (unix time, value) of the last message of
+                          the pair, raises ConnectionError if there
+                          is none or it is stale
+        """
+        with self.updated:
+            if not self.updated.wait_for(
+                    lambda: pair in messages, self.wait_seconds):
+                raise ConnectionError(
+                    f'No {name} of {pair} on the market data bus')
+            unix_time, value = messages[pair]
+        age = time.time() - unix_time
+        if age > self.stale_seconds:
+            raise ConnectionError(
+                f'{name} of {pair} on the market data bus is '
+                f'{age:.0f} seconds old')
+        return unix_time, value
+
+    def due_pairs(
+            self: Any,
+            cadences: dict
+    ) -> set:
+        """
+        The prices come in without requests, every pair is due
+        """
+        self.polling_schedule.set_cadences(cadences)
+        return set(cadences)
+
+    def fetch_mid_price(
+            self: Any,
+            pair: str,
+            current_time: Any
+    ) -> float:
+        """
+        :return: float -> the last price of the pair on the bus,
+                          the same one for the whole tick
+        """
+        current_price = self.tick_prices.get(pair)
+        if current_price is None:
+            current_price = self.latest(
+                self.latest_prices, pair, 'price')[1]
+            self.tick_prices[pair] = current_price
+            self.polling_schedule.record_poll(pair, current_price)
+        return current_price
+
+    def fetch_orderbook(
+            self: Any,
+            pair: str
+    ) -> dict:
+        return self.latest(self.orderbooks, pair, 'order book')[1]
+
+    def fetch_custom_ohlcv(
+            self: Any,
+            exchange_id: str,
+            pair: str,
+            exchange_open_time: str,
+            since: Any,
+            days_back: int
+    ) -> Any:
+        """
+        Answers from the session bars of the bus, the sessions
+        the collector doesn't publish are downloaded here
+        """
+        key = (exchange_id, pair, exchange_open_time, since, days_back)
+        with self.updated:
+            ohlcv = self.session_bars.get(key)
+        if ohlcv is not None:
+            self.stats['session_hits'] += 1
+            return ohlcv.copy()
+        return super().fetch_custom_ohlcv(
+            exchange_id, pair, exchange_open_time, since, days_back)
+
+    def close(
+            self: Any
+    ) -> None:
+        self.subscriber.stop()
+
+
+class BusDataManager(LiveDataManager):
+    def __init__(
+            self: Any,
+            fpg_connector: Any,
+            database: Any,
+            balance_reconcile_seconds: float = 60.0,
+            address: str = None,
+            pairs: Any = None
+    ) -> None:
+        """
+        :param fpg_connector: FPG_Connector of the account
+        :param address: str -> zmq endpoint of the collector
+        :param pairs: iterable of pairs to subscribe to, None for all
+        """
+        super().__init__(
+            fpg_connector, database, balance_reconcile_seconds,
+            SubscribedMarketData(address, pairs, database))
+        self.owns_market_data = True
+
+    def fetch_orderbook(
+            self: Any,
+            pair: str
+    ) -> dict:
+        """
+        :param pair: str -> orderbook pair
+        :return: dictionary -> last snapshot of the bus, keys (str):
+                               'asks', 'bids', values (list): ordered
+                               list of price and amount
+        """
+        return self.market_data.fetch_orderbook(pair)
@@ -1,22 +1,27 @@
 """
 Actual method that fetches data for the client
 """
-import ccxt
 import datetime
-import pandas as pd
+import numpy
 import pytz
 from typing import Any
 
+from lib.py.fpg.balance_cache import (
+    BalanceCache
+)
+from lib.py.fpg.bar_aggregation import (
+    session_anchor
+)
 from lib.py.fpg.data_manager.data_manager_parent import (
-    DataHandlerSuper
+    DataHandlerSuper,
+    shares_ohlcv
+)
+from lib.py.fpg.data_manager.market_data import (
+    MarketData
 )
 from lib.py.fpg.logger import (
     get_module_logger
 )
-from lib.py.fpg.utils import (
-    get_datetime_from_epoch,
-    exchange_open_time_hours_shift
-)
 logger = get_module_logger('data')
 
 
@@ -24,7 +29,9 @@ class LiveDataManager(DataHandlerSuper):
     def __init__(
             self: Any,
             fpg_connector: Any,
-            database: Any
+            database: Any,
+            balance_reconcile_seconds: float = 60.0,
+            market_data: Any = None
     ) -> None:
         """
         This class will handle the following connections:
@@ -33,8 +40,44 @@ class LiveDataManager(DataHandlerSuper):
         2. Connecting to ccxt based on a given exchange
            and fetching ohlcv
         :param fpg_connector: FPG_Connector class object
+        :param balance_reconcile_seconds: float -> seconds the cached
+                                           balance is used before it
+                                           is read again
+        :param market_data: MarketData shared with other portfolios,
+                            None to make one of our own
         """
         super().__init__(fpg_connector, database)
+        self.balance_cache = BalanceCache(
+            self.fetch_account_balance, balance_reconcile_seconds)
+        # The prices are polled by the market data, its
+        # owner starts its ticks
+        self.owns_market_data = market_data is None
+        if market_data is None:
+            market_data = MarketData(fpg_connector, database)
+        self.market_data = market_data
+        self.polling_schedule = market_data.polling_schedule
+        # Recent prices and minute bars of every pair
+        self.price_history = market_data.price_history
+
+    def start_tick(
+            self: Any
+    ) -> None:
+        """
+        Prices are polled at most once per pair and tick
+        :return: None
+        """
+        if self.owns_market_data:
+            self.market_data.start_tick()
+
+    def due_pairs(
+            self: Any,
+            cadences: dict
+    ) -> set:
+        """
+        :param cadences: dict -> pair: polling cadence of every pair
+        :return: set -> pairs whose price should be polled this tick
+        """
+        return self.market_data.due_pairs(cadences)
 
     def fetch_current_time(
             self: Any
@@ -51,15 +94,27 @@ class LiveDataManager(DataHandlerSuper):
     ) -> float:
         """
         :param pair: str -> pair to fetch mid price for
-        :return: float -> the current mid price for the pair given
+        :return: float -> the current mid price for the pair given,
+                          fetched once per tick
+        """
+        current_price = self.market_data.fetch_mid_price(
+            pair, self.current_time)
+        self.current_price = current_price
+        return current_price
+
+    def seed_price_history(
+            self: Any,
+            pairs: Any
+    ) -> None:
+        """
+        Fills the price history of the pairs from
+        the prices stored in the database
+        :param pairs: iterable of pairs traded
+        :return: None
         """
-        logger.info(f'fetched mid price for {pair}')
-        self.current_price = self.fpg_connector.fetch_price(pair)
-        self.database.insert_coin_data(
-            pair, self.current_price, self.current_time
-        )
-        return self.current_price
+        self.market_data.seed_price_history(pairs)
 
+    @shares_ohlcv
     def fetch_custom_ohlcv(
             self: Any,
             exchange_id: str,
@@ -91,60 +146,95 @@ class LiveDataManager(DataHandlerSuper):
                  on the exchange open time. The exchange open time
                  specified will be set to midnight (all of the data
                  will shift).
+                 Responses are cached by the market data.
+        """
+        return self.market_data.fetch_custom_ohlcv(
+            exchange_id, pair, exchange_open_time, since, days_back)
+
+    def fetch_bars(
+            self: Any,
+            pair: str,
+            timeframe: str,
+            exchange_open_time: str = None,
+            count: int = None
+    ) -> dict:
         """
-        # Generating exchange object
-        exchange_call = getattr(ccxt, exchange_id)
-        exchange_object = exchange_call()
-
-        # Calculating how many hours we need to shift
-        # the data
-        time_to_shift = exchange_open_time_hours_shift(
-            exchange_open_time
-        )
-        # Fetching the high low data
-        high_low_data = exchange_object.fetch_ohlcv(
-                pair,
-                since=since,
-                timeframe='1h'
-        )
-        logger.info(f'fetched ohlcv for '
-                    f'{pair} in exchange {exchange_id}')
-        high_low_df = pd.DataFrame.from_records(
-            high_low_data, columns=["timestamp", "o", "h", "l", "c", "v"])
-        high_low_df['exchange_shift_time'] = high_low_df['timestamp'].apply(
-            lambda time: (
-                    get_datetime_from_epoch(time/1000, True) + time_to_shift)
-        )
-        # high_low_df['exchange_shift_time'] = high_low_df['datetime'].apply(
-        #     lambda date: date + time_to_shift
-        # )
-        high = high_low_df.groupby(
-            high_low_df.exchange_shift_time.dt.date)[['h']].max()
-        low = high_low_df.groupby(
-            high_low_df.exchange_shift_time.dt.date)[['l']].min()
-        opens = high_low_df.groupby(
-            high_low_df.exchange_shift_time.dt.date)[['o']].first()
-        close = high_low_df.groupby(
-            high_low_df.exchange_shift_time.dt.date)[['c']].last()
-        volume = high_low_df.groupby(
-            high_low_df.exchange_shift_time.dt.date)[['v']].sum()
-        custom_high_low_df = high.join([low, opens, close, volume])
-        custom_high_low_df = custom_high_low_df.reset_index()
-        custom_high_low_df = custom_high_low_df.sort_values(
-            by='exchange_shift_time')
-        custom_high_low_df['exchange_shift_time'] = \
-            custom_high_low_df['exchange_shift_time'].apply(
-            lambda date: datetime.datetime.combine(
-                date, datetime.time(0, 0))
-        )
-        return custom_high_low_df
+        Bars of any timeframe built from the polled prices, shared
+        by the portfolios of the market data
+        :param pair: str -> pair
+        :param timeframe: str -> '1m', '5m', '1h', '4h', '1d'
+        :param exchange_open_time: str -> "18:00:00", open time the
+                                          bars are aligned to, None
+                                          for the start of the day
+        :param count: int -> number of the last finished bars,
+                             None for all
+        :return: dict -> 'time' (epoch seconds of the start), 'open',
+                         'high', 'low', 'close', 'volume': numpy
+                         arrays, oldest first, the current bar last
+        """
+        anchor = 0 if exchange_open_time is None else \
+            session_anchor(exchange_open_time)
+        return self.market_data.fetch_bars(pair, timeframe, anchor, count)
+
+    def price_at(
+            self: Any,
+            pair: str,
+            unix_time: float = None
+    ) -> float:
+        """
+        See DataHandlerSuper.price_at, from the price history
+        """
+        now = self.current_unix_time()
+        unix_time = now if unix_time is None else min(unix_time, now)
+        times, prices = self.price_history.prices(pair)
+        position = numpy.searchsorted(times, unix_time, side='right') - 1
+        if position < 0:
+            raise ValueError(f'No price of {pair} at {unix_time}')
+        return float(prices[position])
+
+    def bars_between(
+            self: Any,
+            pair: str,
+            start: float,
+            end: float,
+            timeframe: str = '1m',
+            exchange_open_time: str = None
+    ) -> dict:
+        """
+        See DataHandlerSuper.bars_between, from the bars built
+        from the polled prices
+        """
+        anchor = 0 if exchange_open_time is None else \
+            session_anchor(exchange_open_time)
+        end = min(end, numpy.nextafter(self.current_unix_time(), numpy.inf))
+        return self.market_data.bar_aggregator.window(
+            pair, timeframe, anchor, start, end)
+
+    def last_bars(
+            self: Any,
+            pair: str,
+            count: int,
+            before: float = None,
+            timeframe: str = '1m',
+            exchange_open_time: str = None
+    ) -> dict:
+        """
+        See DataHandlerSuper.last_bars
+        """
+        anchor = 0 if exchange_open_time is None else \
+            session_anchor(exchange_open_time)
+        end = numpy.nextafter(self.current_unix_time(), numpy.inf)
+        return self.market_data.bar_aggregator.last(
+            pair, timeframe, anchor, count,
+            end if before is None else min(before, end))
 
     def fetch_balance(
             self: Any,
             coins: list
     ) -> dict:
         """
-        Will return the FPG's account balance in every coin
+        Will return the FPG's account balance in every coin,
+        from the balance cache
         :param coins: list of coins trading for example ['BTC','ETH']
         :return: dict -> balance in every coin.
                          keys: str -> coin name
@@ -153,10 +243,44 @@ class LiveDataManager(DataHandlerSuper):
                          additional key named 'succeeded' will return and will
                          indicate if the request was successful
         """
+        return self.balance_cache.get(coins)
+
+    def fetch_account_balance(
+            self: Any,
+            coins: list
+    ) -> dict:
+        """
+        Requests the balance from FPG's endpoint
+        :param coins: list of coins trading for example ['BTC','ETH']
+        :return: dict -> balance in every coin and 'succeeded'
+        """
+        if isinstance(coins, set):
+            coins = list(coins)
         logger.info("fetching balance for account")
         balance = self.fpg_connector.fetch_balance(coins)
         return balance
 
+    def record_fill(
+            self: Any,
+            pair: str,
+            side: str,
+            amount: float,
+            fill: dict
+    ) -> None:
+        """
+        Updates the cached balance after one of our trades
+        :param pair: str -> pair traded
+        :param side: str -> 'buy'/ 'sell'
+        :param amount: float -> amount ordered
+        :param fill: dict -> execution response of FPG's endpoint,
+                             None if the result of the order is unknown
+        :return: None
+        """
+        if fill is None:
+            self.balance_cache.invalidate()
+        else:
+            self.balance_cache.apply_fill(pair, side, amount, fill)
+
     def fetch_orderbook(
             self: Any,
             pair: str
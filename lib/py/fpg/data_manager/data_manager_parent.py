@@ -1,8 +1,51 @@
 """
 Super class for the data handler
 """
+import contextlib
+import functools
+import threading
+import time
 from typing import Any
 
+from lib.py.fpg.utils import (
+    get_epoch_from_datetime
+)
+
+
+def shares_ohlcv(
+        fetch_custom_ohlcv: Any
+) -> Any:
+    """
+    Decorates the fetch_custom_ohlcv of a data manager, so its
+    calls from a thread inside shared_ohlcv() are answered from
+    the memo of that call
+    :param fetch_custom_ohlcv: function -> fetch_custom_ohlcv of
+                                           a data manager class
+    :return: function -> the decorated fetch_custom_ohlcv
+    """
+    @functools.wraps(fetch_custom_ohlcv)
+    def fetch_shared_custom_ohlcv(
+            self: Any,
+            exchange_id: str,
+            pair: str,
+            exchange_open_time: str,
+            since: Any,
+            days_back: int
+    ) -> Any:
+        with self.shared_ohlcv_lock:
+            memo = self.shared_ohlcv_memos.get(threading.get_ident())
+        if memo is None:
+            return fetch_custom_ohlcv(
+                self, exchange_id, pair, exchange_open_time, since,
+                days_back)
+        key = (exchange_id, pair, exchange_open_time, since, days_back)
+        if key not in memo:
+            memo[key] = fetch_custom_ohlcv(
+                self, exchange_id, pair, exchange_open_time, since,
+                days_back)
+        return memo[key].copy()
+    return fetch_shared_custom_ohlcv
+
 
 class DataHandlerSuper:
     def __init__(
@@ -14,3 +57,120 @@ class DataHandlerSuper:
         self.database = database
         self.current_time = None
         self.current_price = None
+        # Memo of the shared_ohlcv() call every thread is in,
+        # other threads keep fetching on their own
+        self.shared_ohlcv_memos = {}
+        self.shared_ohlcv_lock = threading.Lock()
+
+    def start_tick(
+            self: Any
+    ) -> None:
+        """
+        Called by the portfolio at the start of every tick
+        :return: None
+        """
+
+    def due_pairs(
+            self: Any,
+            cadences: dict
+    ) -> set or None:
+        """
+        :param cadences: dict -> pair: polling cadence of every pair
+        :return: set -> pairs whose price should be polled this
+                        tick, None if every pair is polled
+        """
+        return None
+
+    def current_unix_time(
+            self: Any
+    ) -> float:
+        """
+        :return: float -> epoch seconds of the current time, the
+                          limit of the as-of queries
+        """
+        if self.current_time is None:
+            return time.time()
+        return get_epoch_from_datetime(self.current_time)
+
+    def price_at(
+            self: Any,
+            pair: str,
+            unix_time: float = None
+    ) -> float:
+        """
+        :param pair: str -> pair
+        :param unix_time: float -> epoch seconds, None for now, a
+                                   later time than now is read as now
+        :return: float -> last price of the pair at or before the time,
+                          raises ValueError if there is none
+        """
+        raise NotImplementedError
+
+    def bars_between(
+            self: Any,
+            pair: str,
+            start: float,
+            end: float,
+            timeframe: str = '1m',
+            exchange_open_time: str = None
+    ) -> dict:
+        """
+        :param pair: str -> pair
+        :param start: float -> epoch seconds, included
+        :param end: float -> epoch seconds, excluded, the bars stop
+                             at the current minute whatever the end
+        :param timeframe: str -> '1m', '5m', '15m', '1h', '4h', '1d'
+        :param exchange_open_time: str -> "18:00:00", open time the
+                                          bars are aligned to, None
+                                          for the start of the day
+        :return: dict -> 'time' (epoch seconds of the start), 'open',
+                         'high', 'low', 'close', 'volume': numpy
+                         arrays of the minutes in [start, end), oldest
+                         first, the buckets at the edges only hold
+                         their minutes in the window
+        """
+        raise NotImplementedError
+
+    def last_bars(
+            self: Any,
+            pair: str,
+            count: int,
+            before: float = None,
+            timeframe: str = '1m',
+            exchange_open_time: str = None
+    ) -> dict:
+        """
+        The last bars of a pair, see bars_between() for the
+        other parameters
+        :param count: int -> number of bars
+        :param before: float -> epoch seconds the bars start before,
+                                None for up to the current minute
+                                included
+        :return: dict -> the last count bars with data of
+                         bars_between(pair, -inf, before)
+        """
+        raise NotImplementedError
+
+    @contextlib.contextmanager
+    def shared_ohlcv(
+            self: Any
+    ) -> Any:
+        """
+        While active, the fetch_custom_ohlcv calls of this thread
+        with the same arguments are answered from one request, used
+        when many objects of a pair fetch their data together.
+        The data manager classes opt in with @shares_ohlcv.
+        :return: context manager
+        """
+        thread_id = threading.get_ident()
+        with self.shared_ohlcv_lock:
+            outer_memo = self.shared_ohlcv_memos.get(thread_id)
+            self.shared_ohlcv_memos[thread_id] = {}
+        try:
+            yield
+        finally:
+            with self.shared_ohlcv_lock:
+                if outer_memo is None:
+                    del self.shared_ohlcv_memos[thread_id]
+                else:
+                    self.shared_ohlcv_memos[thread_id] = outer_memo
@@ -0,0 +1,334 @@
+"""
+Market data of the live portfolios: mid prices, their history and
+the ohlcv of the exchanges. It holds nothing of an account, so the
+portfolios of one process can share it (see PortfolioHost), every
+price is then requested once per tick whatever the number of
+portfolios trading its pair, and every ohlcv once per cache period.
+"""
+import numpy
+import threading
+import time
+from typing import Any
+
+from lib.py.fpg.bar_aggregation import (
+    BarAggregator,
+    aggregate_bars,
+    ohlcv_frame,
+    session_anchor
+)
+from lib.py.fpg.constants import (
+    Constants
+)
+from lib.py.fpg.event_bus import (
+    PriceTick
+)
+from lib.py.fpg.logger import (
+    get_module_logger
+)
+from lib.py.fpg.polling_schedule import (
+    PollingSchedule
+)
+from lib.py.fpg.price_history import (
+    PriceHistory
+)
+from lib.py.fpg.rate_limiter import (
+    get_rate_limiter
+)
+from lib.py.fpg.utils import (
+    get_epoch_from_datetime
+)
+logger = get_module_logger('data')
+
+
+class MarketData:
+    # Polling cadences from the fastest
+    cadence_order = {'fast': 0, 'slow': 1, 'expired': 2}
+
+    def __init__(
+            self: Any,
+            fpg_connector: Any,
+            database: Any,
+            ohlcv_cache_seconds: float = None,
+            clock: Any = time.monotonic
+    ) -> None:
+        """
+        :param fpg_connector: FPG_Connector class object
+        :param database: Database the prices are stored in
+        :param ohlcv_cache_seconds: float -> seconds an ohlcv response
+                                             is reused, defaults to
+                                             Constants
+        :param clock: callable -> monotonic time in seconds
+        """
+        self.fpg_connector = fpg_connector
+        self.database = database
+        # Prices are fetched concurrently, they are
+        # inserted one at a time
+        self.database_lock = threading.Lock()
+        # With an event bus the prices are stored by its
+        # subscriber instead of the tick, see attach_event_bus()
+        self.event_bus = None
+        self.clock = clock
+        self.polling_schedule = PollingSchedule(
+            dict(Constants.polling_intervals), Constants.polling_budget)
+        # pair -> price polled in the current tick
+        self.tick_prices = {}
+        # pair -> fastest cadence asked for in the current tick
+        self.tick_cadences = {}
+        self.lock = threading.Lock()
+        # pair -> lock held while its price is fetched, concurrent
+        # fetches of a pair wait for one request
+        self.price_locks = {}
+        # Recent prices and minute bars of every pair
+        self.price_history = PriceHistory(
+            Constants.price_history_size,
+            Constants.price_history_minute_bars)
+        # Bars of every timeframe asked for, built from the prices
+        self.bar_aggregator = BarAggregator(
+            Constants.live_bars_per_timeframe)
+        self.seeded_pairs = set()
+        self.ohlcv_cache_seconds = Constants.ohlcv_cache_seconds \
+            if ohlcv_cache_seconds is None else ohlcv_cache_seconds
+        # ohlcv arguments -> (time fetched, data frame)
+        self.ohlcv_cache = {}
+        # ohlcv arguments -> lock held while it is downloaded
+        self.ohlcv_locks = {}
+        self.stats = {'price_requests': 0, 'ohlcv_requests': 0,
+                      'ohlcv_cache_hits': 0}
+
+    def start_tick(
+            self: Any
+    ) -> None:
+        """
+        Prices are polled at most once per pair and tick,
+        called once per tick by the owner of the market data
+        :return: None
+        """
+        with self.lock:
+            self.tick_prices = {}
+            self.tick_cadences = {}
+        self.polling_schedule.start_tick()
+
+    def due_pairs(
+            self: Any,
+            cadences: dict
+    ) -> set:
+        """
+        The cadences of the portfolios sharing a pair are merged,
+        the fastest one sets its polling
+        :param cadences: dict -> pair: polling cadence of every pair
+                                 of a portfolio
+        :return: set -> its pairs to poll this tick, the pairs already
+                        polled this tick are always due
+        """
+        with self.lock:
+            for pair, cadence in cadences.items():
+                current = self.tick_cadences.get(pair)
+                if current is None or self.cadence_order[cadence] < \
+                        self.cadence_order[current]:
+                    self.tick_cadences[pair] = cadence
+            self.polling_schedule.set_cadences(dict(self.tick_cadences))
+            return {pair for pair in cadences
+                    if pair in self.tick_prices or
+                    self.polling_schedule.is_due(pair)}
+
+    def fetch_mid_price(
+            self: Any,
+            pair: str,
+            current_time: Any
+    ) -> float:
+        """
+        :param pair: str -> pair to fetch mid price for
+        :param current_time: datetime object -> time of the tick
+        :return: float -> the current mid price, fetched once per tick
+                          even by concurrent callers
+        """
+        with self.lock:
+            lock = self.price_locks.setdefault(pair, threading.Lock())
+        with lock:
+            with self.lock:
+                current_price = self.tick_prices.get(pair)
+            if current_price is not None:
+                return current_price
+            logger.info(f'fetched mid price for {pair}')
+            current_price = self.fpg_connector.fetch_price(pair)
+            with self.lock:
+                self.stats['price_requests'] += 1
+                self.tick_prices[pair] = current_price
+                self.polling_schedule.record_poll(pair, current_price)
+        if current_time is not None:
+            self.record_price(
+                pair, get_epoch_from_datetime(current_time), current_price)
+        if self.event_bus is not None:
+            self.event_bus.publish(
+                PriceTick(pair, current_price, current_time))
+        else:
+            self.save_price_tick(
+                PriceTick(pair, current_price, current_time))
+        return current_price
+
+    def record_price(
+            self: Any,
+            pair: str,
+            unix_time: float,
+            price: float
+    ) -> None:
+        """
+        Adds a price to the price history and the bars of the pair
+        """
+        self.price_history.record(pair, unix_time, price)
+        self.bar_aggregator.record(pair, unix_time, price)
+
+    def fetch_bars(
+            self: Any,
+            pair: str,
+            timeframe: Any,
+            anchor: int = 0,
+            count: int = None
+    ) -> dict:
+        """
+        :param pair: str -> pair
+        :param timeframe: str -> '1m', '5m', '1h', '4h', '1d'
+        :param anchor: int -> epoch seconds the bars are aligned to
+        :param count: int -> number of the last finished bars
+        :return: dict -> 'time', 'open', 'high', 'low', 'close',
+                         'volume': numpy arrays of the bars built from
+                         the polled prices, the current one last
+        """
+        return self.bar_aggregator.series(pair, timeframe, anchor).bars(
+            count, include_current=True)
+
+    def attach_event_bus(
+            self: Any,
+            event_bus: Any
+    ) -> None:
+        """
+        Publishes the polled prices on the event bus, they are
+        stored in the database by a subscriber that drops them
+        rather than block the tick
+        :param event_bus: EventBus of the portfolio
+        :return: None
+        """
+        event_bus.subscribe('coin_data', self.save_price_tick,
+                            (PriceTick,), block=False)
+        self.event_bus = event_bus
+
+    def save_price_tick(
+            self: Any,
+            price_tick: Any
+    ) -> None:
+        with self.database_lock:
+            self.database.insert_coin_data(
+                price_tick.pair, price_tick.price, price_tick.time
+            )
+
+    def seed_price_history(
+            self: Any,
+            pairs: Any
+    ) -> None:
+        """
+        Fills the price history of the pairs not seeded yet
+        from the prices stored in the database
+        :param pairs: iterable of pairs traded
+        :return: None
+        """
+        for pair in pairs:
+            if pair in self.seeded_pairs:
+                continue
+            self.seeded_pairs.add(pair)
+            with self.database_lock:
+                rows = self.database.retrieve_coin_data(
+                    pair, Constants.price_history_size)
+            if rows:
+                unix_times, prices = numpy.array(rows, dtype=float).T
+                self.price_history.seed(pair, unix_times, prices)
+                self.bar_aggregator.extend(pair, {
+                    'time': unix_times, 'open': prices, 'high': prices,
+                    'low': prices, 'close': prices,
+                    'volume': numpy.zeros(len(prices))})
+                logger.info(f'seeded {len(rows)} prices of {pair}')
+
+    def fetch_custom_ohlcv(
+            self: Any,
+            exchange_id: str,
+            pair: str,
+            exchange_open_time: str,
+            since: Any,
+            days_back: int
+    ) -> Any:
+        """
+        Daily ohlcv with a custom exchange open time, see
+        LiveDataManager.fetch_custom_ohlcv. A response is reused for
+        the same arguments for ohlcv_cache_seconds, concurrent
+        requests of the same arguments wait for one download.
+        :return: pandas data frame, a copy of the cached one
+        """
+        key = (exchange_id, pair, exchange_open_time, since, days_back)
+        with self.lock:
+            lock = self.ohlcv_locks.setdefault(key, threading.Lock())
+        with lock:
+            cached = self.ohlcv_cache.get(key)
+            if cached is not None and \
+                    self.clock() - cached[0] < self.ohlcv_cache_seconds:
+                with self.lock:
+                    self.stats['ohlcv_cache_hits'] += 1
+                return cached[1].copy()
+            ohlcv = self.download_ohlcv(
+                exchange_id, pair, exchange_open_time, since, days_back)
+            now = self.clock()
+            with self.lock:
+                self.stats['ohlcv_requests'] += 1
+                for old_key, (fetch_time, _) in \
+                        list(self.ohlcv_cache.items()):
+                    if now - fetch_time >= self.ohlcv_cache_seconds:
+                        del self.ohlcv_cache[old_key]
+                        self.ohlcv_locks.pop(old_key, None)
+                self.ohlcv_cache[key] = (now, ohlcv)
+        return ohlcv.copy()
+
+    def download_ohlcv(
+            self: Any,
+            exchange_id: str,
+            pair: str,
+            exchange_open_time: str,
+            since: Any,
+            days_back: int
+    ) -> Any:
+        """
+        Fetches the hourly ohlcv from the exchange through ccxt
+        and aggregates it into days starting at the exchange
+        open time
+        """
+        # ccxt takes longer to import than the rest of the
+        # system, it is only loaded once an ohlcv is downloaded
+        import ccxt
+        # Generating exchange object
+        exchange_call = getattr(ccxt, exchange_id)
+        exchange_object = exchange_call()
+
+        # Fetching the high low data
+        get_rate_limiter().acquire('fetch_ohlcv')
+        high_low_data = exchange_object.fetch_ohlcv(
+                pair,
+                since=since,
+                timeframe='1h'
+        )
+        logger.info(f'fetched ohlcv for '
+                    f'{pair} in exchange {exchange_id}')
+        hours = numpy.array(high_low_data, dtype=float).reshape(-1, 6)
+        days = aggregate_bars({
+            'time': hours[:, 0] / 1000,
+            'open': hours[:, 1],
+            'high': hours[:, 2],
+            'low': hours[:, 3],
+            'close': hours[:, 4],
+            'volume': hours[:, 5]
+        }, 86400, session_anchor(exchange_open_time))
+        return ohlcv_frame(days, exchange_open_time)
+
+    def metrics(
+            self: Any
+    ) -> dict:
+        """
+        :return: dict -> requests made, ohlcv cache hits and polling
+        """
+        return dict(self.stats, polling=self.polling_schedule.metrics())
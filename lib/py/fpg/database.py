@@ -3,6 +3,7 @@ Module to create and handle database
 """
 import json
 import sqlite3
+import threading
 from typing import Any
 from lib.py.fpg.constants import (
     Constants
@@ -17,10 +18,11 @@ class Database:
             self
     ) -> None:
         self.coins_tables = {}
-        self.connection = None
+        # Every thread has its own connection, the portfolio's
+        # events are written on the event bus threads
+        self.local = threading.local()
         self.strategy_objects_table = None
         self.trading_history_table = None
-        self.crsr = None
         self.trade_history_columns = [
             'trade_id',
             'trade_time',
@@ -35,6 +37,32 @@ class Database:
             'portfolio_balance'
         ]
 
+    @property
+    def connection(
+            self: Any
+    ) -> Any:
+        return getattr(self.local, 'connection', None)
+
+    @connection.setter
+    def connection(
+            self: Any,
+            connection: Any
+    ) -> None:
+        self.local.connection = connection
+
+    @property
+    def crsr(
+            self: Any
+    ) -> Any:
+        return getattr(self.local, 'crsr', None)
+
+    @crsr.setter
+    def crsr(
+            self: Any,
+            crsr: Any
+    ) -> None:
+        self.local.crsr = crsr
+
     def connect(
             self: Any,
             query: bool = False
@@ -173,6 +201,42 @@ class Database:
         )
         self.close_connection()
 
+    def retrieve_coin_data(
+            self: Any,
+            pair: str,
+            limit: int
+    ) -> list:
+        """
+        Will query the last prices stored for the pair
+        :param pair: str -> pair traded
+        :param limit: int -> number of the last prices
+        :return: list of (unix_time, price) rows, oldest first,
+                 empty if the pair has no table
+        """
+        db_pair = pair.replace("/", "_")
+        self.connect()
+        self.execute(
+            command="SELECT name FROM sqlite_master "
+                    "WHERE type = 'table' AND name = ?",
+            values=(db_pair,)
+        )
+        if self.crsr.fetchone() is None:
+            self.close_connection()
+            return []
+        command = f"""
+        SELECT unix_time, price FROM {db_pair}
+        ORDER BY unix_time DESC
+        LIMIT ?
+        """
+        self.execute(
+            command=command,
+            values=(limit,)
+        )
+        rows = self.crsr.fetchall()
+        self.close_connection()
+        rows.reverse()
+        return rows
+
     def insert_new_strategy(
             self: Any,
             strategy_object
@@ -182,28 +246,41 @@ class Database:
         :param strategy_object:
         :return: None
         """
+        self.insert_new_strategies([strategy_object])
+
+    def insert_new_strategies(
+            self: Any,
+            strategy_objects: list
+    ) -> None:
+        """
+        Will write several new strategy objects to the
+        table in one transaction
+        :param strategy_objects: list of strategy objects
+        :return: None
+        """
         self.connect()
-        values_to_insert = (
-            strategy_object.strategy_id,
-            strategy_object.strategy_name,
-            strategy_object.pair,
-            get_epoch_from_datetime(strategy_object.creation_time),
-            strategy_object.strategy_position,
-            strategy_object.amount,
-            strategy_object.is_expired,
-            strategy_object.live_position,
-            strategy_object.days_passed,
-            strategy_object.is_leverage,
-            json.dumps(strategy_object.create_dictionary_for_db())
-        )
+        values_to_insert = [
+            (
+                strategy_object.strategy_id,
+                strategy_object.strategy_name,
+                strategy_object.pair,
+                get_epoch_from_datetime(strategy_object.creation_time),
+                strategy_object.strategy_position,
+                strategy_object.amount,
+                strategy_object.is_expired,
+                strategy_object.live_position,
+                strategy_object.days_passed,
+                strategy_object.is_leverage,
+                json.dumps(strategy_object.create_dictionary_for_db())
+            )
+            for strategy_object in strategy_objects
+        ]
         strategy_command = f"""
         INSERT INTO {self.strategy_objects_table} VALUES (
         ?,?,?,?,?,?,?,?,?,?,?)
         """
-        self.execute(
-            command=strategy_command,
-            values=values_to_insert
-        )
+        self.crsr.executemany(strategy_command, values_to_insert)
+        self.connection.commit()
         self.close_connection()
 
     def update_strategy(
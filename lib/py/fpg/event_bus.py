@@ -0,0 +1,275 @@
+"""
+In-process event bus of a portfolio. The tick publishes typed
+events (prices, strategy lifecycle, orders and fills) and every
+subscriber handles them on its own thread from a bounded queue,
+so persistence and exports don't add to the tick latency.
+
+A full queue either blocks the publisher until the subscriber
+catches up (block=True, nothing is lost, e.g. the database) or
+drops the event (block=False, e.g. metrics). Until start() is
+called events are handled synchronously by the publisher.
+"""
+import atexit
+import queue
+import threading
+import time
+from typing import Any, NamedTuple
+
+from lib.py.fpg.constants import (
+    Constants
+)
+from lib.py.fpg.logger import (
+    get_module_logger
+)
+logger = get_module_logger('event_bus')
+
+
+class PriceTick(NamedTuple):
+    pair: str
+    price: float
+    time: Any
+
+
+class StrategiesCreated(NamedTuple):
+    # Copies of the new objects, in the order they were created
+    strategy_objects: tuple
+
+
+class StrategyUpdated(NamedTuple):
+    # Copy of the object when it was published
+    strategy_object: Any
+
+
+class OrderSent(NamedTuple):
+    pair: str
+    side: str
+    amount: float
+    leverage: Any
+
+
+class OrderFilled(NamedTuple):
+    pair: str
+    side: str
+    amount: float
+    price: float
+    trade_id: Any
+
+
+class TradeExecuted(NamedTuple):
+    # Executed action of a strategy object and the balance after it
+    action: dict
+    balance: dict
+
+
+class Subscriber:
+    def __init__(
+            self: Any,
+            name: str,
+            handler: Any,
+            queue_size: int,
+            block: bool = True,
+            clock: Any = time.perf_counter
+    ) -> None:
+        """
+        :param name: str -> name in the metrics and the thread name
+        :param handler: callable -> called with every event
+        :param queue_size: int -> events waiting before backpressure
+        :param block: bool -> True blocks the publisher while the
+                              queue is full, False drops the event
+        :param clock: callable -> time in seconds
+        """
+        self.name = name
+        self.handler = handler
+        self.block = block
+        self.clock = clock
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.thread = None
+        self.stats = {'handled': 0, 'dropped': 0, 'errors': 0,
+                      'blocked': 0, 'blocked_seconds': 0.0,
+                      'max_depth': 0}
+
+    def deliver(
+            self: Any,
+            event: Any
+    ) -> None:
+        if self.thread is None:
+            self.handler(event)
+            self.stats['handled'] += 1
+            return
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            if not self.block:
+                self.stats['dropped'] += 1
+                return
+            start = self.clock()
+            self.queue.put(event)
+            self.stats['blocked'] += 1
+            self.stats['blocked_seconds'] += self.clock() - start
+        depth = self.queue.qsize()
+        if depth > self.stats['max_depth']:
+            self.stats['max_depth'] = depth
+
+    def start(
+            self: Any
+    ) -> None:
+        if self.thread is not None:
+            return
+        self.thread = threading.Thread(
+            target=self.handle_events, name=f'events-{self.name}',
+            daemon=True)
+        self.thread.start()
+
+    def handle_events(
+            self: Any
+    ) -> None:
+        while True:
+            event = self.queue.get()
+            try:
+                if event is None:
+                    return
+                self.handler(event)
+                self.stats['handled'] += 1
+            except Exception as exception:
+                self.stats['errors'] += 1
+                logger.error(f'{self.name} failed to handle '
+                             f'{type(event).__name__}: {exception!r}')
+            finally:
+                self.queue.task_done()
+
+    def flush(
+            self: Any
+    ) -> None:
+        if self.thread is not None:
+            self.queue.join()
+
+    def stop(
+            self: Any
+    ) -> None:
+        """
+        Handles the events still queued and stops the thread
+        """
+        if self.thread is None:
+            return
+        self.queue.put(None)
+        self.thread.join()
+        self.thread = None
+
+    def metrics(
+            self: Any
+    ) -> dict:
+        return dict(self.stats, depth=self.queue.qsize())
+
+
+class EventBus:
+    def __init__(
+            self: Any,
+            queue_size: int = None
+    ) -> None:
+        """
+        :param queue_size: int -> default queue size of the
+                                  subscribers, defaults to Constants
+        """
+        self.queue_size = Constants.event_queue_size \
+            if queue_size is None else queue_size
+        self.subscribers = {}
+        # event type -> subscribers of the type
+        self.routes = {}
+        self.lock = threading.Lock()
+        self.running = False
+        self.published = 0
+
+    def subscribe(
+            self: Any,
+            name: str,
+            handler: Any,
+            event_types: tuple,
+            queue_size: int = None,
+            block: bool = True
+    ) -> Subscriber:
+        """
+        :param name: str -> unique name of the subscriber
+        :param handler: callable -> called with every event of the types
+        :param event_types: tuple -> event classes to receive
+        :param queue_size: int -> defaults to the bus queue size
+        :param block: bool -> True blocks the publisher while the
+                              queue is full, False drops the event
+        :return: Subscriber
+        """
+        with self.lock:
+            if name in self.subscribers:
+                raise ValueError(f'Subscriber {name} already exists')
+            subscriber = Subscriber(
+                name, handler,
+                self.queue_size if queue_size is None else queue_size,
+                block)
+            self.subscribers[name] = subscriber
+            for event_type in event_types:
+                self.routes[event_type] = \
+                    self.routes.get(event_type, ()) + (subscriber,)
+            if self.running:
+                subscriber.start()
+        return subscriber
+
+    def publish(
+            self: Any,
+            event: Any
+    ) -> None:
+        """
+        :param event: event object, it must not be changed afterwards
+        :return: None
+        """
+        self.published += 1
+        for subscriber in self.routes.get(type(event), ()):
+            subscriber.deliver(event)
+
+    def start(
+            self: Any
+    ) -> None:
+        """
+        Handles the events on the subscribers' threads from now on,
+        the queued events are handled before the interpreter exits
+        """
+        with self.lock:
+            if self.running:
+                return
+            self.running = True
+            for subscriber in self.subscribers.values():
+                subscriber.start()
+        atexit.register(self.stop)
+
+    def flush(
+            self: Any
+    ) -> None:
+        """
+        Waits until every event published so far was handled
+        """
+        for subscriber in list(self.subscribers.values()):
+            subscriber.flush()
+
+    def stop(
+            self: Any
+    ) -> None:
+        with self.lock:
+            if not self.running:
+                return
+            self.running = False
+            for subscriber in self.subscribers.values():
+                subscriber.stop()
+        atexit.unregister(self.stop)
+
+    def metrics(
+            self: Any
+    ) -> dict:
+        """
+        :return: dict -> events published and handled/ dropped/
+                         queued events and publisher blocking time
+                         of every subscriber
+        """
+        return {
+            'published': self.published,
+            'subscribers': {
+                name: subscriber.metrics()
+                for name, subscriber in self.subscribers.items()
+            }
+        }
@@ -5,9 +5,15 @@ import requests
 import random
 from typing import Any
 
+from lib.py.fpg.circuit_breaker import (
+    get_circuit_breakers
+)
 from lib.py.fpg.constants import (
     Constants
 )
+from lib.py.fpg.rate_limiter import (
+    get_rate_limiter
+)
 
 
 class FPGConnector:
@@ -37,6 +43,9 @@ class FPGConnector:
 
         self.base_url_1 = Constants.endpoint_link
         self.verbose = False
+        # Shared with every other connector of the process
+        self.rate_limiter = get_rate_limiter()
+        self.circuit_breakers = get_circuit_breakers()
 
     def addKeys(
             self: Any,
@@ -50,6 +59,35 @@ class FPGConnector:
         data['private_key'] = self.secret_key
         return data
 
+    def read(
+            self: Any,
+            endpoint: str,
+            pair: str,
+            auth_data: dict
+    ) -> dict:
+        """
+        Sends a GET request behind the circuit breaker of the
+        endpoint and pair, once the rate limiter allows it.
+        While the breaker is open it raises CircuitOpenError
+        without sending anything, the request is retried
+        in the background until it succeeds.
+        :param endpoint: str -> endpoint name, e.g. 'fetch_price'
+        :param pair: str -> pair of the request, None if it has none
+        :param auth_data: dict -> request data with the keys
+        :return: dict -> json response
+        """
+        url_endpoint = self.base_url_1+"/"+endpoint
+
+        def request():
+            if self.verbose:
+                print(f"Endpoint: {url_endpoint} | {auth_data}")
+            self.rate_limiter.acquire(endpoint)
+            r = requests.get(url_endpoint, json=auth_data)
+            r.raise_for_status()
+            return r.json()
+        name = endpoint if pair is None else f"{endpoint} {pair}"
+        return self.circuit_breakers.call(name, request)
+
     def fetch_price(
             self: Any,
             pair: str
@@ -60,15 +98,11 @@ class FPGConnector:
         :param pair: str -> pair for price
         :return: float -> current price
         """
-        url_endpoint = self.base_url_1+"/fetch_price"
         jsonData = {
             "currency_pair": pair
         }
         auth_data = self.addKeys(jsonData)
-        if self.verbose:
-            print(f"Endpoint: {url_endpoint} | {auth_data}")
-        r = requests.get(url_endpoint, json=auth_data)
-        return r.json()['mid']
+        return self.read('fetch_price', pair, auth_data)['mid']
 
     def fetch_orderbook(
             self: Any,
@@ -77,15 +111,11 @@ class FPGConnector:
         """
             Hits the FPG API and returns a consolidated level2 orderbook
         """
-        url_endpoint = self.base_url_1+"/fetch_l2_book"
         jsonData = {
             "currency_pair": pair
         }
         auth_data = self.addKeys(jsonData)
-        if self.verbose:
-            print(f"Endpoint: {url_endpoint} | {auth_data}")
-        r = requests.get(url_endpoint, json=auth_data)
-        return r.json()
+        return self.read('fetch_l2_book', pair, auth_data)
 
     def fetch_balance(
             self: Any,
@@ -97,15 +127,11 @@ class FPGConnector:
         :param coins: list -> coins to check balance for
         :return: dict -> coin:balance
         """
-        url_endpoint = self.base_url_1+"/fetch_balance"
         jsonData = {
             "coins": coins
         }
         auth_data = self.addKeys(jsonData)
-        if self.verbose:
-            print(f"Endpoint: {url_endpoint} | {auth_data}")
-        r = requests.get(url_endpoint, json=auth_data)
-        r = r.json()
+        r = self.read('fetch_balance', None, auth_data)
         del r['succeeded']
         return r
 
@@ -144,6 +170,7 @@ class FPGConnector:
         auth_data = self.addKeys(jsonData)
         if self.verbose:
             print(f"Endpoint: {url_endpoint} | {auth_data}")
+        self.rate_limiter.acquire('execute_trade')
         r = requests.post(url_endpoint, json=auth_data)
         r = r.json()
         r['trade_id'] = trade_id
@@ -0,0 +1,481 @@
+"""
+Technical indicators of price series.
+Every indicator has a batch form, a function over numpy arrays for
+backtests (NaN until the first full window), and a streaming form, a
+class whose update() takes the next value in O(1) for live trading.
+Both forms make the same floating point operations in the same order,
+so they return identical values, not only close ones: a strategy
+backtested on the batch form trades the same live.
+
+The rolling sums are updated with the value entering and the one
+leaving the window and the rolling variance with the update of
+Welford's algorithm for a sliding window, the batch form runs these
+recurrences with numpy.cumsum, which adds in order. The first window
+of both forms is summed by window_moments(). The recurrences of the
+exponential averages can't be vectorized exactly, their batch form
+runs the streaming form.
+Values are expected to be finite, a NaN stays in the rolling sums.
+"""
+import collections
+import math
+import numpy
+from typing import Any
+from numpy.lib.stride_tricks import (
+    as_strided
+)
+
+
+def window_moments(
+        values: Any
+) -> tuple:
+    """
+    :param values: iterable of floats -> first full window
+    :return: tuple -> (sum, sum of the squared deviations from the
+                       mean) of the values, added in order
+    """
+    values = [float(value) for value in values]
+    total = 0.0
+    for value in values:
+        total += value
+    mean = total / len(values)
+    squares = 0.0
+    for value in values:
+        squares += (value - mean) * (value - mean)
+    return total, squares
+
+
+def empty_like(
+        values: Any
+) -> Any:
+    return numpy.full(len(values), numpy.nan)
+
+
+def rolling_moments(
+        values: Any,
+        period: int
+) -> tuple:
+    """
+    :param values: numpy array -> values, oldest first
+    :param period: int -> values per window
+    :return: tuple -> (rolling means, rolling sums of the squared
+                       deviations from the mean) numpy arrays, NaN
+                       before the first full window
+    """
+    values = numpy.asarray(values, dtype=float)
+    means, squares = empty_like(values), empty_like(values)
+    if period < 1 or len(values) < period:
+        return means, squares
+    total, square = window_moments(values[:period])
+    entering, leaving = values[period:], values[:-period]
+    changes = entering - leaving
+    sums = numpy.cumsum(numpy.r_[total, changes])
+    means[period - 1:] = sums / period
+    window_means = means[period - 1:]
+    terms = changes * ((entering - window_means[1:]) +
+                       (leaving - window_means[:-1]))
+    squares[period - 1:] = numpy.cumsum(numpy.r_[square, terms])
+    return means, squares
+
+
+def sma(
+        values: Any,
+        period: int
+) -> Any:
+    """
+    :param values: numpy array -> values, oldest first
+    :param period: int -> values averaged
+    :return: numpy array -> simple moving average
+    """
+    return rolling_moments(values, period)[0]
+
+
+def rolling_std(
+        values: Any,
+        period: int,
+        ddof: int = 0
+) -> Any:
+    """
+    :param values: numpy array -> values, oldest first
+    :param period: int -> values per window
+    :param ddof: int -> delta degrees of freedom, 0 for the
+                        population deviation of numpy.std
+    :return: numpy array -> rolling standard deviation
+    """
+    squares = rolling_moments(values, period)[1]
+    return numpy.sqrt(numpy.maximum(squares, 0.0) / (period - ddof))
+
+
+def bollinger_bands(
+        values: Any,
+        period: int,
+        width: float = 2.0,
+        ddof: int = 0
+) -> tuple:
+    """
+    :param values: numpy array -> values, oldest first
+    :param period: int -> values per window
+    :param width: float -> standard deviations from the mean
+    :return: tuple -> (lower, middle, upper) numpy arrays, the
+                      middle band is the sma
+    """
+    means, squares = rolling_moments(values, period)
+    deviations = numpy.sqrt(
+        numpy.maximum(squares, 0.0) / (period - ddof)) * width
+    return means - deviations, means, means + deviations
+
+
+def z_score(
+        values: Any,
+        period: int,
+        ddof: int = 0
+) -> Any:
+    """
+    :param values: numpy array -> values, oldest first
+    :param period: int -> values per window
+    :return: numpy array -> deviations of every value from the mean of
+                            its window, in standard deviations, NaN
+                            for a constant window
+    """
+    values = numpy.asarray(values, dtype=float)
+    means, squares = rolling_moments(values, period)
+    deviations = numpy.sqrt(numpy.maximum(squares, 0.0) / (period - ddof))
+    scores = empty_like(values)
+    defined = deviations > 0
+    scores[defined] = (values[defined] - means[defined]) / \
+        deviations[defined]
+    return scores
+
+
+def ema(
+        values: Any,
+        period: int,
+        alpha: float = None
+) -> Any:
+    """
+    :param values: numpy array -> values, oldest first
+    :param period: int -> values of the sma the average starts from
+    :param alpha: float -> weight of a new value, 2 / (period + 1)
+                           by default
+    :return: numpy array -> exponential moving average
+    """
+    average = EMA(period, alpha)
+    values = numpy.asarray(values, dtype=float).tolist()
+    return numpy.array([average.update(value) for value in values])
+
+
+def true_range(
+        high: Any,
+        low: Any,
+        close: Any
+) -> Any:
+    """
+    :return: numpy array -> true range of every bar, the range of the
+                            first one
+    """
+    high = numpy.asarray(high, dtype=float)
+    low = numpy.asarray(low, dtype=float)
+    close = numpy.asarray(close, dtype=float)
+    previous_close = numpy.r_[numpy.nan, close[:-1]]
+    ranges = high - low
+    gaps = numpy.maximum(numpy.abs(high - previous_close),
+                         numpy.abs(low - previous_close))
+    ranges[1:] = numpy.maximum(ranges[1:], gaps[1:])
+    return ranges
+
+
+def atr(
+        high: Any,
+        low: Any,
+        close: Any,
+        period: int
+) -> Any:
+    """
+    :return: numpy array -> average true range, Wilder's average
+                            (alpha of 1 / period) of the true range
+    """
+    return ema(true_range(high, low, close), period, 1 / period)
+
+
+def sliding_windows(
+        values: Any,
+        period: int
+) -> Any:
+    """
+    :param values: numpy array -> values, oldest first
+    :param period: int -> values per window, at most len(values)
+    :return: numpy array -> read only (windows, period) view of the
+                            values, one row per full window
+    """
+    stride = values.strides[0]
+    return as_strided(values, shape=(len(values) - period + 1, period),
+                      strides=(stride, stride), writeable=False)
+
+
+def rolling_min(
+        values: Any,
+        period: int
+) -> Any:
+    """
+    :return: numpy array -> lowest value of every window
+    """
+    values = numpy.asarray(values, dtype=float)
+    lowest = empty_like(values)
+    if 1 <= period <= len(values):
+        lowest[period - 1:] = sliding_windows(values, period).min(1)
+    return lowest
+
+
+def rolling_max(
+        values: Any,
+        period: int
+) -> Any:
+    """
+    :return: numpy array -> highest value of every window
+    """
+    values = numpy.asarray(values, dtype=float)
+    highest = empty_like(values)
+    if 1 <= period <= len(values):
+        highest[period - 1:] = sliding_windows(values, period).max(1)
+    return highest
+
+
+class RollingMoments:
+    def __init__(
+            self: Any,
+            period: int
+    ) -> None:
+        """
+        :param period: int -> values per window
+        """
+        if period < 1:
+            raise ValueError(f'Period of {period} values')
+        self.period = period
+        self.window = collections.deque(maxlen=period)
+        self.total = 0.0
+        # Mean and sum of the squared deviations from it,
+        # NaN before the first full window
+        self.mean = math.nan
+        self.squares = math.nan
+
+    def update(
+            self: Any,
+            value: float
+    ) -> float:
+        """
+        :param value: float -> next value
+        :return: float -> mean of the window
+        """
+        value = float(value)
+        if len(self.window) < self.period:
+            self.window.append(value)
+            if len(self.window) == self.period:
+                self.total, self.squares = window_moments(self.window)
+                self.mean = self.total / self.period
+            return self.mean
+        leaving = self.window[0]
+        self.window.append(value)
+        change = value - leaving
+        self.total = self.total + change
+        previous_mean = self.mean
+        self.mean = self.total / self.period
+        self.squares = self.squares + change * (
+            (value - self.mean) + (leaving - previous_mean))
+        return self.mean
+
+    def std(
+            self: Any,
+            ddof: int = 0
+    ) -> float:
+        if math.isnan(self.squares):
+            return math.nan
+        return math.sqrt(max(self.squares, 0.0) / (self.period - ddof))
+
+
+class SMA:
+    def __init__(
+            self: Any,
+            period: int
+    ) -> None:
+        self.moments = RollingMoments(period)
+        self.value = math.nan
+
+    def update(
+            self: Any,
+            value: float
+    ) -> float:
+        self.value = self.moments.update(value)
+        return self.value
+
+
+class RollingStd:
+    def __init__(
+            self: Any,
+            period: int,
+            ddof: int = 0
+    ) -> None:
+        self.moments = RollingMoments(period)
+        self.ddof = ddof
+        self.value = math.nan
+
+    def update(
+            self: Any,
+            value: float
+    ) -> float:
+        self.moments.update(value)
+        self.value = self.moments.std(self.ddof)
+        return self.value
+
+
+class BollingerBands:
+    def __init__(
+            self: Any,
+            period: int,
+            width: float = 2.0,
+            ddof: int = 0
+    ) -> None:
+        self.moments = RollingMoments(period)
+        self.width = width
+        self.ddof = ddof
+        self.value = (math.nan, math.nan, math.nan)
+
+    def update(
+            self: Any,
+            value: float
+    ) -> tuple:
+        """
+        :return: tuple -> (lower, middle, upper) bands
+        """
+        mean = self.moments.update(value)
+        deviation = self.moments.std(self.ddof) * self.width
+        self.value = (mean - deviation, mean, mean + deviation)
+        return self.value
+
+
+class ZScore:
+    def __init__(
+            self: Any,
+            period: int,
+            ddof: int = 0
+    ) -> None:
+        self.moments = RollingMoments(period)
+        self.ddof = ddof
+        self.value = math.nan
+
+    def update(
+            self: Any,
+            value: float
+    ) -> float:
+        mean = self.moments.update(value)
+        deviation = self.moments.std(self.ddof)
+        self.value = (float(value) - mean) / deviation \
+            if deviation > 0 else math.nan
+        return self.value
+
+
+class EMA:
+    def __init__(
+            self: Any,
+            period: int,
+            alpha: float = None
+    ) -> None:
+        """
+        :param period: int -> values of the sma the average starts from
+        :param alpha: float -> weight of a new value, 2 / (period + 1)
+                               by default
+        """
+        self.moments = RollingMoments(period)
+        self.alpha = 2 / (period + 1) if alpha is None else alpha
+        self.value = math.nan
+
+    def update(
+            self: Any,
+            value: float
+    ) -> float:
+        value = float(value)
+        if math.isnan(self.value):
+            self.value = self.moments.update(value)
+        else:
+            self.value = self.value + self.alpha * (value - self.value)
+        return self.value
+
+
+class ATR:
+    def __init__(
+            self: Any,
+            period: int
+    ) -> None:
+        self.average = EMA(period, 1 / period)
+        self.previous_close = None
+        self.value = math.nan
+
+    def update(
+            self: Any,
+            high: float,
+            low: float,
+            close: float
+    ) -> float:
+        """
+        :return: float -> average true range with the bar
+        """
+        high, low = float(high), float(low)
+        true_range = high - low
+        if self.previous_close is not None:
+            true_range = max(true_range,
+                             max(abs(high - self.previous_close),
+                                 abs(low - self.previous_close)))
+        self.previous_close = float(close)
+        self.value = self.average.update(true_range)
+        return self.value
+
+
+class RollingExtreme:
+    def __init__(
+            self: Any,
+            period: int,
+            keeps: Any
+    ) -> None:
+        """
+        :param period: int -> values per window
+        :param keeps: callable -> (kept value, new value): True if the
+                                  kept value stays before the new one
+        """
+        if period < 1:
+            raise ValueError(f'Period of {period} values')
+        self.period = period
+        self.keeps = keeps
+        # (index, value) of the candidates, the extreme first
+        self.candidates = collections.deque()
+        self.count = 0
+        self.value = math.nan
+
+    def update(
+            self: Any,
+            value: float
+    ) -> float:
+        value = float(value)
+        candidates = self.candidates
+        while candidates and not self.keeps(candidates[-1][1], value):
+            candidates.pop()
+        candidates.append((self.count, value))
+        if candidates[0][0] <= self.count - self.period:
+            candidates.popleft()
+        self.count += 1
+        if self.count >= self.period:
+            self.value = candidates[0][1]
+        return self.value
+
+
+class RollingMin(RollingExtreme):
+    def __init__(
+            self: Any,
+            period: int
+    ) -> None:
+        super().__init__(period, lambda kept, value: kept < value)
+
+
+class RollingMax(RollingExtreme):
+    def __init__(
+            self: Any,
+            period: int
+    ) -> None:
+        super().__init__(period, lambda kept, value: kept > value)
@@ -8,9 +8,6 @@ from lib.py.fpg.constants import (
 from lib.py.fpg.logger import (
     get_module_logger
 )
-from lib.py.fpg.trader import (
-    FPGTrader
-)
 from lib.py.fpg.utils import (
     fetch_keys
 )
@@ -23,6 +20,10 @@ logger = get_module_logger('core')
 
 
 def initialize_trader():
+    # The api client (requests) is only loaded for live trading
+    from lib.py.fpg.trader import (
+        FPGTrader
+    )
     # Pull the keys
     env: Environment = Environment.DEBUG
     (public_key, private_key) = fetch_keys(env)
@@ -237,9 +237,8 @@ class Interface:
                                                     old_strategy.pair
                                                 )
                                     if short and long:
-                                        self.portfolio.active_strategy_objects[
-                                            old_strategy.strategy_id] = old_strategy
-                                        self.portfolio.check_strategy_current_short_long_positions()
+                                        self.portfolio.add_active_strategy_object(
+                                            old_strategy)
                                         try:
                                             if latest_object_creation_date[
                                                     old_strategy.strategy_name] < \
@@ -256,9 +255,8 @@ class Interface:
                                         answer = input("Do you want to force input this object?\n"
                                                        "Enter y/n (if not object will be set to expired): ")
                                         if answer == 'y':
-                                            self.portfolio.active_strategy_objects[
-                                                old_strategy.strategy_id] = old_strategy
-                                            self.portfolio.check_strategy_current_short_long_positions()
+                                            self.portfolio.add_active_strategy_object(
+                                                old_strategy)
                                             try:
                                                 if latest_object_creation_date[
                                                         old_strategy.strategy_name] < \
@@ -275,9 +273,8 @@ class Interface:
                                                 old_strategy.strategy_id
                                             )
                                 else:
-                                    self.portfolio.active_strategy_objects[
-                                        old_strategy.strategy_id] = \
-                                        old_strategy
+                                    self.portfolio.add_active_strategy_object(
+                                        old_strategy)
                             elif answer == 2:
                                 passed_restore_live_object_second_screen = True
                                 self.portfolio.liquidate(
@@ -317,6 +314,7 @@ class Interface:
                   "5. For fetching balance enter 5\n"
                   "6. For exporting all strategy history enter 6\n"
                   "7. For exporting all trades history enter 7\n"
+                  "8. For the slowest objects enter 8\n"
                   f"Data shown is for {self.portfolio.current_time}, "
                   f"for refresh enter 9")
             print("-----------------")
@@ -337,6 +335,8 @@ class Interface:
             elif arg == '3':
                 id = input("For all objects enter 0, else enter\n"
                            "strategy id: ")
+                # Batched objects keep their state in the batch arrays
+                self.portfolio.sync_strategy_batches()
                 if id == '0':
                     for strategy_object in \
                             self.portfolio.active_strategy_objects.values():
@@ -371,6 +371,17 @@ class Interface:
             elif arg == '7':
                 self.portfolio.export_trades(backtesting=False)
                 print("Exported History file")
+            elif arg == '8':
+                report = self.portfolio.refresh_watchdog.report()
+                print(f"Refresh budget "
+                      f"{report['object_budget_seconds']} seconds")
+                for times in report['slowest_objects']:
+                    print(f"{times['strategy_name']} - id: "
+                          f"{times['strategy_id']} ({times['pair']}) "
+                          f"max {times['max_seconds']:.3f}s, "
+                          f"mean {times['mean_seconds']:.3f}s, "
+                          f"overruns {times['overruns']}, "
+                          f"isolated {times['isolated']}")
             print("===========================")
 
     def initialize_threads(
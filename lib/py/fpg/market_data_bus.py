@@ -0,0 +1,450 @@
+"""
+Market data bus over local ZeroMQ pub/sub sockets.
+One collector process polls FPG's api and the exchanges and
+publishes price ticks, order book snapshots and session (daily
+ohlcv) bars, any number of strategy processes subscribe to them
+(see data_manager_bus.py) instead of calling the api themselves.
+
+Every message has two frames, the topic and a binary payload:
+- 'price|<pair>|': unix time, price as two little endian doubles
+- 'book|<pair>|': unix time, bid and ask levels (double, 2 uint32),
+  then the bids and the asks as (price, amount) doubles
+- 'session|<pair>|<exchange>|<open time>|<since>|<days back>':
+  rows of exchange_shift_time (epoch seconds), h, l, o, c, v doubles
+Subscribers filter by topic prefix, 'price|BTC/USD|' for one pair.
+
+To run the collector:
+  > python3 -m lib.py.fpg.market_data_bus --pairs BTC/USD ETH/USD \
+        --session binance BTC/USDT 18:00:00 20
+"""
+import argparse
+import datetime
+import struct
+import threading
+import time
+import numpy
+import pandas as pd
+import zmq
+from typing import Any
+
+from lib.py.fpg.constants import (
+    Constants,
+    Environment
+)
+from lib.py.fpg.logger import (
+    get_module_logger
+)
+from lib.py.fpg.utils import (
+    create_datetime_object,
+    get_timestamp
+)
+logger = get_module_logger('market_data_bus')
+
+PRICE = struct.Struct('<dd')
+BOOK_HEADER = struct.Struct('<dII')
+SESSION_COLUMNS = ('h', 'l', 'o', 'c', 'v')
+
+
+def price_topic(
+        pair: str
+) -> bytes:
+    return f'price|{pair}|'.encode()
+
+
+def book_topic(
+        pair: str
+) -> bytes:
+    return f'book|{pair}|'.encode()
+
+
+def session_topic(
+        pair: str,
+        exchange_id: str = None,
+        exchange_open_time: str = None,
+        since: int = None,
+        days_back: int = None
+) -> bytes:
+    """
+    :return: bytes -> topic of the session bars, the prefix of all
+                      the sessions of the pair without exchange_id
+    """
+    if exchange_id is None:
+        return f'session|{pair}|'.encode()
+    return f'session|{pair}|{exchange_id}|{exchange_open_time}|' \
+           f'{since}|{days_back}'.encode()
+
+
+def encode_price(
+        pair: str,
+        unix_time: float,
+        price: float
+) -> list:
+    return [price_topic(pair), PRICE.pack(unix_time, price)]
+
+
+def encode_orderbook(
+        pair: str,
+        unix_time: float,
+        orderbook: dict
+) -> list:
+    """
+    :param orderbook: dict -> 'bids' and 'asks' lists of [price, amount]
+    """
+    bids = numpy.asarray(orderbook['bids'], dtype='<f8').reshape(-1, 2)
+    asks = numpy.asarray(orderbook['asks'], dtype='<f8').reshape(-1, 2)
+    return [book_topic(pair),
+            BOOK_HEADER.pack(unix_time, len(bids), len(asks)) +
+            bids.tobytes() + asks.tobytes()]
+
+
+def encode_session_bars(
+        exchange_id: str,
+        pair: str,
+        exchange_open_time: str,
+        since: int,
+        days_back: int,
+        ohlcv: Any
+) -> list:
+    """
+    :param ohlcv: pandas data frame of fetch_custom_ohlcv
+    """
+    shift_times = (pd.to_datetime(ohlcv['exchange_shift_time']) -
+                   pd.Timestamp(0)).dt.total_seconds().to_numpy()
+    rows = numpy.column_stack(
+        [shift_times] + [ohlcv[column].to_numpy(dtype=float)
+                         for column in SESSION_COLUMNS])
+    return [session_topic(pair, exchange_id, exchange_open_time,
+                          since, days_back),
+            rows.astype('<f8').tobytes()]
+
+
+def decode(
+        frames: list
+) -> tuple:
+    """
+    :param frames: list -> topic and payload of a message
+    :return: tuple -> (kind, pair, value):
+                      'price', pair, (unix time, price)
+                      'book', pair, (unix time, orderbook dict)
+                      'session', pair, (fetch_custom_ohlcv arguments,
+                                        data frame)
+    """
+    topic, payload = frames
+    kind, pair, rest = topic.decode().split('|', 2)
+    if kind == 'price':
+        return kind, pair, PRICE.unpack(payload)
+    if kind == 'book':
+        unix_time, bid_levels, ask_levels = \
+            BOOK_HEADER.unpack_from(payload)
+        levels = numpy.frombuffer(
+            payload, dtype='<f8', offset=BOOK_HEADER.size).reshape(-1, 2)
+        return kind, pair, (unix_time, {
+            'bids': levels[:bid_levels].tolist(),
+            'asks': levels[bid_levels:bid_levels + ask_levels].tolist()
+        })
+    exchange_id, exchange_open_time, since, days_back = rest.split('|')
+    rows = numpy.frombuffer(payload, dtype='<f8').reshape(
+        -1, len(SESSION_COLUMNS) + 1)
+    ohlcv = pd.DataFrame({
+        'exchange_shift_time': pd.to_datetime(rows[:, 0], unit='s'),
+        **{column: rows[:, index + 1]
+           for index, column in enumerate(SESSION_COLUMNS)}
+    })
+    arguments = (exchange_id, pair, exchange_open_time,
+                 int(since), int(days_back))
+    return kind, pair, (arguments, ohlcv)
+
+
+class MarketDataPublisher:
+    def __init__(
+            self: Any,
+            address: str,
+            context: Any = None
+    ) -> None:
+        """
+        :param address: str -> zmq endpoint to bind, e.g.
+                               'tcp://127.0.0.1:5556' or 'ipc:///tmp/md',
+                               a '*' port binds any free port
+        :param context: zmq.Context, None for the shared one
+        """
+        context = context or zmq.Context.instance()
+        self.socket = context.socket(zmq.PUB)
+        self.socket.bind(address)
+        self.address = self.socket.getsockopt_string(zmq.LAST_ENDPOINT)
+        self.lock = threading.Lock()
+        self.messages = 0
+
+    def send(
+            self: Any,
+            frames: list
+    ) -> None:
+        with self.lock:
+            self.socket.send_multipart(frames, copy=False)
+            self.messages += 1
+
+    def publish_price(
+            self: Any,
+            pair: str,
+            unix_time: float,
+            price: float
+    ) -> None:
+        self.send(encode_price(pair, unix_time, price))
+
+    def publish_orderbook(
+            self: Any,
+            pair: str,
+            unix_time: float,
+            orderbook: dict
+    ) -> None:
+        self.send(encode_orderbook(pair, unix_time, orderbook))
+
+    def publish_session_bars(
+            self: Any,
+            exchange_id: str,
+            pair: str,
+            exchange_open_time: str,
+            since: int,
+            days_back: int,
+            ohlcv: Any
+    ) -> None:
+        self.send(encode_session_bars(
+            exchange_id, pair, exchange_open_time, since, days_back, ohlcv))
+
+    def close(
+            self: Any
+    ) -> None:
+        with self.lock:
+            self.socket.close(linger=0)
+
+
+class MarketDataSubscriber:
+    def __init__(
+            self: Any,
+            address: str,
+            receive: Any,
+            pairs: Any = None,
+            context: Any = None
+    ) -> None:
+        """
+        Receives the messages on a background thread
+        :param address: str -> zmq endpoint of the publisher
+        :param receive: callable -> (kind, pair, value) of every
+                                    decoded message, see decode()
+        :param pairs: iterable of pairs to subscribe to, None for all
+        :param context: zmq.Context, None for the shared one
+        """
+        self.address = address
+        self.receive = receive
+        self.topics = [b''] if pairs is None else [
+            topic(pair) for pair in pairs
+            for topic in (price_topic, book_topic, session_topic)
+        ]
+        self.context = context or zmq.Context.instance()
+        self.running = False
+        self.thread = None
+        self.messages = 0
+
+    def start(
+            self: Any
+    ) -> None:
+        self.running = True
+        self.thread = threading.Thread(
+            target=self.receive_loop, name='market-data-subscriber',
+            daemon=True)
+        self.thread.start()
+
+    def receive_loop(
+            self: Any
+    ) -> None:
+        # zmq sockets are used from the thread that made them
+        socket = self.context.socket(zmq.SUB)
+        for topic in self.topics:
+            socket.setsockopt(zmq.SUBSCRIBE, topic)
+        socket.connect(self.address)
+        poller = zmq.Poller()
+        poller.register(socket, zmq.POLLIN)
+        try:
+            while self.running:
+                if not poller.poll(100):
+                    continue
+                frames = socket.recv_multipart()
+                self.messages += 1
+                try:
+                    self.receive(*decode(frames))
+                except Exception as exception:
+                    logger.error(f'Dropped market data message '
+                                 f'{frames[0]!r}: {exception!r}')
+        finally:
+            socket.close(linger=0)
+
+    def stop(
+            self: Any
+    ) -> None:
+        self.running = False
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+
+def session_since(
+        exchange_open_time: str,
+        days_back: int,
+        current_time: Any
+) -> int:
+    """
+    :param exchange_open_time: str -> "18:00:00"
+    :param days_back: int -> days of ohlcv before the session
+    :param current_time: datetime object -> aware in utc
+    :return: int -> since (epoch milliseconds) the objects created
+                    in the current session request their ohlcv with
+    """
+    last_open_time = create_datetime_object(
+        current_time.strftime('%Y-%m-%d') + ' ' + exchange_open_time)
+    if current_time < last_open_time:
+        last_open_time -= datetime.timedelta(days=1)
+    return get_timestamp(last_open_time - datetime.timedelta(days=days_back))
+
+
+class MarketDataCollector:
+    def __init__(
+            self: Any,
+            market_data: Any,
+            publisher: MarketDataPublisher,
+            pairs: list,
+            sessions: list = (),
+            book_seconds: float = 5.0,
+            session_seconds: float = 30.0,
+            clock: Any = time.monotonic
+    ) -> None:
+        """
+        Polls the market data and publishes it on the bus
+        :param market_data: MarketData polling FPG's api
+        :param publisher: MarketDataPublisher
+        :param pairs: list -> pairs whose prices and books are published
+        :param sessions: list -> (exchange id, pair, exchange open time,
+                                  days back) of the session bars
+                                  published
+        :param book_seconds: float -> seconds between order book
+                                      snapshots, None for none
+        :param session_seconds: float -> seconds between the session
+                                         bars, subscribers that joined
+                                         late get them on the next round
+        """
+        self.market_data = market_data
+        self.publisher = publisher
+        self.pairs = list(pairs)
+        self.sessions = list(sessions)
+        self.book_seconds = book_seconds
+        self.session_seconds = session_seconds
+        self.clock = clock
+        self.last_books = None
+        self.last_sessions = None
+        self.running = False
+
+    def tick(
+            self: Any
+    ) -> None:
+        """
+        Publishes the price of every pair, and the order books
+        and session bars when they are due
+        :return: None
+        """
+        self.market_data.start_tick()
+        current_time = datetime.datetime.now(datetime.timezone.utc)
+        for pair in self.pairs:
+            try:
+                price = self.market_data.fetch_mid_price(pair, current_time)
+            except Exception as exception:
+                logger.error(f'Price of {pair} failed: {exception!r}')
+                continue
+            self.publisher.publish_price(pair, time.time(), price)
+        now = self.clock()
+        if self.book_seconds is not None and (
+                self.last_books is None or
+                now - self.last_books >= self.book_seconds):
+            self.last_books = now
+            for pair in self.pairs:
+                try:
+                    orderbook = \
+                        self.market_data.fpg_connector.fetch_orderbook(pair)
+                except Exception as exception:
+                    logger.error(f'Order book of {pair} failed: '
+                                 f'{exception!r}')
+                    continue
+                self.publisher.publish_orderbook(pair, time.time(), orderbook)
+        if self.sessions and (
+                self.last_sessions is None or
+                now - self.last_sessions >= self.session_seconds):
+            self.last_sessions = now
+            for exchange_id, pair, exchange_open_time, days_back in \
+                    self.sessions:
+                since = session_since(
+                    exchange_open_time, days_back, current_time)
+                try:
+                    ohlcv = self.market_data.fetch_custom_ohlcv(
+                        exchange_id, pair, exchange_open_time,
+                        since, days_back)
+                except Exception as exception:
+                    logger.error(f'Session bars of {pair} in '
+                                 f'{exchange_id} failed: {exception!r}')
+                    continue
+                self.publisher.publish_session_bars(
+                    exchange_id, pair, exchange_open_time,
+                    since, days_back, ohlcv)
+
+    def run(
+            self: Any,
+            tick_time: float
+    ) -> None:
+        """
+        Ticks until stop() is called
+        :param tick_time: float -> seconds between the ticks
+        :return: None
+        """
+        self.running = True
+        while self.running:
+            self.tick()
+            time.sleep(tick_time)
+
+    def stop(
+            self: Any
+    ) -> None:
+        self.running = False
+
+
+def main():
+    from lib.py.fpg.data_manager.market_data import MarketData
+    from lib.py.fpg.database import Database
+    from lib.py.fpg.fpg_library import FPGConnector
+    from lib.py.fpg.utils import fetch_keys
+
+    parser = argparse.ArgumentParser(
+        description='Publish FPG market data on a local zmq bus')
+    parser.add_argument('--address', default='tcp://127.0.0.1:5556')
+    parser.add_argument('--pairs', nargs='+', required=True)
+    parser.add_argument('--tick-time', type=float, default=0.95)
+    parser.add_argument('--book-seconds', type=float, default=5.0)
+    parser.add_argument('--session', nargs=4, action='append', default=[],
+                        metavar=('EXCHANGE', 'PAIR', 'OPEN_TIME',
+                                 'DAYS_BACK'),
+                        help='session bars to publish, repeatable')
+    args = parser.parse_args()
+
+    public_key, private_key = fetch_keys(Environment.DEBUG)
+    market_data = MarketData(
+        FPGConnector(public_key, private_key), Database())
+    publisher = MarketDataPublisher(args.address)
+    sessions = [(exchange_id, pair, open_time, int(days_back))
+                for exchange_id, pair, open_time, days_back in args.session]
+    collector = MarketDataCollector(
+        market_data, publisher, args.pairs, sessions, args.book_seconds)
+    logger.info(f'publishing {args.pairs} on {publisher.address}, '
+                f'prices stored in {Constants.database_link}')
+    try:
+        collector.run(args.tick_time)
+    finally:
+        publisher.close()
+
+
+if __name__ == '__main__':
+    main()
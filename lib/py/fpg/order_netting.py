@@ -0,0 +1,73 @@
+"""
+Netting of the orders strategy objects send in one tick.
+Orders on the same pair and leverage are combined into one
+order for the net amount, opposing orders cross each other
+and only the difference is sent to FPG's endpoint.
+"""
+from typing import Any
+
+# Net amounts below this are fully crossed
+MIN_ORDER_AMOUNT = 1e-8
+
+
+class NetOrder:
+    def __init__(
+            self: Any,
+            pair: str,
+            leverage: Any
+    ) -> None:
+        self.pair = pair
+        self.leverage = leverage
+        self.bought = 0.0
+        self.sold = 0.0
+        # Indexes of the actions combined in this order
+        self.members = []
+
+    def add(
+            self: Any,
+            index: int,
+            side: str,
+            amount: float
+    ) -> None:
+        self.members.append(index)
+        if side == 'buy':
+            self.bought += amount
+        else:
+            self.sold += amount
+
+    @property
+    def side(
+            self: Any
+    ) -> str:
+        return 'buy' if self.bought >= self.sold else 'sell'
+
+    @property
+    def amount(
+            self: Any
+    ) -> float:
+        """
+        :return: float -> amount left after crossing the
+                          opposing orders, 0 if fully crossed
+        """
+        amount = round(abs(self.bought - self.sold), 8)
+        if amount < MIN_ORDER_AMOUNT:
+            return 0.0
+        return amount
+
+
+def net_orders(
+        actions: list
+) -> list:
+    """
+    :param actions: list of dict -> actions with 'pair', 'side',
+                                   'amount' and 'leverage'
+    :return: list of NetOrder -> one per pair and leverage, in the
+                                 order the pairs first appear
+    """
+    orders = {}
+    for index, action in enumerate(actions):
+        key = (action['pair'], action['leverage'])
+        if key not in orders:
+            orders[key] = NetOrder(action['pair'], action['leverage'])
+        orders[key].add(index, action['side'], action['amount'])
+    return list(orders.values())
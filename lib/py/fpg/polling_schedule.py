@@ -0,0 +1,166 @@
+"""
+Per pair polling cadence of the live prices.
+Every tick the portfolio sorts its pairs into cadences:
+- 'fast': a live position, objects refreshing every tick or a
+  price near a level an object waits for
+- 'slow': only sleeping objects far from their levels
+- 'expired': every object of the pair expired
+A pair is polled once its cadence's interval passed since its last
+poll. When the planned polls exceed the request budget the intervals
+are stretched, the fast pairs first get what they need, the other
+pairs share the rest but keep at least min_share of the budget.
+"""
+import time
+from typing import Any
+
+
+class PollingSchedule:
+    # Part of the budget kept for the slow/ expired pairs
+    min_share = 0.1
+
+    def __init__(
+            self: Any,
+            intervals: dict,
+            budget: float = None,
+            clock: Any = time.monotonic
+    ) -> None:
+        """
+        :param intervals: dict -> cadence: seconds between the
+                                  polls of a pair, 0 polls every tick
+        :param budget: float -> price polls per second of all the
+                                pairs together, None for no limit
+        :param clock: callable -> monotonic time in seconds
+        """
+        self.intervals = intervals
+        self.budget = budget
+        self.clock = clock
+        # pair -> cadence, pairs without one are polled every tick
+        self.cadences = {}
+        # pair -> (time, price) of the last poll
+        self.last_polls = {}
+        # cadence -> factor its interval is stretched by
+        self.stretch = {cadence: 1.0 for cadence in intervals}
+        self.tick_period = None
+        self.last_tick_time = None
+        # Metrics
+        self.polls = {cadence: 0 for cadence in intervals}
+        self.skipped_polls = 0
+
+    def start_tick(
+            self: Any
+    ) -> None:
+        """
+        Measures the time between ticks, a poll per tick
+        is the fastest a pair can be polled, and forgets the
+        pairs without a cadence in the last tick
+        :return: None
+        """
+        for pair in list(self.last_polls):
+            if pair not in self.cadences:
+                del self.last_polls[pair]
+        now = self.clock()
+        if self.last_tick_time is not None:
+            period = now - self.last_tick_time
+            self.tick_period = period if self.tick_period is None \
+                else 0.8 * self.tick_period + 0.2 * period
+        self.last_tick_time = now
+
+    def set_cadences(
+            self: Any,
+            cadences: dict
+    ) -> None:
+        """
+        :param cadences: dict -> pair: cadence of every polled pair,
+                                 the other pairs are forgotten on
+                                 the next tick
+        :return: None -> stretches the intervals to the budget
+        """
+        self.cadences = cadences
+        self.stretch = {cadence: 1.0 for cadence in self.intervals}
+        if self.budget is None or not self.tick_period:
+            return
+        rates = {cadence: 0.0 for cadence in self.intervals}
+        for cadence in cadences.values():
+            rates[cadence] += 1 / self.interval(cadence)
+        fast_rate = rates.pop('fast', 0.0)
+        other_rate = sum(rates.values())
+        fast_budget = self.budget * (1 - self.min_share) \
+            if other_rate else self.budget
+        self.stretch['fast'] = max(1.0, fast_rate / fast_budget)
+        if other_rate:
+            other_budget = self.budget - fast_rate / self.stretch['fast']
+            for cadence in rates:
+                self.stretch[cadence] = max(1.0, other_rate / other_budget)
+
+    def interval(
+            self: Any,
+            cadence: str
+    ) -> float:
+        """
+        :param cadence: str -> cadence of a pair
+        :return: float -> seconds between its polls
+        """
+        interval = max(self.intervals[cadence], self.tick_period or 0.0)
+        return interval * self.stretch[cadence]
+
+    def is_due(
+            self: Any,
+            pair: str
+    ) -> bool:
+        """
+        :param pair: str -> pair to poll
+        :return: bool -> True if the pair should be polled this tick
+        """
+        last_poll = self.last_polls.get(pair)
+        cadence = self.cadences.get(pair)
+        if last_poll is None or cadence is None:
+            return True
+        # Ticks don't line up with the intervals, a pair that
+        # would be due within half a tick is polled now
+        elapsed = self.clock() - last_poll[0] + (self.tick_period or 0.0) / 2
+        if elapsed >= self.interval(cadence):
+            return True
+        self.skipped_polls += 1
+        return False
+
+    def record_poll(
+            self: Any,
+            pair: str,
+            price: float
+    ) -> None:
+        self.last_polls[pair] = (self.clock(), price)
+        cadence = self.cadences.get(pair)
+        if cadence is not None:
+            self.polls[cadence] += 1
+
+    def last_price(
+            self: Any,
+            pair: str
+    ) -> float or None:
+        """
+        :param pair: str -> polled pair
+        :return: float -> price of its last poll, None if not polled
+        """
+        last_poll = self.last_polls.get(pair)
+        return None if last_poll is None else last_poll[1]
+
+    def metrics(
+            self: Any
+    ) -> dict:
+        """
+        :return: dict -> pairs and polls per cadence, the polls
+                         skipped and the current intervals
+        """
+        pairs = {cadence: 0 for cadence in self.intervals}
+        for cadence in self.cadences.values():
+            pairs[cadence] += 1
+        return {
+            'pairs': pairs,
+            'polls': dict(self.polls),
+            'skipped_polls': self.skipped_polls,
+            'interval_seconds': {
+                cadence: self.interval(cadence)
+                for cadence in self.intervals
+            },
+            'budget': self.budget
+        }
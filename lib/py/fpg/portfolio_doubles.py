@@ -0,0 +1,154 @@
+"""
+Test doubles of the collaborators of a portfolio (trader, risk
+manager, data manager, database and strategy objects), shared by
+the test files that execute strategy responses
+"""
+import datetime
+import time
+
+from lib.py.fpg.circuit_breaker import (
+    CircuitBreakers,
+    CircuitOpenError
+)
+from lib.py.fpg.portfolio_parent import (
+    Portfolio
+)
+
+
+class FakeTrader:
+    """
+    Fills every order at fill_price, except the orders of the
+    pairs in timeout_pairs (TimeoutError) and circuit_pairs
+    (CircuitOpenError)
+    """
+    def __init__(self, timeout_pairs=(), circuit_pairs=(),
+                 fill_price=100.0):
+        self.timeout_pairs = set(timeout_pairs)
+        self.circuit_pairs = set(circuit_pairs)
+        self.fill_price = fill_price
+        self.breakers = CircuitBreakers()
+        self.orders = []
+
+    def trade(self, pair, amount, side, leverage, timeout=None):
+        if pair in self.timeout_pairs:
+            raise TimeoutError('order did not succeed')
+        if pair in self.circuit_pairs:
+            raise CircuitOpenError(self.breakers.get(f'trade {pair}'))
+        self.orders.append((pair, amount, side, leverage))
+        fill = {'executed_price': self.fill_price, 'executed_amount': amount}
+        return self.fill_price, len(self.orders), fill
+
+
+class FakeRiskManager:
+    """
+    Sizes every entrance with amount, or raises error
+    """
+    def __init__(self, amount=1.0, error=None):
+        self.amount = amount
+        self.error = error
+
+    def calculate_transaction_amount(self, pair, stop_price):
+        if self.error is not None:
+            raise self.error
+        return self.amount, None
+
+
+class FakeDataManager:
+    def __init__(self, mid_price=50.0):
+        self.mid_price = mid_price
+        self.fills = []
+
+    def fetch_current_time(self):
+        return datetime.datetime(2021, 1, 1)
+
+    def fetch_mid_price(self, pair):
+        return self.mid_price
+
+    def fetch_balance(self, coins):
+        return {'USD': 100.0}
+
+    def record_fill(self, pair, side, amount, fill):
+        self.fills.append((pair, side, amount, fill is not None))
+
+
+class RecordingDatabase:
+    """
+    Keeps what the portfolio writes, every write
+    can be slowed down by delay seconds
+    """
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.updates = []
+        self.trades = []
+        self.inserts = []
+
+    def update_strategy(self, strategy_object):
+        self.wait()
+        self.updates.append(strategy_object)
+
+    def save_trade(self, action, portfolio_amount):
+        self.wait()
+        self.trades.append((action, portfolio_amount))
+
+    def insert_new_strategies(self, strategy_objects):
+        self.wait()
+        self.inserts.append([strategy_object.strategy_id
+                             for strategy_object in strategy_objects])
+
+    def wait(self):
+        if self.delay:
+            time.sleep(self.delay)
+
+
+class PositionStrategy:
+    """
+    Strategy object that enters a long position when it is
+    flat and exits its position otherwise, changing its state
+    before the portfolio executes, like the strategies do
+    """
+    def __init__(self, strategy_id, pair, strategy_position=None,
+                 is_leverage=3):
+        self.strategy_id = strategy_id
+        self.strategy_name = 'Regular'
+        self.pair = pair
+        self.strategy_position = strategy_position
+        self.live_position = strategy_position is not None
+        self.is_expired = False
+        self.is_leverage = is_leverage
+        self.amount = 2.0 if self.live_position else None
+        self.long_entrance_price = None
+        self.short_exit_price = None
+
+    def check_execution(self):
+        if self.live_position:
+            action = {'pair': self.pair, 'amount': self.amount,
+                      'type': self.strategy_position, 'action': 'exit'}
+            self.live_position = False
+            self.is_expired = True
+            self.strategy_position = None
+        else:
+            self.strategy_position = 'long'
+            action = {'pair': self.pair, 'amount': None, 'type': 'long',
+                      'stop_price': 40.0, 'action': 'enter'}
+            self.live_position = True
+        return [action]
+
+
+def execution_portfolio(trader, risk_manager=None, order_netting=False,
+                        leverage=3):
+    """
+    :return: Portfolio -> live portfolio with the doubles, counting
+                          the positions of the 'Regular' objects
+    """
+    portfolio = Portfolio()
+    portfolio.strategy_dictionary = {
+        'Regular': {'advanced_settings': True,
+                    'long': {'current_long': {}},
+                    'short': {'current_short': {}}}}
+    portfolio.trader = trader
+    portfolio.risk_manager = risk_manager or FakeRiskManager()
+    portfolio.data_manager = FakeDataManager()
+    portfolio.database = RecordingDatabase()
+    portfolio.order_netting = order_netting
+    portfolio.leverage = leverage
+    return portfolio
@@ -4,26 +4,52 @@ necessary to run trading
 """
 import copy
 import datetime
+import functools
+import itertools
 import json
-import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any
 import time
 import traceback
+from lib.py.fpg.circuit_breaker import (
+    CircuitOpenError,
+    get_circuit_breakers
+)
 from lib.py.fpg.constants import (
     Constants
 )
 from lib.py.fpg.database import (
     Database
 )
-from lib.py.fpg.data_manager.data_manager_backtesting import (
-    BacktestingDataManager
-)
-from lib.py.fpg.data_manager.data_manager_live import (
-    LiveDataManager
+from lib.py.fpg.event_bus import (
+    EventBus,
+    OrderFilled,
+    OrderSent,
+    StrategiesCreated,
+    StrategyUpdated,
+    TradeExecuted
 )
 from lib.py.fpg.logger import (
     get_module_logger
 )
+from lib.py.fpg import (
+    order_netting
+)
+from lib.py.fpg.price_triggers import (
+    PriceTriggerIndex
+)
+from lib.py.fpg.refresh_watchdog import (
+    RefreshWatchdog
+)
+from lib.py.fpg.strategy_batch import (
+    StrategyBatch
+)
+from lib.py.fpg.strategy_registry import (
+    get_strategy_registry
+)
+from lib.py.fpg.timer_service import (
+    TimerService
+)
 from user_managment.risk_manager import (
     RiskManager
 )
@@ -43,12 +69,25 @@ from user_managment.risk_manager import (
 
 logger = get_module_logger('portfolio')
 
+# Order side of the entrances and exits of every position type
+ENTRANCE_SIDES = {'short': 'sell', 'long': 'buy'}
+EXIT_SIDES = {'short': 'buy', 'long': 'sell'}
+
 
 class Portfolio:
     def __init__(
             self: Any
     ) -> None:
         self.database = Database()
+        # Tables of the portfolio's objects and trades
+        self.database_name = 'strategy_objects'
+        # The tick publishes its strategy updates and trades, the
+        # database is written by a subscriber on its own thread
+        # once trading was set up (see event_bus.py)
+        self.event_bus = EventBus()
+        self.event_bus.subscribe(
+            'database', self.write_to_database,
+            (StrategiesCreated, StrategyUpdated, TradeExecuted))
         self.trader = None
         self.data_manager = None
         self.risk_manager = None
@@ -59,30 +98,115 @@ class Portfolio:
         self.backtesting_mode = False
         self.backtesting_index = 0
         self.portfolio_money = {}
-        self.advanced_settings_counter = None
         self.strategy_dictionary = None  # Might cause a problem
+        # Strategy classes of the installed strategies
+        self.strategy_registry = get_strategy_registry()
         self.coins = set()
         self.pairs = set()
         self.active_strategy_objects = {}
+        # Secondary indexes of the active objects:
+        # strategy name/ pair -> {strategy id: strategy object}
+        self.active_objects_by_strategy = {}
+        self.active_objects_by_pair = {}
+        # strategy id -> sides the object is counted for
+        # in the current short/ long settings
+        self.counted_positions = {}
         self.executed_strategy_ids = set()
+        self.timer_service = TimerService()
+        # Batched refresh: strategy class -> StrategyBatch
+        self.batch_refresh = False
+        self.strategy_batches = {}
+        # strategy id -> order the object was activated in
+        self.activation_order = {}
+        self.activation_sequence = itertools.count()
+        # Restored objects that still need their data
+        self.pending_warm_up = []
+        # Timer driven objects that implement trigger_levels()
+        # sleep until the price reaches one of their levels
+        self.price_triggers = False
+        self.price_trigger_index = PriceTriggerIndex()
+        # strategy id -> object refreshed on every tick
+        self.awake_objects = {}
+        # Live trading: every pair is polled at the cadence of
+        # its objects, see polling_cadence()
+        self.adaptive_polling = False
+        # Live trading: zmq endpoint of a market data collector
+        # (market_data_bus.py) to get the prices from instead
+        # of FPG's api, None to poll them
+        self.market_data_address = None
+        # New objects of one creation event are initialized
+        # concurrently in live trading, up to creation_workers
+        self.creation_workers = 1
+        self.creation_pool = None
+        # Seconds the cached account balance is used in live
+        # trading before it is read from the endpoint again
+        self.balance_reconcile_seconds = 60.0
+        # Live orders of one tick are netted per pair and sent
+        # concurrently, each order is retried up to order_timeout
+        self.order_netting = False
+        self.order_workers = 8
+        self.order_timeout = None
+        self.order_pool = None
+        # Live trading: failing pairs/ endpoints are skipped
+        # while their circuit is open, failed ticks back off
+        self.circuit_breakers = None
+        # Live trading: seconds one object's refresh may take and
+        # strategy name -> seconds all of its objects may take in
+        # a tick. Objects that overrun their budget
+        # refresh_overrun_limit times in a row refresh on a worker
+        # and are skipped while they run (see refresh_watchdog.py)
+        self.refresh_budget = 0.1
+        self.strategy_refresh_budgets = {}
+        self.refresh_overrun_limit = 3
+        self.refresh_watchdog = None
 
     def setup_live_trading(
             self: Any,
-            trader
+            trader,
+            market_data: Any = None
     ) -> None:
         """
         Will setup methods for live trading
         :param trader:
+        :param market_data: MarketData shared with other portfolios,
+                            None for one of the portfolio's own
         :return: None -> sets default values
         """
+        # The live data managers (ccxt, zmq) are only
+        # imported when trading live
+        from lib.py.fpg.data_manager.data_manager_live import (
+            LiveDataManager
+        )
         self.Trade = True
-        self.database.initialize_database()
+        self.database.initialize_database(name=self.database_name)
         self.trader = trader
-        self.data_manager = \
-            LiveDataManager(self.trader.fpg_connector, self.database)
+        if market_data is None and self.market_data_address is not None:
+            from lib.py.fpg.data_manager.data_manager_bus import (
+                BusDataManager
+            )
+            self.data_manager = BusDataManager(
+                self.trader.fpg_connector,
+                self.database,
+                self.balance_reconcile_seconds,
+                self.market_data_address,
+                self.pairs or None)
+        else:
+            self.data_manager = LiveDataManager(
+                self.trader.fpg_connector,
+                self.database,
+                self.balance_reconcile_seconds,
+                market_data)
+        if self.data_manager.owns_market_data:
+            self.data_manager.market_data.attach_event_bus(self.event_bus)
+        self.event_bus.start()
         self.risk_manager = \
             RiskManager(self.data_manager)
         self.current_time = self.data_manager.current_time
+        self.circuit_breakers = get_circuit_breakers()
+        self.refresh_watchdog = RefreshWatchdog(
+            self.refresh_budget,
+            self.strategy_refresh_budgets,
+            self.refresh_overrun_limit)
 
     def setup_backtesting(
             self: Any,
@@ -97,11 +221,15 @@ class Portfolio:
         :param backtesting_name: str -> name of the current backtesting
         :return: None -> sets default class values
         """
+        from lib.py.fpg.data_manager.data_manager_backtesting import (
+            BacktestingDataManager
+        )
         self.backtesting_mode = True
         self.database.initialize_database(name=backtesting_name)
         # Setup all backtesting related stuff
         self.data_manager = \
             BacktestingDataManager(start_date, end_date, self.pairs)
+        self.event_bus.start()
         self.risk_manager = \
             RiskManager(self.data_manager)
         self.current_time = self.data_manager.current_time
@@ -110,23 +238,50 @@ class Portfolio:
             self: Any
     ) -> None:
         """
-        This will create a thread for the ticking to run on the background
+        This will create a thread for the ticking to run on the background.
+        Failures of single pairs are handled inside the tick, when
+        the tick itself fails the next ticks are skipped with an
+        exponential backoff and the trader is remade.
         :return: None -> will run the ticker
         """
+        tick_breaker = self.circuit_breakers.get('tick', failure_threshold=1)
         while self.Trade:
-            try:
-                self.tick()
-            except:
-                logger.error("Error; caught and moving on")
-                traceback.print_exc()
-                time.sleep(10)
-                self.trader.connect()
-                self.data_manager.fpg_connector = \
-                    self.trader.fpg_connector
-                logger.info("Remade trader and restarted.")
+            self.guarded_tick(tick_breaker)
             time.sleep(self.tick_time)
         print("shutting trader")
 
+    def guarded_tick(
+            self: Any,
+            tick_breaker: Any
+    ) -> bool:
+        """
+        Ticks unless the tick breaker is open, a failed
+        tick opens it and remakes the trader
+        :param tick_breaker: CircuitBreaker of the portfolio's ticks
+        :return: bool -> True if the tick ran without an error
+        """
+        if not tick_breaker.allow():
+            tick_breaker.record_skip()
+            return False
+        try:
+            self.tick()
+        except Exception:
+            logger.error("Error; caught and moving on")
+            traceback.print_exc()
+            tick_breaker.record_failure()
+            self.trader.connect()
+            self.data_manager.fpg_connector = \
+                self.trader.fpg_connector
+            if self.data_manager.owns_market_data:
+                # Prices are polled through the market data's connector
+                self.data_manager.market_data.fpg_connector = \
+                    self.trader.fpg_connector
+            logger.info("Remade trader, retrying after "
+                        f"{tick_breaker.backoff} seconds")
+            return False
+        tick_breaker.record_success()
+        return True
+
     def add_pairs_to_coins_portfolio(
             self: Any
     ) -> None:
@@ -205,7 +360,7 @@ class Portfolio:
             quote = action['pair'].split("/")[1]
             self.portfolio_money[quote] += \
                 action['price'] * action['amount']
-        self.database.save_trade(
+        self.save_trade(
             action,
             self.portfolio_money
         )
@@ -230,51 +385,257 @@ class Portfolio:
         :return: None
         """
         for action in response:
-            action['trade_time'] = get_epoch_from_datetime(
-                self.data_manager.fetch_current_time()
-            )
-            action['strategy_id'] = strategy_object.strategy_id
-            action['strategy_name'] = strategy_object.strategy_name
+            self.set_action_details(action, strategy_object)
             if not self.backtesting_mode:
-                if action['action'] == 'enter':
-                    execution_amount = \
-                        self.risk_manager.calculate_transaction_amount(
-                            pair=action['pair'],
-                            stop_price=action['stop_price']
-                        )
-                    action['amount'] = execution_amount[0]
-                    action['leverage'] = self.leverage
-                    if action['type'] == 'short':  # Enter Short
-                        action['side'] = 'sell'
-                        execution_response = self.execute_trade(action)
-                        strategy_object.short_entrance_price = \
-                            execution_response['price']
-                    elif action['type'] == 'long':  # Enter Long
-                        action['side'] = 'buy'
-                        execution_response = self.execute_trade(action)
-                        strategy_object.long_entrance_price = \
-                            execution_response['price']
-                    strategy_object.amount = execution_response['amount']
-                    strategy_object.is_leverage = execution_response['leverage']
-                elif action['action'] == 'exit':
-                    if action['type'] == 'short':  # Exit Short
-                        action['side'] = 'buy'
-                        execution_response = self.execute_trade(action)
-                        strategy_object.short_exit_price = execution_response['price']
-                    elif action['type'] == 'long':  # Exit Long
-                        action['side'] = 'sell'
-                        execution_response = self.execute_trade(action)
-                        strategy_object.long_exit_price = execution_response['price']
-                # Saving trade to DB
-                self.database.save_trade(
-                    execution_response,
-                    self.data_manager.fetch_balance(self.coins)
-                )
+                self.prepare_live_action(action)
+                self.execute_trade(action)
+                self.save_live_execution(action, strategy_object)
             elif self.backtesting_mode:
                 self.parse_response_and_execute_backtesting(
                     action,
                     strategy_object
                 )
+        self.recount_strategy_object_positions(strategy_object)
+
+    def set_action_details(
+            self: Any,
+            action: dict,
+            strategy_object: Any
+    ) -> None:
+        action['trade_time'] = get_epoch_from_datetime(
+            self.data_manager.fetch_current_time()
+        )
+        action['strategy_id'] = strategy_object.strategy_id
+        action['strategy_name'] = strategy_object.strategy_name
+        # Exits are executed with the leverage of the entrance
+        action.setdefault('leverage', strategy_object.is_leverage)
+
+    def prepare_live_action(
+            self: Any,
+            action: dict
+    ) -> None:
+        """
+        Sizes the entrances with the risk manager and
+        sets the side of the order
+        :param action: dict -> execution of a strategy object
+        :return: None
+        """
+        if action['action'] == 'enter':
+            execution_amount = \
+                self.risk_manager.calculate_transaction_amount(
+                    pair=action['pair'],
+                    stop_price=action['stop_price']
+                )
+            action['amount'] = execution_amount[0]
+            action['leverage'] = self.leverage
+            action['side'] = ENTRANCE_SIDES[action['type']]
+        elif action['action'] == 'exit':
+            action['side'] = EXIT_SIDES[action['type']]
+
+    def save_live_execution(
+            self: Any,
+            action: dict,
+            strategy_object: Any
+    ) -> None:
+        """
+        Saves an executed action (with its price and trade id)
+        in the strategy object and in the db
+        :param action: dict -> executed action
+        :param strategy_object: strategy object the action is for
+        :return: None
+        """
+        if action['action'] == 'enter':
+            if action['type'] == 'short':  # Enter Short
+                strategy_object.short_entrance_price = action['price']
+            elif action['type'] == 'long':  # Enter Long
+                strategy_object.long_entrance_price = action['price']
+            strategy_object.amount = action['amount']
+            strategy_object.is_leverage = action['leverage']
+        elif action['action'] == 'exit':
+            if action['type'] == 'short':  # Exit Short
+                strategy_object.short_exit_price = action['price']
+            elif action['type'] == 'long':  # Exit Long
+                strategy_object.long_exit_price = action['price']
+        # Saving trade to DB
+        self.save_trade(
+            action,
+            self.data_manager.fetch_balance(self.coins)
+        )
+
+    def execute_responses(
+            self: Any,
+            responses: list
+    ) -> None:
+        """
+        Executes the responses of one tick and updates the
+        objects in the db.
+        In live trading with order_netting, the actions of
+        all of the objects are sized first, then the orders on
+        the same pair are netted and sent together (see
+        submit_orders) and the fills are split back to the objects.
+        The actions that were not executed are undone (see
+        undo_action) before their objects are saved.
+        :param responses: list -> (strategy object, response)
+        :return: None
+        """
+        if self.backtesting_mode or not self.order_netting:
+            errors = []
+            for strategy_object, response in responses:
+                try:
+                    self.parse_response_and_execute(
+                        response, strategy_object)
+                except Exception as exception:
+                    logger.error(f"Skipped the execution of "
+                                 f"{strategy_object.strategy_id}: "
+                                 f"{exception!r}")
+                    errors.append(exception)
+                    for action in reversed(response):
+                        if 'trade_id' not in action:
+                            self.undo_action(action, strategy_object)
+                    self.recount_strategy_object_positions(strategy_object)
+                self.save_strategy(strategy_object)
+            self.raise_execution_error(errors)
+            return
+        actions = []
+        errors = []
+        for strategy_object, response in responses:
+            for action in response:
+                self.set_action_details(action, strategy_object)
+                # An action that can't be sized is not sent
+                try:
+                    self.prepare_live_action(action)
+                except Exception as exception:
+                    logger.error(f"Sizing of an action of "
+                                 f"{strategy_object.strategy_id} "
+                                 f"failed: {exception!r}")
+                    errors.append(exception)
+                    continue
+                actions.append(action)
+        executed, error = self.submit_orders(actions)
+        if error is not None:
+            errors.append(error)
+        executed_actions = {
+            id(action) for action, is_executed in zip(actions, executed)
+            if is_executed}
+        for strategy_object, response in responses:
+            for action in response:
+                if id(action) in executed_actions:
+                    self.save_live_execution(action, strategy_object)
+            for action in reversed(response):
+                if id(action) not in executed_actions:
+                    self.undo_action(action, strategy_object)
+            self.recount_strategy_object_positions(strategy_object)
+            self.save_strategy(strategy_object)
+        self.raise_execution_error(errors)
+
+    def raise_execution_error(
+            self: Any,
+            errors: list
+    ) -> None:
+        """
+        Raises the first error of the tick's executions, once every
+        object was saved. Orders of a pair with an open circuit were
+        not sent, the other pairs keep ticking.
+        :param errors: list of Exception -> errors of the executions
+        :return: None
+        """
+        for error in errors:
+            if not isinstance(error, CircuitOpenError):
+                raise error
+
+    def undo_action(
+            self: Any,
+            action: dict,
+            strategy_object: Any
+    ) -> None:
+        """
+        Puts the object back in the position it had before an
+        action that was not executed. The object keeps its expiry,
+        so an exit that was not executed is retried next tick.
+        :param action: dict -> action that was not executed
+        :param strategy_object: strategy object the action is for
+        :return: None
+        """
+        if action['action'] == 'enter':
+            strategy_object.live_position = False
+            strategy_object.strategy_position = None
+        elif action['action'] == 'exit':
+            strategy_object.live_position = True
+            strategy_object.strategy_position = action['type']
+        if self.is_batched(strategy_object):
+            self.strategy_batches[type(strategy_object)].load(
+                strategy_object)
+
+    def submit_orders(
+            self: Any,
+            actions: list
+    ) -> tuple:
+        """
+        Nets the orders of the actions per pair and leverage and
+        sends the net orders concurrently, each with order_timeout.
+        Every action of a net order gets its price, actions that
+        were fully crossed get the current mid price.
+        :param actions: list of dict -> prepared live actions
+        :return: tuple -> (list of bool, True for every executed action,
+                           first error of the orders that failed or None)
+        """
+        if self.order_pool is None:
+            self.order_pool = ThreadPoolExecutor(
+                max_workers=self.order_workers,
+                thread_name_prefix='order-submission')
+        net_orders = order_netting.net_orders(actions)
+        submitted = {}
+        for net_order in net_orders:
+            if net_order.amount:
+                self.event_bus.publish(OrderSent(
+                    net_order.pair, net_order.side, net_order.amount,
+                    net_order.leverage))
+                submitted[id(net_order)] = self.order_pool.submit(
+                    self.trader.trade,
+                    net_order.pair,
+                    net_order.amount,
+                    net_order.side,
+                    net_order.leverage,
+                    timeout=self.order_timeout
+                )
+        executed = [False] * len(actions)
+        error = None
+        for net_order in net_orders:
+            trade_id = None
+            if id(net_order) in submitted:
+                try:
+                    price, trade_id, fill = \
+                        submitted[id(net_order)].result()
+                except Exception as exception:
+                    logger.error(f"Order for {net_order.pair} failed: "
+                                 f"{exception!r}")
+                    # A timed out order was never filled, neither
+                    # was one of a pair with an open circuit,
+                    # for anything else we can't tell
+                    if not isinstance(
+                            exception, (TimeoutError, CircuitOpenError)):
+                        self.data_manager.record_fill(
+                            net_order.pair, net_order.side,
+                            net_order.amount, None)
+                    if error is None:
+                        error = exception
+                    continue
+                self.data_manager.record_fill(
+                    net_order.pair, net_order.side,
+                    net_order.amount, fill)
+                self.event_bus.publish(OrderFilled(
+                    net_order.pair, net_order.side, net_order.amount,
+                    price, trade_id))
+            else:
+                price = self.data_manager.fetch_mid_price(net_order.pair)
+            for index in net_order.members:
+                actions[index]['price'] = price
+                # Every trade in the db has its own id
+                actions[index]['trade_id'] = \
+                    trade_id if trade_id is not None else generate_id()
+                trade_id = None
+                executed[index] = True
+        return executed, error
 
     def execute_trade(
             self: Any,
@@ -293,14 +654,27 @@ class Portfolio:
         side = execution_dict['side']
         amount = execution_dict['amount']
         leverage = execution_dict['leverage']
-        execution_response = self.trader.trade(
-            pair,
-            amount,
-            side,
-            leverage
-        )
+        self.event_bus.publish(OrderSent(pair, side, amount, leverage))
+        try:
+            execution_response = self.trader.trade(
+                pair,
+                amount,
+                side,
+                leverage,
+                timeout=self.order_timeout
+            )
+        except Exception:
+            # The order might have been executed
+            self.data_manager.record_fill(pair, side, amount, None)
+            raise
         execution_dict['price'] = execution_response[0]
         execution_dict['trade_id'] = execution_response[1]
+        fill = execution_response[2] if len(execution_response) > 2 \
+            else None
+        self.data_manager.record_fill(pair, side, amount, fill)
+        self.event_bus.publish(OrderFilled(
+            pair, side, amount, execution_dict['price'],
+            execution_dict['trade_id']))
         return execution_dict
 
     def create_new_strategy_object(
@@ -322,36 +696,25 @@ class Portfolio:
             self.current_time = \
                 self.data_manager.fetch_current_time()
             current_time = self.current_time
-        return self.strategy_dictionary[strategy_name][
-            'object'](current_time,
-                      self.data_manager,
-                      pair)
+        return self.strategy_class(strategy_name)(
+            current_time,
+            self.data_manager,
+            pair)
 
-    def create_advanced_settings_counter(
+    def strategy_class(
             self: Any,
-            strategy_dictionary: dict
-    ) -> None:
+            strategy_name: str
+    ) -> Any:
         """
-        Will create a clean dictionary just for
-        counting the number of short/ long
-        :param strategy_dictionary: the orig strategy dictionary
-                                    in the the portfolio
-        :return: None -> sets the advanced settings counter
+        :param strategy_name: str -> strategy name
+        :return: class of the strategy, strategies that were not
+                 active are imported from the registry on first use
         """
-        advanced_settings_counter = {}
-        for strategy_name, strategy_settings in \
-                strategy_dictionary.items():
-            if strategy_settings['advanced_settings']:
-                strategy_dict = {}
-                for pair in strategy_settings['pairs']:
-                    strategy_dict[pair] = {
-                        'long': 0,
-                        'short': 0
-                    }
-                advanced_settings_counter[
-                    strategy_name] = strategy_dict
-        self.advanced_settings_counter = \
-            advanced_settings_counter
+        strategy_settings = self.strategy_dictionary[strategy_name]
+        if strategy_settings['object'] is None:
+            strategy_settings['object'] = \
+                self.strategy_registry.strategy_class(strategy_name)
+        return strategy_settings['object']
 
     def restore_strategy_objects(
             self: Any,
@@ -362,12 +725,17 @@ class Portfolio:
         if the query is not empty, it will run through the
         rows and will create the objects, then it will send the
         new objects to set their old values.
+        Strategies that implement initialize_restored() are
+        restored without fetching any data for every object:
+        the price is fetched once per pair and objects that
+        still need their data are warmed up on the first tick.
         :param live_strategies: sqlite3 query
         :return: list of restores strategy objects or
                  None if there is nothing to restore
         """
         if live_strategies is not None:
             old_objects = []
+            pair_prices = {}
             for old_strategy_object_settings in live_strategies:
                 strategy_name = \
                     old_strategy_object_settings['strategy_name']
@@ -377,18 +745,58 @@ class Portfolio:
                             old_strategy_object_settings['creation_time'],
                             est_time=True
                 )
-                old_object = self.create_new_strategy_object(
-                        strategy_name,
-                        strategy_pair,
-                        strategy_creation
+                strategy_class = self.strategy_class(strategy_name)
+                if not hasattr(strategy_class, 'initialize_restored'):
+                    old_object = self.create_new_strategy_object(
+                            strategy_name,
+                            strategy_pair,
+                            strategy_creation
+                        )
+                    self.set_strategy_old_values(
+                        old_object, old_strategy_object_settings
                     )
+                    old_objects.append(old_object)
+                    continue
+                old_object = strategy_class(
+                    strategy_creation,
+                    self.data_manager,
+                    strategy_pair,
+                    restoring=True
+                )
                 self.set_strategy_old_values(
                     old_object, old_strategy_object_settings
                 )
+                if strategy_pair not in pair_prices:
+                    pair_prices[strategy_pair] = \
+                        self.data_manager.fetch_mid_price(strategy_pair)
+                old_object.current_price = pair_prices[strategy_pair]
+                if old_object.initialize_restored():
+                    self.pending_warm_up.append(old_object)
                 old_objects.append(old_object)
             return old_objects
         return None
 
+    def warm_up_strategy_objects(
+            self: Any
+    ) -> None:
+        """
+        Warms up the restored objects that were pushed to live
+        trading, the objects that share a pair and settings
+        share one fetch of their data
+        :return: None
+        """
+        pending_warm_up = self.pending_warm_up
+        self.pending_warm_up = []
+        with self.data_manager.shared_ohlcv():
+            for strategy_object in pending_warm_up:
+                if strategy_object.strategy_id not in \
+                        self.active_strategy_objects:
+                    continue
+                strategy_object.warm_up()
+                if self.is_batched(strategy_object):
+                    self.strategy_batches[
+                        type(strategy_object)].load(strategy_object)
+
     def check_if_allowed_to_create_position(
             self,
             position: str,
@@ -405,10 +813,10 @@ class Portfolio:
         :param pair: str -> pair trading 'BTC/USD' and etc.
         :return: True/ False
         """
-        if self.strategy_dictionary[strategy_name][
-            position]['current_' + position][pair] < \
-                self.strategy_dictionary[strategy_name][position][
-                    'max_' + position + '_per_pair']:
+        position_settings = \
+            self.strategy_dictionary[strategy_name][position]
+        if position_settings['current_' + position].get(pair, 0) < \
+                position_settings['max_' + position + '_per_pair']:
             return True
         return False
 
@@ -467,7 +875,9 @@ class Portfolio:
             self,
             id: str = None,
             strategy_object: Any = None,
-            liquidate_all=False
+            liquidate_all=False,
+            strategy_name: str = None,
+            pair: str = None
     ) -> None:
 
         """
@@ -478,7 +888,8 @@ class Portfolio:
                               object is not expired and executed
          - If liquidate_all True is passed -> will liquidate all current
                               executed positions which are not
-                              expired
+                              expired, only of the strategy name
+                              and/ or pair if given
 
         :param strategy_object: default -> None
                                 executed strategy object
@@ -486,6 +897,10 @@ class Portfolio:
                               pass the str id of the strategy object
         :param liquidate_all: default -> False
                               pass True to liquidate all objects
+        :param strategy_name: default -> None
+                              with liquidate_all, only this strategy
+        :param pair: default -> None
+                              with liquidate_all, only this pair
         :return: None -> will liquidate positions
         """
         if not liquidate_all:
@@ -494,6 +909,7 @@ class Portfolio:
                     strategy_object = self.active_strategy_objects[id]
                 except KeyError:
                     print("Response: Strategy not found")
+                    return
             if strategy_object.strategy_position is None:
                 print("Strategy is not executed ->"
                       "Nothing to liquidate")
@@ -501,12 +917,9 @@ class Portfolio:
                                "Enter y/n:")
                 if answer == 'y':
                     strategy_object.is_expired = True
-                    try:
-                        del self.active_strategy_objects[
-                            strategy_object.strategy_id]
-                    except KeyError:
-                        pass
-                    self.database.update_strategy(
+                    self.remove_active_strategy_object(
+                        strategy_object.strategy_id)
+                    self.save_strategy(
                         strategy_object)
 
             else:
@@ -514,71 +927,563 @@ class Portfolio:
                     [self.create_liquidation_dict(strategy_object)],
                     strategy_object
                 )
-                try:
-                    del self.active_strategy_objects[id]
-                except KeyError:
-                    pass
-                self.database.update_strategy(strategy_object)
+                self.remove_active_strategy_object(
+                    strategy_object.strategy_id)
+                self.save_strategy(strategy_object)
         elif liquidate_all:
             print("This operation will close all positions\n"
                   "Do you want to  continue?")
             answer = input("Enter y/n: ")
             if answer == 'y':
-                for strategy_id, strategy_object in \
-                        self.active_strategy_objects.items():
+                for strategy_object in self.get_active_strategy_objects(
+                        strategy_name, pair):
                     strategy_object.is_expired = True
                     if strategy_object.strategy_position is not None:
                         response = [self.create_liquidation_dict
                                     (strategy_object)]
                         self.parse_response_and_execute(
                             response, strategy_object)
-                    self.database.update_strategy(
+                    self.remove_active_strategy_object(
+                        strategy_object.strategy_id)
+                    self.save_strategy(
                         strategy_object)
-                self.active_strategy_objects = {}
+
+    def get_active_strategy_objects(
+            self: Any,
+            strategy_name: str = None,
+            pair: str = None
+    ) -> list:
+        """
+        Uses the secondary indexes to find the active objects
+        of a strategy and/ or a pair
+        :param strategy_name: str -> strategy name of the objects
+        :param pair: str -> pair of the objects
+        :return: list of active strategy objects
+        """
+        if strategy_name is None and pair is None:
+            return list(self.active_strategy_objects.values())
+        if strategy_name is None:
+            return list(self.active_objects_by_pair.get(pair, {}).values())
+        strategy_objects = \
+            self.active_objects_by_strategy.get(strategy_name, {})
+        if pair is None:
+            return list(strategy_objects.values())
+        return [strategy_object
+                for strategy_object in strategy_objects.values()
+                if strategy_object.pair == pair]
+
+    def add_active_strategy_object(
+            self: Any,
+            strategy_object: Any
+    ) -> None:
+        """
+        Adds the object to the active objects, the indexes
+        and the current short/ long counters
+        :param strategy_object: strategy object to activate
+        :return: None
+        """
+        strategy_id = strategy_object.strategy_id
+        self.active_strategy_objects[strategy_id] = strategy_object
+        self.active_objects_by_strategy.setdefault(
+            strategy_object.strategy_name, {})[strategy_id] = \
+            strategy_object
+        self.active_objects_by_pair.setdefault(
+            strategy_object.pair, {})[strategy_id] = strategy_object
+        self.count_strategy_object_positions(strategy_object)
+        self.schedule_strategy_object_timer(strategy_object)
+        self.activation_order[strategy_id] = next(self.activation_sequence)
+        self.awake_objects[strategy_id] = strategy_object
+        self.add_to_strategy_batch(strategy_object)
+
+    def remove_active_strategy_object(
+            self: Any,
+            strategy_id: str
+    ) -> Any:
+        """
+        Removes the object from the active objects, the indexes
+        and the current short/ long counters
+        :param strategy_id: str -> id of the object
+        :return: the removed object or None if it was not active
+        """
+        strategy_object = self.active_strategy_objects.pop(strategy_id, None)
+        if strategy_object is None:
+            return None
+        del self.active_objects_by_strategy[
+            strategy_object.strategy_name][strategy_id]
+        del self.active_objects_by_pair[strategy_object.pair][strategy_id]
+        self.uncount_strategy_object_positions(strategy_object)
+        self.timer_service.cancel(('object', strategy_id))
+        del self.activation_order[strategy_id]
+        self.awake_objects.pop(strategy_id, None)
+        self.price_trigger_index.cancel(strategy_id)
+        if self.refresh_watchdog is not None:
+            self.refresh_watchdog.forget(strategy_id)
+        strategy_batch = self.strategy_batches.get(type(strategy_object))
+        if strategy_batch is not None:
+            strategy_batch.remove(strategy_id)
+        return strategy_object
+
+    def add_to_strategy_batch(
+            self: Any,
+            strategy_object: Any
+    ) -> None:
+        """
+        With batch_refresh on, timer driven objects of strategy
+        classes that implement refresh_batch() are refreshed
+        together from the shared arrays of their class' batch
+        :param strategy_object: active strategy object
+        :return: None
+        """
+        strategy_class = type(strategy_object)
+        if not self.batch_refresh or \
+                not strategy_object.timer_driven or \
+                not hasattr(strategy_class, 'refresh_batch'):
+            return
+        if strategy_class not in self.strategy_batches:
+            self.strategy_batches[strategy_class] = \
+                StrategyBatch(strategy_class)
+        self.strategy_batches[strategy_class].add(strategy_object)
+
+    def is_batched(
+            self: Any,
+            strategy_object: Any
+    ) -> bool:
+        strategy_batch = self.strategy_batches.get(type(strategy_object))
+        return strategy_batch is not None and \
+            strategy_object.strategy_id in strategy_batch
+
+    def sync_strategy_batches(
+            self: Any
+    ) -> None:
+        """
+        Writes the batch arrays back to the objects, so every
+        attribute of the active objects is up to date
+        :return: None
+        """
+        for strategy_batch in self.strategy_batches.values():
+            strategy_batch.store_all()
+
+    def refresh_strategy_objects(
+            self: Any
+    ) -> tuple:
+        """
+        Refreshes every active object, the batched objects
+        with one call per batch
+        :return: tuple -> (list of (strategy object, response) with
+                           a response, in activation order,
+                           list of the expired objects)
+        """
+        if self.pending_warm_up:
+            self.warm_up_strategy_objects()
+        responses = []
+        expired_objects = []
+        batched_objects = 0
+        # In live trading a pair that fails is skipped this tick
+        failed_pairs = None if self.backtesting_mode else {}
+        due_pairs = self.due_pairs()
+        watchdog = self.refresh_watchdog
+        for strategy_batch in self.strategy_batches.values():
+            start = time.perf_counter()
+            responses.extend(strategy_batch.refresh(
+                self.data_manager, failed_pairs, due_pairs))
+            expired_objects.extend(strategy_batch.expired_objects())
+            batched_objects += len(strategy_batch)
+            if watchdog is not None:
+                watchdog.add_strategy_seconds(
+                    strategy_batch.strategy_class.__name__,
+                    time.perf_counter() - start)
+        isolated_objects = False
+        if batched_objects < len(self.active_strategy_objects):
+            for strategy_object in \
+                    self.strategy_objects_to_refresh(failed_pairs, due_pairs):
+                if self.is_batched(strategy_object) or \
+                        due_pairs is not None and \
+                        strategy_object.pair not in due_pairs:
+                    continue
+                if watchdog is None:
+                    refresh = strategy_object.refresh
+                elif watchdog.is_isolated(strategy_object.strategy_id):
+                    watchdog.submit(strategy_object)
+                    isolated_objects = True
+                    continue
+                else:
+                    refresh = functools.partial(
+                        watchdog.timed_refresh, strategy_object)
+                try:
+                    response = refresh()
+                except Exception as exception:
+                    if failed_pairs is None:
+                        raise
+                    failed_pairs.setdefault(strategy_object.pair, exception)
+                    continue
+                if response:
+                    responses.append((strategy_object, response))
+                elif self.price_triggers:
+                    self.put_to_sleep(strategy_object)
+                if strategy_object.is_expired:
+                    expired_objects.append(strategy_object)
+        if watchdog is not None:
+            # The isolated objects get up to their budget, the
+            # ones that are still running are paused
+            for strategy_object, future in \
+                    watchdog.collect(watchdog.object_budget):
+                isolated_objects = True
+                try:
+                    response = future.result()
+                except Exception as exception:
+                    failed_pairs.setdefault(strategy_object.pair, exception)
+                    continue
+                if response:
+                    responses.append((strategy_object, response))
+                if strategy_object.is_expired:
+                    expired_objects.append(strategy_object)
+            watchdog.end_tick()
+        if self.strategy_batches or isolated_objects:
+            responses.sort(key=lambda object_response:
+                           self.activation_order[
+                               object_response[0].strategy_id])
+        if failed_pairs:
+            self.skip_failed_pairs(failed_pairs)
+        return responses, expired_objects
+
+    def strategy_objects_to_refresh(
+            self: Any,
+            failed_pairs: dict,
+            due_pairs: set = None
+    ) -> Any:
+        """
+        With price_triggers on, fetches the price of every pair
+        with sleeping objects and wakes the objects whose levels
+        the price reached
+        :param failed_pairs: dict -> pair: error, None to raise
+        :param due_pairs: set -> pairs polled this tick, None for all
+        :return: the active objects, or with price_triggers the
+                 awake objects, in activation order
+        """
+        if not self.price_triggers:
+            return self.active_strategy_objects.values()
+        for pair in self.price_trigger_index.pairs():
+            if due_pairs is not None and pair not in due_pairs:
+                continue
+            try:
+                price = self.data_manager.fetch_mid_price(pair)
+            except Exception as exception:
+                if failed_pairs is None:
+                    raise
+                failed_pairs.setdefault(pair, exception)
+                continue
+            for strategy_id in \
+                    self.price_trigger_index.pop_triggered(pair, price):
+                self.awake_objects[strategy_id] = \
+                    self.active_strategy_objects[strategy_id]
+        return sorted(
+            self.awake_objects.values(),
+            key=lambda strategy_object:
+                self.activation_order[strategy_object.strategy_id])
+
+    def due_pairs(
+            self: Any
+    ) -> set or None:
+        """
+        With adaptive_polling on in live trading, sorts the pairs
+        of the active objects into polling cadences
+        :return: set -> pairs to refresh this tick, None for all
+        """
+        if not self.adaptive_polling or self.backtesting_mode:
+            return None
+        return self.data_manager.due_pairs({
+            pair: self.polling_cadence(pair, strategy_objects.values())
+            for pair, strategy_objects in self.active_objects_by_pair.items()
+            if strategy_objects
+        })
+
+    def polling_cadence(
+            self: Any,
+            pair: str,
+            strategy_objects: Any
+    ) -> str:
+        """
+        :param pair: str -> pair of the objects
+        :param strategy_objects: active objects of the pair
+        :return: str -> 'fast' with a live position, an awake object
+                        or a price near a level, 'expired' if every
+                        object expired, 'slow' otherwise
+        """
+        expired = True
+        for strategy_object in strategy_objects:
+            if strategy_object.live_position:
+                return 'fast'
+            if strategy_object.is_expired:
+                continue
+            expired = False
+            if strategy_object.strategy_id in self.awake_objects:
+                return 'fast'
+        if expired:
+            return 'expired'
+        price = self.data_manager.polling_schedule.last_price(pair)
+        if price is None:
+            return 'fast'
+        lower, upper = self.price_trigger_index.closest_levels(pair)
+        margin = price * Constants.polling_near_fraction
+        if lower is not None and price - lower <= margin or \
+                upper is not None and upper - price <= margin:
+            return 'fast'
+        return 'slow'
+
+    def put_to_sleep(
+            self: Any,
+            strategy_object: Any
+    ) -> None:
+        """
+        Registers the levels of a timer driven object in the
+        price trigger index, it isn't refreshed until the
+        price reaches them or one of its timers runs
+        :param strategy_object: refreshed object without a response
+        :return: None
+        """
+        if not strategy_object.timer_driven or \
+                not hasattr(strategy_object, 'trigger_levels'):
+            return
+        levels = strategy_object.trigger_levels()
+        if levels is None:
+            return
+        strategy_id = strategy_object.strategy_id
+        self.price_trigger_index.register(
+            strategy_id, strategy_object.pair, *levels)
+        del self.awake_objects[strategy_id]
+
+    def wake_strategy_object(
+            self: Any,
+            strategy_object: Any
+    ) -> None:
+        """
+        Refreshes a sleeping object again from the next refresh
+        :param strategy_object: active strategy object
+        :return: None
+        """
+        if self.price_trigger_index.cancel(strategy_object.strategy_id):
+            self.awake_objects[strategy_object.strategy_id] = \
+                strategy_object
+
+    def skip_failed_pairs(
+            self: Any,
+            failed_pairs: dict
+    ) -> None:
+        """
+        Logs the pairs skipped this tick and counts the
+        skipped tick on the circuits that were open
+        :param failed_pairs: dict -> pair: first error of the tick
+        :return: None
+        """
+        skipped_breakers = set()
+        for pair, exception in failed_pairs.items():
+            if isinstance(exception, CircuitOpenError):
+                skipped_breakers.add(exception.breaker)
+            else:
+                logger.error(f"Refresh of {pair} failed, skipped "
+                             f"this tick: {exception!r}")
+        for breaker in skipped_breakers:
+            breaker.record_skip()
+
+    def strategy_object_counted_sides(
+            self: Any,
+            strategy_object: Any
+    ) -> tuple:
+        """
+        :param strategy_object: active strategy object
+        :return: tuple -> the sides ('long'/ 'short') this object
+                          takes in the max short/ long settings
+        """
+        strategy_settings = self.strategy_dictionary.get(
+            strategy_object.strategy_name)
+        if not strategy_settings or \
+                not strategy_settings['advanced_settings']:
+            return ()
+        sides = []
+        if strategy_object.strategy_position == 'long' \
+                or getattr(strategy_object, 'long_allowed', False):
+            sides.append('long')
+        if strategy_object.strategy_position == 'short' \
+                or getattr(strategy_object, 'short_allowed', False):
+            sides.append('short')
+        return tuple(sides)
+
+    def change_position_counters(
+            self: Any,
+            strategy_object: Any,
+            sides: tuple,
+            change: int
+    ) -> None:
+        for side in sides:
+            current = self.strategy_dictionary[
+                strategy_object.strategy_name][side]['current_' + side]
+            current[strategy_object.pair] = \
+                current.get(strategy_object.pair, 0) + change
+
+    def count_strategy_object_positions(
+            self: Any,
+            strategy_object: Any
+    ) -> None:
+        sides = self.strategy_object_counted_sides(strategy_object)
+        self.counted_positions[strategy_object.strategy_id] = sides
+        self.change_position_counters(strategy_object, sides, 1)
+
+    def uncount_strategy_object_positions(
+            self: Any,
+            strategy_object: Any
+    ) -> None:
+        sides = self.counted_positions.pop(strategy_object.strategy_id, ())
+        self.change_position_counters(strategy_object, sides, -1)
+
+    def recount_strategy_object_positions(
+            self: Any,
+            strategy_object: Any
+    ) -> None:
+        """
+        Updates the current short/ long counters after the
+        object entered or exited a position
+        :param strategy_object: strategy object
+        :return: None
+        """
+        if strategy_object.strategy_id not in self.active_strategy_objects:
+            return
+        self.uncount_strategy_object_positions(strategy_object)
+        self.count_strategy_object_positions(strategy_object)
 
     def check_strategy_current_short_long_positions(
             self: Any
     ) -> None:
         """
-        Will go through all of our active and executed objects
-        and will check how many long/ short position we are
-        currently running. Then it will update the settings
-        for the current number of long/ short.
-        Since we have limitations on number of long/ short allowed
-        at a time, we have to check this process.
+        The current number of long/ short positions is kept up
+        to date as objects are added, execute and removed.
+        This will rebuild the counters from all of our
+        active objects, in case the objects were changed
+        outside of the portfolio.
         :return: None
         """
-        # Initiate counters
-        if self.advanced_settings_counter is None:
-            self.create_advanced_settings_counter(
-                self.strategy_dictionary
-            )
-        advanced_settings_counter = copy.deepcopy(
-            self.advanced_settings_counter
-        )
-        for strategy_object in \
-                self.active_strategy_objects.values():
-            if strategy_object.strategy_name in \
-                    advanced_settings_counter:
-                if strategy_object.strategy_position == 'long' \
-                        or strategy_object.long_allowed:
-                    advanced_settings_counter[
-                        strategy_object.strategy_name][
-                        strategy_object.pair][
-                        'long'] += 1
-                if strategy_object.strategy_position == 'short' \
-                        or strategy_object.short_allowed:
-                    advanced_settings_counter[
-                        strategy_object.strategy_name][
-                        strategy_object.pair][
-                        'short'] += 1
-        for strategy_name, strategy_counter in \
-                advanced_settings_counter.items():
-            for pair, counter in strategy_counter.items():
-                self.strategy_dictionary[strategy_name][
-                    'short']['current_short'][pair] = counter['short']
-                self.strategy_dictionary[strategy_name][
-                    'long']['current_long'][pair] = counter['long']
+        for strategy_settings in self.strategy_dictionary.values():
+            if strategy_settings['advanced_settings']:
+                for side in ('short', 'long'):
+                    current = strategy_settings[side]['current_' + side]
+                    for pair in current:
+                        current[pair] = 0
+        self.counted_positions = {}
+        for strategy_object in self.active_strategy_objects.values():
+            self.count_strategy_object_positions(strategy_object)
+
+    def build_strategy_objects(
+            self: Any,
+            strategy_name: str,
+            pairs: list
+    ) -> list:
+        """
+        Creates the new objects of one creation event.
+        In live trading their initialization (price and ohlcv
+        requests) runs concurrently on the creation pool.
+        :param strategy_name: str -> The name of the strategy
+        :param pairs: list -> pair of every new object
+        :return: list -> new objects, in the order of the pairs, None
+                         for the pairs that failed in live trading
+        """
+        self.current_time = self.data_manager.fetch_current_time()
+        current_time = self.current_time
+
+        def build(pair):
+            try:
+                return self.create_new_strategy_object(
+                    strategy_name, pair, current_time)
+            except Exception as exception:
+                if self.backtesting_mode:
+                    raise
+                # The other pairs are still created
+                logger.error(f"Creating {strategy_name} for {pair} "
+                             f"failed, skipped: {exception!r}")
+                return None
+
+        if self.backtesting_mode or self.creation_workers <= 1 \
+                or len(pairs) <= 1:
+            return [build(pair) for pair in pairs]
+        if self.creation_pool is None:
+            self.creation_pool = ThreadPoolExecutor(
+                max_workers=self.creation_workers,
+                thread_name_prefix='strategy-creation')
+        return list(self.creation_pool.map(build, pairs))
+
+    def commit_new_strategy_objects(
+            self: Any,
+            strategy_name: str,
+            new_objects: list
+    ) -> None:
+        """
+        Adds the new objects of one creation event to the
+        active objects and the db, in the order they were built
+        :param strategy_name: str -> The name of the strategy
+        :param new_objects: list -> new strategy objects
+        :return: None
+        """
+        new_objects = [new_object for new_object in new_objects
+                       if new_object is not None]
+        if not new_objects:
+            return
+        for new_object in new_objects:
+            self.add_active_strategy_object(new_object)
+        self.save_new_strategies(new_objects)
+        self.strategy_dictionary[strategy_name][
+            'last_object_created_time'] = \
+            new_objects[-1].last_exchange_open_time
+
+    def save_new_strategies(
+            self: Any,
+            strategy_objects: list
+    ) -> None:
+        """
+        Publishes copies of new objects to be inserted in the db
+        :param strategy_objects: list -> new strategy objects
+        :return: None
+        """
+        self.event_bus.publish(StrategiesCreated(tuple(
+            copy.copy(strategy_object)
+            for strategy_object in strategy_objects)))
+
+    def save_strategy(
+            self: Any,
+            strategy_object: Any
+    ) -> None:
+        """
+        Publishes a copy of the object to be updated in the db,
+        the object keeps changing while the update waits
+        :param strategy_object: strategy object
+        :return: None
+        """
+        self.event_bus.publish(StrategyUpdated(copy.copy(strategy_object)))
+
+    def save_trade(
+            self: Any,
+            action: dict,
+            balance: dict
+    ) -> None:
+        """
+        :param action: dict -> executed action of a strategy object
+        :param balance: dict -> coin: amount after the action
+        :return: None
+        """
+        self.event_bus.publish(TradeExecuted(dict(action), dict(balance)))
+
+    def write_to_database(
+            self: Any,
+            event: Any
+    ) -> None:
+        """
+        Subscriber of the event bus that writes the db
+        :param event: StrategiesCreated/ StrategyUpdated/ TradeExecuted
+        :return: None
+        """
+        if isinstance(event, StrategyUpdated):
+            self.database.update_strategy(event.strategy_object)
+        elif isinstance(event, StrategiesCreated):
+            self.database.insert_new_strategies(list(event.strategy_objects))
+        elif isinstance(event, TradeExecuted):
+            self.database.save_trade(event.action, event.balance)
 
     def advanced_settings_strategies_creator(
             self: Any,
@@ -593,9 +1498,9 @@ class Portfolio:
         :param strategy_settings: dict -> The settings of the strategy
         :return: None -> creates new objects
         """
+        allowed_pairs = []
+        allowed_positions = []
         for pair in strategy_settings['pairs']:
-            # if not maxed_out:
-            self.check_strategy_current_short_long_positions()
             short = self.check_if_allowed_to_create_position(
                 'short',
                 strategy_name,
@@ -607,18 +1512,17 @@ class Portfolio:
                 pair
             )
             if short or long:
-                new_object = self.create_new_strategy_object(
-                    strategy_name,
-                    pair
-                )
-                new_object.short_allowed = short
-                new_object.long_allowed = long
-                self.active_strategy_objects[
-                    new_object.strategy_id] = new_object
-                self.database.insert_new_strategy(new_object)
-                self.strategy_dictionary[
-                    strategy_name]['last_object_created_time'] = \
-                    new_object.last_exchange_open_time
+                allowed_pairs.append(pair)
+                allowed_positions.append((short, long))
+        new_objects = self.build_strategy_objects(
+            strategy_name, allowed_pairs)
+        for new_object, (short, long) in \
+                zip(new_objects, allowed_positions):
+            if new_object is None:
+                continue
+            new_object.short_allowed = short
+            new_object.long_allowed = long
+        self.commit_new_strategy_objects(strategy_name, new_objects)
 
     def regular_strategies_creator(
             self: Any,
@@ -634,69 +1538,140 @@ class Portfolio:
         :param strategy_settings: dict -> The settings of the strategy
         :return: None -> creates new objects
         """
-        for pair in strategy_settings['pairs']:
-            new_object = self.create_new_strategy_object(
+        new_objects = self.build_strategy_objects(
+            strategy_name, strategy_settings['pairs'])
+        self.commit_new_strategy_objects(strategy_name, new_objects)
+
+    def create_strategy_objects(
+            self: Any,
+            strategy_name: str
+    ) -> None:
+        """
+        Creates the new objects of one strategy, with or
+        without the advanced settings
+        :param strategy_name: str -> The name of the strategy
+        :return: None -> creates new objects
+        """
+        strategy_settings = self.strategy_dictionary[strategy_name]
+        if strategy_settings['advanced_settings']:
+            self.advanced_settings_strategies_creator(
                 strategy_name,
-                pair
-            )
-            self.active_strategy_objects[
-                new_object.strategy_id] = new_object
-            self.database.insert_new_strategy(new_object)
-            self.strategy_dictionary[strategy_name][
-                'last_object_created_time'] = \
-                new_object.last_exchange_open_time
+                strategy_settings)
+        else:
+            self.regular_strategies_creator(
+                strategy_name,
+                strategy_settings)
+
+    def schedule_strategy_creation(
+            self: Any,
+            strategy_name: str
+    ) -> None:
+        """
+        Registers the next creation of the strategy objects
+        with the timer service. We want to give two minutes
+        break between each creation interval.
+        :param strategy_name: str -> The name of the strategy
+        :return: None
+        """
+        strategy_settings = self.strategy_dictionary[strategy_name]
+        if strategy_settings['last_object_created_time'] is None:
+            strategy_settings['last_object_created_time'] = \
+                self.data_manager.fetch_current_time()
+        self.timer_service.schedule(
+            ('creation', strategy_name),
+            strategy_settings['last_object_created_time'] +
+            strategy_settings['creation_interval'] +
+            datetime.timedelta(minutes=2)
+        )
+
+    def schedule_strategy_object_timer(
+            self: Any,
+            strategy_object: Any
+    ) -> None:
+        """
+        Objects that implement next_timer_time() and on_timer()
+        get their time based work (session rollover, expiration)
+        run by the timer service instead of on every refresh
+        :param strategy_object: active strategy object
+        :return: None
+        """
+        if not hasattr(strategy_object, 'next_timer_time'):
+            return
+        due_time = strategy_object.next_timer_time()
+        if due_time is not None and not strategy_object.is_expired:
+            strategy_object.timer_driven = True
+            self.timer_service.schedule(
+                ('object', strategy_object.strategy_id), due_time)
+
+    def run_due_timers(
+            self: Any
+    ) -> None:
+        """
+        Pops the timers that are due at the current time:
+        - creation timers create the new strategy objects
+        - object timers run the object's time based work
+        :return: None
+        """
+        for timer_type, name in \
+                self.timer_service.pop_due(self.current_time):
+            if timer_type == 'creation':
+                strategy_settings = self.strategy_dictionary[name]
+                # Will create based on exchange time
+                strategy_settings['last_object_created_time'] += \
+                    strategy_settings['creation_interval']
+                self.create_strategy_objects(name)
+                self.schedule_strategy_creation(name)
+            elif timer_type == 'object':
+                strategy_object = self.active_strategy_objects.get(name)
+                if self.refresh_watchdog is not None and \
+                        self.refresh_watchdog.is_running(name):
+                    # Its refresh still runs on a worker, try again
+                    # on the next tick
+                    self.timer_service.schedule(
+                        ('object', name), self.current_time)
+                elif strategy_object is not None:
+                    if self.is_batched(strategy_object):
+                        strategy_batch = \
+                            self.strategy_batches[type(strategy_object)]
+                        strategy_batch.store(
+                            strategy_batch.rows[name])
+                        strategy_object.on_timer(self.current_time)
+                        strategy_batch.load(strategy_object)
+                    else:
+                        strategy_object.on_timer(self.current_time)
+                    self.wake_strategy_object(strategy_object)
+                    self.schedule_strategy_object_timer(strategy_object)
 
     def check_for_new_object_creation(
             self: Any,
             initial=False
     ) -> None:
         """
-        This will loop through the strategy dictionary
-        for every object that is active,
-        it will check if we need a new object based on
-        the strategy creation interval
+        On the first run this will loop through the strategy
+        dictionary, create the objects of every active strategy
+        and register the next creation with the timer service.
+        Afterwards, it will only run the timers that are due
+        based on the strategy creation interval.
         If we have any advanced settings, such as max short/ long
         it will check for their specifications as well
         :return: None -> changes default class variables
         """
+        if not initial:
+            self.run_due_timers()
+            return
         for strategy_name, strategy_settings in \
                 self.strategy_dictionary.items():
-            # We want to give two minutes break between each day
             if strategy_settings['active']:
-                # If it is first run we can't use last object
-                # created time that's why we have to write
-                # this twice
-                if initial:
-                    # for pair in strategy_settings['pairs']:
-                    #     self.add_pair_to_coins_portfolio(pair)
-                    if strategy_settings['advanced_settings']:
-                        self.advanced_settings_strategies_creator(
-                            strategy_name,
-                            strategy_settings)
-                    else:
-                        self.regular_strategies_creator(
-                            strategy_name,
-                            strategy_settings)
-                elif self.current_time - datetime.timedelta(minutes=2) - \
-                        strategy_settings['last_object_created_time'] >= \
-                        strategy_settings['creation_interval']:
-                    # Will create based on exchange time
-                    strategy_settings['last_object_created_time'] += \
-                        strategy_settings['creation_interval']
-                    if strategy_settings['advanced_settings']:
-                        self.advanced_settings_strategies_creator(
-                            strategy_name,
-                            strategy_settings)
-                    else:
-                        self.regular_strategies_creator(
-                            strategy_name,
-                            strategy_settings)
+                self.create_strategy_objects(strategy_name)
+                self.schedule_strategy_creation(strategy_name)
 
     def export_trades(
             self,
             backtesting: bool = True
     ) -> None:
-        general_df = pd.DataFrame()
+        trades_rows = []
+        # The trades published so far are written first
+        self.event_bus.flush()
         trades = self.database.retrieve_all_trades()
         for trade in trades:
             trade_dict = {}
@@ -707,7 +1682,9 @@ class Portfolio:
                 elif column == 'portfolio_balance':
                     value = json.loads(value)
                 trade_dict[column] = value
-            general_df = general_df.append(trade_dict, ignore_index=True)
+            trades_rows.append(trade_dict)
+        import pandas as pd
+        general_df = pd.DataFrame(trades_rows)
         if backtesting:
             file_name = f"{Constants.backtesting_results}/{self.database.strategy_objects_table}_trades.csv"
         else:
@@ -726,7 +1703,8 @@ class Portfolio:
         saves results backtesting results dir
         :return:
         """
-        general_df = pd.DataFrame()
+        strategies_rows = []
+        self.event_bus.flush()
         strategies = self.database.retrieve_all_objects()
         for strategy_settings in strategies:
             user_settings = json.loads(
@@ -740,7 +1718,9 @@ class Portfolio:
                     settings_value = \
                         get_datetime_from_epoch(int(settings_value), True)
                     all_settings[settings_name] = settings_value
-            general_df = general_df.append(all_settings, ignore_index=True)
+            strategies_rows.append(all_settings)
+        import pandas as pd
+        general_df = pd.DataFrame(strategies_rows)
         if backtesting:
             file_name = f"{Constants.backtesting_results}/{self.database.strategy_objects_table}.csv"
         else:
@@ -0,0 +1,309 @@
+"""
+In memory history of the recent live prices of every pair.
+Every pair keeps a fixed size ring buffer of its polled prices and
+one of minute bars built from them as the prices come in. The
+buffers write every value twice, at its index and capacity after it,
+so the last n values are always one contiguous slice: windows are
+read only numpy views, no copy is made.
+A view shows the values at the time it was taken until they are
+overwritten, capacity appends later; copy it to keep it longer.
+"""
+import threading
+import numpy
+from typing import Any
+
+
+class RingBuffer:
+    def __init__(
+            self: Any,
+            capacity: int,
+            columns: tuple
+    ) -> None:
+        """
+        :param capacity: int -> number of rows kept
+        :param columns: tuple -> names of the float columns
+        """
+        self.capacity = capacity
+        self.columns = {
+            column: numpy.zeros(2 * capacity) for column in columns
+        }
+        # Index of the next row to write and number of rows kept
+        self.head = 0
+        self.count = 0
+
+    def __len__(
+            self: Any
+    ) -> int:
+        return self.count
+
+    def append(
+            self: Any,
+            row: dict
+    ) -> None:
+        """
+        :param row: dict -> column: value, of every column
+        :return: None -> overwrites the oldest row once full
+        """
+        head = self.head
+        for column, values in self.columns.items():
+            values[head] = values[head + self.capacity] = row[column]
+        self.head = (head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def extend(
+            self: Any,
+            rows: dict
+    ) -> None:
+        """
+        :param rows: dict -> column: numpy array, in time order
+        :return: None -> keeps the last capacity rows
+        """
+        rows = {column: values[-self.capacity:]
+                for column, values in rows.items()}
+        size = len(rows[next(iter(self.columns))])
+        indexes = (self.head + numpy.arange(size)) % self.capacity
+        for column, values in self.columns.items():
+            values[indexes] = values[indexes + self.capacity] = rows[column]
+        self.head = (self.head + size) % self.capacity
+        self.count = min(self.count + size, self.capacity)
+
+    def replace_last(
+            self: Any,
+            column: str,
+            value: float
+    ) -> None:
+        last = (self.head - 1) % self.capacity
+        values = self.columns[column]
+        values[last] = values[last + self.capacity] = value
+
+    def last(
+            self: Any,
+            column: str
+    ) -> float or None:
+        if not self.count:
+            return None
+        return self.columns[column][(self.head - 1) % self.capacity]
+
+    def window(
+            self: Any,
+            column: str,
+            count: int = None
+    ) -> Any:
+        """
+        :param column: str -> column name
+        :param count: int -> number of the last rows, None for all
+        :return: numpy array -> read only view, oldest first
+        """
+        count = self.count if count is None else min(count, self.count)
+        end = self.head + self.capacity
+        view = self.columns[column][end - count:end]
+        view.flags.writeable = False
+        return view
+
+
+class PairPriceHistory:
+    bar_columns = ('time', 'open', 'high', 'low', 'close', 'ticks')
+
+    def __init__(
+            self: Any,
+            capacity: int,
+            bar_capacity: int
+    ) -> None:
+        """
+        :param capacity: int -> number of prices kept
+        :param bar_capacity: int -> number of finished minute bars kept
+        """
+        self.prices = RingBuffer(capacity, ('time', 'price'))
+        self.bars = RingBuffer(bar_capacity, self.bar_columns)
+        # Minute bar of the current minute, not finished yet
+        self.current_bar = None
+
+    def record(
+            self: Any,
+            unix_time: float,
+            price: float
+    ) -> None:
+        """
+        :param unix_time: float -> epoch seconds of the price
+        :param price: float -> polled price
+        :return: None -> older prices than the last one are ignored,
+                         a price of the same time replaces it
+        """
+        last_time = self.prices.last('time')
+        if last_time is not None and unix_time <= last_time:
+            if unix_time == last_time:
+                self.prices.replace_last('price', price)
+                self.update_bar(unix_time, price, replace=True)
+            return
+        self.prices.append({'time': unix_time, 'price': price})
+        self.update_bar(unix_time, price)
+
+    def update_bar(
+            self: Any,
+            unix_time: float,
+            price: float,
+            replace: bool = False
+    ) -> None:
+        minute = unix_time - unix_time % 60
+        bar = self.current_bar
+        if bar is not None and bar['time'] == minute:
+            bar['high'] = max(bar['high'], price)
+            bar['low'] = min(bar['low'], price)
+            bar['close'] = price
+            if not replace:
+                bar['ticks'] += 1
+            return
+        if bar is not None:
+            self.bars.append(bar)
+        self.current_bar = {'time': minute, 'open': price, 'high': price,
+                            'low': price, 'close': price, 'ticks': 1}
+
+    def seed(
+            self: Any,
+            unix_times: Any,
+            prices: Any
+    ) -> None:
+        """
+        Fills the empty history from recorded prices
+        :param unix_times: numpy array -> epoch seconds, ascending
+        :param prices: numpy array -> prices
+        :return: None
+        """
+        if not len(unix_times):
+            return
+        self.prices.extend({'time': unix_times, 'price': prices})
+        minutes = unix_times - unix_times % 60
+        starts = numpy.flatnonzero(
+            numpy.r_[True, minutes[1:] != minutes[:-1]])
+        ends = numpy.r_[starts[1:], len(prices)]
+        bars = {
+            'time': minutes[starts],
+            'open': prices[starts],
+            'high': numpy.maximum.reduceat(prices, starts),
+            'low': numpy.minimum.reduceat(prices, starts),
+            'close': prices[ends - 1],
+            'ticks': (ends - starts).astype(float)
+        }
+        self.bars.extend({column: values[:-1]
+                          for column, values in bars.items()})
+        self.current_bar = {column: values[-1].item()
+                            for column, values in bars.items()}
+
+
+class PriceHistory:
+    def __init__(
+            self: Any,
+            capacity: int = 14400,
+            bar_capacity: int = 1440
+    ) -> None:
+        """
+        :param capacity: int -> prices kept per pair
+        :param bar_capacity: int -> finished minute bars kept per pair
+        """
+        self.capacity = capacity
+        self.bar_capacity = bar_capacity
+        # pair -> PairPriceHistory
+        self.pairs = {}
+        # Prices are recorded from the creation and refresh threads
+        self.lock = threading.Lock()
+
+    def pair_history(
+            self: Any,
+            pair: str
+    ) -> PairPriceHistory:
+        history = self.pairs.get(pair)
+        if history is None:
+            history = self.pairs[pair] = PairPriceHistory(
+                self.capacity, self.bar_capacity)
+        return history
+
+    def record(
+            self: Any,
+            pair: str,
+            unix_time: float,
+            price: float
+    ) -> None:
+        """
+        :param pair: str -> pair of the price
+        :param unix_time: float -> epoch seconds of the price
+        :param price: float -> polled price
+        :return: None
+        """
+        with self.lock:
+            self.pair_history(pair).record(unix_time, price)
+
+    def seed(
+            self: Any,
+            pair: str,
+            unix_times: Any,
+            prices: Any
+    ) -> None:
+        """
+        :param pair: str -> pair with no prices recorded yet
+        :param unix_times: numpy array -> epoch seconds, ascending
+        :param prices: numpy array -> prices
+        :return: None
+        """
+        with self.lock:
+            history = self.pair_history(pair)
+            if not len(history.prices):
+                history.seed(unix_times, prices)
+
+    def prices(
+            self: Any,
+            pair: str,
+            count: int = None
+    ) -> tuple:
+        """
+        :param pair: str -> pair
+        :param count: int -> number of the last prices, None for all
+        :return: tuple -> (epoch seconds, prices) read only views,
+                          oldest first
+        """
+        with self.lock:
+            prices = self.pair_history(pair).prices
+            return prices.window('time', count), \
+                prices.window('price', count)
+
+    def prices_since(
+            self: Any,
+            pair: str,
+            unix_time: float
+    ) -> tuple:
+        """
+        :param pair: str -> pair
+        :param unix_time: float -> epoch seconds of the first price
+        :return: tuple -> (epoch seconds, prices) read only views
+                          of the prices from unix_time on
+        """
+        times, prices = self.prices(pair)
+        start = numpy.searchsorted(times, unix_time)
+        return times[start:], prices[start:]
+
+    def minute_bars(
+            self: Any,
+            pair: str,
+            count: int = None,
+            include_current: bool = False
+    ) -> dict:
+        """
+        Minutes without a price have no bar
+        :param pair: str -> pair
+        :param count: int -> number of the last finished bars,
+                             None for all
+        :param include_current: bool -> adds the unfinished bar of the
+                                        current minute, the bars are
+                                        then copied
+        :return: dict -> 'time' (epoch seconds of the minute), 'open',
+                         'high', 'low', 'close', 'ticks': numpy arrays,
+                         oldest first
+        """
+        with self.lock:
+            history = self.pair_history(pair)
+            bars = {column: history.bars.window(column, count)
+                    for column in PairPriceHistory.bar_columns}
+            if include_current and history.current_bar is not None:
+                bars = {column: numpy.append(
+                            values, history.current_bar[column])
+                        for column, values in bars.items()}
+            return bars
@@ -0,0 +1,169 @@
+"""
+Per pair index of the price levels strategy objects wait for.
+An object that can't act until the price leaves a range
+registers the range and sleeps, on every price update only the
+objects whose range was left are woken.
+Every pair keeps a max heap of the lower levels and a min heap
+of the upper levels, so a price update pops only the levels
+that were crossed.
+"""
+import heapq
+import itertools
+from typing import Any
+
+
+class PriceTriggerIndex:
+    def __init__(
+            self: Any
+    ) -> None:
+        # pair -> heap of (-lower level, sequence, strategy id)
+        self.lower_levels = {}
+        # pair -> heap of (upper level, sequence, strategy id)
+        self.upper_levels = {}
+        # strategy id -> (pair, sequence of its live heap entries)
+        self.registrations = {}
+        # pair -> number of registered objects
+        self.pair_counts = {}
+        self.sequence = itertools.count()
+
+    def __len__(
+            self: Any
+    ) -> int:
+        return len(self.registrations)
+
+    def __contains__(
+            self: Any,
+            strategy_id: str
+    ) -> bool:
+        return strategy_id in self.registrations
+
+    def pairs(
+            self: Any
+    ) -> list:
+        """
+        :return: list -> pairs with sleeping objects
+        """
+        return list(self.pair_counts)
+
+    def register(
+            self: Any,
+            strategy_id: str,
+            pair: str,
+            lower: float = None,
+            upper: float = None
+    ) -> None:
+        """
+        The object sleeps while lower < price < upper and is
+        woken once the price reaches either level
+        :param strategy_id: str -> id of the object
+        :param pair: str -> pair of the object
+        :param lower: float -> lower level, None if unbounded
+        :param upper: float -> upper level, None if unbounded
+        :return: None
+        """
+        self.cancel(strategy_id)
+        sequence = next(self.sequence)
+        self.registrations[strategy_id] = (pair, sequence)
+        self.pair_counts[pair] = self.pair_counts.get(pair, 0) + 1
+        if lower is not None:
+            heapq.heappush(
+                self.lower_levels.setdefault(pair, []),
+                (-lower, sequence, strategy_id))
+        if upper is not None:
+            heapq.heappush(
+                self.upper_levels.setdefault(pair, []),
+                (upper, sequence, strategy_id))
+
+    def cancel(
+            self: Any,
+            strategy_id: str
+    ) -> bool:
+        """
+        Removes the object's levels. The heap entries are
+        dropped once they reach the top or the heap is compacted.
+        :param strategy_id: str -> id of the object
+        :return: bool -> True if the object was registered
+        """
+        registration = self.registrations.pop(strategy_id, None)
+        if registration is None:
+            return False
+        pair = registration[0]
+        self.pair_counts[pair] -= 1
+        if not self.pair_counts[pair]:
+            del self.pair_counts[pair]
+            self.lower_levels.pop(pair, None)
+            self.upper_levels.pop(pair, None)
+        else:
+            self.compact(pair)
+        return True
+
+    def pop_triggered(
+            self: Any,
+            pair: str,
+            price: float
+    ) -> list:
+        """
+        Wakes the objects whose levels the price reached,
+        they are removed from the index
+        :param pair: str -> pair of the price
+        :param price: float -> current price
+        :return: list -> ids of the woken objects
+        """
+        woken = []
+        lower_levels = self.lower_levels.get(pair)
+        while lower_levels and -lower_levels[0][0] >= price:
+            _, sequence, strategy_id = heapq.heappop(lower_levels)
+            if self.is_live(strategy_id, sequence):
+                self.cancel(strategy_id)
+                woken.append(strategy_id)
+        upper_levels = self.upper_levels.get(pair)
+        while upper_levels and upper_levels[0][0] <= price:
+            _, sequence, strategy_id = heapq.heappop(upper_levels)
+            if self.is_live(strategy_id, sequence):
+                self.cancel(strategy_id)
+                woken.append(strategy_id)
+        return woken
+
+    def closest_levels(
+            self: Any,
+            pair: str
+    ) -> tuple:
+        """
+        :param pair: str -> pair with sleeping objects
+        :return: tuple -> (highest lower level, lowest upper level)
+                          of the pair, None if there is none
+        """
+        closest = []
+        for levels, sign in ((self.lower_levels, -1),
+                             (self.upper_levels, 1)):
+            heap = levels.get(pair)
+            while heap and not self.is_live(heap[0][2], heap[0][1]):
+                heapq.heappop(heap)
+            closest.append(sign * heap[0][0] if heap else None)
+        return tuple(closest)
+
+    def is_live(
+            self: Any,
+            strategy_id: str,
+            sequence: int
+    ) -> bool:
+        registration = self.registrations.get(strategy_id)
+        return registration is not None and registration[1] == sequence
+
+    def compact(
+            self: Any,
+            pair: str
+    ) -> None:
+        """
+        Drops the cancelled entries of the pair once they
+        outnumber the registered objects
+        :param pair: str -> pair to compact
+        :return: None
+        """
+        limit = 2 * self.pair_counts[pair] + 64
+        for levels in (self.lower_levels, self.upper_levels):
+            heap = levels.get(pair)
+            if heap is not None and len(heap) > limit:
+                heap[:] = [entry for entry in heap
+                           if self.is_live(entry[2], entry[1])]
+                heapq.heapify(heap)
@@ -0,0 +1,181 @@
+"""
+Client side rate limiter for FPG's endpoint and the exchanges.
+Every endpoint draws from a token bucket (several endpoints
+can share one bucket), the bucket is shared by all threads.
+Requests waiting for a token are served by priority:
+orders first, then prices and balances, then history.
+"""
+import collections
+import heapq
+import itertools
+import threading
+import time
+from typing import Any
+
+from lib.py.fpg.constants import (
+    Constants
+)
+
+PRIORITY_ORDER = 0
+PRIORITY_PRICE = 1
+PRIORITY_HISTORY = 2
+
+# endpoint -> (bucket, priority)
+ENDPOINTS = {
+    'execute_trade': ('fpg', PRIORITY_ORDER),
+    'fetch_price': ('fpg', PRIORITY_PRICE),
+    'fetch_l2_book': ('fpg', PRIORITY_PRICE),
+    'fetch_balance': ('fpg', PRIORITY_PRICE),
+    'fetch_ohlcv': ('exchange', PRIORITY_HISTORY)
+}
+
+
+class TokenBucket:
+    def __init__(
+            self: Any,
+            rate: float,
+            capacity: float
+    ) -> None:
+        """
+        :param rate: float -> tokens added per second
+        :param capacity: float -> largest burst
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def seconds_until_token(
+            self: Any,
+            now: float
+    ) -> float:
+        """
+        :param now: float -> monotonic time
+        :return: float -> 0 if a token is available
+        """
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(
+            self: Any
+    ) -> None:
+        self.tokens -= 1
+
+
+class RateLimiter:
+    def __init__(
+            self: Any,
+            limits: dict = None,
+            samples: int = 1000
+    ) -> None:
+        """
+        :param limits: dict -> bucket: (requests per second, burst),
+                               defaults to Constants.rate_limits.
+                               Endpoints of buckets without a limit
+                               are not limited.
+        :param samples: int -> wait times kept per endpoint
+        """
+        if limits is None:
+            limits = Constants.rate_limits
+        self.buckets = {
+            name: TokenBucket(rate, burst)
+            for name, (rate, burst) in limits.items()
+        }
+        self.condition = threading.Condition()
+        self.queues = {name: [] for name in self.buckets}
+        self.sequence = itertools.count()
+        self.wait_times = collections.defaultdict(
+            lambda: collections.deque(maxlen=samples))
+        self.requests = collections.Counter()
+
+    def acquire(
+            self: Any,
+            endpoint: str,
+            priority: int = None
+    ) -> float:
+        """
+        Blocks until the endpoint may send a request
+        :param endpoint: str -> endpoint name (see ENDPOINTS)
+        :param priority: int -> lower is served first, defaults
+                                to the priority of the endpoint
+        :return: float -> seconds waited
+        """
+        bucket_name, default_priority = \
+            ENDPOINTS.get(endpoint, (endpoint, PRIORITY_PRICE))
+        if priority is None:
+            priority = default_priority
+        start = time.monotonic()
+        bucket = self.buckets.get(bucket_name)
+        if bucket is not None:
+            queue = self.queues[bucket_name]
+            ticket = (priority, next(self.sequence))
+            with self.condition:
+                heapq.heappush(queue, ticket)
+                while True:
+                    if queue[0] == ticket:
+                        wait = bucket.seconds_until_token(time.monotonic())
+                        if wait <= 0:
+                            bucket.take()
+                            heapq.heappop(queue)
+                            self.condition.notify_all()
+                            break
+                        self.condition.wait(wait)
+                    else:
+                        self.condition.wait()
+        waited = time.monotonic() - start
+        with self.condition:
+            self.requests[endpoint] += 1
+            self.wait_times[endpoint].append(waited)
+        return waited
+
+    def metrics(
+            self: Any
+    ) -> dict:
+        """
+        :return: dict -> endpoint: requests, mean/ p95/ max
+                         queue wait in ms over the last samples
+        """
+        metrics = {}
+        with self.condition:
+            for endpoint, wait_times in self.wait_times.items():
+                ordered = sorted(wait_times)
+                metrics[endpoint] = {
+                    'requests': self.requests[endpoint],
+                    'mean_wait_ms':
+                        sum(ordered) / len(ordered) * 1000,
+                    'p95_wait_ms':
+                        ordered[int(0.95 * (len(ordered) - 1))] * 1000,
+                    'max_wait_ms': ordered[-1] * 1000
+                }
+        return metrics
+
+
+shared_rate_limiter = None
+shared_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """
+    :return: RateLimiter -> the limiter shared by every connector
+                            and data manager of the process
+    """
+    global shared_rate_limiter
+    with shared_rate_limiter_lock:
+        if shared_rate_limiter is None:
+            shared_rate_limiter = RateLimiter()
+        return shared_rate_limiter
+
+
+def reset_rate_limiter() -> None:
+    """
+    Drops the shared limiter, the next one is built
+    from the current Constants.rate_limits
+    :return: None
+    """
+    global shared_rate_limiter
+    with shared_rate_limiter_lock:
+        shared_rate_limiter = None
@@ -0,0 +1,281 @@
+"""
+Time budget for the refresh of the live strategy objects.
+Every refresh is timed against the object budget and every tick
+against the budget of each strategy. Objects that overrun their
+budget overrun_limit times in a row are isolated: they refresh on
+a worker thread, the tick waits for them up to their budget and
+skips them (paused) while a refresh of theirs is still running.
+An isolated object that keeps to its budget is moved back.
+"""
+import collections
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any
+
+from lib.py.fpg.logger import (
+    get_module_logger
+)
+logger = get_module_logger('watchdog')
+
+
+class RefreshWatchdog:
+    def __init__(
+            self: Any,
+            object_budget: float = 0.1,
+            strategy_budgets: dict = None,
+            overrun_limit: int = 3,
+            release_after: int = 20,
+            workers: int = 4,
+            clock: Any = time.perf_counter
+    ) -> None:
+        """
+        :param object_budget: float -> seconds one refresh may take
+        :param strategy_budgets: dict -> strategy name: seconds the
+                                         objects of the strategy may
+                                         take together in one tick
+        :param overrun_limit: int -> overruns in a row that isolate
+        :param release_after: int -> refreshes in budget in a row
+                                     that move an isolated object back
+        :param workers: int -> threads of the isolated objects
+        :param clock: callable -> time in seconds
+        """
+        self.object_budget = object_budget
+        self.strategy_budgets = strategy_budgets or {}
+        self.overrun_limit = overrun_limit
+        self.release_after = release_after
+        self.workers = workers
+        self.clock = clock
+        self.lock = threading.Lock()
+        # strategy id -> refresh times of the object
+        self.objects = {}
+        # strategy name -> tick times of the strategy
+        self.strategies = {}
+        # strategy name -> refresh time in the current tick
+        self.tick_seconds = collections.Counter()
+        self.isolated = set()
+        # strategy id -> (strategy object, future) of the
+        # isolated refreshes that were not collected yet
+        self.running = {}
+        self.pool = None
+
+    def timed_refresh(
+            self: Any,
+            strategy_object: Any
+    ) -> Any:
+        """
+        :param strategy_object: active strategy object
+        :return: the response of the object's refresh
+        """
+        start = self.clock()
+        try:
+            return strategy_object.refresh()
+        finally:
+            self.record(strategy_object, self.clock() - start)
+
+    def record(
+            self: Any,
+            strategy_object: Any,
+            seconds: float
+    ) -> None:
+        """
+        Records one refresh of the object and isolates or
+        releases it based on its overruns
+        :param strategy_object: active strategy object
+        :param seconds: float -> refresh time
+        :return: None
+        """
+        strategy_id = strategy_object.strategy_id
+        with self.lock:
+            times = self.objects.get(strategy_id)
+            if times is None:
+                times = self.objects[strategy_id] = {
+                    'strategy_name': strategy_object.strategy_name,
+                    'pair': strategy_object.pair,
+                    'refreshes': 0,
+                    'total_seconds': 0.0,
+                    'max_seconds': 0.0,
+                    'overruns': 0,
+                    'overruns_in_row': 0,
+                    'in_budget_in_row': 0,
+                    'paused_ticks': 0
+                }
+            self.tick_seconds[times['strategy_name']] += seconds
+            times['refreshes'] += 1
+            times['total_seconds'] += seconds
+            times['max_seconds'] = max(times['max_seconds'], seconds)
+            if seconds > self.object_budget:
+                times['overruns'] += 1
+                times['overruns_in_row'] += 1
+                times['in_budget_in_row'] = 0
+            else:
+                times['overruns_in_row'] = 0
+                times['in_budget_in_row'] += 1
+            if strategy_id not in self.isolated and \
+                    times['overruns_in_row'] >= self.overrun_limit:
+                self.isolated.add(strategy_id)
+                logger.warning(f'{strategy_id} overran its refresh budget '
+                               f'{times["overruns_in_row"]} times in a row, '
+                               f'isolating it')
+            elif strategy_id in self.isolated and \
+                    times['in_budget_in_row'] >= self.release_after:
+                self.isolated.discard(strategy_id)
+                logger.info(f'{strategy_id} is back in its refresh budget')
+
+    def add_strategy_seconds(
+            self: Any,
+            strategy_name: str,
+            seconds: float
+    ) -> None:
+        """
+        Adds refresh time of the strategy that was not timed
+        per object (batched refresh) to the current tick
+        :param strategy_name: str -> name of the strategy
+        :param seconds: float -> refresh time
+        :return: None
+        """
+        with self.lock:
+            self.tick_seconds[strategy_name] += seconds
+
+    def end_tick(
+            self: Any
+    ) -> None:
+        """
+        Records the refresh time of every strategy in the tick
+        against the strategy's budget
+        :return: None
+        """
+        with self.lock:
+            strategy_seconds = self.tick_seconds
+            self.tick_seconds = collections.Counter()
+            for strategy_name, seconds in strategy_seconds.items():
+                times = self.strategies.setdefault(strategy_name, {
+                    'ticks': 0,
+                    'total_seconds': 0.0,
+                    'max_seconds': 0.0,
+                    'overruns': 0
+                })
+                times['ticks'] += 1
+                times['total_seconds'] += seconds
+                times['max_seconds'] = max(times['max_seconds'], seconds)
+                budget = self.strategy_budgets.get(strategy_name)
+                if budget is not None and seconds > budget:
+                    times['overruns'] += 1
+
+    def is_isolated(
+            self: Any,
+            strategy_id: str
+    ) -> bool:
+        return strategy_id in self.isolated
+
+    def is_running(
+            self: Any,
+            strategy_id: str
+    ) -> bool:
+        """
+        :return: bool -> True while a refresh of the isolated object
+                         runs or was not collected, the object must
+                         not be touched by the tick until then
+        """
+        return strategy_id in self.running
+
+    def submit(
+            self: Any,
+            strategy_object: Any
+    ) -> None:
+        """
+        Starts the refresh of an isolated object on a worker,
+        an object whose last refresh is still running is paused
+        :param strategy_object: isolated strategy object
+        :return: None
+        """
+        strategy_id = strategy_object.strategy_id
+        if strategy_id in self.running:
+            if not self.running[strategy_id][1].done():
+                with self.lock:
+                    self.objects[strategy_id]['paused_ticks'] += 1
+            return
+        if self.pool is None:
+            self.pool = ThreadPoolExecutor(
+                max_workers=self.workers,
+                thread_name_prefix='isolated-refresh')
+        self.running[strategy_id] = (
+            strategy_object,
+            self.pool.submit(self.timed_refresh, strategy_object))
+
+    def collect(
+            self: Any,
+            timeout: float
+    ) -> list:
+        """
+        Waits up to timeout for the running isolated refreshes
+        :param timeout: float -> seconds to wait
+        :return: list -> (strategy object, future) of the finished
+                         refreshes, the others keep running
+        """
+        if not self.running:
+            return []
+        wait([future for _, future in self.running.values()],
+             timeout=timeout)
+        finished = []
+        for strategy_id, (strategy_object, future) in \
+                list(self.running.items()):
+            if future.done():
+                del self.running[strategy_id]
+                finished.append((strategy_object, future))
+        return finished
+
+    def forget(
+            self: Any,
+            strategy_id: str
+    ) -> None:
+        """
+        Drops a removed object
+        :param strategy_id: str -> id of the object
+        :return: None
+        """
+        with self.lock:
+            self.objects.pop(strategy_id, None)
+            self.isolated.discard(strategy_id)
+        self.running.pop(strategy_id, None)
+
+    def report(
+            self: Any,
+            top: int = 10
+    ) -> dict:
+        """
+        :param top: int -> number of the slowest objects
+        :return: dict -> slowest objects by their longest refresh,
+                         isolated objects and strategy tick times
+        """
+        with self.lock:
+            slowest = sorted(
+                self.objects.items(),
+                key=lambda item: item[1]['max_seconds'],
+                reverse=True)[:top]
+            return {
+                'object_budget_seconds': self.object_budget,
+                'slowest_objects': [
+                    {
+                        'strategy_id': strategy_id,
+                        'strategy_name': times['strategy_name'],
+                        'pair': times['pair'],
+                        'refreshes': times['refreshes'],
+                        'mean_seconds':
+                            times['total_seconds'] / times['refreshes'],
+                        'max_seconds': times['max_seconds'],
+                        'overruns': times['overruns'],
+                        'paused_ticks': times['paused_ticks'],
+                        'isolated': strategy_id in self.isolated
+                    }
+                    for strategy_id, times in slowest
+                ],
+                'isolated_objects': sorted(self.isolated),
+                'strategies': {
+                    strategy_name: dict(
+                        times,
+                        budget_seconds=self.strategy_budgets.get(
+                            strategy_name))
+                    for strategy_name, times in self.strategies.items()
+                }
+            }
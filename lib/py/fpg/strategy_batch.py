@@ -0,0 +1,255 @@
+"""
+Shared array state for the batched refresh of strategy objects.
+Objects of one strategy class keep the state their refresh
+depends on (bands, counters, position, expiry) in numpy columns,
+one row per object, so the strategy class can evaluate all of
+its objects with one vectorized call per tick.
+
+A strategy class opts in by defining:
+- batch_columns: dict -> attribute name: numpy dtype
+- refresh_batch(batch, prices): classmethod returning
+  {row: execution list} for the rows that have to execute
+"""
+import numpy
+from typing import Any
+
+
+class StrategyBatch:
+    def __init__(
+            self: Any,
+            strategy_class: Any,
+            capacity: int = 64
+    ) -> None:
+        self.strategy_class = strategy_class
+        self.columns = dict(strategy_class.batch_columns)
+        self.columns['current_price'] = float
+        self.arrays = {
+            name: numpy.zeros(capacity, dtype=dtype)
+            for name, dtype in self.columns.items()
+        }
+        # Rows of every column whose attribute was None, they
+        # are NaN in the arrays and None again on the objects
+        self.none_masks = {
+            name: numpy.zeros(capacity, dtype=bool)
+            for name in self.columns
+        }
+        # Removed rows are only dropped once enough of them piled
+        # up, so the rows keep the order the objects were added in
+        self.alive = numpy.zeros(capacity, dtype=bool)
+        self.pair_codes = numpy.zeros(capacity, dtype=numpy.int64)
+        self.pairs = []
+        self.pair_index = {}
+        self.objects = []
+        self.rows = {}
+        self.size = 0
+        self.last_refresh_time = None
+
+    def __len__(
+            self: Any
+    ) -> int:
+        return len(self.rows)
+
+    def __contains__(
+            self: Any,
+            strategy_id: str
+    ) -> bool:
+        return strategy_id in self.rows
+
+    def column(
+            self: Any,
+            name: str
+    ) -> Any:
+        """
+        :param name: str -> column name
+        :return: numpy array -> view of the used rows of the column
+        """
+        return self.arrays[name][:self.size]
+
+    def alive_rows(
+            self: Any
+    ) -> Any:
+        return self.alive[:self.size]
+
+    def add(
+            self: Any,
+            strategy_object: Any
+    ) -> None:
+        """
+        Adds a row for the object, filled from its attributes
+        :param strategy_object: strategy object of the batch class
+        :return: None
+        """
+        if self.size == len(self.alive):
+            self.grow()
+        row = self.size
+        self.size += 1
+        self.objects.append(strategy_object)
+        self.rows[strategy_object.strategy_id] = row
+        self.alive[row] = True
+        pair = strategy_object.pair
+        if pair not in self.pair_index:
+            self.pair_index[pair] = len(self.pairs)
+            self.pairs.append(pair)
+        self.pair_codes[row] = self.pair_index[pair]
+        self.load(strategy_object)
+
+    def remove(
+            self: Any,
+            strategy_id: str
+    ) -> None:
+        """
+        Writes the row back to its object and removes it
+        :param strategy_id: str -> id of the object
+        :return: None
+        """
+        row = self.rows.pop(strategy_id, None)
+        if row is None:
+            return
+        self.store(row)
+        self.alive[row] = False
+        self.objects[row] = None
+        if self.size - len(self.rows) > max(len(self.rows), 64):
+            self.compact()
+
+    def load(
+            self: Any,
+            strategy_object: Any
+    ) -> None:
+        """
+        Reads the row from the object's attributes, after
+        the object was changed outside of the batched refresh
+        :param strategy_object: strategy object in the batch
+        :return: None
+        """
+        row = self.rows[strategy_object.strategy_id]
+        for name, array in self.arrays.items():
+            value = getattr(strategy_object, name)
+            self.none_masks[name][row] = value is None
+            array[row] = numpy.nan if value is None else value
+
+    def store(
+            self: Any,
+            row: int
+    ) -> None:
+        """
+        Writes the row back to the object's attributes
+        :param row: int -> row of the object
+        :return: None
+        """
+        strategy_object = self.objects[row]
+        for name, array in self.arrays.items():
+            setattr(strategy_object, name,
+                    None if self.none_masks[name][row]
+                    else array[row].item())
+        if self.last_refresh_time is not None:
+            strategy_object.last_price_fetch_time = self.last_refresh_time
+
+    def store_all(
+            self: Any
+    ) -> None:
+        """
+        Writes every row back to its object, before the
+        objects are viewed or saved as a whole
+        :return: None
+        """
+        for row in self.rows.values():
+            self.store(row)
+
+    def grow(
+            self: Any
+    ) -> None:
+        capacity = len(self.alive) * 2
+        for name, array in self.arrays.items():
+            self.arrays[name] = numpy.resize(array, capacity)
+        for name, mask in self.none_masks.items():
+            self.none_masks[name] = numpy.resize(mask, capacity)
+        self.alive = numpy.resize(self.alive, capacity)
+        self.alive[self.size:] = False
+        self.pair_codes = numpy.resize(self.pair_codes, capacity)
+
+    def compact(
+            self: Any
+    ) -> None:
+        """
+        Drops the removed rows, keeping the order of the others
+        :return: None
+        """
+        keep = numpy.flatnonzero(self.alive_rows())
+        count = len(keep)
+        for array in self.arrays.values():
+            array[:count] = array[keep]
+        for mask in self.none_masks.values():
+            mask[:count] = mask[keep]
+        self.pair_codes[:count] = self.pair_codes[keep]
+        self.alive[:count] = True
+        self.alive[count:] = False
+        self.objects = [self.objects[row] for row in keep]
+        self.rows = {
+            strategy_object.strategy_id: row
+            for row, strategy_object in enumerate(self.objects)
+        }
+        self.size = count
+
+    def refresh(
+            self: Any,
+            data_manager: Any,
+            failed_pairs: dict = None,
+            due_pairs: set = None
+    ) -> list:
+        """
+        Fetches the current price once per pair and lets
+        the strategy class evaluate every row
+        :param data_manager: data manager of the portfolio
+        :param failed_pairs: dict -> if given, the rows of the pairs
+                                     whose price can't be fetched are
+                                     skipped and the pairs are added
+                                     here with their error
+        :param due_pairs: set -> if given, only the rows of these
+                                 pairs are refreshed
+        :return: list -> (strategy object, execution list) of the
+                         objects that have to execute, in row order
+        """
+        self.last_refresh_time = data_manager.fetch_current_time()
+        prices = numpy.zeros(len(self.pairs))
+        pair_fetched = numpy.ones(len(self.pairs), dtype=bool)
+        for code, pair in enumerate(self.pairs):
+            if due_pairs is not None and pair not in due_pairs:
+                pair_fetched[code] = False
+                continue
+            try:
+                prices[code] = data_manager.fetch_mid_price(pair)
+            except Exception as exception:
+                if failed_pairs is None:
+                    raise
+                failed_pairs.setdefault(pair, exception)
+                pair_fetched[code] = False
+        codes = self.pair_codes[:self.size]
+        fetched = pair_fetched[codes]
+        self.column('current_price')[fetched] = prices[codes[fetched]]
+        self.none_masks['current_price'][:self.size][fetched] = False
+        # The rows without a price sit this refresh out
+        skipped = self.alive_rows() & ~fetched
+        self.alive[:self.size] &= fetched
+        try:
+            responses = self.strategy_class.refresh_batch(self)
+        finally:
+            self.alive[:self.size] |= skipped
+        executions = []
+        for row in sorted(responses):
+            self.store(row)
+            executions.append((self.objects[row], responses[row]))
+        return executions
+
+    def expired_objects(
+            self: Any
+    ) -> list:
+        """
+        :return: list -> objects whose is_expired column is set,
+                         written back from their rows
+        """
+        expired_objects = []
+        for row in numpy.flatnonzero(
+                self.alive_rows() & self.column('is_expired')):
+            self.store(row)
+            expired_objects.append(self.objects[row])
+        return expired_objects
@@ -0,0 +1,154 @@
+"""
+Registry of the strategies installed under lib/py/strategies.
+Every strategy package describes its strategies in a strategy.json
+file, read without importing the package:
+
+{
+    "<strategy name>": {
+        "module": "<module of the package>",
+        "class": "<strategy class>",
+        "active": true,
+        "creation_interval_days": 1,
+        "pairs": ["BTC/USD"],
+        "advanced_settings": false
+    }
+}
+
+with "short"/ "long" settings when advanced_settings is set (see
+PortfolioManager). Only the active strategies are imported when
+a strategy dictionary is built, the other ones on first use, and
+the classes are kept for the process (e.g. several backtests).
+"""
+import copy
+import datetime
+import importlib
+import json
+import os
+import threading
+from typing import Any
+
+from lib.py.fpg.logger import (
+    get_module_logger
+)
+logger = get_module_logger('strategies')
+
+METADATA_FILE = 'strategy.json'
+
+
+class StrategyRegistry:
+    def __init__(
+            self: Any,
+            directory: str = None,
+            package: str = 'lib.py.strategies'
+    ) -> None:
+        """
+        :param directory: str -> directory of the strategy packages,
+                                 defaults to the one of the package
+        :param package: str -> importable name of the directory
+        """
+        if directory is None:
+            directory = os.path.dirname(
+                importlib.import_module(package).__file__)
+        self.directory = directory
+        self.package = package
+        self.lock = threading.Lock()
+        # strategy name -> metadata of strategy.json
+        self.metadata = None
+        # strategy name -> imported class
+        self.classes = {}
+
+    def discover(
+            self: Any
+    ) -> dict:
+        """
+        Reads the metadata of every strategy package once
+        :return: dict -> strategy name: metadata, with the
+                         dotted module of the strategy
+        """
+        with self.lock:
+            if self.metadata is not None:
+                return self.metadata
+            metadata = {}
+            for package_name in sorted(os.listdir(self.directory)):
+                path = os.path.join(
+                    self.directory, package_name, METADATA_FILE)
+                if not os.path.isfile(path):
+                    continue
+                with open(path) as metadata_file:
+                    strategies = json.load(metadata_file)
+                for strategy_name, settings in strategies.items():
+                    if strategy_name in metadata:
+                        raise ValueError(
+                            f'Strategy {strategy_name} of {package_name} '
+                            f'is already installed')
+                    settings = dict(settings)
+                    settings['module'] = f"{self.package}.{package_name}." \
+                                         f"{settings['module']}"
+                    metadata[strategy_name] = settings
+            self.metadata = metadata
+            return metadata
+
+    def strategy_class(
+            self: Any,
+            strategy_name: str
+    ) -> Any:
+        """
+        :param strategy_name: str -> name of an installed strategy
+        :return: class of the strategy, imported on the first call
+        """
+        strategy_class = self.classes.get(strategy_name)
+        if strategy_class is not None:
+            return strategy_class
+        settings = self.discover()[strategy_name]
+        with self.lock:
+            if strategy_name not in self.classes:
+                module = importlib.import_module(settings['module'])
+                self.classes[strategy_name] = \
+                    getattr(module, settings['class'])
+                logger.info(f'loaded strategy {strategy_name}')
+            return self.classes[strategy_name]
+
+    def strategy_dictionary(
+            self: Any
+    ) -> dict:
+        """
+        :return: dict -> strategy dictionary of a portfolio with every
+                         installed strategy, the 'object' of the
+                         inactive ones is None until they are used
+                         (see Portfolio.strategy_class())
+        """
+        strategy_dictionary = {}
+        for strategy_name, settings in self.discover().items():
+            strategy_settings = {
+                'object': self.strategy_class(strategy_name)
+                if settings['active'] else None,
+                'last_object_created_time': None,
+                'active': settings['active'],
+                'creation_interval': datetime.timedelta(
+                    days=settings['creation_interval_days']),
+                'pairs': list(settings['pairs']),
+                'advanced_settings': settings['advanced_settings']
+            }
+            if settings['advanced_settings']:
+                # The counters change while trading
+                for side in ('short', 'long'):
+                    strategy_settings[side] = copy.deepcopy(settings[side])
+            strategy_dictionary[strategy_name] = strategy_settings
+        return strategy_dictionary
+
+
+shared_strategy_registry = None
+shared_strategy_registry_lock = threading.Lock()
+
+
+def get_strategy_registry() -> StrategyRegistry:
+    """
+    :return: StrategyRegistry -> the registry of lib/py/strategies
+                                 shared by the portfolios of the
+                                 process
+    """
+    global shared_strategy_registry
+    with shared_strategy_registry_lock:
+        if shared_strategy_registry is None:
+            shared_strategy_registry = StrategyRegistry()
+        return shared_strategy_registry
@@ -0,0 +1,60 @@
+"""
+Test file for the account balance cache
+
+To run:
+  > pytest test_balance_cache.py
+"""
+import unittest
+from lib.py.fpg.balance_cache import (
+    BalanceCache
+)
+
+
+class FakeAccount:
+    def __init__(self):
+        self.balance = {'USD': 1000.0, 'BTC': 0.0}
+        self.requests = 0
+        self.now = 0.0
+
+    def fetch_balance(self, coins):
+        self.requests += 1
+        balance = {coin: self.balance.get(coin, 0.0) for coin in coins}
+        balance['succeeded'] = True
+        return balance
+
+    def clock(self):
+        return self.now
+
+
+class TestBalanceCache(unittest.TestCase):
+
+    def setUp(self):
+        self.account = FakeAccount()
+        self.cache = BalanceCache(
+            self.account.fetch_balance, 60, self.account.clock)
+
+    def test_fills_update_cached_balance(self):
+        assert self.cache.get(['USD'])['USD'] == 1000.0
+        assert self.cache.get(['USD', 'BTC'])['BTC'] == 0.0
+        assert self.account.requests == 2
+        self.cache.apply_fill('BTC/USD', 'buy', 2.0, {
+            'executed_price': 100.0, 'executed_amount': 2.0})
+        balance = self.cache.get(['USD', 'BTC'])
+        assert balance['USD'] == 800.0
+        assert balance['BTC'] == 2.0
+        assert self.account.requests == 2
+
+    def test_reconcile_on_interval_and_ambiguous_fill(self):
+        self.cache.get(['USD'])
+        self.account.balance['USD'] = 900.0
+        self.account.now = 30.0
+        assert self.cache.get(['USD'])['USD'] == 1000.0
+        self.account.now = 60.0
+        assert self.cache.get(['USD'])['USD'] == 900.0
+        assert self.account.requests == 2
+        # Partial fill, the cache can't tell the balance
+        self.account.balance['USD'] = 850.0
+        self.cache.apply_fill('BTC/USD', 'buy', 2.0, {
+            'executed_price': 100.0, 'executed_amount': 0.5})
+        assert self.cache.get(['USD'])['USD'] == 850.0
+        assert self.account.requests == 3
@@ -0,0 +1,192 @@
+"""
+Test file for the bar aggregation
+
+To run:
+  > pytest test_bar_aggregation.py
+"""
+import datetime
+import unittest
+import numpy
+import pandas as pd
+from lib.py.fpg.bar_aggregation import (
+    BarAggregator,
+    BarSeries,
+    aggregate_bars,
+    ohlcv_frame,
+    session_anchor
+)
+from lib.py.fpg.utils import (
+    exchange_open_time_hours_shift
+)
+
+START = 1577836800  # 2020-01-01 00:00 UTC
+
+
+def minute_bars(minutes, start=START, seed=1):
+    generator = numpy.random.default_rng(seed)
+    closes = 100 + numpy.cumsum(generator.normal(0, 1, minutes))
+    opens = numpy.r_[100, closes[:-1]]
+    spread = generator.uniform(0, 1, minutes)
+    return {
+        'time': start + 60.0 * numpy.arange(minutes),
+        'open': opens,
+        'high': numpy.maximum(opens, closes) + spread,
+        'low': numpy.minimum(opens, closes) - spread,
+        'close': closes,
+        'volume': generator.uniform(0, 5, minutes)
+    }
+
+
+def groupby_bars(bars, period, anchor):
+    """
+    Aggregation of the pandas group by of the data managers
+    """
+    frame = pd.DataFrame(bars)
+    keys = (frame['time'] - anchor) // period
+    grouped = frame.groupby(keys)
+    return {
+        'time': (grouped['time'].first() -
+                 (grouped['time'].first() - anchor) % period).to_numpy(),
+        'open': grouped['open'].first().to_numpy(),
+        'high': grouped['high'].max().to_numpy(),
+        'low': grouped['low'].min().to_numpy(),
+        'close': grouped['close'].last().to_numpy(),
+        'volume': grouped['volume'].sum().to_numpy()
+    }
+
+
+class TestBarAggregation(unittest.TestCase):
+
+    def assertBarsEqual(self, bars, expected):
+        for column in ('time', 'open', 'high', 'low', 'close'):
+            numpy.testing.assert_array_equal(bars[column], expected[column])
+        numpy.testing.assert_allclose(bars['volume'], expected['volume'])
+
+    def test_aggregate_matches_group_by(self):
+        bars = minute_bars(3000)
+        for period, anchor in ((300, 0), (3600, 0), (14400, 3600),
+                               (86400, session_anchor('18:00:00'))):
+            self.assertBarsEqual(aggregate_bars(bars, period, anchor),
+                                 groupby_bars(bars, period, anchor))
+
+    def test_session_anchor_matches_the_shift(self):
+        for open_time in ('18:00:00', '13:30:00', '00:00:00'):
+            shift = exchange_open_time_hours_shift(open_time)
+            open_hour = datetime.datetime(2020, 1, 1) + \
+                datetime.timedelta(days=1) - shift
+            self.assertEqual(session_anchor(open_time),
+                             (open_hour.hour * 60 + open_hour.minute) * 60)
+
+    def test_streamed_bars_match_batch_bars(self):
+        bars = minute_bars(2000)
+        aggregator = BarAggregator()
+        hours = aggregator.series('BTC/USD', '1h')
+        four_hours = aggregator.series('BTC/USD', '4h', 3600)
+        for index in range(2000):
+            aggregator.extend('BTC/USD', {
+                column: values[index:index + 1]
+                for column, values in bars.items()})
+        self.assertBarsEqual(hours.bars(include_current=True),
+                             aggregate_bars(bars, 3600, 0))
+        self.assertBarsEqual(four_hours.bars(include_current=True),
+                             aggregate_bars(bars, 14400, 3600))
+        # The last bucket has data of the current minute only
+        self.assertEqual(len(hours), len(hours.bars(
+            include_current=True)['time']) - 1)
+
+    def test_higher_timeframes_come_from_lower_ones(self):
+        aggregator = BarAggregator()
+        aggregator.extend('BTC/USD', minute_bars(600))
+        five_minutes = aggregator.series('BTC/USD', '5m')
+        hours = aggregator.series('BTC/USD', '1h')
+        sessions = aggregator.series('BTC/USD', '1d',
+                                     session_anchor('18:30:00'))
+        self.assertIs(five_minutes.source,
+                      aggregator.series('BTC/USD', '1m'))
+        self.assertIs(hours.source, five_minutes)
+        # Buckets at half past can't be made of hours
+        self.assertIs(sessions.source, five_minutes)
+        self.assertIs(aggregator.series('BTC/USD', 3600), hours)
+        with self.assertRaises(ValueError):
+            aggregator.series('BTC/USD', '2w')
+
+    def test_prices_make_minute_bars(self):
+        aggregator = BarAggregator(capacity=10)
+        for second, price in ((0, 10.0), (20, 12.0), (40, 9.0),
+                              (10, 50.0), (60, 11.0), (200, 13.0)):
+            aggregator.record('BTC/USD', START + second, price)
+        bars = aggregator.series('BTC/USD', '1m').bars(include_current=True)
+        numpy.testing.assert_array_equal(bars['time'],
+                                         [START, START + 60, START + 180])
+        numpy.testing.assert_array_equal(bars['open'], [10.0, 11.0, 13.0])
+        numpy.testing.assert_array_equal(bars['high'], [12.0, 11.0, 13.0])
+        numpy.testing.assert_array_equal(bars['low'], [9.0, 11.0, 13.0])
+        hours = aggregator.series('BTC/USD', '1h')
+        self.assertEqual(len(hours), 0)
+        aggregator.advance('BTC/USD', START + 3600)
+        self.assertEqual(len(hours), 1)
+        self.assertEqual(hours.bars()['close'][0], 13.0)
+
+    def test_capacity(self):
+        series = BarSeries(60, 0, capacity=5)
+        bars = minute_bars(23)
+        series.extend(bars)
+        kept = series.bars()
+        self.assertLessEqual(len(kept['time']), 10)
+        numpy.testing.assert_array_equal(
+            kept['close'], bars['close'][22 - len(kept['time']):22])
+        self.assertEqual(series.bars(3)['time'][-1], bars['time'][21])
+
+    def test_window_clips_the_edge_buckets(self):
+        bars = minute_bars(5000)
+        aggregator = BarAggregator()
+        aggregator.extend('BTC/USD', bars)
+        anchor = session_anchor('18:00:00')
+        for start, end in ((START + 630, START + 4000 * 60),
+                           (START, START + 5000 * 60),
+                           (START + 120, START + 600),
+                           (START + 64800, START + 86400 + 64800)):
+            minutes = bars['time']
+            mask = (minutes >= start) & (minutes < end)
+            expected = aggregate_bars(
+                {column: values[mask] for column, values in bars.items()},
+                86400, anchor)
+            self.assertBarsEqual(
+                aggregator.window('BTC/USD', '1d', anchor, start, end),
+                expected)
+
+    def test_last_bars_before_a_time(self):
+        bars = minute_bars(3000)
+        # Minutes without data
+        kept = numpy.ones(3000, dtype=bool)
+        kept[1000:1500] = False
+        bars = {column: values[kept] for column, values in bars.items()}
+        aggregator = BarAggregator()
+        aggregator.extend('BTC/USD', bars)
+        end = START + 1700 * 60 + 30
+        minutes = bars['time'] < end
+        expected = aggregate_bars(
+            {column: values[minutes] for column, values in bars.items()},
+            3600, 0)
+        for count in (1, 3, 20, 100):
+            last = aggregator.last('BTC/USD', '1h', 0, count, end)
+            self.assertBarsEqual(
+                last, {column: values[-count:]
+                       for column, values in expected.items()})
+        self.assertBarsEqual(
+            aggregator.last('BTC/USD', '1m', 0, 4, end),
+            {column: values[minutes][-4:]
+             for column, values in bars.items()})
+
+    def test_ohlcv_frame(self):
+        anchor = session_anchor('18:00:00')
+        frame = ohlcv_frame(aggregate_bars(minute_bars(3000), 86400,
+                                           anchor), '18:00:00')
+        self.assertEqual(list(frame.columns),
+                         ['exchange_shift_time', 'h', 'l', 'o', 'c', 'v'])
+        self.assertEqual(frame['exchange_shift_time'][1],
+                         pd.Timestamp(2020, 1, 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
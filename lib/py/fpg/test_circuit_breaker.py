@@ -0,0 +1,170 @@
+"""
+Test file for the circuit breakers of the live tick
+
+To run:
+  > pytest test_circuit_breaker.py
+"""
+import unittest
+from lib.py.fpg.circuit_breaker import (
+    CircuitBreakers,
+    CircuitOpenError
+)
+from lib.py.fpg.data_manager.data_manager_live import (
+    LiveDataManager
+)
+from lib.py.fpg.portfolio_doubles import (
+    FakeTrader,
+    PositionStrategy,
+    execution_portfolio
+)
+from lib.py.fpg.portfolio_parent import (
+    Portfolio
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeEndpoint:
+    def __init__(self):
+        self.down = True
+        self.requests = 0
+
+    def fetch(self):
+        self.requests += 1
+        if self.down:
+            raise ConnectionError('endpoint is down')
+        return 1.0
+
+
+class PricedStrategy:
+    def __init__(self, strategy_id, pair, data_manager):
+        self.strategy_id = strategy_id
+        self.strategy_name = 'Regular'
+        self.pair = pair
+        self.short_allowed = True
+        self.long_allowed = True
+        self.strategy_position = None
+        self.is_expired = False
+        self.data_manager = data_manager
+
+    def refresh(self):
+        self.data_manager.fetch_mid_price(self.pair)
+        return [{'pair': self.pair}]
+
+
+class FailingPairDataManager:
+    def __init__(self, breakers):
+        self.breakers = breakers
+        self.endpoint = FakeEndpoint()
+
+    def fetch_mid_price(self, pair):
+        if pair == 'XRP/USD':
+            return self.breakers.call(
+                f'fetch_price {pair}', self.endpoint.fetch)
+        return 1.0
+
+
+class ReconnectingTrader:
+    def __init__(self):
+        self.fpg_connector = object()
+
+    def connect(self):
+        self.fpg_connector = object()
+
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    def test_open_backoff_and_probe_recovery(self):
+        clock = FakeClock()
+        breakers = CircuitBreakers(
+            failure_threshold=2, base_backoff=1.0, clock=clock)
+        endpoint = FakeEndpoint()
+        for _ in range(2):
+            with self.assertRaises(ConnectionError):
+                breakers.call('fetch_price XRP/USD', endpoint.fetch)
+        breaker = breakers.get('fetch_price XRP/USD')
+        # Open, the callers fail fast without a request
+        with self.assertRaises(CircuitOpenError):
+            breakers.call('fetch_price XRP/USD', endpoint.fetch)
+        assert endpoint.requests == 2
+        clock.now = 1.0
+        assert breaker.start_retry()
+        breakers.run_probe(breaker)
+        assert endpoint.requests == 3
+        assert breaker.retry_time == 3.0
+        clock.now = 2.0
+        assert not breaker.start_retry()
+        clock.now = 3.0
+        endpoint.down = False
+        assert breaker.start_retry()
+        breakers.run_probe(breaker)
+        assert breakers.call('fetch_price XRP/USD', endpoint.fetch) == 1.0
+        stats = breakers.metrics()['fetch_price XRP/USD']
+        assert not stats['open']
+        assert stats['outages'] == 1
+
+    def test_failing_pair_skipped_in_live_refresh(self):
+        portfolio = Portfolio()
+        portfolio.strategy_dictionary = {
+            'Regular': {'advanced_settings': False}}
+        breakers = CircuitBreakers(failure_threshold=1)
+        portfolio.data_manager = FailingPairDataManager(breakers)
+        for strategy_id, pair in enumerate(
+                ['BTC/USD', 'XRP/USD', 'ETH/USD', 'XRP/USD']):
+            portfolio.add_active_strategy_object(PricedStrategy(
+                str(strategy_id), pair, portfolio.data_manager))
+        for _ in range(3):
+            responses, _ = portfolio.refresh_strategy_objects()
+            assert [strategy_object.pair
+                    for strategy_object, _ in responses] == \
+                ['BTC/USD', 'ETH/USD']
+        assert portfolio.data_manager.endpoint.requests == 1
+        stats = breakers.metrics()['fetch_price XRP/USD']
+        # The tick it opened in was not skipped
+        assert stats['skipped_ticks'] == 2
+
+    def test_open_circuit_saves_the_objects_unexecuted(self):
+        portfolio = execution_portfolio(
+            FakeTrader(circuit_pairs=['XRP/USD']))
+        entering = PositionStrategy('entering', 'XRP/USD')
+        exiting = PositionStrategy('exiting', 'XRP/USD', 'short')
+        for strategy_object in (entering, exiting):
+            portfolio.add_active_strategy_object(strategy_object)
+        portfolio.execute_responses([
+            (strategy_object, strategy_object.check_execution())
+            for strategy_object in (entering, exiting)])
+        assert portfolio.database.trades == []
+        saved = portfolio.database.updates
+        assert [strategy_object.strategy_id
+                for strategy_object in saved] == ['entering', 'exiting']
+        assert not saved[0].live_position
+        assert saved[0].strategy_position is None
+        # The exit is retried next tick
+        assert saved[1].live_position
+        assert saved[1].strategy_position == 'short'
+        assert portfolio.strategy_dictionary['Regular']['short'][
+            'current_short'] == {'XRP/USD': 1}
+        assert portfolio.strategy_dictionary['Regular']['long'][
+            'current_long'] == {}
+
+    def test_failed_tick_reconnects_the_market_data(self):
+        portfolio = Portfolio()
+        portfolio.trader = ReconnectingTrader()
+        portfolio.data_manager = LiveDataManager(
+            portfolio.trader.fpg_connector, None)
+
+        def failing_tick():
+            raise ConnectionError('connection was reset')
+        portfolio.tick = failing_tick
+        tick_breaker = CircuitBreakers().get('tick')
+        assert not portfolio.guarded_tick(tick_breaker)
+        connector = portfolio.trader.fpg_connector
+        assert portfolio.data_manager.fpg_connector is connector
+        # Prices are polled through the new connector too
+        assert portfolio.data_manager.market_data.fpg_connector is connector
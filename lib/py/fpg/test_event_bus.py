@@ -0,0 +1,142 @@
+"""
+Test file for the event bus of the portfolio
+
+To run:
+  > pytest test_event_bus.py
+"""
+import threading
+import time
+import unittest
+from lib.py.fpg.event_bus import (
+    EventBus,
+    PriceTick,
+    StrategyUpdated
+)
+from lib.py.fpg.portfolio_doubles import (
+    RecordingDatabase
+)
+from lib.py.fpg.portfolio_parent import (
+    Portfolio
+)
+
+
+class Gate:
+    """
+    Handler that waits until it is opened
+    """
+    def __init__(self):
+        self.opened = threading.Event()
+        self.events = []
+
+    def __call__(self, event):
+        self.opened.wait(5)
+        self.events.append(event)
+
+
+class StrategyObject:
+    __slots__ = ('strategy_id', 'amount')
+
+    def __init__(self, strategy_id):
+        self.strategy_id = strategy_id
+        self.amount = 0.0
+
+
+class TestEventBus(unittest.TestCase):
+
+    def test_handled_synchronously_until_started(self):
+        bus = EventBus()
+        events = []
+        bus.subscribe('prices', events.append, (PriceTick,))
+        bus.publish(PriceTick('BTC/USD', 100.0, None))
+        # Not subscribed to
+        bus.publish(StrategyUpdated(None))
+        self.assertEqual(events, [PriceTick('BTC/USD', 100.0, None)])
+        with self.assertRaises(ValueError):
+            bus.subscribe('prices', events.append, (PriceTick,))
+
+    def test_subscribers_handle_events_in_order_off_the_publisher(self):
+        bus = EventBus()
+        gate = Gate()
+        bus.subscribe('slow', gate, (PriceTick,))
+        bus.start()
+        try:
+            start = time.perf_counter()
+            for index in range(100):
+                bus.publish(PriceTick('BTC/USD', float(index), None))
+            self.assertLess(time.perf_counter() - start, 1.0)
+            self.assertEqual(gate.events, [])
+            gate.opened.set()
+            bus.flush()
+            self.assertEqual([event.price for event in gate.events],
+                             [float(index) for index in range(100)])
+        finally:
+            bus.stop()
+
+    def test_full_queue_blocks_or_drops(self):
+        bus = EventBus(queue_size=2)
+        blocking, dropping = Gate(), Gate()
+        bus.subscribe('blocking', blocking, (PriceTick,))
+        bus.subscribe('dropping', dropping, (PriceTick,), block=False)
+        bus.start()
+        try:
+            publisher = threading.Thread(target=lambda: [
+                bus.publish(PriceTick('BTC/USD', float(index), None))
+                for index in range(10)])
+            publisher.start()
+            time.sleep(0.1)
+            # Waits for room in the blocking subscriber's queue
+            self.assertTrue(publisher.is_alive())
+            blocking.opened.set()
+            publisher.join(5)
+            dropping.opened.set()
+            bus.flush()
+        finally:
+            bus.stop()
+        metrics = bus.metrics()['subscribers']
+        self.assertEqual(len(blocking.events), 10)
+        self.assertGreater(metrics['blocking']['blocked'], 0)
+        self.assertGreater(metrics['dropping']['dropped'], 0)
+        self.assertEqual(len(dropping.events) +
+                         metrics['dropping']['dropped'], 10)
+
+    def test_failing_handler_keeps_handling(self):
+        bus = EventBus()
+        events = []
+
+        def handler(event):
+            if event.price < 0:
+                raise ValueError('negative price')
+            events.append(event.price)
+        bus.subscribe('prices', handler, (PriceTick,))
+        bus.start()
+        for price in (1.0, -1.0, 2.0):
+            bus.publish(PriceTick('BTC/USD', price, None))
+        bus.stop()
+        self.assertEqual(events, [1.0, 2.0])
+        self.assertEqual(
+            bus.metrics()['subscribers']['prices']['errors'], 1)
+
+    def test_portfolio_writes_copies_of_its_objects(self):
+        portfolio = Portfolio()
+        portfolio.database = RecordingDatabase(delay=0.01)
+        portfolio.event_bus.start()
+        try:
+            strategy_object = StrategyObject(1)
+            for amount in (1.0, 2.0, 3.0):
+                strategy_object.amount = amount
+                portfolio.save_strategy(strategy_object)
+            balance = {'USD': 100.0}
+            portfolio.save_trade({'trade_id': 7}, balance)
+            balance['USD'] = 0.0
+            portfolio.event_bus.flush()
+        finally:
+            portfolio.event_bus.stop()
+        self.assertEqual([(strategy_object.strategy_id, strategy_object.amount)
+                          for strategy_object in portfolio.database.updates],
+                         [(1, 1.0), (1, 2.0), (1, 3.0)])
+        self.assertEqual(portfolio.database.trades,
+                         [({'trade_id': 7}, {'USD': 100.0})])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,158 @@
+"""
+Test file for the indicators
+
+To run:
+  > pytest test_indicators.py
+"""
+import unittest
+import numpy
+import pandas as pd
+from lib.py.fpg import indicators
+from lib.py.fpg.AbstractStrategies import (
+    CompactStrategy
+)
+from lib.py.strategies.mean_reversion.mean_reversion import (
+    MeanReversion
+)
+
+
+def prices(count, seed=7):
+    generator = numpy.random.default_rng(seed)
+    closes = 20000 + numpy.cumsum(generator.normal(0, 25, count))
+    spread = generator.uniform(0, 30, count)
+    return closes + spread, closes - spread, closes
+
+
+def stream(indicator, *columns):
+    return numpy.array([indicator.update(*row) for row in zip(*columns)])
+
+
+class OhlcvDataManager:
+    def __init__(self, closes):
+        self.closes = closes
+
+    def fetch_custom_ohlcv(self, exchange_id, pair, exchange_open_time,
+                           since, days_back):
+        return pd.DataFrame({'c': self.closes})
+
+
+class TestIndicators(unittest.TestCase):
+
+    def assertIdentical(self, batch, streamed):
+        # Same bits, NaN where both are NaN
+        numpy.testing.assert_array_equal(batch, streamed)
+
+    def test_streaming_forms_match_the_batch_forms(self):
+        high, low, close = prices(5000)
+        for period in (1, 2, 20, 390):
+            self.assertIdentical(indicators.sma(close, period),
+                                 stream(indicators.SMA(period), close))
+            self.assertIdentical(
+                indicators.rolling_std(close, period),
+                stream(indicators.RollingStd(period), close))
+            self.assertIdentical(
+                numpy.column_stack(
+                    indicators.bollinger_bands(close, period, 2.5)),
+                stream(indicators.BollingerBands(period, 2.5), close))
+            self.assertIdentical(indicators.z_score(close, period),
+                                 stream(indicators.ZScore(period), close))
+            self.assertIdentical(indicators.ema(close, period),
+                                 stream(indicators.EMA(period), close))
+            self.assertIdentical(
+                indicators.atr(high, low, close, period),
+                stream(indicators.ATR(period), high, low, close))
+            self.assertIdentical(
+                indicators.rolling_min(close, period),
+                stream(indicators.RollingMin(period), close))
+            self.assertIdentical(
+                indicators.rolling_max(close, period),
+                stream(indicators.RollingMax(period), close))
+
+    def test_values_match_pandas(self):
+        high, low, close = prices(3000)
+        series = pd.Series(close)
+        period = 50
+        rolling = series.rolling(period)
+        numpy.testing.assert_allclose(
+            indicators.sma(close, period), rolling.mean(), rtol=1e-12)
+        numpy.testing.assert_allclose(
+            indicators.rolling_std(close, period, ddof=1), rolling.std(),
+            rtol=1e-8)
+        numpy.testing.assert_allclose(
+            indicators.rolling_min(close, period), rolling.min())
+        numpy.testing.assert_allclose(
+            indicators.rolling_max(close, period), rolling.max())
+        # Windows of a strided view
+        numpy.testing.assert_allclose(
+            indicators.rolling_min(close[::3], 7),
+            series[::3].rolling(7).min())
+        # Started from the sma of the first period
+        seeded = series.copy()
+        seeded[:period - 1] = numpy.nan
+        seeded[period - 1] = close[:period].mean()
+        numpy.testing.assert_allclose(
+            indicators.ema(close, period),
+            seeded.ewm(span=period, adjust=False).mean(), rtol=1e-12)
+        lower, middle, upper = indicators.bollinger_bands(close, period)
+        numpy.testing.assert_allclose(
+            upper - middle, 2 * rolling.std(ddof=0), rtol=1e-8)
+        numpy.testing.assert_allclose(
+            indicators.z_score(close, period),
+            (series - rolling.mean()) / rolling.std(ddof=0), rtol=1e-6)
+
+    def test_last_window_matches_numpy(self):
+        close = prices(60)[2]
+        lower, middle, upper = indicators.bollinger_bands(close, 60)
+        self.assertAlmostEqual(middle[-1], numpy.mean(close), places=8)
+        self.assertAlmostEqual((upper[-1] - middle[-1]) / 2,
+                               numpy.std(close), places=8)
+
+    def test_true_range_and_warm_up(self):
+        high = numpy.array([10.0, 12.0, 9.0])
+        low = numpy.array([8.0, 11.0, 7.0])
+        close = numpy.array([9.0, 11.5, 8.0])
+        numpy.testing.assert_array_equal(
+            indicators.true_range(high, low, close), [2.0, 3.0, 4.5])
+        numpy.testing.assert_array_equal(
+            indicators.atr(high, low, close, 2),
+            [numpy.nan, 2.5, 2.5 + 0.5 * (4.5 - 2.5)])
+        self.assertTrue(numpy.isnan(indicators.sma(close, 5)).all())
+        self.assertTrue(numpy.isnan(
+            indicators.ZScore(3).update(1.0)))
+        with self.assertRaises(ValueError):
+            indicators.SMA(0)
+
+    def test_constant_window_has_no_z_score(self):
+        values = numpy.array([5.0, 5.0, 5.0, 6.0])
+        numpy.testing.assert_array_equal(
+            indicators.z_score(values, 3)[:3], [numpy.nan] * 3)
+        self.assertTrue(numpy.isnan(
+            stream(indicators.ZScore(3), values)[2]))
+
+    def test_mean_reversion_bands_skip_missing_closes(self):
+        closes = prices(20)[2]
+        closes[[3, 11]] = numpy.nan
+        strategy_object = MeanReversion.__new__(MeanReversion)
+        CompactStrategy.__init__(strategy_object)
+        strategy_object.data_manager = OhlcvDataManager(closes)
+        strategy_object.exchange = 'binance'
+        strategy_object.pair = 'BTC/USD'
+        strategy_object.exchange_daily_open_time = '18:00:00'
+        strategy_object.days_back = 20
+        strategy_object.calculate_bands(0)
+        self.assertAlmostEqual(strategy_object.mean_band,
+                               numpy.nanmean(closes), places=8)
+        self.assertAlmostEqual(strategy_object.std,
+                               numpy.nanstd(closes), places=8)
+        self.assertAlmostEqual(
+            strategy_object.high_band - strategy_object.low_band,
+            4 * numpy.nanstd(closes), places=8)
+        # No close at all
+        strategy_object.data_manager = OhlcvDataManager([numpy.nan])
+        strategy_object.calculate_bands(0)
+        self.assertTrue(numpy.isnan(strategy_object.mean_band))
+        self.assertTrue(numpy.isnan(strategy_object.std))
+
+
+if __name__ == '__main__':
+    unittest.main()
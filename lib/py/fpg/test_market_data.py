@@ -0,0 +1,191 @@
+"""
+Test file for the market data shared by the live portfolios
+
+To run:
+  > pytest test_market_data.py
+"""
+import datetime
+import threading
+import time
+import unittest
+import pytz
+from concurrent.futures import ThreadPoolExecutor
+from lib.py.fpg.data_manager.data_manager_live import (
+    LiveDataManager
+)
+from lib.py.fpg.data_manager.market_data import (
+    MarketData
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class CountingConnector:
+    def __init__(self):
+        self.requests = 0
+
+    def fetch_price(self, pair):
+        self.requests += 1
+        return 100.0
+
+
+class SlowConnector(CountingConnector):
+    def __init__(self):
+        super().__init__()
+        self.request_lock = threading.Lock()
+
+    def fetch_price(self, pair):
+        with self.request_lock:
+            self.requests += 1
+        time.sleep(0.05)
+        return 100.0
+
+
+class NullDatabase:
+    def insert_coin_data(self, pair, price, date):
+        pass
+
+
+class CountingMarketData(MarketData):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.downloads = 0
+        self.download_lock = threading.Lock()
+
+    def download_ohlcv(self, exchange_id, pair, exchange_open_time,
+                       since, days_back):
+        with self.download_lock:
+            self.downloads += 1
+        time.sleep(0.05)
+        return {'pair': pair, 'days_back': days_back}.copy()
+
+
+class TestMarketData(unittest.TestCase):
+
+    def test_prices_polled_once_per_tick_for_every_portfolio(self):
+        connector = CountingConnector()
+        market_data = MarketData(connector, NullDatabase())
+        data_managers = [
+            LiveDataManager(connector, None, market_data=market_data)
+            for _ in range(3)
+        ]
+        for _ in range(2):
+            market_data.start_tick()
+            for data_manager in data_managers:
+                # Only the owner of the market data starts its ticks
+                data_manager.start_tick()
+                for pair in ('BTC/USD', 'ETH/USD'):
+                    self.assertEqual(
+                        data_manager.fetch_mid_price(pair), 100.0)
+        self.assertEqual(connector.requests, 4)
+        self.assertEqual(market_data.stats['price_requests'], 4)
+
+    def test_concurrent_fetches_of_a_pair_request_once(self):
+        connector = SlowConnector()
+        market_data = MarketData(connector, NullDatabase())
+        market_data.start_tick()
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            prices = list(pool.map(
+                lambda _: market_data.fetch_mid_price('BTC/USD', None),
+                range(8)))
+        self.assertEqual(prices, [100.0] * 8)
+        self.assertEqual(connector.requests, 1)
+        self.assertEqual(market_data.stats['price_requests'], 1)
+
+    def test_fastest_cadence_of_a_pair_is_polled(self):
+        clock = FakeClock()
+        market_data = MarketData(CountingConnector(), NullDatabase())
+        market_data.polling_schedule.clock = clock
+        market_data.start_tick()
+        self.assertEqual(market_data.due_pairs({'BTC/USD': 'slow'}),
+                         {'BTC/USD'})
+        market_data.fetch_mid_price('BTC/USD', None)
+        clock.now += 1.0
+        market_data.start_tick()
+        self.assertEqual(market_data.due_pairs({'BTC/USD': 'slow'}), set())
+        self.assertEqual(market_data.due_pairs({'BTC/USD': 'fast'}),
+                         {'BTC/USD'})
+        market_data.fetch_mid_price('BTC/USD', None)
+        # Polled this tick, so due for the slow portfolio too
+        self.assertEqual(market_data.due_pairs({'BTC/USD': 'slow'}),
+                         {'BTC/USD'})
+        self.assertEqual(market_data.polling_schedule.cadences,
+                         {'BTC/USD': 'fast'})
+
+    def test_ohlcv_downloaded_once_per_cache_period(self):
+        clock = FakeClock()
+        market_data = CountingMarketData(
+            CountingConnector(), NullDatabase(),
+            ohlcv_cache_seconds=60.0, clock=clock)
+        arguments = ('binance', 'BTC/USDT', '00:00:00', 0, 30)
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            responses = list(pool.map(
+                lambda _: market_data.fetch_custom_ohlcv(*arguments),
+                range(8)))
+        self.assertEqual(market_data.downloads, 1)
+        self.assertEqual(responses[0], {'pair': 'BTC/USDT', 'days_back': 30})
+        market_data.fetch_custom_ohlcv('binance', 'ETH/USDT',
+                                       '00:00:00', 0, 30)
+        self.assertEqual(market_data.downloads, 2)
+        clock.now += 61.0
+        market_data.fetch_custom_ohlcv(*arguments)
+        self.assertEqual(market_data.downloads, 3)
+        self.assertEqual(market_data.stats['ohlcv_cache_hits'], 7)
+        self.assertEqual(len(market_data.ohlcv_cache), 1)
+
+    def test_portfolios_share_the_bars_of_a_timeframe(self):
+        connector = CountingConnector()
+        market_data = MarketData(connector, NullDatabase())
+        data_managers = [
+            LiveDataManager(connector, None, market_data=market_data)
+            for _ in range(2)
+        ]
+        start = pytz.utc.localize(datetime.datetime(2021, 1, 1, 17))
+        for minute in range(0, 180, 10):
+            market_data.start_tick()
+            data_managers[0].current_time = \
+                start + datetime.timedelta(minutes=minute)
+            data_managers[0].fetch_mid_price('BTC/USD')
+        bars = data_managers[1].fetch_bars('BTC/USD', '1h')
+        self.assertEqual(len(bars['time']), 3)
+        self.assertEqual(bars['time'][0], start.timestamp())
+        sessions = data_managers[0].fetch_bars(
+            'BTC/USD', '1d', exchange_open_time='18:00:00')
+        # The open time splits the prices in two days
+        self.assertEqual(len(sessions['time']), 2)
+        self.assertIs(
+            market_data.bar_aggregator.series('BTC/USD', '1h').source,
+            market_data.bar_aggregator.series('BTC/USD', '1m'))
+
+    def test_as_of_queries(self):
+        connector = CountingConnector()
+        data_manager = LiveDataManager(connector, None)
+        data_manager.market_data.database = NullDatabase()
+        start = pytz.utc.localize(datetime.datetime(2021, 1, 1, 17))
+        for minute in range(0, 30, 10):
+            data_manager.start_tick()
+            data_manager.current_time = \
+                start + datetime.timedelta(minutes=minute)
+            data_manager.fetch_mid_price('BTC/USD')
+        with self.assertRaises(ValueError):
+            data_manager.price_at('BTC/USD', start.timestamp() - 1)
+        self.assertEqual(
+            data_manager.price_at('BTC/USD', start.timestamp() + 900), 100.0)
+        bars = data_manager.last_bars('BTC/USD', 2)
+        self.assertEqual(list(bars['time']),
+                         [start.timestamp() + 600, start.timestamp() + 1200])
+        # Bars after the current time are never returned
+        data_manager.current_time = start + datetime.timedelta(minutes=15)
+        bars = data_manager.bars_between(
+            'BTC/USD', start.timestamp(), start.timestamp() + 3600)
+        self.assertEqual(len(bars['time']), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
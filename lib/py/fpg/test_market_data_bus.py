@@ -0,0 +1,94 @@
+"""
+Test file for the zmq market data bus
+
+To run:
+  > pytest test_market_data_bus.py
+"""
+import time
+import unittest
+import numpy
+import pandas as pd
+from lib.py.fpg.data_manager.data_manager_bus import (
+    SubscribedMarketData
+)
+from lib.py.fpg.market_data_bus import (
+    MarketDataPublisher,
+    decode,
+    encode_orderbook,
+    encode_price,
+    encode_session_bars
+)
+
+
+def daily_ohlcv(days):
+    close = numpy.linspace(100.0, 120.0, days)
+    return pd.DataFrame({
+        'exchange_shift_time': pd.date_range('2021-01-01', periods=days),
+        'h': close + 1,
+        'l': close - 1,
+        'o': close,
+        'c': close,
+        'v': numpy.ones(days)
+    })
+
+
+class TestMarketDataBus(unittest.TestCase):
+
+    def test_encoding_round_trip(self):
+        self.assertEqual(decode(encode_price('BTC/USD', 1.5, 100.25)),
+                         ('price', 'BTC/USD', (1.5, 100.25)))
+        self.assertEqual(len(encode_price('BTC/USD', 1.5, 100.25)[1]), 16)
+        orderbook = {'bids': [[99.0, 1.0], [98.0, 2.0]],
+                     'asks': [[101.0, 3.0]]}
+        self.assertEqual(
+            decode(encode_orderbook('ETH/USD', 2.0, orderbook)),
+            ('book', 'ETH/USD', (2.0, orderbook)))
+        ohlcv = daily_ohlcv(5)
+        kind, pair, (arguments, decoded) = decode(encode_session_bars(
+            'binance', 'BTC/USDT', '18:00:00', 1609459200000, 5, ohlcv))
+        self.assertEqual((kind, pair), ('session', 'BTC/USDT'))
+        self.assertEqual(arguments, ('binance', 'BTC/USDT', '18:00:00',
+                                     1609459200000, 5))
+        pd.testing.assert_frame_equal(decoded, ohlcv, check_dtype=False,
+                                      check_freq=False)
+
+    def test_subscribed_market_data(self):
+        publisher = MarketDataPublisher('tcp://127.0.0.1:*')
+        market_data = SubscribedMarketData(
+            publisher.address, ['BTC/USD'], wait_seconds=0.05,
+            stale_seconds=5.0)
+        try:
+            # Subscribers miss what was sent before they connected
+            deadline = time.time() + 5
+            while 'BTC/USD' not in market_data.latest_prices and \
+                    time.time() < deadline:
+                publisher.publish_price('BTC/USD', time.time(), 100.0)
+                time.sleep(0.01)
+            market_data.start_tick()
+            self.assertEqual(market_data.fetch_mid_price('BTC/USD', None),
+                             100.0)
+            publisher.publish_price('ETH/USD', time.time(), 10.0)
+            publisher.publish_price('BTC/USD', time.time() - 60, 101.0)
+            arguments = ('binance', 'BTC/USD', '18:00:00', 0, 3)
+            publisher.publish_session_bars(*arguments, daily_ohlcv(3))
+            with market_data.updated:
+                market_data.updated.wait_for(
+                    lambda: arguments in market_data.session_bars, 5)
+            ohlcv = market_data.fetch_custom_ohlcv(*arguments)
+            self.assertEqual(list(ohlcv['c']), [100.0, 110.0, 120.0])
+            # Same price for the whole tick
+            self.assertEqual(market_data.fetch_mid_price('BTC/USD', None),
+                             100.0)
+            market_data.start_tick()
+            with self.assertRaises(ConnectionError):
+                market_data.fetch_mid_price('BTC/USD', None)
+            # Not subscribed
+            with self.assertRaises(ConnectionError):
+                market_data.fetch_mid_price('ETH/USD', None)
+        finally:
+            market_data.close()
+            publisher.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+"""
+Test file for netting and submitting the orders of one tick
+
+To run:
+  > pytest test_order_netting.py
+"""
+import unittest
+from lib.py.fpg.order_netting import (
+    net_orders
+)
+from lib.py.fpg.portfolio_doubles import (
+    FakeDataManager,
+    FakeRiskManager,
+    FakeTrader,
+    PositionStrategy,
+    execution_portfolio
+)
+from lib.py.fpg.portfolio_parent import (
+    Portfolio
+)
+
+
+def order(pair, side, amount, leverage=3):
+    return {'pair': pair, 'side': side, 'amount': amount,
+            'leverage': leverage}
+
+
+class TestOrderNetting(unittest.TestCase):
+
+    def test_net_orders_per_pair_and_leverage(self):
+        orders = net_orders([
+            order('BTC/USD', 'buy', 1.0),
+            order('ETH/USD', 'sell', 2.0),
+            order('BTC/USD', 'sell', 0.25),
+            order('BTC/USD', 'buy', 1.0, leverage=1),
+            order('ETH/USD', 'buy', 2.0)
+        ])
+        assert [(net_order.pair, net_order.leverage, net_order.side,
+                 net_order.amount, net_order.members)
+                for net_order in orders] == [
+            ('BTC/USD', 3, 'buy', 0.75, [0, 2]),
+            ('ETH/USD', 3, 'buy', 0.0, [1, 4]),
+            ('BTC/USD', 1, 'buy', 1.0, [3])
+        ]
+
+    def test_submit_orders_splits_fills(self):
+        portfolio = Portfolio()
+        portfolio.trader = FakeTrader(timeout_pairs=['XRP/USD'])
+        portfolio.data_manager = FakeDataManager()
+        actions = [
+            order('BTC/USD', 'buy', 1.0),
+            order('BTC/USD', 'sell', 0.4),
+            order('ETH/USD', 'sell', 2.0),
+            order('ETH/USD', 'buy', 2.0),
+            order('XRP/USD', 'buy', 5.0)
+        ]
+        executed, error = portfolio.submit_orders(actions)
+        assert sorted(portfolio.trader.orders) == [('BTC/USD', 0.6, 'buy', 3)]
+        assert executed == [True, True, True, True, False]
+        assert isinstance(error, TimeoutError)
+        assert [action.get('price') for action in actions] == \
+            [100.0, 100.0, 50.0, 50.0, None]
+        trade_ids = [action['trade_id'] for action in actions[:4]]
+        assert len(set(trade_ids)) == 4
+        # A timed out order was not filled, the balance is still known
+        assert portfolio.data_manager.fills == [
+            ('BTC/USD', 'buy', 0.6, True)]
+
+    def test_unexecuted_net_orders_leave_the_objects_unchanged(self):
+        portfolio = execution_portfolio(
+            FakeTrader(timeout_pairs=['XRP/USD'],
+                       circuit_pairs=['ADA/USD']),
+            order_netting=True)
+        strategy_objects = [
+            PositionStrategy('filled', 'BTC/USD'),
+            PositionStrategy('timed out', 'XRP/USD'),
+            PositionStrategy('timed out exit', 'XRP/USD', 'short'),
+            PositionStrategy('open circuit', 'ADA/USD'),
+            PositionStrategy('open circuit exit', 'ADA/USD', 'short')
+        ]
+        for strategy_object in strategy_objects:
+            portfolio.add_active_strategy_object(strategy_object)
+        with self.assertRaises(TimeoutError):
+            portfolio.execute_responses([
+                (strategy_object, strategy_object.check_execution())
+                for strategy_object in strategy_objects])
+        assert [action['strategy_id']
+                for action, _ in portfolio.database.trades] == ['filled']
+        saved = {strategy_object.strategy_id: strategy_object
+                 for strategy_object in portfolio.database.updates}
+        assert saved['filled'].live_position
+        assert saved['filled'].long_entrance_price == 100.0
+        for strategy_id in ('timed out', 'open circuit'):
+            assert not saved[strategy_id].live_position
+            assert saved[strategy_id].strategy_position is None
+            assert saved[strategy_id].long_entrance_price is None
+        for strategy_id in ('timed out exit', 'open circuit exit'):
+            assert saved[strategy_id].live_position
+            assert saved[strategy_id].strategy_position == 'short'
+            assert saved[strategy_id].short_exit_price is None
+
+    def test_failed_sizing_leaves_the_objects_unchanged(self):
+        portfolio = execution_portfolio(
+            FakeTrader(),
+            FakeRiskManager(error=ConnectionError('balance unavailable')),
+            order_netting=True)
+        entering = PositionStrategy('entering', 'BTC/USD')
+        exiting = PositionStrategy('exiting', 'ETH/USD', 'short')
+        for strategy_object in (entering, exiting):
+            portfolio.add_active_strategy_object(strategy_object)
+        with self.assertRaises(ConnectionError):
+            portfolio.execute_responses([
+                (strategy_object, strategy_object.check_execution())
+                for strategy_object in (entering, exiting)])
+        # The exit needs no sizing and is sent
+        assert portfolio.trader.orders == [('ETH/USD', 2.0, 'buy', 3)]
+        saved = {strategy_object.strategy_id: strategy_object
+                 for strategy_object in portfolio.database.updates}
+        assert not saved['entering'].live_position
+        assert saved['entering'].strategy_position is None
+        assert not saved['exiting'].live_position
+        assert saved['exiting'].short_exit_price == 100.0
+
+    def test_timed_out_orders_without_netting(self):
+        portfolio = execution_portfolio(
+            FakeTrader(timeout_pairs=['XRP/USD']))
+        strategy_objects = [
+            PositionStrategy('timed out', 'XRP/USD'),
+            PositionStrategy('timed out exit', 'XRP/USD', 'short'),
+            PositionStrategy('filled', 'BTC/USD')
+        ]
+        for strategy_object in strategy_objects:
+            portfolio.add_active_strategy_object(strategy_object)
+        with self.assertRaises(TimeoutError):
+            portfolio.execute_responses([
+                (strategy_object, strategy_object.check_execution())
+                for strategy_object in strategy_objects])
+        # The objects after the failed ones are still executed
+        assert portfolio.trader.orders == [('BTC/USD', 1.0, 'buy', 3)]
+        saved = portfolio.database.updates
+        assert [strategy_object.strategy_id for strategy_object in saved] \
+            == ['timed out', 'timed out exit', 'filled']
+        assert not saved[0].live_position
+        assert saved[0].strategy_position is None
+        assert saved[1].live_position
+        assert saved[1].strategy_position == 'short'
+        assert saved[2].live_position
+        assert saved[2].long_entrance_price == 100.0
+        assert portfolio.strategy_dictionary['Regular']['short'][
+            'current_short'] == {'XRP/USD': 1}
+        assert portfolio.strategy_dictionary['Regular']['long'][
+            'current_long'] == {'BTC/USD': 1}
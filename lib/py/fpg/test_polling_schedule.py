@@ -0,0 +1,113 @@
+"""
+Test file for the per pair polling cadence of the live prices
+
+To run:
+  > pytest test_polling_schedule.py
+"""
+import unittest
+from lib.py.fpg.polling_schedule import (
+    PollingSchedule
+)
+from lib.py.fpg.portfolio_parent import (
+    Portfolio
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class PolledDataManager:
+    def __init__(self, polling_schedule):
+        self.polling_schedule = polling_schedule
+
+    def due_pairs(self, cadences):
+        self.polling_schedule.set_cadences(cadences)
+        return {pair for pair in cadences
+                if self.polling_schedule.is_due(pair)}
+
+
+class WaitingStrategy:
+    def __init__(self, strategy_id, pair):
+        self.strategy_id = strategy_id
+        self.strategy_name = 'Regular'
+        self.pair = pair
+        self.short_allowed = True
+        self.long_allowed = True
+        self.strategy_position = None
+        self.live_position = False
+        self.is_expired = False
+
+
+class TestPollingSchedule(unittest.TestCase):
+
+    def test_budget_stretches_fast_pairs_first(self):
+        clock = FakeClock()
+        schedule = PollingSchedule(
+            {'fast': 0.0, 'slow': 5.0, 'expired': 30.0},
+            budget=4.0, clock=clock)
+        for _ in range(2):
+            schedule.start_tick()
+            clock.now += 1.0
+        cadences = {f'FAST{index}/USD': 'fast' for index in range(6)}
+        cadences.update({'SLOW0/USD': 'slow', 'SLOW1/USD': 'slow'})
+        schedule.set_cadences(cadences)
+        # 6 polls per second of the fast pairs get 90% of the budget,
+        # the 0.4 of the slow pairs fit in the rest
+        self.assertAlmostEqual(schedule.interval('fast'), 6 / 3.6)
+        self.assertAlmostEqual(schedule.interval('slow'), 5.0)
+        for pair in cadences:
+            schedule.record_poll(pair, 100.0)
+        clock.now += 1.0
+        self.assertFalse(schedule.is_due('FAST0/USD'))
+        clock.now += 1.0
+        self.assertTrue(schedule.is_due('FAST0/USD'))
+        self.assertFalse(schedule.is_due('SLOW0/USD'))
+        clock.now += 3.0
+        self.assertTrue(schedule.is_due('SLOW0/USD'))
+        self.assertTrue(schedule.is_due('NEW/USD'))
+
+    def test_portfolio_cadences(self):
+        clock = FakeClock()
+        schedule = PollingSchedule(
+            {'fast': 0.0, 'slow': 5.0, 'expired': 30.0}, clock=clock)
+        portfolio = Portfolio()
+        portfolio.strategy_dictionary = {
+            'Regular': {'advanced_settings': False}}
+        portfolio.adaptive_polling = True
+        portfolio.price_triggers = True
+        portfolio.data_manager = PolledDataManager(schedule)
+        objects = {
+            'position': WaitingStrategy('position', 'A/USD'),
+            'awake': WaitingStrategy('awake', 'B/USD'),
+            'far': WaitingStrategy('far', 'C/USD'),
+            'near': WaitingStrategy('near', 'D/USD'),
+            'expired': WaitingStrategy('expired', 'E/USD')
+        }
+        for strategy_object in objects.values():
+            portfolio.add_active_strategy_object(strategy_object)
+            schedule.record_poll(strategy_object.pair, 100.0)
+        objects['position'].live_position = True
+        objects['expired'].is_expired = True
+        for strategy_id, lower, upper in (('position', 90.0, None),
+                                          ('far', 90.0, 110.0),
+                                          ('near', 99.9, 110.0)):
+            portfolio.price_trigger_index.register(
+                strategy_id, objects[strategy_id].pair, lower, upper)
+            del portfolio.awake_objects[strategy_id]
+        self.assertEqual(portfolio.due_pairs(),
+                         {'A/USD', 'B/USD', 'D/USD'})
+        self.assertEqual(schedule.cadences, {
+            'A/USD': 'fast', 'B/USD': 'fast', 'C/USD': 'slow',
+            'D/USD': 'fast', 'E/USD': 'expired'})
+        clock.now += 5.0
+        self.assertEqual(portfolio.due_pairs(),
+                         {'A/USD', 'B/USD', 'C/USD', 'D/USD'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+"""
+Test file for the portfolio's active objects indexes
+and short/ long counters
+
+To run:
+  > pytest test_portfolio_counters.py
+"""
+import unittest
+from lib.py.fpg.portfolio_parent import (
+    Portfolio
+)
+
+
+class CountedStrategy:
+    def __init__(self, strategy_id, pair, short_allowed, long_allowed,
+                 strategy_name='Advanced'):
+        self.strategy_id = strategy_id
+        self.strategy_name = strategy_name
+        self.pair = pair
+        self.short_allowed = short_allowed
+        self.long_allowed = long_allowed
+        self.strategy_position = None
+
+
+def make_portfolio():
+    portfolio = Portfolio()
+    portfolio.strategy_dictionary = {
+        'Advanced': {
+            'advanced_settings': True,
+            'pairs': ['BTC/USD', 'ETH/USD'],
+            'short': {
+                'max_short_per_pair': 1,
+                'current_short': {'BTC/USD': 0, 'ETH/USD': 0}
+            },
+            'long': {
+                'max_long_per_pair': 2,
+                'current_long': {'BTC/USD': 0, 'ETH/USD': 0}
+            }
+        },
+        'Regular': {
+            'advanced_settings': False,
+            'pairs': ['BTC/USD']
+        }
+    }
+    return portfolio
+
+
+class TestPortfolioCounters(unittest.TestCase):
+
+    def test_counters_follow_objects(self):
+        portfolio = make_portfolio()
+        portfolio.add_active_strategy_object(
+            CountedStrategy('1', 'BTC/USD', True, True))
+        assert not portfolio.check_if_allowed_to_create_position(
+            'short', 'Advanced', 'BTC/USD')
+        assert portfolio.check_if_allowed_to_create_position(
+            'long', 'Advanced', 'BTC/USD')
+        assert portfolio.check_if_allowed_to_create_position(
+            'short', 'Advanced', 'ETH/USD')
+        portfolio.remove_active_strategy_object('1')
+        assert portfolio.check_if_allowed_to_create_position(
+            'short', 'Advanced', 'BTC/USD')
+        assert portfolio.strategy_dictionary['Advanced'][
+            'long']['current_long']['BTC/USD'] == 0
+
+    def test_recount_after_position_change(self):
+        portfolio = make_portfolio()
+        strategy_object = CountedStrategy('1', 'BTC/USD', False, True)
+        portfolio.add_active_strategy_object(strategy_object)
+        strategy_object.strategy_position = 'short'
+        portfolio.recount_strategy_object_positions(strategy_object)
+        current_short = portfolio.strategy_dictionary['Advanced'][
+            'short']['current_short']
+        assert current_short['BTC/USD'] == 1
+        strategy_object.strategy_position = None
+        portfolio.recount_strategy_object_positions(strategy_object)
+        assert current_short['BTC/USD'] == 0
+
+    def test_incremental_matches_full_recount(self):
+        portfolio = make_portfolio()
+        for index in range(20):
+            portfolio.add_active_strategy_object(CountedStrategy(
+                str(index), ['BTC/USD', 'ETH/USD'][index % 2],
+                index % 3 == 0, index % 4 == 0))
+        portfolio.add_active_strategy_object(CountedStrategy(
+            'regular', 'BTC/USD', True, True, 'Regular'))
+        for index in range(0, 20, 3):
+            portfolio.remove_active_strategy_object(str(index))
+        incremental = {
+            side: dict(portfolio.strategy_dictionary['Advanced'][side][
+                'current_' + side])
+            for side in ('short', 'long')
+        }
+        portfolio.check_strategy_current_short_long_positions()
+        for side in ('short', 'long'):
+            assert incremental[side] == portfolio.strategy_dictionary[
+                'Advanced'][side]['current_' + side]
+
+    def test_indexes(self):
+        portfolio = make_portfolio()
+        portfolio.add_active_strategy_object(
+            CountedStrategy('1', 'BTC/USD', True, True))
+        portfolio.add_active_strategy_object(
+            CountedStrategy('2', 'ETH/USD', True, True))
+        portfolio.add_active_strategy_object(
+            CountedStrategy('3', 'BTC/USD', True, True, 'Regular'))
+        by_pair = portfolio.get_active_strategy_objects(pair='BTC/USD')
+        assert {strategy.strategy_id for strategy in by_pair} == {'1', '3'}
+        by_both = portfolio.get_active_strategy_objects('Advanced', 'ETH/USD')
+        assert [strategy.strategy_id for strategy in by_both] == ['2']
+        portfolio.remove_active_strategy_object('2')
+        assert portfolio.get_active_strategy_objects('Advanced', 'ETH/USD') \
+            == []
+        assert portfolio.remove_active_strategy_object('2') is None
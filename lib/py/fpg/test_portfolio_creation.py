@@ -0,0 +1,61 @@
+"""
+Test file for the concurrent creation of strategy objects
+
+To run:
+  > pytest test_portfolio_creation.py
+"""
+import datetime
+import random
+import threading
+import time
+import unittest
+from lib.py.fpg.portfolio_doubles import (
+    RecordingDatabase
+)
+from lib.py.fpg.portfolio_parent import (
+    Portfolio
+)
+
+
+class SlowDataManager:
+    def fetch_current_time(self):
+        return datetime.datetime(2019, 1, 1)
+
+
+class SlowStrategy:
+    threads = set()
+
+    def __init__(self, current_time, data_manager, pair):
+        # Blocking requests of the initialization
+        time.sleep(random.uniform(0, 0.02))
+        SlowStrategy.threads.add(threading.current_thread().name)
+        self.strategy_id = pair
+        self.strategy_name = 'Slow'
+        self.pair = pair
+        self.creation_time = current_time
+        self.last_exchange_open_time = current_time
+        self.is_expired = False
+
+
+class TestPortfolioCreation(unittest.TestCase):
+
+    def test_concurrent_creation_commits_in_pair_order(self):
+        pairs = [f'SYN{index}/USD' for index in range(12)]
+        portfolio = Portfolio()
+        portfolio.database = RecordingDatabase()
+        portfolio.data_manager = SlowDataManager()
+        portfolio.creation_workers = 4
+        portfolio.strategy_dictionary = {
+            'Slow': {
+                'object': SlowStrategy,
+                'advanced_settings': False,
+                'last_object_created_time': None,
+                'pairs': pairs
+            }
+        }
+        portfolio.create_strategy_objects('Slow')
+        assert list(portfolio.active_strategy_objects) == pairs
+        assert portfolio.database.inserts == [pairs]
+        assert len(SlowStrategy.threads) > 1
+        assert all(name.startswith('strategy-creation')
+                   for name in SlowStrategy.threads)
@@ -0,0 +1,149 @@
+"""
+Test file for restoring strategy objects from the database
+
+To run:
+  > pytest test_portfolio_restore.py
+"""
+import datetime
+import json
+import threading
+import unittest
+
+import numpy
+import pandas as pd
+
+from lib.py.fpg.data_manager.data_manager_parent import (
+    DataHandlerSuper,
+    shares_ohlcv
+)
+from lib.py.fpg.utils import (
+    create_datetime_object,
+    get_epoch_from_datetime
+)
+from lib.py.strategies.mean_reversion.mean_reversion import (
+    MeanReversion
+)
+from user_managment.portfolio import (
+    PortfolioManager
+)
+
+
+class CountingDataManager(DataHandlerSuper):
+    def __init__(self, current_time):
+        super().__init__()
+        self.current_time = current_time
+        self.price_requests = 0
+        self.ohlcv_requests = 0
+
+    def fetch_current_time(self):
+        return self.current_time
+
+    def fetch_mid_price(self, pair):
+        self.price_requests += 1
+        return 100.0
+
+    @shares_ohlcv
+    def fetch_custom_ohlcv(self, exchange_id, pair, exchange_open_time,
+                           since, days_back):
+        self.ohlcv_requests += 1
+        closes = numpy.arange(days_back, dtype=float) + len(pair)
+        return pd.DataFrame({'c': closes})
+
+
+def database_row(strategy_object, saved_bands=True):
+    user_settings = strategy_object.create_dictionary_for_db()
+    if not saved_bands:
+        for name in ('high_band', 'low_band', 'mean_band', 'std'):
+            del user_settings[name]
+    return {
+        'strategy_id': strategy_object.strategy_id,
+        'strategy_name': strategy_object.strategy_name,
+        'pair': strategy_object.pair,
+        'creation_time': get_epoch_from_datetime(
+            strategy_object.creation_time),
+        'strategy_position': strategy_object.strategy_position,
+        'amount': strategy_object.amount,
+        'is_expired': 0,
+        'live_position': '0',
+        'days_passed': strategy_object.days_passed,
+        'is_leverage': strategy_object.is_leverage,
+        'additional_user_settings': json.dumps(user_settings)
+    }
+
+
+class TestPortfolioRestore(unittest.TestCase):
+
+    def setUp(self):
+        creation_time = create_datetime_object('2019-01-01 14:00:00')
+        self.data_manager = CountingDataManager(creation_time)
+        self.objects = [
+            MeanReversion(creation_time, self.data_manager, pair)
+            for pair in ['BTC/USD', 'ETH/USD', 'BTC/USD', 'ETH/USD']]
+        for strategy_object in self.objects:
+            strategy_object.roll_exchange_session()
+        # Restarted two days later
+        self.data_manager.current_time = \
+            creation_time + datetime.timedelta(days=2)
+        self.data_manager.price_requests = 0
+        self.data_manager.ohlcv_requests = 0
+        self.portfolio = PortfolioManager()
+        self.portfolio.strategy_dictionary = {
+            'MeanReversion': {
+                'object': MeanReversion,
+                'advanced_settings': False
+            }
+        }
+        self.portfolio.data_manager = self.data_manager
+
+    def test_restore_without_fetching_data(self):
+        restored = self.portfolio.restore_strategy_objects(
+            [database_row(strategy_object)
+             for strategy_object in self.objects])
+        assert self.data_manager.ohlcv_requests == 0
+        assert self.data_manager.price_requests == 2
+        assert self.portfolio.pending_warm_up == []
+        for old_object, restored_object in zip(self.objects, restored):
+            assert restored_object.strategy_id == old_object.strategy_id
+            assert restored_object.high_band == old_object.high_band
+            assert restored_object.low_band == old_object.low_band
+            assert restored_object.last_exchange_open_time == \
+                old_object.last_exchange_open_time
+
+    def test_rows_without_bands_warm_up_once_per_pair(self):
+        restored = self.portfolio.restore_strategy_objects(
+            [database_row(strategy_object, saved_bands=False)
+             for strategy_object in self.objects])
+        assert self.data_manager.ohlcv_requests == 0
+        for restored_object in restored[:3]:
+            self.portfolio.add_active_strategy_object(restored_object)
+        self.portfolio.warm_up_strategy_objects()
+        assert self.data_manager.ohlcv_requests == 2
+        assert self.portfolio.pending_warm_up == []
+        for old_object, restored_object in zip(self.objects, restored[:3]):
+            assert restored_object.mean_band == old_object.mean_band
+            assert restored_object.high_band == old_object.high_band
+        # Not pushed to live trading
+        assert restored[3].mean_band is None
+
+    def test_shared_ohlcv_only_shares_in_its_call(self):
+        data_manager = self.data_manager
+        arguments = ('binance', 'BTC/USD', '18:00:00', 0, 20)
+        with data_manager.shared_ohlcv():
+            data_manager.fetch_custom_ohlcv(*arguments)
+            data_manager.fetch_custom_ohlcv(*arguments)
+            assert data_manager.ohlcv_requests == 1
+            # Other threads fetch on their own
+            thread = threading.Thread(
+                target=data_manager.fetch_custom_ohlcv, args=arguments)
+            thread.start()
+            thread.join()
+            assert data_manager.ohlcv_requests == 2
+            with data_manager.shared_ohlcv():
+                data_manager.fetch_custom_ohlcv(*arguments)
+                data_manager.fetch_custom_ohlcv(*arguments)
+            assert data_manager.ohlcv_requests == 3
+            data_manager.fetch_custom_ohlcv(*arguments)
+            assert data_manager.ohlcv_requests == 3
+        data_manager.fetch_custom_ohlcv(*arguments)
+        assert data_manager.ohlcv_requests == 4
+        assert data_manager.shared_ohlcv_memos == {}
@@ -0,0 +1,85 @@
+"""
+Test file for the in memory price history
+
+To run:
+  > pytest test_price_history.py
+"""
+import datetime
+import numpy
+import tempfile
+import unittest
+from lib.py.fpg.constants import (
+    Constants
+)
+from lib.py.fpg.database import (
+    Database
+)
+from lib.py.fpg.price_history import (
+    PriceHistory
+)
+
+
+class TestPriceHistory(unittest.TestCase):
+
+    def test_windows_are_views_after_wrapping(self):
+        history = PriceHistory(capacity=5, bar_capacity=3)
+        for second in range(12):
+            history.record('BTC/USD', 1000.0 + second, float(second))
+        times, prices = history.prices('BTC/USD')
+        numpy.testing.assert_array_equal(prices, [7, 8, 9, 10, 11])
+        numpy.testing.assert_array_equal(times, 1000.0 + prices)
+        last = history.prices('BTC/USD', 2)[1]
+        self.assertTrue(numpy.shares_memory(last, prices))
+        self.assertFalse(prices.flags.writeable)
+        numpy.testing.assert_array_equal(
+            history.prices_since('BTC/USD', 1009.5)[1], [10, 11])
+        # A price of the same time replaces the last one,
+        # an older one is ignored
+        history.record('BTC/USD', 1011.0, 20.0)
+        history.record('BTC/USD', 1003.0, 30.0)
+        numpy.testing.assert_array_equal(
+            history.prices('BTC/USD')[1], [7, 8, 9, 10, 20])
+
+    def test_incremental_bars_match_seeded_bars(self):
+        generator = numpy.random.default_rng(1)
+        unix_times = numpy.cumsum(generator.uniform(1, 40, 200)) + 6e5
+        prices = 100 + numpy.cumsum(generator.normal(0, 1, 200))
+        recorded = PriceHistory(capacity=50, bar_capacity=20)
+        for unix_time, price in zip(unix_times, prices):
+            recorded.record('ETH/USD', unix_time, price)
+        seeded = PriceHistory(capacity=50, bar_capacity=20)
+        seeded.seed('ETH/USD', unix_times, prices)
+        recorded_bars = recorded.minute_bars('ETH/USD', include_current=True)
+        seeded_bars = seeded.minute_bars('ETH/USD', include_current=True)
+        self.assertEqual(len(recorded_bars['time']), 21)
+        for column, values in recorded_bars.items():
+            numpy.testing.assert_array_equal(values, seeded_bars[column])
+        last_bar = recorded_bars['time'][-1]
+        in_last_bar = (unix_times - unix_times % 60) == last_bar
+        self.assertEqual(recorded_bars['high'][-1], prices[in_last_bar].max())
+        self.assertEqual(recorded_bars['ticks'][-1], in_last_bar.sum())
+        numpy.testing.assert_array_equal(
+            seeded.prices('ETH/USD')[1], prices[-50:])
+
+    def test_retrieve_coin_data(self):
+        database_link = Constants.database_link
+        with tempfile.TemporaryDirectory() as directory:
+            Constants.database_link = f'{directory}/prices.db'
+            try:
+                database = Database()
+                self.assertEqual(
+                    database.retrieve_coin_data('BTC/USD', 10), [])
+                start = datetime.datetime(
+                    2021, 1, 1, tzinfo=datetime.timezone.utc)
+                for second in range(5):
+                    database.insert_coin_data(
+                        'BTC/USD', 100.0 + second,
+                        start + datetime.timedelta(seconds=second))
+                rows = database.retrieve_coin_data('BTC/USD', 3)
+            finally:
+                Constants.database_link = database_link
+        self.assertEqual([price for _, price in rows], [102, 103, 104])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+"""
+Test file for the price trigger index
+
+To run:
+  > pytest test_price_triggers.py
+"""
+import unittest
+from lib.py.fpg.price_triggers import (
+    PriceTriggerIndex
+)
+
+
+class TestPriceTriggerIndex(unittest.TestCase):
+
+    def test_wakes_only_crossed_levels(self):
+        index = PriceTriggerIndex()
+        index.register('inside', 'BTC/USD', 90.0, 110.0)
+        index.register('wide', 'BTC/USD', 50.0, 150.0)
+        index.register('above_mean', 'BTC/USD', 120.0, None)
+        index.register('below_mean', 'BTC/USD', None, 80.0)
+        index.register('other_pair', 'ETH/USD', 90.0, 110.0)
+        assert index.pop_triggered('BTC/USD', 100.0) == \
+            ['above_mean', 'below_mean']
+        assert index.pop_triggered('BTC/USD', 110.0) == ['inside']
+        assert index.pop_triggered('BTC/USD', 110.0) == []
+        assert 'wide' in index and 'inside' not in index
+        assert index.pairs() == ['BTC/USD', 'ETH/USD']
+        # Registering again replaces the old levels
+        index.register('wide', 'BTC/USD', 10.0, 20.0)
+        assert index.pop_triggered('BTC/USD', 15.0) == []
+        assert index.pop_triggered('BTC/USD', 10.0) == ['wide']
+        assert index.pairs() == ['ETH/USD']
+
+    def test_cancelled_entries_are_compacted(self):
+        index = PriceTriggerIndex()
+        index.register('kept', 'BTC/USD', 0.0, 1000.0)
+        for round_number in range(200):
+            index.register('moving', 'BTC/USD',
+                           round_number, round_number + 100.0)
+        assert len(index) == 2
+        assert len(index.lower_levels['BTC/USD']) <= 2 * 2 + 64 + 1
+        index.cancel('moving')
+        assert index.pop_triggered('BTC/USD', 5000.0) == ['kept']
+        assert len(index) == 0
@@ -0,0 +1,41 @@
+"""
+Test file for the client side rate limiter
+
+To run:
+  > pytest test_rate_limiter.py
+"""
+import threading
+import time
+import unittest
+from lib.py.fpg.rate_limiter import (
+    RateLimiter
+)
+
+
+class TestRateLimiter(unittest.TestCase):
+
+    def test_waiting_requests_served_by_priority(self):
+        limiter = RateLimiter({'fpg': (10.0, 1)})
+        limiter.acquire('fetch_price')
+        served = []
+
+        def request(endpoint):
+            limiter.acquire(endpoint)
+            served.append(endpoint)
+        threads = []
+        for endpoint in ['fetch_ohlcv', 'fetch_balance', 'execute_trade']:
+            threads.append(threading.Thread(target=request, args=(endpoint,)))
+            threads[-1].start()
+            time.sleep(0.02)
+        # fetch_ohlcv is on the unlimited exchange bucket
+        limiter.acquire('fetch_price', priority=2)
+        for thread in threads:
+            thread.join()
+        assert served == ['fetch_ohlcv', 'execute_trade', 'fetch_balance']
+        metrics = limiter.metrics()
+        assert metrics['fetch_price']['requests'] == 2
+        assert metrics['fetch_ohlcv']['max_wait_ms'] < 50
+        # Three tokens at 10 per second after the burst
+        assert metrics['fetch_price']['max_wait_ms'] >= 150
+        assert metrics['fetch_balance']['max_wait_ms'] > \
+            metrics['execute_trade']['max_wait_ms']
@@ -0,0 +1,84 @@
+"""
+Test file for the refresh time budget and watchdog
+
+To run:
+  > pytest test_refresh_watchdog.py
+"""
+import threading
+import unittest
+from lib.py.fpg.portfolio_parent import (
+    Portfolio
+)
+from lib.py.fpg.refresh_watchdog import (
+    RefreshWatchdog
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TimedStrategy:
+    def __init__(self, strategy_id, clock, seconds):
+        self.strategy_id = strategy_id
+        self.strategy_name = 'Regular'
+        self.pair = 'BTC/USD'
+        self.short_allowed = True
+        self.long_allowed = True
+        self.strategy_position = None
+        self.is_expired = False
+        self.clock = clock
+        self.seconds = seconds
+        self.hang = None
+
+    def refresh(self):
+        self.clock.now += self.seconds
+        if self.hang is not None:
+            self.hang.wait()
+        return [{'strategy_id': self.strategy_id}]
+
+
+class TestRefreshWatchdog(unittest.TestCase):
+
+    def test_slow_object_isolated_and_paused(self):
+        clock = FakeClock()
+        portfolio = Portfolio()
+        portfolio.strategy_dictionary = {
+            'Regular': {'advanced_settings': False}}
+        portfolio.refresh_watchdog = RefreshWatchdog(
+            object_budget=0.1, strategy_budgets={'Regular': 0.5},
+            overrun_limit=2, clock=clock)
+        fast = TimedStrategy('fast', clock, 0.01)
+        slow = TimedStrategy('slow', clock, 0.5)
+        portfolio.add_active_strategy_object(slow)
+        portfolio.add_active_strategy_object(fast)
+        for _ in range(2):
+            responses, _ = portfolio.refresh_strategy_objects()
+            assert len(responses) == 2
+        assert portfolio.refresh_watchdog.is_isolated('slow')
+        # Isolated: refreshed on a worker, the tick doesn't wait
+        # for it once it hangs
+        slow.hang = threading.Event()
+        responses, _ = portfolio.refresh_strategy_objects()
+        assert [strategy_object.strategy_id
+                for strategy_object, _ in responses] == ['fast']
+        assert portfolio.refresh_watchdog.is_running('slow')
+        responses, _ = portfolio.refresh_strategy_objects()
+        assert len(responses) == 1
+        slow.hang.set()
+        portfolio.refresh_watchdog.running['slow'][1].result()
+        responses, _ = portfolio.refresh_strategy_objects()
+        # In activation order
+        assert [strategy_object.strategy_id
+                for strategy_object, _ in responses] == ['slow', 'fast']
+        report = portfolio.refresh_watchdog.report()
+        assert report['slowest_objects'][0]['strategy_id'] == 'slow'
+        assert report['slowest_objects'][0]['overruns'] == 3
+        assert report['slowest_objects'][0]['paused_ticks'] == 1
+        assert report['isolated_objects'] == ['slow']
+        # Isolated refreshes count in the tick they finished in
+        assert report['strategies']['Regular']['overruns'] == 3
@@ -0,0 +1,73 @@
+"""
+Test file for the modules loaded at startup
+
+To run:
+  > pytest test_startup_imports.py
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+HEAVY_MODULES = ['ccxt', 'pandas', 'requests', 'zmq']
+
+# Stands in for ccxt, an exchange returning two hours of ohlcv
+FAKE_CCXT = '''
+class binance:
+    def fetch_ohlcv(self, pair, since=None, timeframe=None):
+        return [[0, 1.0, 2.0, 0.5, 1.5, 10.0],
+                [3600000, 1.5, 3.0, 1.0, 2.5, 20.0]]
+'''
+
+
+def loaded_modules(code):
+    """
+    :return: dict -> heavy module: True if the code loaded it,
+                     in a fresh interpreter
+    """
+    output = subprocess.run(
+        [sys.executable, '-c',
+         f'{code}\nimport json, sys\n'
+         f'print(json.dumps({{name: name in sys.modules '
+         f'for name in {HEAVY_MODULES!r}}}))'],
+        capture_output=True, text=True, check=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+class TestStartupImports(unittest.TestCase):
+
+    def test_interface_loads_no_heavy_modules(self):
+        self.assertEqual(
+            loaded_modules('import lib.py.fpg.interface'),
+            dict.fromkeys(HEAVY_MODULES, False))
+
+    def test_backtest_loads_no_live_modules(self):
+        modules = loaded_modules(
+            'import lib.py.fpg.interface\n'
+            'import lib.py.fpg.data_manager.data_manager_backtesting')
+        self.assertTrue(modules['pandas'])
+        self.assertFalse(modules['ccxt'])
+        self.assertFalse(modules['requests'])
+        self.assertFalse(modules['zmq'])
+
+    def test_live_loads_ccxt_on_first_download(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, 'ccxt.py'), 'w') as file:
+                file.write(FAKE_CCXT)
+            modules = loaded_modules(
+                'import sys\n'
+                f'sys.path.insert(0, {directory!r})\n'
+                'import lib.py.fpg.data_manager.data_manager_live\n'
+                'from lib.py.fpg.data_manager.market_data import (\n'
+                '    MarketData\n'
+                ')\n'
+                "assert 'ccxt' not in sys.modules\n"
+                'MarketData(None, None).download_ohlcv(\n'
+                "    'binance', 'BTC/USDT', '00:00:00', 0, 1)")
+        self.assertTrue(modules['ccxt'])
+        self.assertFalse(modules['zmq'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,166 @@
+"""
+Test file for the batched refresh of strategy objects
+
+To run:
+  > pytest test_strategy_batch.py
+"""
+import copy
+import datetime
+import unittest
+
+import numpy
+
+from lib.py.fpg.AbstractStrategies import (
+    CompactStrategy
+)
+from lib.py.fpg.strategy_batch import (
+    StrategyBatch
+)
+from lib.py.fpg.utils import (
+    create_datetime_object
+)
+from lib.py.strategies.mean_reversion.mean_reversion import (
+    MeanReversion
+)
+
+
+class PriceFeed:
+    def __init__(self, pairs):
+        self.current_time = create_datetime_object('2019-01-01 14:00:00')
+        self.prices = {pair: 100.0 for pair in pairs}
+
+    def fetch_current_time(self):
+        return self.current_time
+
+    def fetch_mid_price(self, pair):
+        return self.prices[pair]
+
+
+def create_object(data_manager, pair, index):
+    strategy_object = MeanReversion.__new__(MeanReversion)
+    CompactStrategy.__init__(strategy_object)
+    strategy_object.strategy_id = str(index)
+    strategy_object.strategy_name = 'MeanReversion'
+    strategy_object.pair = pair
+    strategy_object.data_manager = data_manager
+    strategy_object.timer_driven = True
+    strategy_object.amount = float(index)
+    strategy_object.strategy_position = None
+    strategy_object.live_position = False
+    strategy_object.is_expired = False
+    strategy_object.is_executed = False
+    strategy_object.current_price = None
+    strategy_object.last_price_fetch_time = None
+    strategy_object.mean_band = 100.0 + index % 3
+    strategy_object.high_band = strategy_object.mean_band + 30
+    strategy_object.low_band = strategy_object.mean_band - 30
+    strategy_object.passed_high_band_counter = 0
+    strategy_object.passed_low_band_counter = 0
+    return strategy_object
+
+
+class TestStrategyBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.pairs = ['BTC/USD', 'ETH/USD', 'XRP/USD']
+        self.generator = numpy.random.default_rng(0)
+
+    def test_batch_matches_object_refresh(self):
+        data_manager = PriceFeed(self.pairs)
+        objects = [create_object(data_manager, self.pairs[index % 3], index)
+                   for index in range(30)]
+        # Some objects start with an open or an expired position
+        for strategy_object in objects[::4]:
+            strategy_object.live_position = True
+            strategy_object.strategy_position = 'long'
+        objects[5].is_expired = True
+        objects[8].is_expired = True
+        batched_objects = copy.deepcopy(objects)
+        for batched_object in batched_objects:
+            batched_object.data_manager = data_manager
+        batch = StrategyBatch(MeanReversion, capacity=4)
+        for batched_object in batched_objects:
+            batch.add(batched_object)
+
+        actions = []
+        for tick in range(400):
+            data_manager.current_time += datetime.timedelta(minutes=1)
+            for pair in self.pairs:
+                data_manager.prices[pair] = max(
+                    1.0, data_manager.prices[pair] +
+                    self.generator.normal(0, 4))
+            expected = []
+            for strategy_object in objects:
+                response = strategy_object.refresh()
+                if response:
+                    expected.append((strategy_object.strategy_id, response))
+                    actions.append(response[0]['action'])
+            executions = batch.refresh(data_manager)
+            assert [(batched_object.strategy_id, response)
+                    for batched_object, response in executions] == expected
+            expired_ids = {batched_object.strategy_id for batched_object
+                           in batch.expired_objects()}
+            assert expired_ids == {strategy_object.strategy_id
+                                   for strategy_object in objects
+                                   if strategy_object.is_expired}
+            # Expired objects leave, like in the portfolio
+            for strategy_id in expired_ids:
+                batch.remove(strategy_id)
+            objects = [strategy_object for strategy_object in objects
+                       if strategy_object.strategy_id not in expired_ids]
+
+        assert {'enter', 'exit'} <= set(actions)
+        batch.store_all()
+        batched_objects = [batch.objects[row]
+                           for row in sorted(batch.rows.values())]
+        assert len(batched_objects) == len(objects)
+        for strategy_object, batched_object in zip(objects, batched_objects):
+            for name in MeanReversion.batch_columns:
+                assert getattr(batched_object, name) == \
+                    getattr(strategy_object, name)
+            assert batched_object.strategy_position == \
+                strategy_object.strategy_position
+
+    def test_removed_rows_are_compacted_in_order(self):
+        data_manager = PriceFeed(self.pairs)
+        batch = StrategyBatch(MeanReversion, capacity=2)
+        objects = [create_object(data_manager, self.pairs[index % 3], index)
+                   for index in range(200)]
+        for strategy_object in objects:
+            batch.add(strategy_object)
+        for strategy_object in objects[:150]:
+            batch.remove(strategy_object.strategy_id)
+        assert len(batch) == 50
+        assert batch.size < 200
+        assert [batch.objects[row].strategy_id
+                for row in sorted(batch.rows.values())] == \
+            [strategy_object.strategy_id for strategy_object in objects[150:]]
+        assert batch.column('mean_band')[batch.alive_rows()].tolist() == \
+            [strategy_object.mean_band for strategy_object in objects[150:]]
+
+    def test_none_attributes_are_stored_back_as_none(self):
+        data_manager = PriceFeed(self.pairs)
+        batch = StrategyBatch(MeanReversion, capacity=2)
+        objects = [create_object(data_manager, self.pairs[index % 3], index)
+                   for index in range(100)]
+        # Objects whose bands were not calculated yet
+        for strategy_object in objects[1::2]:
+            strategy_object.mean_band = None
+            strategy_object.high_band = None
+            strategy_object.low_band = None
+        for strategy_object in objects:
+            batch.add(strategy_object)
+        for strategy_object in objects[:60]:
+            batch.remove(strategy_object.strategy_id)
+        assert objects[1].mean_band is None
+        assert objects[2].mean_band == 102.0
+        batch.refresh(data_manager)
+        batch.store_all()
+        for strategy_object in objects[60:]:
+            assert strategy_object.current_price == 100.0
+            if int(strategy_object.strategy_id) % 2:
+                assert strategy_object.mean_band is None
+                assert strategy_object.high_band is None
+            else:
+                assert strategy_object.mean_band == \
+                    100.0 + int(strategy_object.strategy_id) % 3
@@ -0,0 +1,128 @@
+"""
+Test file for the strategy registry
+
+To run:
+  > pytest test_strategy_registry.py
+"""
+import json
+import os
+import sys
+import tempfile
+import unittest
+from lib.py.fpg.portfolio_parent import (
+    Portfolio
+)
+from lib.py.fpg.strategy_registry import (
+    StrategyRegistry,
+    get_strategy_registry
+)
+from lib.py.strategies.mean_reversion.mean_reversion import (
+    MeanReversion
+)
+
+STRATEGY_MODULE = """
+class {name}:
+    pass
+"""
+
+
+def write_strategy(directory, package_name, strategy_name, active,
+                   advanced_settings=False):
+    os.makedirs(os.path.join(directory, package_name))
+    with open(os.path.join(directory, package_name,
+                           f'{package_name}.py'), 'w') as module:
+        module.write(STRATEGY_MODULE.format(name=strategy_name))
+    metadata = {
+        'module': package_name,
+        'class': strategy_name,
+        'active': active,
+        'creation_interval_days': 0.5,
+        'pairs': ['BTC/USD'],
+        'advanced_settings': advanced_settings
+    }
+    if advanced_settings:
+        metadata['short'] = {'max_short_per_pair': 1,
+                             'current_short': {'BTC/USD': 0}}
+        metadata['long'] = {'max_long_per_pair': 1,
+                            'current_long': {'BTC/USD': 0}}
+    with open(os.path.join(directory, package_name,
+                           'strategy.json'), 'w') as metadata_file:
+        json.dump({strategy_name: metadata}, metadata_file)
+
+
+class TestStrategyRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.package = 'registry_test_strategies'
+        self.strategies = os.path.join(self.directory.name, self.package)
+        os.makedirs(self.strategies)
+        open(os.path.join(self.strategies, '__init__.py'), 'w').close()
+        sys.path.insert(0, self.directory.name)
+
+    def tearDown(self):
+        sys.path.remove(self.directory.name)
+        for name in list(sys.modules):
+            if name.startswith(self.package):
+                del sys.modules[name]
+        self.directory.cleanup()
+
+    def test_only_active_strategies_are_imported(self):
+        write_strategy(self.strategies, 'alpha', 'Alpha', True,
+                       advanced_settings=True)
+        for index in range(20):
+            write_strategy(self.strategies, f'inactive_{index}',
+                           f'Inactive{index}', False)
+        registry = StrategyRegistry(self.strategies, self.package)
+        strategy_dictionary = registry.strategy_dictionary()
+        self.assertEqual(len(strategy_dictionary), 21)
+        self.assertEqual(strategy_dictionary['Alpha']['object'].__name__,
+                         'Alpha')
+        self.assertEqual(
+            strategy_dictionary['Alpha']['creation_interval'].seconds,
+            12 * 3600)
+        self.assertIsNone(strategy_dictionary['Inactive3']['object'])
+        self.assertEqual(
+            [name for name in sys.modules if name.startswith(self.package)],
+            [self.package, f'{self.package}.alpha',
+             f'{self.package}.alpha.alpha'])
+        # The counters of every portfolio are its own, the
+        # classes are shared
+        other_dictionary = registry.strategy_dictionary()
+        strategy_dictionary['Alpha']['short']['current_short'][
+            'BTC/USD'] = 1
+        self.assertEqual(other_dictionary['Alpha']['short'][
+            'current_short']['BTC/USD'], 0)
+        self.assertIs(other_dictionary['Alpha']['object'],
+                      strategy_dictionary['Alpha']['object'])
+
+    def test_inactive_strategy_is_imported_on_first_use(self):
+        write_strategy(self.strategies, 'beta', 'Beta', False)
+        registry = StrategyRegistry(self.strategies, self.package)
+        portfolio = Portfolio()
+        portfolio.strategy_registry = registry
+        portfolio.strategy_dictionary = registry.strategy_dictionary()
+        self.assertNotIn(f'{self.package}.beta.beta', sys.modules)
+        # e.g. objects of an inactive strategy restored from the db
+        strategy_class = portfolio.strategy_class('Beta')
+        self.assertEqual(strategy_class.__name__, 'Beta')
+        self.assertIn(f'{self.package}.beta.beta', sys.modules)
+        self.assertIs(portfolio.strategy_dictionary['Beta']['object'],
+                      strategy_class)
+
+    def test_duplicate_strategy_names(self):
+        write_strategy(self.strategies, 'alpha', 'Alpha', True)
+        write_strategy(self.strategies, 'gamma', 'Alpha', True)
+        with self.assertRaises(ValueError):
+            StrategyRegistry(self.strategies, self.package).discover()
+
+    def test_installed_strategies(self):
+        strategy_dictionary = get_strategy_registry().strategy_dictionary()
+        self.assertIs(strategy_dictionary['MeanReversion']['object'],
+                      MeanReversion)
+        self.assertFalse(strategy_dictionary['Example']['active'])
+        self.assertIsNone(strategy_dictionary['Example']['object'])
+
+
+if __name__ == '__main__':
+    unittest.main()
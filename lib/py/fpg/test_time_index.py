@@ -0,0 +1,135 @@
+"""
+Test file for the as-of time index and the as-of queries of the
+backtesting data manager
+
+To run:
+  > pytest test_time_index.py
+"""
+import contextlib
+import datetime
+import io
+import tempfile
+import unittest
+import numpy
+import pytz
+from lib.py.benchmarks.synthetic_data import (
+    DEFAULT_START,
+    synthetic_pair_names,
+    write_data_bundle
+)
+from lib.py.fpg.constants import (
+    Constants
+)
+from lib.py.fpg.data_manager.data_manager_backtesting import (
+    BacktestingDataManager
+)
+from lib.py.fpg.time_index import (
+    TimeIndex
+)
+
+
+class TestTimeIndex(unittest.TestCase):
+
+    def setUp(self):
+        # Minutes 0 to 9 without minute 5
+        self.index = TimeIndex([60 * minute for minute in range(10)
+                                if minute != 5])
+
+    def test_as_of(self):
+        self.assertEqual(self.index.as_of(-1), -1)
+        self.assertEqual(self.index.as_of(0), 0)
+        self.assertEqual(self.index.as_of(330), 4)
+        self.assertEqual(self.index.as_of(10 ** 6), 8)
+        # Never after now
+        self.assertEqual(self.index.as_of(10 ** 6, now=150), 2)
+
+    def test_between_and_last(self):
+        self.assertEqual(self.index.between(60, 360), slice(1, 5))
+        self.assertEqual(self.index.between(60, 360, now=120), slice(1, 3))
+        self.assertEqual(self.index.between(300, 600, now=0), slice(5, 5))
+        self.assertEqual(self.index.last(3), slice(6, 9))
+        self.assertEqual(self.index.last(3, before=420), slice(3, 6))
+        self.assertEqual(self.index.last(20, now=120), slice(0, 3))
+
+    def test_unsorted_times(self):
+        with self.assertRaises(ValueError):
+            TimeIndex([0, 120, 60])
+
+
+class TestBacktestingAsOfQueries(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.pair = synthetic_pair_names(1)[0]
+        write_data_bundle([cls.pair], DEFAULT_START, 12, 3,
+                          cls.directory.name)
+        data_bundle_link = Constants.data_bundle_link
+        Constants.data_bundle_link = cls.directory.name
+        start = pytz.utc.localize(DEFAULT_START + datetime.timedelta(days=10))
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                cls.data_manager = BacktestingDataManager(
+                    start, start + datetime.timedelta(days=1), [cls.pair])
+        finally:
+            Constants.data_bundle_link = data_bundle_link
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    def setUp(self):
+        self.data_manager.current_index = 90
+        self.data_manager.fetch_current_time()
+        self.now = self.data_manager.current_time.timestamp()
+
+    def test_price_at(self):
+        data_manager = self.data_manager
+        self.assertEqual(data_manager.price_at(self.pair),
+                         data_manager.fetch_mid_price(self.pair))
+        # A later time is read as now
+        self.assertEqual(data_manager.price_at(self.pair, self.now + 3600),
+                         data_manager.price_at(self.pair))
+        data_manager.current_index = 30
+        data_manager.fetch_current_time()
+        self.assertEqual(data_manager.price_at(self.pair, self.now - 3600),
+                         data_manager.fetch_mid_price(self.pair))
+
+    def test_bars_stop_at_the_current_minute(self):
+        data_manager = self.data_manager
+        minutes = data_manager.bars_between(
+            self.pair, self.now - 600, self.now + 86400)
+        self.assertEqual(len(minutes['time']), 11)
+        self.assertEqual(minutes['time'][-1], self.now)
+        self.assertEqual(minutes['close'][-1],
+                         data_manager.fetch_mid_price(self.pair))
+        hours = data_manager.bars_between(
+            self.pair, self.now - 86400, self.now + 86400, '1h')
+        self.assertEqual(hours['time'][-1], self.now - self.now % 3600)
+        self.assertEqual(hours['close'][-1], minutes['close'][-1])
+        last = data_manager.last_bars(self.pair, 3, timeframe='4h',
+                                      exchange_open_time='18:00:00')
+        self.assertEqual(len(last['time']), 3)
+        self.assertEqual(last['close'][-1], minutes['close'][-1])
+        numpy.testing.assert_array_equal(
+            data_manager.last_bars(self.pair, 5)['time'],
+            minutes['time'][-5:])
+
+    def test_ohlcv_window_moves_back_to_the_current_time(self):
+        data_manager = self.data_manager
+        since = self.now - 3 * 86400
+        # Asks for days after the current time, the window is moved
+        # back by whole days until it ends by the current time
+        ohlcv = data_manager.fetch_custom_ohlcv(
+            'binance', self.pair, '18:00:00', int(since * 1000), 10)
+        to = since + 12 * 86400
+        while to > self.now:
+            to -= 86400
+        # The last minute of the window, in the shifted time
+        self.assertEqual(ohlcv['c'].iloc[-1],
+                         data_manager.price_at(self.pair, to - 6 * 3600))
+        self.assertEqual(len(ohlcv), 11)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+"""
+Test file for the timer service
+
+To run:
+  > pytest test_timer_service.py
+"""
+import datetime
+import unittest
+from lib.py.fpg.timer_service import (
+    TimerService
+)
+from lib.py.fpg.utils import (
+    create_datetime_object
+)
+
+
+class TestTimerService(unittest.TestCase):
+
+    def setUp(self):
+        self.start = create_datetime_object('2019-01-01 00:00:00')
+        self.timer_service = TimerService()
+
+    def minutes(self, minutes):
+        return self.start + datetime.timedelta(minutes=minutes)
+
+    def test_pops_only_due_timers_in_order(self):
+        self.timer_service.schedule('late', self.minutes(10))
+        self.timer_service.schedule('early', self.minutes(1))
+        self.timer_service.schedule('same_time', self.minutes(1))
+        assert self.timer_service.pop_due(self.minutes(0)) == []
+        assert self.timer_service.pop_due(self.minutes(5)) == \
+            ['early', 'same_time']
+        assert len(self.timer_service) == 1
+        assert self.timer_service.pop_due(self.minutes(10)) == ['late']
+        assert self.timer_service.next_due_time() is None
+
+    def test_reschedule_and_cancel(self):
+        self.timer_service.schedule('timer', self.minutes(1))
+        self.timer_service.schedule('timer', self.minutes(3))
+        self.timer_service.schedule('cancelled', self.minutes(2))
+        self.timer_service.cancel('cancelled')
+        assert 'cancelled' not in self.timer_service
+        assert self.timer_service.next_due_time() == \
+            self.minutes(3).timestamp()
+        assert self.timer_service.pop_due(self.minutes(2)) == []
+        assert self.timer_service.pop_due(self.minutes(3)) == ['timer']
@@ -0,0 +1,91 @@
+"""
+As-of index of the rows of a pair by time.
+The times are kept as a sorted int64 array of epoch seconds and every
+query is a binary search, O(log n) whatever the length of the data.
+Every query takes the time the caller is at (the current time of a
+backtest): rows after it are never returned, a query for a later time
+is answered as of that time.
+"""
+import numpy
+from typing import Any
+
+
+class TimeIndex:
+    def __init__(
+            self: Any,
+            unix_times: Any
+    ) -> None:
+        """
+        :param unix_times: numpy array -> epoch seconds of the rows,
+                                          ascending
+        """
+        self.times = numpy.asarray(unix_times, dtype=numpy.int64)
+        if len(self.times) > 1 and (numpy.diff(self.times) < 0).any():
+            raise ValueError('The times of a TimeIndex must be sorted')
+
+    def __len__(
+            self: Any
+    ) -> int:
+        return len(self.times)
+
+    def visible(
+            self: Any,
+            now: float = None
+    ) -> int:
+        """
+        :param now: float -> epoch seconds the caller is at,
+                             None for no limit
+        :return: int -> number of rows at or before now
+        """
+        if now is None:
+            return len(self.times)
+        return int(numpy.searchsorted(self.times, now, side='right'))
+
+    def as_of(
+            self: Any,
+            unix_time: float,
+            now: float = None
+    ) -> int:
+        """
+        :param unix_time: float -> epoch seconds
+        :param now: float -> epoch seconds the caller is at
+        :return: int -> position of the last row at or before
+                        unix_time, -1 if there is none
+        """
+        if now is not None:
+            unix_time = min(unix_time, now)
+        return int(numpy.searchsorted(
+            self.times, unix_time, side='right')) - 1
+
+    def between(
+            self: Any,
+            start: float,
+            end: float,
+            now: float = None
+    ) -> slice:
+        """
+        :param start: float -> epoch seconds, included
+        :param end: float -> epoch seconds, excluded
+        :param now: float -> epoch seconds the caller is at
+        :return: slice -> rows from start to end, up to now
+        """
+        first, last = numpy.searchsorted(self.times, (start, end))
+        last = min(int(last), self.visible(now))
+        return slice(int(first), max(last, int(first)))
+
+    def last(
+            self: Any,
+            count: int,
+            before: float = None,
+            now: float = None
+    ) -> slice:
+        """
+        :param count: int -> number of rows
+        :param before: float -> epoch seconds, excluded, None for now
+        :param now: float -> epoch seconds the caller is at
+        :return: slice -> the last count rows before before, up to now
+        """
+        last = self.visible(now)
+        if before is not None:
+            last = min(last, int(numpy.searchsorted(self.times, before)))
+        return slice(max(last - count, 0), last)
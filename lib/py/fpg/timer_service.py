@@ -0,0 +1,92 @@
+"""
+Central timer service for time based work:
+strategy object creation intervals, exchange session
+rollovers and expiration deadlines.
+Timers are kept in a heap so every tick only pops
+the timers that are due.
+"""
+import heapq
+import itertools
+from typing import Any
+
+
+class TimerService:
+    def __init__(
+            self: Any
+    ) -> None:
+        self.heap = []
+        # timer key -> sequence number of its live heap entry
+        self.timers = {}
+        self.sequence = itertools.count()
+
+    def __len__(
+            self: Any
+    ) -> int:
+        return len(self.timers)
+
+    def __contains__(
+            self: Any,
+            key: Any
+    ) -> bool:
+        return key in self.timers
+
+    def schedule(
+            self: Any,
+            key: Any,
+            due_time: Any
+    ) -> None:
+        """
+        Schedules the timer, replacing any pending
+        timer with the same key
+        :param key: hashable -> identifies the timer
+        :param due_time: datetime object -> time the timer fires
+        :return: None
+        """
+        sequence = next(self.sequence)
+        self.timers[key] = sequence
+        heapq.heappush(self.heap, (due_time.timestamp(), sequence, key))
+
+    def cancel(
+            self: Any,
+            key: Any
+    ) -> None:
+        """
+        Cancels the pending timer of the key (if any).
+        The heap entry is dropped once it reaches the top.
+        :param key: hashable -> identifies the timer
+        :return: None
+        """
+        self.timers.pop(key, None)
+
+    def next_due_time(
+            self: Any
+    ) -> float or None:
+        """
+        :return: float -> epoch of the next pending timer
+                          or None if nothing is scheduled
+        """
+        while self.heap and \
+                self.timers.get(self.heap[0][2]) != self.heap[0][1]:
+            heapq.heappop(self.heap)
+        if self.heap:
+            return self.heap[0][0]
+        return None
+
+    def pop_due(
+            self: Any,
+            current_time: Any
+    ) -> list:
+        """
+        Removes and returns every timer due at the current time
+        :param current_time: datetime object -> current time
+        :return: list -> keys of the due timers ordered by due time
+                         and scheduling order
+        """
+        now = current_time.timestamp()
+        due_keys = []
+        while self.heap and self.heap[0][0] <= now:
+            due_time, sequence, key = heapq.heappop(self.heap)
+            if self.timers.get(key) == sequence:
+                del self.timers[key]
+                due_keys.append(key)
+        return due_keys
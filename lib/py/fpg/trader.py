@@ -52,13 +52,17 @@ class FPGTrader:
             base_quote: str,
             amount: float,
             side: str,
-            leverage: int
+            leverage: int,
+            timeout: float = None
     ) -> float:
         """
         :param base_quote: str -> pair
         :param amount: float -> amount we want to transact
         :param side: str -> 'buy'/ 'sell'
-        :return: float -> price the trade was executed at
+        :param timeout: float -> seconds to keep retrying the order,
+                                 None retries until it succeeds
+        :return: tuple -> (price the trade was executed at,
+                           trade id, execution response)
 
         The function will fetch the most recent price and
         will execute a trade with the given values.
@@ -66,6 +70,9 @@ class FPGTrader:
         completed = False
         logger.info(f"Trading {amount} of {base_quote}, side: {side}")
         pair = base_quote
+        deadline = None
+        if timeout is not None:
+            deadline = time.monotonic() + timeout
         while not completed:
             order_price = self.fpg_connector.fetch_price(pair)
             response = self.fpg_connector.execute_trade(
@@ -76,8 +83,13 @@ class FPGTrader:
                 order_price)
             completed = response['succeeded']
             if not completed:
+                if deadline is not None and \
+                        time.monotonic() + 0.4 > deadline:
+                    raise TimeoutError(
+                        f"Order of {amount} {pair} did not "
+                        f"succeed in {timeout} seconds")
                 time.sleep(0.4)
-        return order_price, completed['trade_id']
+        return order_price, response['trade_id'], response
 
     def balance(
             self: Any,
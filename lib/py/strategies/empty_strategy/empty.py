@@ -1,19 +1,23 @@
 from typing import Any
 from lib.py.fpg.AbstractStrategies import (
-    StrategiesAbstract
+    CompactStrategy
 )
 from lib.py.fpg.utils import (
     generate_id
 )
 
 
-class EmptyStrategy(StrategiesAbstract):
+class EmptyStrategy(CompactStrategy):
+    # Add every strategy specific attribute here
+    __slots__ = ()
+
     def __init__(
             self: Any,
             current_time: Any,
             data_manager: Any,
             pair: str = None
     ) -> None:
+        super().__init__()
         # Mandatory settings:
         # General settings:
         self.data_manager = data_manager
@@ -1,9 +1,13 @@
 import datetime
+import math
 import numpy
 from typing import Any
 
 from lib.py.fpg.AbstractStrategies import (
-    StrategiesAbstract
+    CompactStrategy
+)
+from lib.py.fpg.indicators import (
+    window_moments
 )
 from lib.py.fpg.utils import (
     get_timestamp,
@@ -12,15 +16,43 @@ from lib.py.fpg.utils import (
 )
 
 
-class MeanReversion(StrategiesAbstract):
+class MeanReversion(CompactStrategy):
     """
     """
+    __slots__ = (
+        'days_back',
+        'high_band',
+        'low_band',
+        'mean_band',
+        'std',
+        'passed_high_band_counter',
+        'passed_low_band_counter'
+    )
+    # State read by refresh_batch, kept in the
+    # shared arrays of a StrategyBatch
+    batch_columns = {
+        'high_band': float,
+        'low_band': float,
+        'mean_band': float,
+        'passed_high_band_counter': numpy.int64,
+        'passed_low_band_counter': numpy.int64,
+        'live_position': bool,
+        'is_expired': bool
+    }
+
     def __init__(
             self: Any,
             current_time: Any,
             data_manager: Any,
-            pair: str = None
+            pair: str = None,
+            restoring: bool = False
      ) -> None:
+        """
+        :param restoring: bool -> True when the object is restored
+                                  from the db, initialize_restored()
+                                  is run instead of initialize()
+        """
+        super().__init__()
         # Mandatory settings:
         # General settings:
         self.data_manager = data_manager
@@ -47,7 +79,6 @@ class MeanReversion(StrategiesAbstract):
 
         # All other specific strategy related settings:
         self.days_back = 20  # For data fetching
-        self.close_df = None
         self.high_band = None
         self.low_band = None
         self.mean_band = None
@@ -56,7 +87,8 @@ class MeanReversion(StrategiesAbstract):
         self.passed_low_band_counter = 0
         # ....
         # ....
-        self.initialize()
+        if not restoring:
+            self.initialize()
 
     def create_dictionary_for_db(
             self: Any
@@ -74,25 +106,43 @@ class MeanReversion(StrategiesAbstract):
         return {
             'expiration_period': self.expiration_period,
             'is_executed': self.is_executed,
-            'exchange': self.exchange
+            'exchange': self.exchange,
+            # The bands are restored instead of fetching
+            # the data again
+            'high_band': self.high_band,
+            'low_band': self.low_band,
+            'mean_band': self.mean_band,
+            'std': self.std
         }
 
     def calculate_bands(
             self,
             since
     ) -> None:
-        self.close_df = self.data_manager.fetch_custom_ohlcv(
+        # The data frame is not kept on the object,
+        # only the bands calculated from it
+        close_df = self.data_manager.fetch_custom_ohlcv(
             exchange_id=self.exchange,  # Must
             pair=self.pair,  # Must
             exchange_open_time=self.exchange_daily_open_time,  # Must
             since=since,  # Must
             days_back=self.days_back  # Must, will return until the time of the request
         )
-        close_numpy_array = self.close_df['c'].to_numpy()
-        self.std = numpy.nanstd(close_numpy_array)
-        self.mean_band = numpy.nanmean(close_numpy_array)
-        self.high_band = self.mean_band + self.std*2
-        self.low_band = self.mean_band - self.std*2
+        close_numpy_array = close_df['c'].to_numpy()
+        # Days without a close are left out, as nanmean/ nanstd did
+        close_numpy_array = \
+            close_numpy_array[~numpy.isnan(close_numpy_array)]
+        if not len(close_numpy_array):
+            self.low_band = self.mean_band = self.high_band = math.nan
+            self.std = math.nan
+            return
+        # Bands of the whole window, summed like the
+        # first window of the rolling bands
+        total, squares = window_moments(close_numpy_array)
+        self.mean_band = total / len(close_numpy_array)
+        self.std = math.sqrt(max(squares, 0.0) / len(close_numpy_array))
+        self.low_band = self.mean_band - self.std * 2
+        self.high_band = self.mean_band + self.std * 2
 
     def print_details(
             self: Any
@@ -129,20 +179,59 @@ class MeanReversion(StrategiesAbstract):
         # Fetch current price
         self.current_price = self.data_manager.fetch_mid_price(self.pair)
         # Convert dates for fetching High Low
+        self.set_last_exchange_open_time(
+            self.data_manager.fetch_current_time())
+        data_initialization_datetime_object = \
+            self.last_exchange_open_time - \
+            datetime.timedelta(days=self.days_back)
+        # Fetch high low
+        self.calculate_bands(
+            get_timestamp(
+                data_initialization_datetime_object)
+        )
+
+    def set_last_exchange_open_time(
+            self: Any,
+            current_time: Any
+    ) -> None:
         str_date_today = self.creation_time.strftime('%Y-%m-%d')
         self.last_exchange_open_time = create_datetime_object(
             str_date_today + ' ' + self.exchange_daily_open_time)
         # not available in backtesting
-        if self.data_manager.fetch_current_time() - self.last_exchange_open_time < \
+        if current_time - self.last_exchange_open_time < \
                 datetime.timedelta(seconds=-1):
             self.last_exchange_open_time -= datetime.timedelta(days=1)
-        data_initialization_datetime_object = \
+
+    def initialize_restored(
+            self: Any
+    ) -> bool:
+        """
+        Initializes an object restored from the db, after its
+        old values were set, without fetching any data.
+        The session is derived from the creation time and
+        the days passed.
+        :return: bool -> True if the bands were not saved and
+                         warm_up() must run before the first refresh
+        """
+        self.set_last_exchange_open_time(self.creation_time)
+        self.last_exchange_open_time += \
+            datetime.timedelta(days=self.days_passed)
+        return self.mean_band is None
+
+    def warm_up(
+            self: Any
+    ) -> None:
+        """
+        Calculates the bands of a restored object
+        :return: None
+        """
+        creation_exchange_open_time = \
             self.last_exchange_open_time - \
-            datetime.timedelta(days=self.days_back)
-        # Fetch high low
+            datetime.timedelta(days=self.days_passed)
         self.calculate_bands(
             get_timestamp(
-                data_initialization_datetime_object)
+                creation_exchange_open_time -
+                datetime.timedelta(days=self.days_back))
         )
 
     def check_execution(
@@ -201,19 +290,149 @@ class MeanReversion(StrategiesAbstract):
             self.passed_high_band_counter = 0
         return execution_list
 
+    @classmethod
+    def refresh_batch(
+            cls: Any,
+            batch: Any
+    ) -> dict:
+        """
+        Same as refresh() followed by check_execution() for
+        every timer driven object of the batch, evaluated on
+        the batch columns at once. Only the objects that
+        execute are touched one by one.
+        :param batch: StrategyBatch -> batch of MeanReversion objects
+                                      with the current prices set
+        :return: dict -> row: execution list, for the rows
+                         that have to execute
+        """
+        alive = batch.alive_rows()
+        price = batch.column('current_price')
+        mean_band = batch.column('mean_band')
+        live_position = batch.column('live_position')
+        is_expired = batch.column('is_expired')
+        high_counter = batch.column('passed_high_band_counter')
+        low_counter = batch.column('passed_low_band_counter')
+
+        # Expired with an open position -> exit
+        expired_exit = alive & is_expired & live_position
+        running = alive & ~is_expired
+        # Position reached the mean -> exit
+        mean_exit = running & live_position & \
+            (mean_band - 20 <= price) & (price <= mean_band + 20)
+        waiting = running & ~live_position
+        above = waiting & (price >= batch.column('high_band'))
+        below = waiting & ~above & (price <= batch.column('low_band'))
+        inside = waiting & ~above & ~below
+        high_counter[above] += 1
+        low_counter[below] += 1
+        high_counter[inside] = 0
+        low_counter[inside] = 0
+        enter_short = above & (high_counter >= 60)
+        enter_long = below & (low_counter >= 60)
+
+        responses = {}
+        for row in numpy.flatnonzero(expired_exit):
+            strategy_object = batch.objects[row]
+            responses[row] = [{
+                'pair': strategy_object.pair,
+                'amount': strategy_object.amount,
+                'type': strategy_object.strategy_position,
+                'action': 'exit'
+            }]
+            live_position[row] = False
+            strategy_object.strategy_position = None
+        for row in numpy.flatnonzero(mean_exit):
+            strategy_object = batch.objects[row]
+            responses[row] = [{
+                'amount': strategy_object.amount,
+                'type': strategy_object.strategy_position,
+                'pair': strategy_object.pair,
+                'action': 'exit'
+            }]
+            live_position[row] = False
+            is_expired[row] = True
+            strategy_object.strategy_position = None
+        for position, rows in (('short', numpy.flatnonzero(enter_short)),
+                               ('long', numpy.flatnonzero(enter_long))):
+            for row in rows:
+                strategy_object = batch.objects[row]
+                strategy_object.strategy_position = position
+                responses[row] = [{
+                    'amount': None,
+                    'type': position,
+                    'stop_price': strategy_object.mean_band,
+                    'pair': strategy_object.pair,
+                    'action': 'enter'
+                }]
+                live_position[row] = True
+        return responses
+
+    def next_timer_time(
+            self: Any
+    ) -> Any:
+        """
+        Registered with the portfolio's timer service.
+        :return: datetime object -> time of the next exchange
+                 session rollover (two minutes before the next open)
+        """
+        return self.last_exchange_open_time + \
+            datetime.timedelta(days=1) - \
+            datetime.timedelta(minutes=2)
+
+    def on_timer(
+            self: Any,
+            current_time: Any
+    ) -> None:
+        """
+        Called by the portfolio's timer service once
+        the next session rollover is due
+        :param current_time: datetime object -> current time
+        :return: None
+        """
+        self.last_price_fetch_time = current_time
+        self.roll_exchange_session()
+
+    def roll_exchange_session(
+            self: Any
+    ) -> None:
+        self.days_passed += 1
+        self.last_exchange_open_time += datetime.timedelta(days=1)
+        if self.days_passed == \
+                self.expiration_period \
+                or not self.live_position:
+            self.is_expired = True
+
+    def trigger_levels(
+            self: Any
+    ) -> tuple or None:
+        """
+        Price levels the object waits for, used by the portfolio's
+        price trigger index. Until the price reaches one of them,
+        refresh() would only update the current price.
+        :return: tuple -> (lower, upper), None if unbounded, or None
+                          if the object has to refresh every tick
+        """
+        if self.is_expired or self.mean_band is None:
+            return None
+        if self.live_position:
+            # Waiting for the price to revert to the mean
+            if self.current_price < self.mean_band - 20:
+                return None, self.mean_band - 20
+            if self.current_price > self.mean_band + 20:
+                return self.mean_band + 20, None
+            return None
+        # Counting the ticks outside of the bands
+        if self.passed_high_band_counter or self.passed_low_band_counter:
+            return None
+        if self.low_band < self.current_price < self.high_band:
+            return self.low_band, self.high_band
+        return None
+
     def check_if_expired(
             self: Any
     ) -> None:
-        if self.last_price_fetch_time + \
-                datetime.timedelta(minutes=2) - \
-                self.last_exchange_open_time >= \
-                datetime.timedelta(days=1):
-            self.days_passed += 1
-            self.last_exchange_open_time += datetime.timedelta(days=1)
-            if self.days_passed == \
-                    self.expiration_period \
-                    or not self.live_position:
-                self.is_expired = True
+        if self.last_price_fetch_time >= self.next_timer_time():
+            self.roll_exchange_session()
 
     def refresh(
             self: Any
@@ -243,8 +462,11 @@ class MeanReversion(StrategiesAbstract):
         # Fetching current price
         self.last_price_fetch_time = self.data_manager.fetch_current_time()
         self.current_price = self.data_manager.fetch_mid_price(self.pair)
-        # Checking if object has reached expiration
-        self.check_if_expired()
+        # Checking if object has reached expiration, when the
+        # portfolio's timer service drives the object this
+        # was already done once the session rollover was due
+        if not self.timer_driven:
+            self.check_if_expired()
         if self.is_expired:
             # Is expired = True
             # Checking if the object has open an position
@@ -252,7 +474,7 @@ class MeanReversion(StrategiesAbstract):
                 execution_dict = {
                     'pair': self.pair,
                     'amount': self.amount,
-                    'type': self.position,
+                    'type': self.strategy_position,
                     'action': 'exit'
                 }
                 self.live_position = False
@@ -3,7 +3,6 @@ Method that will contain all of the different strategy
 objects, and will tick based on the given time
 """
 
-from datetime import timedelta
 from typing import Any
 
 from lib.py.fpg.logger import (
@@ -12,9 +11,6 @@ from lib.py.fpg.logger import (
 from lib.py.fpg.portfolio_parent import (
     Portfolio
 )
-from lib.py.strategies.mean_reversion.mean_reversion import (
-    MeanReversion
-)
 logger = get_module_logger('portfolio')
 
 
@@ -34,6 +30,29 @@ class PortfolioManager(Portfolio):
         self.max_amount_traded = None
         self.risk_percentage = None
         self.leverage = 3  # Enter x leverage
+        # Refresh the objects of strategies that implement
+        # refresh_batch() together, from shared arrays
+        self.batch_refresh = False
+        # Objects waiting for the price to reach their levels
+        # are only refreshed once it does (or on their timers)
+        self.price_triggers = True
+        # Poll the pairs without a position or objects close
+        # to acting less often (Constants.polling_intervals)
+        self.adaptive_polling = True
+        # New objects initialized concurrently in live trading
+        self.creation_workers = 8
+        # Seconds the cached account balance is used before
+        # it is read from FPG's endpoint again
+        self.balance_reconcile_seconds = 60.0
+        # Net the live orders of one tick per pair and send
+        # them together, retrying each for up to order_timeout
+        self.order_netting = True
+        self.order_timeout = 10.0
+        # Seconds one object's refresh may take, objects that
+        # overrun it 3 times in a row refresh on a worker
+        self.refresh_budget = 0.1
+        # strategy name -> seconds all of its objects may take
+        self.strategy_refresh_budgets = {}
         self.mandatory_fields = [
             'strategy_id',
             'strategy_name',
@@ -46,43 +65,12 @@ class PortfolioManager(Portfolio):
             'days_passed',
             'is_leverage'
         ]
-        # Strategy dictionary - will store strategy options
-        # keep on adding options
-        self.strategy_dictionary = {
-            'Example':
-                {
-                    'object': 'SAMPLE',
-                    'last_object_created_time': None,
-                    'active': True,
-                    'creation_interval': timedelta(days=1),
-                    'pairs': ['BTC/USD'],
-                    'advanced_settings': True,
-                    'short': {
-                        'max_short_per_pair': 1,
-                        'current_short': {
-                            'BTC/USD': 0,
-                            'ETH/BTC': 0
-                        }
-                    },
-                    'long': {
-                        'max_long_per_pair': 1,
-                        'current_long': {
-                            'BTC/USD': 0,
-                            'ETH/BTC': 0
-                        }
-                    }
-                },
-            'MeanReversion':
-                {
-                    'object': MeanReversion,
-                    'last_object_created_time': None,
-                    'active': True,
-                    'creation_interval': timedelta(days=1),
-                    'pairs': ['BTC/USD', 'ETH/USD'],
-                    'advanced_settings': False
-                }
-
-        }
+        # Strategy dictionary - will store strategy options,
+        # from the strategy.json of every strategy package
+        # (see strategy_registry.py), only the active
+        # strategies are imported
+        self.strategy_dictionary = \
+            self.strategy_registry.strategy_dictionary()
         self.add_pairs_to_coins_portfolio()
 
     def tick(
@@ -99,26 +87,23 @@ class PortfolioManager(Portfolio):
         logger.info("started fetching price and looping through strategies")
         # Fetch the current time and price
         self.current_time = self.data_manager.fetch_current_time()
-        # Check if one of our strategies needs a
-        # new object based on exchange open time
-        # and interval
-        self.check_for_new_object_creation()
-        # Combining all of the strategies that we need to check
-        expired_strategies = set()
-        # If we are in backtesting mode:
-        # Looping through our strategies
-        for strategy_id, strategy_object in \
-                self.active_strategy_objects.items():
-            # Refreshing the objects
-            response = strategy_object.refresh()
-            # If we got some response
-            if response:
-                self.parse_response_and_execute(response, strategy_object)
-                self.database.update_strategy(strategy_object)
-            if strategy_object.is_expired:
-                expired_strategies.add(strategy_id)
-        for object_id in expired_strategies:
-            del self.active_strategy_objects[object_id]
+        self.data_manager.start_tick()
+        # Retry the failed pairs and endpoints in the background
+        if self.circuit_breakers is not None:
+            self.circuit_breakers.recover()
+        # Run the timers that are due: new objects based on
+        # exchange open time and interval, object session
+        # rollovers and expirations
+        self.run_due_timers()
+        # Refreshing the objects, the batched objects
+        # with one vectorized call per strategy class
+        responses, expired_strategies = self.refresh_strategy_objects()
+        self.execute_responses(responses)
+        for strategy_object in expired_strategies:
+            # An exit that was not executed keeps the object active
+            if not strategy_object.live_position:
+                self.remove_active_strategy_object(
+                    strategy_object.strategy_id)
         if self.backtesting_mode:
             self.data_manager.current_index += 1
 
@@ -131,6 +116,10 @@ class PortfolioManager(Portfolio):
         :return: None
         """
         print("Initializing active strategies")
+        if not self.backtesting_mode:
+            # The prices stored by earlier sessions are
+            # available to the objects from their creation
+            self.data_manager.seed_price_history(self.pairs)
         self.check_for_new_object_creation(True)
         if self.backtesting_mode:
             self.data_manager.current_index += 1
@@ -0,0 +1,158 @@
+"""
+Runs several live portfolios in one process, e.g. one per
+sub account or strategy book. Every portfolio keeps its own trader
+(keys), strategy dictionary, balance and database tables, they
+share one MarketData: a price is requested once per tick and an
+ohlcv once per cache period, whatever the number of portfolios.
+"""
+import threading
+import time
+from typing import Any
+
+from lib.py.fpg.circuit_breaker import (
+    get_circuit_breakers
+)
+from lib.py.fpg.data_manager.market_data import (
+    MarketData
+)
+from lib.py.fpg.database import (
+    Database
+)
+from lib.py.fpg.fpg_library import (
+    FPGConnector
+)
+from lib.py.fpg.logger import (
+    get_module_logger
+)
+from user_managment.portfolio import (
+    PortfolioManager
+)
+logger = get_module_logger('portfolio')
+
+
+class PortfolioHost:
+    def __init__(
+            self: Any,
+            market_data: Any = None,
+            tick_time: float = 0.95
+    ) -> None:
+        """
+        :param market_data: MarketData of the portfolios, None makes
+                            one with the keys of the first portfolio
+        :param tick_time: float -> seconds between the ticks
+        """
+        self.market_data = market_data
+        self.tick_time = tick_time
+        # name -> PortfolioManager
+        self.portfolios = {}
+        # name -> CircuitBreaker of the portfolio's ticks
+        self.tick_breakers = {}
+        self.Trade = False
+        self.ticking = None
+
+    def add_portfolio(
+            self: Any,
+            name: str,
+            trader: Any,
+            portfolio: Any = None
+    ) -> Any:
+        """
+        Sets up a portfolio for live trading on the shared market data
+        :param name: str -> unique name, the portfolio's tables in the
+                            database are named after it
+        :param trader: FPGTrader -> trader of the portfolio's account
+        :param portfolio: PortfolioManager -> with its strategy
+                                              dictionary and preferences
+                                              set, None for the default
+        :return: PortfolioManager -> the hosted portfolio
+        """
+        if name in self.portfolios:
+            raise ValueError(f'Portfolio {name} is already hosted')
+        if self.market_data is None:
+            self.market_data = MarketData(
+                FPGConnector(trader.public_key, trader.private_key),
+                Database())
+        if portfolio is None:
+            portfolio = PortfolioManager()
+        portfolio.database_name = name
+        portfolio.setup_live_trading(trader, self.market_data)
+        self.portfolios[name] = portfolio
+        self.tick_breakers[name] = get_circuit_breakers().get(
+            f'tick {name}', failure_threshold=1)
+        logger.info(f'hosting portfolio {name}')
+        return portfolio
+
+    def initialize_trading(
+            self: Any
+    ) -> None:
+        """
+        Restores/ creates the objects of every portfolio
+        :return: None
+        """
+        for portfolio in self.portfolios.values():
+            portfolio.initialize_trading()
+
+    def tick(
+            self: Any
+    ) -> list:
+        """
+        Ticks every portfolio on the prices of one market data
+        tick, a failing portfolio doesn't stop the others
+        :return: list -> names of the portfolios whose tick failed
+                         or was skipped
+        """
+        self.market_data.start_tick()
+        return [
+            name for name, portfolio in self.portfolios.items()
+            if not portfolio.guarded_tick(self.tick_breakers[name])
+        ]
+
+    def ticking_thread(
+            self: Any
+    ) -> None:
+        """
+        Ticks until stop() is called
+        :return: None
+        """
+        while self.Trade:
+            self.tick()
+            time.sleep(self.tick_time)
+        print("shutting portfolio host")
+
+    def start(
+            self: Any
+    ) -> None:
+        self.Trade = True
+        self.ticking = threading.Thread(target=self.ticking_thread)
+        self.ticking.start()
+
+    def stop(
+            self: Any
+    ) -> None:
+        self.Trade = False
+        for portfolio in self.portfolios.values():
+            portfolio.Trade = False
+        if self.ticking is not None:
+            self.ticking.join()
+            self.ticking = None
+        for portfolio in self.portfolios.values():
+            portfolio.event_bus.flush()
+
+    def metrics(
+            self: Any
+    ) -> dict:
+        """
+        :return: dict -> pairs traded, requests of the shared market
+                         data and active objects per portfolio
+        """
+        pairs = set()
+        for portfolio in self.portfolios.values():
+            pairs.update(portfolio.pairs)
+        return {
+            'pairs': len(pairs),
+            'market_data': self.market_data.metrics(),
+            'active_objects': {
+                name: len(portfolio.active_strategy_objects)
+                for name, portfolio in self.portfolios.items()
+            }
+        }
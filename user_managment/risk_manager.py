@@ -31,7 +31,7 @@ class RiskManager:
             split_pair = pair.split("/")
             quote = split_pair[1]
         if current_aum is None:
-            current_aum = self.data_manager.fetch_balance([quote])
+            current_aum = self.data_manager.fetch_balance([quote])[quote]
         else:
             current_aum = current_aum[quote]
         quote_amount_at_risk = abs(current_aum) * self.percentage_of_aum